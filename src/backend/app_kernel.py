@@ -6,6 +6,7 @@ from contextlib import asynccontextmanager
 
 from azure.monitor.opentelemetry import configure_azure_monitor
 from common.config.app_config import config
+from common.database.database_factory import DatabaseFactory
 from common.models.messages_kernel import UserLanguage
 
 # FastAPI imports
@@ -20,6 +21,7 @@ from v3.api.router import app_v3
 
 # Semantic Kernel imports
 from v3.config.agent_registry import agent_registry
+from v3.config.settings import team_config
 
 
 @asynccontextmanager
@@ -29,6 +31,16 @@ async def lifespan(app: FastAPI):
 
     # Startup
     logger.info("🚀 Starting MACAE application...")
+    if config.CACHE_COHERENCE_ENABLED:
+        try:
+            await DatabaseFactory.start_cache_coherence(team_config.handle_change)
+        except Exception as e:
+            logger.error(f"❌ Could not start change feed cache coherence: {e}")
+    if config.ARCHIVE_ENABLED:
+        try:
+            await DatabaseFactory.start_archiver()
+        except Exception as e:
+            logger.error(f"❌ Could not start plan archiving: {e}")
     yield
 
     # Shutdown
@@ -43,6 +55,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Error during shutdown cleanup: {e}")
 
+    try:
+        # Flush any buffered database writes before the connections are closed
+        await DatabaseFactory.close_all()
+        logger.info("✅ Database connections flushed and closed")
+    except Exception as e:
+        logger.error(f"❌ Error closing database connections: {e}")
+
     logger.info("👋 MACAE application shutdown complete")
 
 
@@ -0,0 +1,126 @@
+"""Benchmark data layer throughput of the Cosmos DB and SQLite backends.
+
+Drives the same mixed workload through each selected backend: concurrent users
+create plans, append agent messages, read plans back by id and list a page of
+their plan history. Cosmos DB uses the account configured in the environment
+(.env); SQLite uses a throwaway database file.
+
+Usage (from src/backend):
+    python -m benchmarks.backend_throughput_benchmark --backends sqlite cosmosdb \
+        --users 20 --plans 10 --messages 5
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from common.database.database_factory import DatabaseFactory
+from common.database.sqlite_db import SQLiteDBClient
+from common.models.messages_kernel import AgentMessageData, Plan, PlanStatus
+
+from benchmarks.bench_utils import OperationStats, print_report
+
+
+async def _user_workload(database, plans: int, messages: int, stats) -> None:
+    write_plan, write_message, read_plan, list_page = stats
+    team_id = str(uuid.uuid4())
+    plan_ids = []
+    for _ in range(plans):
+        plan_id = str(uuid.uuid4())
+        plan = Plan(
+            id=plan_id,
+            plan_id=plan_id,
+            session_id=str(uuid.uuid4()),
+            user_id=database.user_id,
+            team_id=team_id,
+            initial_goal="benchmark plan",
+            overall_status=PlanStatus.completed,
+        )
+        with write_plan.measure():
+            await database.add_plan(plan)
+        plan_ids.append(plan_id)
+
+        for index in range(messages):
+            message = AgentMessageData(
+                plan_id=plan_id,
+                session_id=plan.session_id,
+                user_id=database.user_id,
+                agent="BenchmarkAgent",
+                content=f"message {index}",
+                raw_data="{}",
+            )
+            with write_message.measure():
+                await database.add_agent_message(message)
+
+    for plan_id in plan_ids:
+        with read_plan.measure():
+            await database.get_plan_by_plan_id(plan_id)
+        with list_page.measure():
+            await database.get_plans_page_by_team_id_status(
+                database.user_id, team_id, PlanStatus.completed, 20
+            )
+
+    for plan_id in plan_ids:
+        await database.delete_plan_by_plan_id(plan_id)
+
+
+async def _run_backend(name: str, root, users: int, plans: int, messages: int) -> None:
+    stats = [
+        OperationStats(f"{name}: add_plan"),
+        OperationStats(f"{name}: add_agent_message"),
+        OperationStats(f"{name}: get_plan_by_plan_id"),
+        OperationStats(f"{name}: plans page"),
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _user_workload(
+                root.for_user(f"benchmark-{uuid.uuid4()}"), plans, messages, stats
+            )
+            for _ in range(users)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    operations = sum(len(item.latencies_ms) for item in stats)
+    print_report(
+        f"{name} ({users} users x {plans} plans x {messages} messages)", stats
+    )
+    print(f"{name:<40} {operations / elapsed:.1f} operations/s")
+
+
+async def run(backends, users: int, plans: int, messages: int) -> None:
+    for backend in backends:
+        if backend == "sqlite":
+            with tempfile.TemporaryDirectory() as directory:
+                path = Path(directory) / "bench.db"
+                root = SQLiteDBClient(database_path=str(path))
+                await root.initialize()
+                try:
+                    await _run_backend("sqlite", root, users, plans, messages)
+                finally:
+                    await root.close()
+        else:
+            root = await DatabaseFactory.get_database(force_new=True)
+            try:
+                await _run_backend("cosmosdb", root, users, plans, messages)
+            finally:
+                await root.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--backends", nargs="+", choices=["sqlite", "cosmosdb"], default=["sqlite"]
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--plans", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.backends, args.users, args.plans, args.messages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Shared helpers for the data layer benchmarks."""
+
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class OperationStats:
+    """Collects latency and request-charge samples for one benchmarked operation."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies_ms: List[float] = []
+        self.request_charges: List[float] = []
+
+    @contextmanager
+    def measure(self):
+        """Time the wrapped block and record the elapsed milliseconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    def add_charge(self, charge: float) -> None:
+        self.request_charges.append(charge)
+
+    def summary(self) -> Dict[str, float]:
+        """Return p50/p95/mean latency and mean request charge."""
+        if not self.latencies_ms:
+            return {"count": 0}
+        ordered = sorted(self.latencies_ms)
+        p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+        result = {
+            "count": len(ordered),
+            "p50_ms": round(statistics.median(ordered), 2),
+            "p95_ms": round(ordered[p95_index], 2),
+            "mean_ms": round(statistics.fmean(ordered), 2),
+        }
+        if self.request_charges:
+            result["mean_ru"] = round(statistics.fmean(self.request_charges), 2)
+            result["total_ru"] = round(sum(self.request_charges), 2)
+        return result
+
+
+def last_request_charge(container) -> float:
+    """Read the request charge of the last operation made through a container proxy."""
+    headers = getattr(container.client_connection, "last_response_headers", None) or {}
+    try:
+        return float(headers.get("x-ms-request-charge", 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def print_report(title: str, stats: List[OperationStats]) -> None:
+    """Print a small aligned table of benchmark results."""
+    print(f"\n=== {title} ===")
+    for item in stats:
+        summary = item.summary()
+        fields = ", ".join(f"{key}={value}" for key, value in summary.items())
+        print(f"{item.name:<40} {fields}")
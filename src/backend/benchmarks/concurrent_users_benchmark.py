@@ -0,0 +1,91 @@
+"""Benchmark many distinct users hitting the database concurrently.
+
+Runs against the Cosmos DB account configured in the environment (.env) and
+compares two ways of obtaining a per-user database handle for every request:
+
+* ``force_new=True``: a standalone CosmosClient per request (own connection
+  pool and TLS handshakes), closed after the request
+* the default: a user-scoped view of the factory's shared client
+
+Each simulated request reads the user's plans and the team list. Connection
+pool limits come from COSMOSDB_CONNECTION_LIMIT / COSMOSDB_CONNECTION_LIMIT_PER_HOST.
+
+Usage (from src/backend):
+    python -m benchmarks.concurrent_users_benchmark --users 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from common.config.app_config import config
+from common.database.database_factory import DatabaseFactory
+
+from benchmarks.bench_utils import OperationStats, print_report
+
+
+async def _request(user_id: str, force_new: bool, stats: OperationStats) -> None:
+    with stats.measure():
+        database = await DatabaseFactory.get_database(
+            user_id=user_id, force_new=force_new
+        )
+        try:
+            await database.get_all_plans()
+            await database.get_all_teams()
+        finally:
+            await database.close()
+
+
+async def _run_mode(
+    name: str, force_new: bool, users: list, concurrency: int
+) -> OperationStats:
+    stats = OperationStats(name)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(user_id: str) -> None:
+        async with semaphore:
+            await _request(user_id, force_new, stats)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(user_id) for user_id in users))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {len(users) / elapsed:.1f} requests/s")
+    return stats
+
+
+async def run(user_count: int, concurrency: int) -> None:
+    users = [f"benchmark-{uuid.uuid4()}" for _ in range(user_count)]
+    print(
+        f"connection_limit={config.COSMOSDB_CONNECTION_LIMIT}, "
+        f"limit_per_host={config.COSMOSDB_CONNECTION_LIMIT_PER_HOST}"
+    )
+
+    try:
+        standalone = await _run_mode(
+            "client per request (force_new)", True, users, concurrency
+        )
+        # Warm the shared client so the first request does not pay for its setup
+        await DatabaseFactory.get_database()
+        shared = await _run_mode(
+            "shared client, per-user views", False, users, concurrency
+        )
+    finally:
+        await DatabaseFactory.close_all()
+
+    print_report(
+        f"Concurrent users ({user_count} users, concurrency {concurrency})",
+        [standalone, shared],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Compare the stored size and modeled RU of agent messages with and without the codec.
+
+Runs offline against an in-memory container. Writes the messages of a number of
+plans the way the orchestration stores them (``raw_data`` is the JSON of the
+whole agent response, repeating the content as ``content`` and
+``streaming_message``), then opens every plan with ``get_agent_messages``.
+Reports the stored bytes, the RU of the writes and of the reads, and the time
+spent writing and reading (encoding and decoding included), for each codec
+setting.
+
+Usage (from src/backend):
+    python -m benchmarks.message_codec_benchmark --plans 20 --messages 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import asdict
+
+from common.database.in_memory_cosmos import InMemoryContainer, InMemoryDBClient
+from common.database.message_codec import MessageCodec
+from common.models.messages_kernel import AgentMessageData
+from v3.models.messages import AgentMessageResponse, AgentMessageType
+
+WORDS = (
+    "the plan step agent onboarding account review report customer order "
+    "analysis summary request approve policy update team result data"
+).split()
+
+
+def _content(rng: random.Random) -> str:
+    # Mostly short replies with some long, markdown-like answers
+    words = rng.choice([40, 80, 150, 600, 1500])
+    lines = []
+    for start in range(0, words, 15):
+        line = " ".join(rng.choice(WORDS) for _ in range(min(15, words - start)))
+        lines.append(f"- {line}.")
+    return "\n".join(lines)
+
+
+def _message(rng: random.Random, plan_id: str) -> AgentMessageData:
+    content = _content(rng)
+    response = AgentMessageResponse(
+        plan_id=plan_id,
+        agent="AnalystAgent",
+        content=content,
+        agent_type=AgentMessageType.AI_AGENT,
+        is_final=True,
+        streaming_message=content,
+    )
+    return AgentMessageData(
+        plan_id=plan_id,
+        user_id="user-1",
+        agent="AnalystAgent",
+        content=content,
+        raw_data=json.dumps(asdict(response)),
+    )
+
+
+async def run(plans: int, messages: int) -> None:
+    settings = [
+        ("off", None),
+        ("dedup", MessageCodec(compression="none")),
+        ("dedup+gzip", MessageCodec(compression="gzip")),
+    ]
+    print(f"\n=== {plans} plans x {messages} agent messages ===")
+    print(
+        f"{'codec':<12} {'stored KB':>10} {'write RU':>10} {'read RU':>9} "
+        f"{'write ms':>9} {'read ms':>8}"
+    )
+    for name, codec in settings:
+        rng = random.Random(7)
+        container = InMemoryContainer()
+        database = InMemoryDBClient(container=container, message_codec=codec)
+        await database.initialize()
+        plan_ids = [f"plan-{index}" for index in range(plans)]
+        batches = [
+            [_message(rng, plan_id) for _ in range(messages)] for plan_id in plan_ids
+        ]
+
+        started = time.perf_counter()
+        for batch in batches:
+            for message in batch:
+                await database.add_agent_message(message)
+        write_ms = (time.perf_counter() - started) * 1000
+        stats = container.stats()
+        write_ru = stats["create_item"]["request_charge"]
+        stored = sum(
+            [
+                len(json.dumps(document))
+                async for document in database.iter_items("SELECT * FROM c", [])
+            ]
+        )
+
+        container.reset_stats()
+        started = time.perf_counter()
+        for plan_id in plan_ids:
+            await database.get_agent_messages(plan_id)
+        read_ms = (time.perf_counter() - started) * 1000
+        read_ru = container.stats()["query"]["request_charge"]
+        print(
+            f"{name:<12} {stored / 1024:>10.1f} {write_ru:>10.1f} {read_ru:>9.1f} "
+            f"{write_ms:>9.1f} {read_ms:>8.1f}"
+        )
+        await database.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.plans, args.messages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Compare the modeled RU cost of the session and hierarchical partition layouts.
+
+Runs offline: seeds an in-memory container in the session layout, copies it into
+a hierarchical (user, then plan) container with ``ContainerMigration``, verifies
+the copy, then calls each data access method against both layouts and reports
+the modeled RU charge per call before and after. Composite indexes are not
+modeled; the savings come from queries that are routed to the partitions of one
+user, plan or the team catalog instead of fanning out to every physical
+partition.
+
+Usage (from src/backend):
+    python -m benchmarks.partition_layout_benchmark --users 20 --plans 10 \
+        --messages 10 --physical-partitions 8
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.query_cost_benchmark import seed_workload
+from common.database.in_memory_cosmos import InMemoryContainer, InMemoryDBClient
+from common.database.migration import ContainerMigration
+from common.database.partition_layout import (
+    HIERARCHICAL_LAYOUT,
+    HierarchicalPartitionLayout,
+)
+from common.models.messages_kernel import PlanStatus
+
+
+async def _charge(container: InMemoryContainer, call) -> float:
+    container.reset_stats()
+    await call()
+    return container.total_request_charge
+
+
+async def run(users: int, plans: int, messages: int, physical_partitions: int):
+    source = InMemoryContainer(physical_partitions=physical_partitions)
+    # Disable the team cache so every call reaches the container
+    before = InMemoryDBClient(container=source, team_cache_max_entries=0)
+    await before.initialize()
+    team, user, plan = await seed_workload(before, users, plans, messages)
+
+    layout = HierarchicalPartitionLayout()
+    target = InMemoryContainer(
+        container_id="memory_v2",
+        partition_key_path=list(layout.paths),
+        physical_partitions=physical_partitions,
+    )
+    migration = ContainerMigration(source, target, layout)
+    checkpoint = await migration.copy()
+    report = await migration.verify()
+    print(
+        f"\n=== Migration ({users} users x {plans} plans x {messages} messages, "
+        f"{physical_partitions} physical partitions) ==="
+    )
+    print(
+        f"copied {checkpoint.copied} documents, skipped {checkpoint.skipped} plan "
+        f"locators, {checkpoint.request_charge:.0f} RU"
+    )
+    print(
+        f"verified {report.checked} documents, {report.request_charge:.0f} RU: "
+        f"{'ok' if report.ok else 'MISMATCH'}"
+    )
+
+    after = InMemoryDBClient(
+        container=target, team_cache_max_entries=0, partition_layout=HIERARCHICAL_LAYOUT
+    )
+    await after.initialize()
+    views = {source: user, target: after.for_user(user.user_id)}
+
+    async def cold_plan_read(view):
+        view._forget_plan_partition(plan.id)
+        await view.get_plan_by_plan_id(plan.id)
+
+    operations = [
+        ("get_plan_by_plan_id (cold)", cold_plan_read),
+        (
+            "get_all_plans_by_team_id_status",
+            lambda view: view.get_all_plans_by_team_id_status(
+                user.user_id, team.team_id, PlanStatus.completed
+            ),
+        ),
+        (
+            "get_plans_page_by_team_id_status (20)",
+            lambda view: view.get_plans_page_by_team_id_status(
+                user.user_id, team.team_id, PlanStatus.completed, 20
+            ),
+        ),
+        ("get_all_plans", lambda view: view.get_all_plans()),
+        ("get_agent_messages", lambda view: view.get_agent_messages(plan.id)),
+        ("get_steps_by_plan", lambda view: view.get_steps_by_plan(plan.id)),
+        ("get_team", lambda view: view.get_team(team.team_id)),
+        ("get_all_teams", lambda view: view.get_all_teams()),
+        ("get_team_summaries", lambda view: view.get_team_summaries()),
+        ("get_current_team", lambda view: view.get_current_team(user.user_id)),
+    ]
+
+    print("\n=== Modeled RU per call ===")
+    print(f"{'operation':<40} {'session':>9} {'hierarchical':>13} {'change':>8}")
+    total_before, total_after = 0.0, 0.0
+    for name, call in operations:
+        cost_before = await _charge(source, lambda: call(views[source]))
+        cost_after = await _charge(target, lambda: call(views[target]))
+        total_before += cost_before
+        total_after += cost_after
+        change = (cost_after - cost_before) / cost_before * 100 if cost_before else 0
+        print(f"{name:<40} {cost_before:>9.2f} {cost_after:>13.2f} {change:>7.0f}%")
+    change = (total_after - total_before) / total_before * 100
+    print(f"{'total':<40} {total_before:>9.2f} {total_after:>13.2f} {change:>7.0f}%")
+    await before.close()
+    await after.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--plans", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--physical-partitions", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.plans, args.messages, args.physical_partitions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare opening a plan with sequential reads and with the concurrent plan bundle.
+
+Runs offline against in-memory containers that sleep for the modeled latency of
+every operation. ``GET /plan`` used to read the plan, then its team, then its
+agent messages; ``get_plan_bundle`` reads the messages while the plan and then
+the team are read. Each round opens every seeded plan once per strategy, with a
+cold plan partition cache (the first request for a plan after a restart) and a
+warm one. The team cache is enabled, as in the application.
+
+Usage (from src/backend):
+    python -m benchmarks.plan_bundle_benchmark --plans 20 --messages 20 --rounds 3
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.bench_utils import OperationStats, print_report
+from benchmarks.query_cost_benchmark import seed_workload
+from common.database.in_memory_cosmos import (
+    InMemoryContainer,
+    InMemoryDBClient,
+    LatencyModel,
+)
+from common.database.partition_layout import (
+    HIERARCHICAL_LAYOUT,
+    SESSION_LAYOUT,
+    HierarchicalPartitionLayout,
+)
+
+
+async def _sequential(view, plan_id: str) -> None:
+    plan = await view.get_plan_by_plan_id(plan_id)
+    await view.get_team_by_id(plan.team_id)
+    await view.get_agent_messages(plan.plan_id)
+
+
+async def _bundle(view, plan_id: str) -> None:
+    await view.get_plan_bundle(plan_id)
+
+
+async def run(layout: str, plans: int, messages: int, rounds: int) -> None:
+    paths = "/session_id"
+    if layout == HIERARCHICAL_LAYOUT:
+        paths = list(HierarchicalPartitionLayout.paths)
+    container = InMemoryContainer(
+        partition_key_path=paths, latency_model=LatencyModel()
+    )
+    database = InMemoryDBClient(container=container, partition_layout=layout)
+    await database.initialize()
+    _, user, _ = await seed_workload(database, 1, plans, messages)
+    plan_ids = [plan.plan_id for plan in await user.get_all_plans()]
+    container.latency_model.simulate = True
+
+    stats = []
+    for cache in ("cold", "warm"):
+        for name, open_plan in (("sequential", _sequential), ("bundle", _bundle)):
+            operation = OperationStats(f"{name} ({cache} partition cache)")
+            for _ in range(rounds):
+                for plan_id in plan_ids:
+                    if cache == "cold":
+                        user._forget_plan_partition(plan_id)
+                    with operation.measure():
+                        await open_plan(user, plan_id)
+            stats.append(operation)
+    print_report(
+        f"Opening a plan, {layout} layout ({plans} plans x {messages} messages)",
+        stats,
+    )
+    await database.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    for layout in (SESSION_LAYOUT, HIERARCHICAL_LAYOUT):
+        asyncio.run(run(layout, args.plans, args.messages, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
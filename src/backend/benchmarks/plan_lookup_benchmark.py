@@ -0,0 +1,91 @@
+"""Benchmark plan lookups: cross-partition query vs. locator point reads.
+
+Runs against the Cosmos DB account configured in the environment (.env), seeds
+a set of throwaway plans, and compares request charge and latency of:
+
+* the legacy ``SELECT * FROM c WHERE c.id=@plan_id`` cross-partition query
+* a point read that resolves the partition key through the plan locator
+* a point read with the partition key already cached in-process
+
+Usage (from src/backend):
+    python -m benchmarks.plan_lookup_benchmark --plans 50 --rounds 5
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from common.database.database_factory import DatabaseFactory
+from common.models.messages_kernel import DataType, Plan, PlanStatus
+
+from benchmarks.bench_utils import OperationStats, last_request_charge, print_report
+
+LEGACY_QUERY = "SELECT * FROM c WHERE c.id=@plan_id AND c.data_type=@data_type"
+
+
+async def run(plan_count: int, rounds: int) -> None:
+    user_id = f"benchmark-{uuid.uuid4()}"
+    database = await DatabaseFactory.get_database(user_id=user_id, force_new=True)
+    container = database.container
+
+    plans = [
+        Plan(
+            id=plan_id,
+            plan_id=plan_id,
+            session_id=str(uuid.uuid4()),
+            user_id=user_id,
+            initial_goal="benchmark plan",
+            overall_status=PlanStatus.completed,
+        )
+        for plan_id in (str(uuid.uuid4()) for _ in range(plan_count))
+    ]
+    for plan in plans:
+        await database.add_plan(plan)
+
+    legacy = OperationStats("cross-partition query")
+    cold = OperationStats("point read via locator (cold cache)")
+    warm = OperationStats("point read (warm cache)")
+
+    try:
+        for _ in range(rounds):
+            for plan in plans:
+                parameters = [
+                    {"name": "@plan_id", "value": plan.id},
+                    {"name": "@data_type", "value": DataType.plan},
+                ]
+                with legacy.measure():
+                    items = container.query_items(
+                        query=LEGACY_QUERY, parameters=parameters
+                    )
+                    async for _item in items:
+                        pass
+                legacy.add_charge(last_request_charge(container))
+
+                database._forget_plan_partition(plan.id)
+                with cold.measure():
+                    partition_key = await database._resolve_plan_partition(plan.id)
+                    locator_charge = last_request_charge(container)
+                    await container.read_item(item=plan.id, partition_key=partition_key)
+                cold.add_charge(locator_charge + last_request_charge(container))
+
+                with warm.measure():
+                    await database.get_plan_by_plan_id(plan.id)
+                warm.add_charge(last_request_charge(container))
+    finally:
+        for plan in plans:
+            await database.delete_plan_by_plan_id(plan.id)
+        await database.close()
+
+    print_report(f"Plan lookup ({plan_count} plans x {rounds} rounds)", [legacy, cold, warm])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.plans, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
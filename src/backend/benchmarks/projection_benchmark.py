@@ -0,0 +1,182 @@
+"""Benchmark list reads: full documents vs. summary projections.
+
+Runs against the Cosmos DB account configured in the environment (.env), seeds
+a team with a set of completed plans carrying realistic ``m_plan`` and
+``streaming_message`` payloads, and compares response size, request charge and
+latency of the full ``SELECT *`` list queries against the ``PlanSummary`` /
+``TeamSummary`` projections used by ``?view=summary``.
+
+Usage (from src/backend):
+    python -m benchmarks.projection_benchmark --plans 50 --rounds 5
+"""
+
+import argparse
+import asyncio
+import json
+import uuid
+
+from common.database.database_factory import DatabaseFactory
+from common.models.messages_kernel import (
+    DataType,
+    Plan,
+    PlanStatus,
+    StartingTask,
+    TeamAgent,
+    TeamConfiguration,
+)
+
+from benchmarks.bench_utils import OperationStats, last_request_charge, print_report
+
+PLAN_FILTER = (
+    "FROM c WHERE c.team_id=@team_id AND c.data_type=@data_type "
+    "and c.user_id=@user_id and c.overall_status=@status ORDER BY c._ts DESC"
+)
+
+
+def _plan(user_id: str, team_id: str) -> Plan:
+    plan_id = str(uuid.uuid4())
+    steps = [
+        {"agent": f"Agent{index}", "action": "Investigate the request " * 20}
+        for index in range(8)
+    ]
+    return Plan(
+        id=plan_id,
+        plan_id=plan_id,
+        session_id=str(uuid.uuid4()),
+        user_id=user_id,
+        team_id=team_id,
+        initial_goal="benchmark plan",
+        overall_status=PlanStatus.completed,
+        m_plan={"steps": steps, "facts": "Known facts about the request. " * 50},
+        streaming_message="Agent output streamed to the user. " * 200,
+    )
+
+
+def _team(user_id: str) -> TeamConfiguration:
+    team_id = str(uuid.uuid4())
+    return TeamConfiguration(
+        id=team_id,
+        team_id=team_id,
+        session_id=str(uuid.uuid4()),
+        name="Benchmark team",
+        status="visible",
+        created="2025-01-01T00:00:00",
+        created_by=user_id,
+        user_id=user_id,
+        agents=[
+            TeamAgent(
+                input_key=f"agent_{index}",
+                type="ai",
+                name=f"Agent{index}",
+                deployment_name="gpt-4o",
+                icon="",
+                system_message="You are a helpful agent. " * 100,
+                description="Benchmark agent",
+            )
+            for index in range(6)
+        ],
+        starting_tasks=[
+            StartingTask(
+                id=str(index),
+                name=f"Task {index}",
+                prompt="Do the thing. " * 20,
+                created="2025-01-01T00:00:00",
+                creator=user_id,
+                logo="",
+            )
+            for index in range(4)
+        ],
+    )
+
+
+async def _read(container, query, parameters, stats: OperationStats) -> int:
+    """Run a query, drain it and return the serialized response size in bytes."""
+    with stats.measure():
+        items = [
+            item
+            async for item in container.query_items(
+                query=query, parameters=parameters, max_item_count=1000
+            )
+        ]
+    stats.add_charge(last_request_charge(container))
+    return len(json.dumps(items).encode("utf-8"))
+
+
+async def run(plan_count: int, rounds: int) -> None:
+    user_id = f"benchmark-{uuid.uuid4()}"
+    database = await DatabaseFactory.get_database(user_id=user_id, force_new=True)
+    container = database.container
+
+    team = _team(user_id)
+    await database.add_team(team)
+    plans = [_plan(user_id, team.team_id) for _ in range(plan_count)]
+    for plan in plans:
+        await database.add_plan(plan)
+
+    plan_parameters = [
+        {"name": "@user_id", "value": user_id},
+        {"name": "@team_id", "value": team.team_id},
+        {"name": "@data_type", "value": DataType.plan},
+        {"name": "@status", "value": PlanStatus.completed},
+    ]
+    team_query = "FROM c WHERE c.data_type=@data_type AND c.team_id=@team_id"
+    team_parameters = [
+        {"name": "@data_type", "value": DataType.team_config},
+        {"name": "@team_id", "value": team.team_id},
+    ]
+
+    full_plans = OperationStats("plans: SELECT *")
+    summary_plans = OperationStats("plans: PlanSummary projection")
+    full_teams = OperationStats("teams: SELECT *")
+    summary_teams = OperationStats("teams: TeamSummary projection")
+    all_stats = [full_plans, summary_plans, full_teams, summary_teams]
+    sizes = {stats.name: 0 for stats in all_stats}
+
+    try:
+        for _ in range(rounds):
+            sizes[full_plans.name] = await _read(
+                container, f"SELECT * {PLAN_FILTER}", plan_parameters, full_plans
+            )
+            sizes[summary_plans.name] = await _read(
+                container,
+                f"SELECT {database.PLAN_SUMMARY_FIELDS} {PLAN_FILTER}",
+                plan_parameters,
+                summary_plans,
+            )
+            sizes[full_teams.name] = await _read(
+                container, f"SELECT * {team_query}", team_parameters, full_teams
+            )
+            sizes[summary_teams.name] = await _read(
+                container,
+                f"SELECT {database.TEAM_SUMMARY_FIELDS} {team_query}",
+                team_parameters,
+                summary_teams,
+            )
+    finally:
+        for plan in plans:
+            await database.delete_plan_by_plan_id(plan.id)
+        await database.delete_team(team.team_id)
+        await database.close()
+
+    print_report(
+        f"List projections ({plan_count} plans x {rounds} rounds)", all_stats
+    )
+    print("\nResponse size (bytes)")
+    for name, size in sizes.items():
+        print(f"{name:<40} {size}")
+    for full, summary in ((full_plans, summary_plans), (full_teams, summary_teams)):
+        if sizes[full.name]:
+            saved = 1 - sizes[summary.name] / sizes[full.name]
+            print(f"{summary.name:<40} saves {saved:.1%} of bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.plans, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Report the modeled request-unit cost of each CosmosDBClient query pattern.
+
+Runs offline: seeds an in-memory Cosmos DB container with users, teams, plans
+and agent messages, then calls each data access method of ``CosmosDBClient``
+through ``InMemoryDBClient`` and reports the modeled RU charge, number of
+requests and server latency per call.
+
+Usage (from src/backend):
+    python -m benchmarks.query_cost_benchmark --users 20 --plans 10 \
+        --messages 10 --physical-partitions 8
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from common.database.in_memory_cosmos import InMemoryContainer, InMemoryDBClient
+from common.models.messages_kernel import (
+    AgentMessageData,
+    Plan,
+    PlanStatus,
+    TeamConfiguration,
+    UserCurrentTeam,
+)
+
+
+async def seed_workload(database, users: int, plans: int, messages: int):
+    """Add a team and users with plans and agent messages; returns a sample."""
+    team = TeamConfiguration(
+        id=str(uuid.uuid4()),
+        team_id=str(uuid.uuid4()),
+        session_id=str(uuid.uuid4()),
+        name="Benchmark team",
+        status="visible",
+        created="2025-01-01T00:00:00",
+        created_by="benchmark",
+        user_id="benchmark",
+    )
+    await database.add_team(team)
+
+    sample_user, sample_plan = None, None
+    for _ in range(users):
+        user = database.for_user(f"benchmark-{uuid.uuid4()}")
+        await user.set_current_team(
+            UserCurrentTeam(user_id=user.user_id, team_id=team.team_id)
+        )
+        for _ in range(plans):
+            plan_id = str(uuid.uuid4())
+            plan = Plan(
+                id=plan_id,
+                plan_id=plan_id,
+                session_id=str(uuid.uuid4()),
+                user_id=user.user_id,
+                team_id=team.team_id,
+                initial_goal="benchmark plan",
+                overall_status=PlanStatus.completed,
+            )
+            await user.add_plan(plan)
+            for index in range(messages):
+                await user.add_agent_message(
+                    AgentMessageData(
+                        plan_id=plan_id,
+                        session_id=plan.session_id,
+                        user_id=user.user_id,
+                        agent="BenchmarkAgent",
+                        content=f"message {index}",
+                        raw_data="{}",
+                    )
+                )
+            sample_user, sample_plan = user, plan
+    return team, sample_user, sample_plan
+
+
+async def _cost(container: InMemoryContainer, name: str, call) -> None:
+    container.reset_stats()
+    await call()
+    stats = container.stats()
+    requests = sum(item["count"] for item in stats.values())
+    charge = sum(item["request_charge"] for item in stats.values())
+    latency = sum(item["duration_ms"] for item in stats.values())
+    print(f"{name:<44} {requests:>8} {charge:>10.2f} {latency:>12.2f}")
+
+
+async def run(users: int, plans: int, messages: int, physical_partitions: int):
+    container = InMemoryContainer(physical_partitions=physical_partitions)
+    # Disable the team cache so every call reaches the container
+    database = InMemoryDBClient(container=container, team_cache_max_entries=0)
+    await database.initialize()
+    team, user, plan = await seed_workload(database, users, plans, messages)
+
+    print(
+        f"\n=== Modeled cost per call ({users} users x {plans} plans x "
+        f"{messages} messages, {physical_partitions} physical partitions) ==="
+    )
+    print(f"{'operation':<44} {'requests':>8} {'RU':>10} {'latency_ms':>12}")
+
+    async def cold_plan_read():
+        user._forget_plan_partition(plan.id)
+        await user.get_plan_by_plan_id(plan.id)
+
+    await _cost(container, "get_plan_by_plan_id (locator)", cold_plan_read)
+    await _cost(
+        container,
+        "get_plan_by_plan_id (cached partition)",
+        lambda: user.get_plan_by_plan_id(plan.id),
+    )
+    await _cost(
+        container,
+        "get_all_plans_by_team_id_status",
+        lambda: user.get_all_plans_by_team_id_status(
+            user.user_id, team.team_id, PlanStatus.completed
+        ),
+    )
+    await _cost(
+        container,
+        "get_plans_page_by_team_id_status (20)",
+        lambda: user.get_plans_page_by_team_id_status(
+            user.user_id, team.team_id, PlanStatus.completed, 20
+        ),
+    )
+    await _cost(
+        container,
+        "get_plan_summaries_by_team_id_status",
+        lambda: user.get_plan_summaries_by_team_id_status(
+            user.user_id, team.team_id, PlanStatus.completed
+        ),
+    )
+    await _cost(container, "get_all_plans", user.get_all_plans)
+    await _cost(
+        container, "get_agent_messages", lambda: user.get_agent_messages(plan.id)
+    )
+    await _cost(
+        container, "get_steps_by_plan", lambda: user.get_steps_by_plan(plan.id)
+    )
+    await _cost(container, "get_team", lambda: user.get_team(team.team_id))
+    await _cost(container, "get_all_teams", user.get_all_teams)
+    await _cost(container, "get_team_summaries", user.get_team_summaries)
+    await _cost(
+        container, "get_current_team", lambda: user.get_current_team(user.user_id)
+    )
+    await _cost(container, "get_all_items", user.get_all_items)
+    await database.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--plans", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--physical-partitions", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.plans, args.messages, args.physical_partitions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Measure the CPU time spent turning data models into document write payloads.
+
+Compares the previous path (``model_dump()``, a pass over the top-level values to
+format datetimes, then the stdlib JSON encoding the Cosmos DB SDK applies to
+request bodies) with ``serialization.to_document`` followed by the same stdlib
+encoding, and with ``serialization.encode`` (orjson when installed).
+
+Usage (from src/backend):
+    python -m benchmarks.serialization_benchmark --iterations 20000
+"""
+
+import argparse
+import datetime
+import json
+import time
+
+from common.database import serialization
+from common.models.messages_kernel import (
+    AgentMessageData,
+    Plan,
+    PlanStatus,
+    TeamAgent,
+    TeamConfiguration,
+)
+
+
+def _legacy_document(item):
+    document = item.model_dump()
+    for key, value in list(document.items()):
+        if isinstance(value, datetime.datetime):
+            document[key] = value.isoformat()
+    return document
+
+
+def _sdk_encode(document) -> bytes:
+    # What the Cosmos DB SDK does with a dict request body
+    return json.dumps(document, separators=(",", ":")).encode("utf-8")
+
+
+def _samples():
+    return {
+        "Plan": Plan(
+            plan_id="plan-1",
+            user_id="user-1",
+            team_id="team-1",
+            initial_goal="Onboard a new employee and set up their accounts",
+            overall_status=PlanStatus.in_progress,
+            m_plan={
+                "steps": [
+                    {"agent": "HRAgent", "action": f"Step {index}"}
+                    for index in range(8)
+                ]
+            },
+        ),
+        "TeamConfiguration": TeamConfiguration(
+            team_id="team-1",
+            session_id="session-1",
+            name="HR team",
+            status="visible",
+            created="2025-01-01T00:00:00",
+            created_by="user-1",
+            user_id="user-1",
+            description="Handles onboarding",
+            agents=[
+                TeamAgent(
+                    input_key=f"agent_{index}",
+                    type="ai",
+                    name=f"Agent{index}",
+                    deployment_name="gpt-4o",
+                    icon="",
+                    system_message="You are a helpful assistant. " * 10,
+                )
+                for index in range(5)
+            ],
+        ),
+        "AgentMessageData": AgentMessageData(
+            plan_id="plan-1",
+            user_id="user-1",
+            agent="HRAgent",
+            content="The account has been created. " * 20,
+            raw_data="{}",
+        ),
+    }
+
+
+def _time_us(function, item, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        function(item)
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+def run(iterations: int) -> None:
+    paths = {
+        "legacy dump + stdlib json": lambda item: _sdk_encode(_legacy_document(item)),
+        "to_document + stdlib json": lambda item: _sdk_encode(
+            serialization.to_document(item)
+        ),
+        "to_document + encode": lambda item: serialization.encode(
+            serialization.to_document(item)
+        ),
+    }
+    encoder = "orjson" if serialization.orjson is not None else "stdlib json"
+    print(f"\n=== CPU time per write ({iterations} iterations, encode={encoder}) ===")
+    print(f"{'model':<20} {'path':<28} {'us/write':>10} {'saved':>8}")
+    for name, item in _samples().items():
+        baseline = None
+        for label, function in paths.items():
+            function(item)
+            elapsed = _time_us(function, item, iterations)
+            baseline = baseline or elapsed
+            saved = (1 - elapsed / baseline) * 100
+            print(f"{name:<20} {label:<28} {elapsed:>10.2f} {saved:>7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    run(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Measure request coalescing of the reads a UI reload fires at once.
+
+Runs offline against in-memory containers that sleep for the modeled latency of
+every operation. Each simulated reload issues the reads of ``/init_team``,
+``/team_configs``, ``/plans`` and ``/plan`` concurrently for one user, and many
+users reload at the same moment. Reports the queries sent to the container and
+their modeled RU with single-flight coalescing off and on. The team cache is
+disabled so repeated team reads reach the container as they do on a cold
+replica.
+
+Usage (from src/backend):
+    python -m benchmarks.single_flight_benchmark --users 50 --plans 10
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.query_cost_benchmark import seed_workload
+from common.database.in_memory_cosmos import (
+    InMemoryContainer,
+    InMemoryDBClient,
+    LatencyModel,
+)
+
+
+async def _reload(database, user_id: str, plan_id: str) -> None:
+    view = database.for_user(user_id)
+
+    async def init_team():
+        current = await view.get_current_team(user_id)
+        await view.get_team(current.team_id)
+
+    async def team_configs():
+        await view.get_all_teams()
+
+    async def plans():
+        current = await view.get_current_team(user_id)
+        await view.get_all_plans_by_team_id_status(
+            user_id, current.team_id, "completed"
+        )
+
+    async def plan():
+        await view.get_plan_bundle(plan_id)
+
+    await asyncio.gather(init_team(), team_configs(), plans(), plan())
+
+
+async def run(users: int, plans: int) -> None:
+    print(f"\n=== {users} users reloading at once, {plans} plans each ===")
+    print(f"{'single flight':<14} {'queries':>8} {'RU':>9} {'coalesced':>10} {'ms':>8}")
+    for enabled in (False, True):
+        container = InMemoryContainer(latency_model=LatencyModel())
+        database = InMemoryDBClient(
+            container=container, team_cache_max_entries=0, single_flight_enabled=enabled
+        )
+        await database.initialize()
+        sessions = []
+        for _ in range(users):
+            _, user, plan = await seed_workload(database, 1, plans, 5)
+            sessions.append((user.user_id, plan.plan_id))
+        container.reset_stats()
+        container.latency_model.simulate = True
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(_reload(database, user_id, plan_id) for user_id, plan_id in sessions)
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        queries = container.stats()["query"]
+        print(
+            f"{'on' if enabled else 'off':<14} {queries['count']:>8.0f} "
+            f"{queries['request_charge']:>9.1f} "
+            f"{database.single_flight.coalesced:>10} {elapsed_ms:>8.1f}"
+        )
+        await database.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--plans", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.plans))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Compare peak memory of materialized and streamed query results.
+
+Seeds one plan with a large number of agent messages, then reads them back with
+``query_items`` (every validated model held in a list) and with ``iter_items``
+(one page held at a time), reporting the tracemalloc peak, the time to the
+first item and the total time of each path. Runs offline against the in-memory
+Cosmos DB container and a temporary SQLite database.
+
+Usage (from src/backend):
+    python -m benchmarks.streaming_memory_benchmark --messages 20000 \
+        --page-size 100
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from common.database.in_memory_cosmos import InMemoryDBClient
+from common.database.sqlite_db import SQLiteDBClient
+from common.models.messages_kernel import (
+    AgentMessageData,
+    DataType,
+    Plan,
+    PlanStatus,
+)
+
+QUERY = "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.data_type=@data_type"
+
+
+async def _seed(database, messages: int, content_size: int) -> str:
+    plan_id = str(uuid.uuid4())
+    session_id = str(uuid.uuid4())
+    await database.add_plan(
+        Plan(
+            id=plan_id,
+            plan_id=plan_id,
+            session_id=session_id,
+            user_id=database.user_id,
+            team_id="benchmark-team",
+            initial_goal="benchmark plan",
+            overall_status=PlanStatus.completed,
+        )
+    )
+    content = "x" * content_size
+    for index in range(messages):
+        await database.add_agent_message(
+            AgentMessageData(
+                plan_id=plan_id,
+                session_id=session_id,
+                user_id=database.user_id,
+                agent="BenchmarkAgent",
+                content=f"{index} {content}",
+                raw_data="{}",
+            )
+        )
+    await database.flush_pending_writes(plan_id)
+    return plan_id
+
+
+async def _measure(label: str, consume) -> None:
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    count, first_ms = await consume(started)
+    total_ms = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    peak_mb = (peak - baseline) / (1024 * 1024)
+    print(
+        f"{label:<34} {count:>8} {peak_mb:>10.2f} {first_ms:>12.1f} {total_ms:>10.1f}"
+    )
+
+
+async def _compare(name: str, database, messages: int, content_size: int, page_size):
+    database = database.for_user(f"benchmark-{uuid.uuid4()}")
+    plan_id = await _seed(database, messages, content_size)
+    parameters = [
+        {"name": "@plan_id", "value": plan_id},
+        {"name": "@data_type", "value": DataType.m_plan_message},
+    ]
+
+    async def materialized(started):
+        items = await database.query_items(QUERY, parameters, AgentMessageData)
+        first_ms = (time.perf_counter() - started) * 1000
+        return sum(1 for _ in items), first_ms
+
+    async def streamed(started):
+        count, first_ms = 0, 0.0
+        async for _ in database.iter_items(
+            QUERY, parameters, AgentMessageData, page_size=page_size
+        ):
+            if count == 0:
+                first_ms = (time.perf_counter() - started) * 1000
+            count += 1
+        return count, first_ms
+
+    print(f"\n=== {name}: {messages} messages, page size {page_size} ===")
+    print(f"{'path':<34} {'items':>8} {'peak MB':>10} {'first (ms)':>12} {'total':>10}")
+    await _measure("query_items (list)", materialized)
+    await _measure("iter_items (stream)", streamed)
+
+
+async def run(messages: int, content_size: int, page_size: int) -> None:
+    tracemalloc.start()
+    try:
+        memory = InMemoryDBClient(team_cache_max_entries=0, slow_operation_ms=None)
+        await memory.initialize()
+        await _compare("memory", memory, messages, content_size, page_size)
+        await memory.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            sqlite = SQLiteDBClient(database_path=os.path.join(directory, "macae.db"))
+            await sqlite.initialize()
+            await _compare("sqlite", sqlite, messages, content_size, page_size)
+            await sqlite.close()
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--content-size", type=int, default=1024)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.content_size, args.page_size))
+
+
+if __name__ == "__main__":
+    main()
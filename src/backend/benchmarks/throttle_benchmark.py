@@ -0,0 +1,92 @@
+"""Compare a burst of plan writes with and without the adaptive write limiter.
+
+Runs offline against an in-memory Cosmos DB container capped at a provisioned
+RU/s. Without the limiter every write that arrives while the RU budget is spent
+fails with 429; with it, writes queue, back off for the retry-after delay and
+the achieved throughput settles at the provisioned RU/s.
+
+Usage (from src/backend):
+    python -m benchmarks.throttle_benchmark --users 50 --writes 10 --ru 1000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from common.database.in_memory_cosmos import (
+    InMemoryContainer,
+    InMemoryDBClient,
+    LatencyModel,
+)
+from common.models.messages_kernel import Plan, PlanStatus
+
+
+async def _burst(database, users: int, writes: int):
+    succeeded, failed = 0, 0
+
+    async def user_writes(user_id):
+        nonlocal succeeded, failed
+        view = database.for_user(user_id)
+        for _ in range(writes):
+            plan_id = str(uuid.uuid4())
+            try:
+                await view.add_plan(
+                    Plan(
+                        id=plan_id,
+                        plan_id=plan_id,
+                        session_id=str(uuid.uuid4()),
+                        user_id=user_id,
+                        team_id="benchmark-team",
+                        initial_goal="benchmark plan",
+                        overall_status=PlanStatus.in_progress,
+                    )
+                )
+                succeeded += 1
+            except Exception:
+                failed += 1
+
+    await asyncio.gather(*(user_writes(f"user-{index}") for index in range(users)))
+    return succeeded, failed
+
+
+async def run(users: int, writes: int, ru_per_second: float) -> None:
+    print(f"\n=== {users} users x {writes} writes, {ru_per_second:.0f} RU/s ===")
+    print(
+        f"{'limiter':<10} {'ok':>6} {'failed':>7} {'429s':>6} {'seconds':>8} "
+        f"{'RU/s':>8} {'final limit':>12}"
+    )
+    for label, limit_max in (("off", 0), ("adaptive", 64)):
+        container = InMemoryContainer(
+            provisioned_throughput=ru_per_second,
+            latency_model=LatencyModel(simulate=True),
+        )
+        database = InMemoryDBClient(
+            container=container,
+            write_concurrency_max=limit_max,
+            slow_operation_ms=None,
+        )
+        await database.initialize()
+        started = time.perf_counter()
+        succeeded, failed = await _burst(database, users, writes)
+        elapsed = time.perf_counter() - started
+        achieved = container.total_request_charge / elapsed
+        limit = database.write_limiter.current_limit if database.write_limiter else "-"
+        print(
+            f"{label:<10} {succeeded:>6} {failed:>7} {container.throttled_requests:>6} "
+            f"{elapsed:>8.2f} {achieved:>8.0f} {limit:>12}"
+        )
+        await database.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--writes", type=int, default=10)
+    parser.add_argument("--ru", type=float, default=1000.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.writes, args.ru))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Compare the CPU time of reads with and without trusted reads.
+
+Runs offline against an in-memory container. Writes one plan with many agent
+messages and a list of completed plans through a client with trusted reads
+enabled (so the documents carry their schema version), then reads them through
+clients with trusted reads off and on that share the container. Reports the
+time spent validating the fetched documents alone and the time of
+``get_agent_messages`` and of the plan list end to end (best of --repeat runs).
+
+Usage (from src/backend):
+    python -m benchmarks.trusted_read_benchmark --messages 10000 --plans 2000
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import time
+
+from common.database.in_memory_cosmos import InMemoryContainer, InMemoryDBClient
+from common.models.messages_kernel import (
+    AgentMessageData,
+    AgentMessageType,
+    Plan,
+    PlanStatus,
+)
+
+USER_ID = "user-1"
+TEAM_ID = "team-1"
+PLAN_ID = "plan-open"
+
+
+async def _best_ms(repeat: int, operation) -> float:
+    """Fastest of repeat runs, each started after a full garbage collection."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = operation()
+        if asyncio.iscoroutine(result):
+            await result
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+async def _seed(container: InMemoryContainer, messages: int, plans: int) -> None:
+    writer = InMemoryDBClient(container=container, trusted_reads=True)
+    await writer.initialize()
+    view = writer.for_user(USER_ID)
+    await view.add_plan(
+        Plan(
+            id=PLAN_ID,
+            plan_id=PLAN_ID,
+            session_id="session-open",
+            user_id=USER_ID,
+            initial_goal="Open plan",
+            team_id=TEAM_ID,
+        )
+    )
+    for index in range(messages):
+        content = f"Step {index}: reviewed the account and updated the report."
+        await view.add_agent_message(
+            AgentMessageData(
+                plan_id=PLAN_ID,
+                session_id="session-open",
+                user_id=USER_ID,
+                agent="AnalystAgent",
+                agent_type=AgentMessageType.AI_AGENT,
+                content=content,
+                raw_data=json.dumps({"content": content, "is_final": True}),
+                steps=[{"index": index}],
+            )
+        )
+    for index in range(plans):
+        await view.add_plan(
+            Plan(
+                plan_id=f"plan-{index}",
+                session_id=f"session-{index}",
+                user_id=USER_ID,
+                initial_goal=f"Goal {index}",
+                overall_status=PlanStatus.completed,
+                team_id=TEAM_ID,
+                m_plan={"steps": [{"action": "review", "agent": "AnalystAgent"}]},
+            )
+        )
+    await writer.close()
+
+
+async def run(messages: int, plans: int, repeat: int) -> None:
+    container = InMemoryContainer()
+    await _seed(container, messages, plans)
+    message_query = "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.data_type=@type"
+    parameters = [
+        {"name": "@plan_id", "value": PLAN_ID},
+        {"name": "@type", "value": "m_plan_message"},
+    ]
+    plan_query = "SELECT * FROM c WHERE c.team_id=@team_id AND c.data_type=@type"
+    plan_parameters = [
+        {"name": "@team_id", "value": TEAM_ID},
+        {"name": "@type", "value": "plan"},
+    ]
+
+    print(f"\n=== {messages} agent messages in one plan, {plans} plans listed ===")
+    print(
+        f"{'trusted':<8} {'valid. msgs ms':>14} {'valid. plans ms':>15} "
+        f"{'get msgs ms':>12} {'list plans ms':>14}"
+    )
+    for trusted in (False, True):
+        database = InMemoryDBClient(container=container, trusted_reads=trusted)
+        await database.initialize()
+        view = database.for_user(USER_ID)
+        documents = [doc async for doc in view.iter_items(message_query, parameters)]
+        plan_documents = [
+            doc async for doc in view.iter_items(plan_query, plan_parameters)
+        ]
+
+        assert len(view._validate(documents, AgentMessageData)) == messages
+        build_messages_ms = await _best_ms(
+            repeat, lambda: view._validate(documents, AgentMessageData)
+        )
+        build_plans_ms = await _best_ms(
+            repeat, lambda: view._validate(plan_documents, Plan)
+        )
+        get_messages_ms = await _best_ms(
+            repeat, lambda: view.get_agent_messages(PLAN_ID)
+        )
+        list_plans_ms = await _best_ms(
+            repeat,
+            lambda: view.get_all_plans_by_team_id_status(
+                USER_ID, TEAM_ID, PlanStatus.completed
+            ),
+        )
+        print(
+            f"{'on' if trusted else 'off':<8} {build_messages_ms:>14.1f} "
+            f"{build_plans_ms:>15.1f} {get_messages_ms:>12.1f} {list_plans_ms:>14.1f}"
+        )
+        await database.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--plans", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.plans, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # app_config.py
 import logging
 import os
+import socket
 from typing import Optional
 
 from azure.ai.projects.aio import AIProjectClient
@@ -24,10 +25,137 @@ class AppConfig:
         self.AZURE_CLIENT_ID = self._get_optional("AZURE_CLIENT_ID")
         self.AZURE_CLIENT_SECRET = self._get_optional("AZURE_CLIENT_SECRET")
 
+        # Database backend: "cosmosdb" (default), "sqlite" for single-node installs
+        # or "memory" for the in-memory Cosmos DB stand-in
+        self.DATABASE_BACKEND = self._get_optional("DATABASE_BACKEND", "cosmosdb")
+        self.SQLITE_DATABASE_PATH = self._get_optional(
+            "SQLITE_DATABASE_PATH", "macae.db"
+        )
+        self.SQLITE_READER_POOL_SIZE = int(
+            self._get_optional("SQLITE_READER_POOL_SIZE", "4")
+        )
+        # Keep per-user plan counts by team and status up to date on plan writes
+        # (on Cosmos DB, status and team changes then read the plan first)
+        self.PLAN_STATS_ENABLED = self._get_bool("PLAN_STATS_ENABLED")
+        # Compact storage of agent messages: raw_data without the repeated content,
+        # and content / raw_data above the threshold compressed (none, gzip or zstd)
+        self.MESSAGE_COMPACT_ENABLED = self._get_bool("MESSAGE_COMPACT_ENABLED")
+        self.MESSAGE_COMPRESSION = self._get_optional("MESSAGE_COMPRESSION", "none")
+        self.MESSAGE_COMPRESSION_THRESHOLD_BYTES = int(
+            self._get_optional("MESSAGE_COMPRESSION_THRESHOLD_BYTES", "2048")
+        )
+        # Stamp documents with the schema version of their model and validate
+        # pages of documents written by the current models in one call
+        self.TRUSTED_READS_ENABLED = self._get_bool("TRUSTED_READS_ENABLED")
+
         # CosmosDB settings
         self.COSMOSDB_ENDPOINT = self._get_optional("COSMOSDB_ENDPOINT")
         self.COSMOSDB_DATABASE = self._get_optional("COSMOSDB_DATABASE")
         self.COSMOSDB_CONTAINER = self._get_optional("COSMOSDB_CONTAINER")
+        # "session" (partitioned by /session_id) or "hierarchical" (by user, then
+        # plan); must match the partition key of COSMOSDB_CONTAINER
+        self.COSMOSDB_PARTITION_LAYOUT = self._get_optional(
+            "COSMOSDB_PARTITION_LAYOUT", "session"
+        )
+
+        # Connection pool of the process-wide Cosmos client (0 means unlimited)
+        self.COSMOSDB_CONNECTION_LIMIT = int(
+            self._get_optional("COSMOSDB_CONNECTION_LIMIT", "100")
+        )
+        self.COSMOSDB_CONNECTION_LIMIT_PER_HOST = int(
+            self._get_optional("COSMOSDB_CONNECTION_LIMIT_PER_HOST", "0")
+        )
+        self.COSMOSDB_KEEPALIVE_SECONDS = float(
+            self._get_optional("COSMOSDB_KEEPALIVE_SECONDS", "15")
+        )
+        # Transactional delete batches in flight when cascading a plan delete
+        self.COSMOSDB_DELETE_CONCURRENCY = int(
+            self._get_optional("COSMOSDB_DELETE_CONCURRENCY", "4")
+        )
+        # Log data layer operations slower than this, with their SQL (0 disables)
+        self.COSMOSDB_SLOW_OPERATION_MS = float(
+            self._get_optional("COSMOSDB_SLOW_OPERATION_MS", "500")
+        )
+
+        # Adaptive (AIMD) limit on concurrent writes; it shrinks when Cosmos DB
+        # answers 429 and grows back while writes succeed (MAX=0 disables it)
+        self.COSMOSDB_WRITE_CONCURRENCY = int(
+            self._get_optional("COSMOSDB_WRITE_CONCURRENCY", "16")
+        )
+        self.COSMOSDB_WRITE_CONCURRENCY_MAX = int(
+            self._get_optional("COSMOSDB_WRITE_CONCURRENCY_MAX", "64")
+        )
+        self.COSMOSDB_THROTTLE_MAX_WAIT_SECONDS = float(
+            self._get_optional("COSMOSDB_THROTTLE_MAX_WAIT_SECONDS", "30")
+        )
+
+        # Share one request among identical queries in flight at the same time
+        self.COSMOSDB_SINGLE_FLIGHT_ENABLED = self._get_optional(
+            "COSMOSDB_SINGLE_FLIGHT_ENABLED", "true"
+        ).lower() in ["true", "1"]
+
+        # Write-behind batching of agent message / step writes
+        self.COSMOSDB_WRITE_BEHIND_ENABLED = self._get_bool(
+            "COSMOSDB_WRITE_BEHIND_ENABLED"
+        )
+        self.COSMOSDB_WRITE_BEHIND_BATCH_SIZE = int(
+            self._get_optional("COSMOSDB_WRITE_BEHIND_BATCH_SIZE", "50")
+        )
+        self.COSMOSDB_WRITE_BEHIND_FLUSH_INTERVAL_MS = int(
+            self._get_optional("COSMOSDB_WRITE_BEHIND_FLUSH_INTERVAL_MS", "250")
+        )
+        self.COSMOSDB_WRITE_BEHIND_MAX_QUEUE = int(
+            self._get_optional("COSMOSDB_WRITE_BEHIND_MAX_QUEUE", "1000")
+        )
+
+        # Team configuration cache (set TEAM_CACHE_MAX_ENTRIES=0 to disable)
+        self.TEAM_CACHE_TTL_SECONDS = float(
+            self._get_optional("TEAM_CACHE_TTL_SECONDS", "300")
+        )
+        self.TEAM_CACHE_MAX_ENTRIES = int(
+            self._get_optional("TEAM_CACHE_MAX_ENTRIES", "256")
+        )
+
+        # Per-user session context (current team) kept in-process
+        self.USER_SESSION_MAX_ENTRIES = int(
+            self._get_optional("USER_SESSION_MAX_ENTRIES", "1000")
+        )
+        self.USER_SESSION_IDLE_SECONDS = float(
+            self._get_optional("USER_SESSION_IDLE_SECONDS", "1800")
+        )
+        self.USER_SESSION_MAX_AGE_SECONDS = float(
+            self._get_optional("USER_SESSION_MAX_AGE_SECONDS", "28800")
+        )
+
+        # Change feed invalidation of the caches above across backend replicas
+        self.CACHE_COHERENCE_ENABLED = self._get_bool("CACHE_COHERENCE_ENABLED")
+        self.CACHE_COHERENCE_POLL_SECONDS = float(
+            self._get_optional("CACHE_COHERENCE_POLL_SECONDS", "1")
+        )
+        self.COSMOSDB_LEASE_CONTAINER = self._get_optional(
+            "COSMOSDB_LEASE_CONTAINER", "leases"
+        )
+        # Names this replica's change feed lease; defaults to the host name
+        self.REPLICA_NAME = self._get_optional("REPLICA_NAME") or socket.gethostname()
+
+        # Cold storage of completed plans and their messages
+        self.ARCHIVE_ENABLED = self._get_bool("ARCHIVE_ENABLED")
+        self.ARCHIVE_AFTER_DAYS = float(self._get_optional("ARCHIVE_AFTER_DAYS", "30"))
+        self.ARCHIVE_INTERVAL_SECONDS = float(
+            self._get_optional("ARCHIVE_INTERVAL_SECONDS", "3600")
+        )
+        self.ARCHIVE_BATCH_SIZE = int(self._get_optional("ARCHIVE_BATCH_SIZE", "50"))
+        self.ARCHIVE_CACHE_MAX_ENTRIES = int(
+            self._get_optional("ARCHIVE_CACHE_MAX_ENTRIES", "64")
+        )
+        # Blob storage when an account is set, otherwise files below the path
+        self.ARCHIVE_BLOB_ACCOUNT_URL = self._get_optional("ARCHIVE_BLOB_ACCOUNT_URL")
+        self.ARCHIVE_BLOB_CONTAINER = self._get_optional(
+            "ARCHIVE_BLOB_CONTAINER", "plan-archive"
+        )
+        self.ARCHIVE_STORAGE_PATH = self._get_optional(
+            "ARCHIVE_STORAGE_PATH", "plan_archive"
+        )
 
         self.APPLICATIONINSIGHTS_CONNECTION_STRING = self._get_required(
             "APPLICATIONINSIGHTS_CONNECTION_STRING"
@@ -0,0 +1,385 @@
+"""Cold-storage tiering of completed plans and their messages.
+
+``PlanArchiver`` runs in the background and moves every completed plan that has
+not changed for ``archive_after_days``, together with its steps, agent messages
+and MPlan, into one gzip-compressed JSONL blob (the plan document first, one
+document per line). The plan document stays in the database as a stub: its
+``archive_key`` names the blob and its bulky fields (``m_plan``, the streaming
+message and the clarification exchange) are cleared, so plan lists keep working
+while the container only holds a few hundred bytes per archived plan.
+
+The stub is written with the ETag read when the plan was selected, so a plan
+that changes while it is being archived is left alone and retried on the next
+pass. Blob keys are unique per attempt; a blob whose stub write lost is deleted.
+
+``load`` rehydrates an archived plan, caching the decoded archive in process.
+Blobs are never rewritten, so cached archives do not expire. Deleting an
+archived plan's stub removes its blob through ``forget``, which the database
+calls as its ``archive_forgetter``.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from opentelemetry import metrics
+
+from ..models.messages_kernel import (
+    AgentMessageData,
+    DataType,
+    Plan,
+    PlanStatus,
+    Step,
+)
+from .cache import TTLCache
+from .database_base import DatabaseBase, MessageCursor, PreconditionFailedError
+from .message_codec import decode_message
+from .serialization import encode
+
+logger = logging.getLogger(__name__)
+
+meter = metrics.get_meter(__name__)
+
+_plans_archived = meter.create_counter(
+    "macae.archive.plans", description="Plans moved to cold storage"
+)
+_archive_bytes = meter.create_counter(
+    "macae.archive.bytes", unit="By", description="Compressed bytes archived"
+)
+
+# Plan fields cleared from the stub left in the database
+CLEARED_PLAN_FIELDS = (
+    "m_plan",
+    "streaming_message",
+    "human_clarification_request",
+    "human_clarification_response",
+)
+
+# Documents that only locate the plan stay with the stub
+SKIPPED_DATA_TYPES = (DataType.plan_locator,)
+
+
+class ArchiveStore(ABC):
+    """Blob storage holding archived plans, addressed by key."""
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes) -> None:
+        """Store data under key, replacing any previous blob."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        """Return the blob stored under key.
+
+        Raises:
+            KeyError: If there is no blob under key
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete the blob under key; a missing blob is not an error."""
+
+    async def close(self) -> None:
+        """Release the store's connections."""
+
+
+class LocalArchiveStore(ArchiveStore):
+    """Keeps archive blobs as files below a directory, for development and tests."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError(f"Archive key '{key}' is outside the archive")
+        return path
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial blob
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+    def _read(self, key: str) -> bytes:
+        try:
+            with open(self._path(key), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            raise KeyError(key) from None
+
+    def _remove(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._write, key, data)
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._read, key)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._remove, key)
+
+
+class BlobArchiveStore(ArchiveStore):
+    """Keeps archive blobs in an Azure Storage blob container."""
+
+    def __init__(self, account_url: str, container_name: str, credential: Any):
+        # Imported here so the local store works without the storage SDK
+        from azure.storage.blob.aio import BlobServiceClient
+
+        self._service = BlobServiceClient(account_url, credential=credential)
+        self._container = self._service.get_container_client(container_name)
+
+    async def put(self, key: str, data: bytes) -> None:
+        await self._container.upload_blob(key, data, overwrite=True)
+
+    async def get(self, key: str) -> bytes:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            downloader = await self._container.download_blob(key)
+        except ResourceNotFoundError:
+            raise KeyError(key) from None
+        return await downloader.readall()
+
+    async def delete(self, key: str) -> None:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            await self._container.delete_blob(key)
+        except ResourceNotFoundError:
+            pass
+
+    async def close(self) -> None:
+        await self._service.close()
+
+
+@dataclass
+class ArchivedPlan:
+    """A plan and its documents as read back from cold storage."""
+
+    plan: Plan
+    documents: List[Dict[str, Any]] = field(default_factory=list)
+
+    def _of_type(self, data_type: str) -> List[Dict[str, Any]]:
+        return [doc for doc in self.documents if doc.get("data_type") == data_type]
+
+    @property
+    def steps(self) -> List[Step]:
+        return [Step.model_validate(doc) for doc in self._of_type(DataType.step)]
+
+    @property
+    def messages(self) -> List[AgentMessageData]:
+        """Agent messages in the order get_agent_messages returns them."""
+        documents = sorted(
+            self._of_type(DataType.m_plan_message), key=lambda doc: doc.get("_ts", 0)
+        )
+        return [
+            AgentMessageData.model_validate(decode_message(doc)) for doc in documents
+        ]
+
+    def messages_since(
+        self, cursor: Optional[str] = None
+    ) -> Tuple[List[AgentMessageData], str]:
+        """Agent messages after a cursor, as get_agent_messages_since returns them.
+
+        Raises:
+            ValueError: If cursor is not a message cursor
+        """
+        position = MessageCursor.decode(cursor)
+        documents = sorted(
+            (
+                doc
+                for doc in self._of_type(DataType.m_plan_message)
+                if doc.get("_ts", 0) >= position.since_ts
+            ),
+            key=lambda doc: doc.get("_ts", 0),
+        )
+        documents, position = position.advance(documents)
+        messages = [
+            AgentMessageData.model_validate(decode_message(doc)) for doc in documents
+        ]
+        return messages, position.encode()
+
+
+def archive_key(user_id: str, plan_id: str) -> str:
+    """Return a new blob key for an archive of the plan."""
+    return f"plans/{user_id}/{plan_id}/{uuid.uuid4().hex}.jsonl.gz"
+
+
+def pack(documents: List[Dict[str, Any]]) -> bytes:
+    """Encode documents as gzip-compressed JSON lines."""
+    return gzip.compress(b"".join(encode(doc) + b"\n" for doc in documents))
+
+
+def unpack(data: bytes) -> List[Dict[str, Any]]:
+    """Decode the documents of an archive blob."""
+    return [json.loads(line) for line in gzip.decompress(data).splitlines() if line]
+
+
+class PlanArchiver:
+    """Moves completed plans older than a cut-off into an ArchiveStore."""
+
+    def __init__(
+        self,
+        database: DatabaseBase,
+        store: ArchiveStore,
+        archive_after_days: float = 30.0,
+        batch_size: int = 50,
+        interval: float = 3600.0,
+        cache_max_entries: int = 64,
+    ):
+        self.database = database
+        self.store = store
+        self.archive_after_days = archive_after_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self._cache = TTLCache(
+            name="plan_archive", max_entries=cache_max_entries, ttl_seconds=None
+        )
+        self._task: Optional[asyncio.Task] = None
+        self.plans_archived = 0
+
+    async def _candidates(self, now: float) -> List[Dict[str, Any]]:
+        # The stub's archive_key is a string; plans not archived hold null or
+        # (written before archiving existed) no archive_key at all
+        query = (
+            "SELECT c.id, c.user_id, c._etag FROM c WHERE c.data_type=@data_type "
+            "AND c.overall_status=@status AND c._ts < @cutoff "
+            "AND NOT IS_STRING(c.archive_key)"
+        )
+        parameters = [
+            {"name": "@data_type", "value": DataType.plan},
+            {"name": "@status", "value": PlanStatus.completed},
+            {"name": "@cutoff", "value": int(now - self.archive_after_days * 86400)},
+        ]
+        candidates = []
+        async for document in self.database.iter_items(
+            query, parameters, page_size=self.batch_size
+        ):
+            candidates.append(document)
+            if len(candidates) >= self.batch_size:
+                break
+        return candidates
+
+    async def archive_plan(
+        self, plan_id: str, user_id: str, etag: Optional[str]
+    ) -> bool:
+        """Archive one plan; returns False when it changed and was left alone."""
+        view = self.database.for_user(user_id)
+        await view.flush_pending_writes(plan_id)
+        query = "SELECT * FROM c WHERE c.plan_id=@plan_id"
+        parameters = [{"name": "@plan_id", "value": plan_id}]
+        documents = [
+            document
+            async for document in view.iter_items(query, parameters)
+            if document.get("data_type") not in SKIPPED_DATA_TYPES
+        ]
+        # The plan document leads the archive
+        documents.sort(key=lambda doc: doc.get("data_type") != DataType.plan)
+        if not documents or documents[0].get("data_type") != DataType.plan:
+            return False
+
+        key = archive_key(user_id, plan_id)
+        data = pack(documents)
+        await self.store.put(key, data)
+        operations = [{"op": "set", "path": "/archive_key", "value": key}] + [
+            {"op": "set", "path": f"/{name}", "value": None}
+            for name in CLEARED_PLAN_FIELDS
+        ]
+        try:
+            stub = await view.patch_plan(plan_id, operations, etag=etag)
+        except PreconditionFailedError:
+            stub = None
+        if stub is None:
+            await self.store.delete(key)
+            return False
+
+        result = await view.delete_plan_cascade(plan_id, keep_plan=True)
+        self.plans_archived += 1
+        _plans_archived.add(1)
+        _archive_bytes.add(len(data))
+        logger.info(
+            "Archived plan %s: %d documents, %d bytes, %d removed from the database",
+            plan_id,
+            len(documents),
+            len(data),
+            result.total_deleted,
+        )
+        return True
+
+    async def archive_once(self, now: Optional[float] = None) -> int:
+        """Archive up to batch_size eligible plans; returns the number archived."""
+        archived = 0
+        for candidate in await self._candidates(now or time.time()):
+            plan_id, user_id = candidate["id"], candidate.get("user_id", "")
+            try:
+                if await self.archive_plan(plan_id, user_id, candidate.get("_etag")):
+                    archived += 1
+            except Exception as e:
+                logger.warning("Failed to archive plan %s: %s", plan_id, e)
+        return archived
+
+    async def load(self, key: str) -> ArchivedPlan:
+        """Return an archived plan, reading the blob on the first request only.
+
+        Every call gets its own copy of the plan, so callers can change it
+        without changing what later calls read from the cache.
+
+        Raises:
+            KeyError: If the archive blob does not exist
+        """
+        archived = self._cache.get(key)
+        if archived is None:
+            documents = unpack(await self.store.get(key))
+            archived = ArchivedPlan(
+                plan=Plan.model_validate(documents[0]), documents=documents[1:]
+            )
+            self._cache.set(key, archived)
+        return replace(archived, plan=archived.plan.model_copy(deep=True))
+
+    async def forget(self, key: str) -> None:
+        """Delete an archive blob, e.g. once its plan has been deleted."""
+        self._cache.invalidate(key)
+        await self.store.delete(key)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Drain the backlog a batch at a time, then wait for the next pass
+                while await self.archive_once() >= self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Plan archiving pass failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start archiving in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop archiving and close the store."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.store.close()
@@ -0,0 +1,351 @@
+"""Bulk export and import of documents as gzip-compressed NDJSON.
+
+``export_documents`` streams every document of the selected data types out of a
+``DatabaseBase`` into one ``<data_type>.ndjson.gz`` file per type, one JSON
+document per line, with a reader per data type running concurrently.
+``import_documents`` writes such files back through ``update_item`` (upserts,
+so replaying a file is harmless) with a pool of writers limited by an adaptive
+concurrency limiter that backs off when Cosmos DB throttles. Imported plans
+get their plan locators written with them and have the statistics of their
+owners rebuilt afterwards.
+
+Both directions save their progress to ``checkpoint.json`` in the directory, so
+each directory holds one export. An interrupted export redoes only the data
+types it had not finished (query order is not stable across runs, so a type
+restarts from its beginning); an interrupted import skips the lines already
+written. Service fields (``_rid``, ``_etag``, ...) and partition key fields are
+not exported, so the files can be imported into another backend or partition
+layout.
+
+Usage (from src/backend, against the backend DATABASE_BACKEND selects):
+    python -m common.database.bulk_transfer export backup/
+    python -m common.database.bulk_transfer import backup/ --types plan,step
+"""
+
+import argparse
+import asyncio
+import gzip
+import itertools
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Type
+
+from ..models.messages_kernel import (
+    AgentMessage,
+    AgentMessageData,
+    BaseDataModel,
+    DataType,
+    Plan,
+    Step,
+    TeamConfiguration,
+    UserCurrentTeam,
+)
+from .database_base import DatabaseBase
+from .message_codec import decode_message
+from .migration import SYSTEM_FIELDS
+from .partition_layout import OWNER_FIELD, SCOPE_FIELD
+from .plan_stats import reconcile_plan_stats
+from .serialization import encode
+from .throttle import AdaptiveConcurrencyLimiter
+from .trusted_read import SCHEMA_VERSION_FIELD
+
+logger = logging.getLogger(__name__)
+
+# Data types that can be transferred, with the model each is imported as.
+# Plan locators and plan statistics are derived data: locators are written with
+# the imported plans and statistics rebuilt once the import is done.
+TRANSFER_MODELS: Dict[str, Type[BaseDataModel]] = {
+    DataType.team_config.value: TeamConfiguration,
+    DataType.user_current_team.value: UserCurrentTeam,
+    DataType.plan.value: Plan,
+    DataType.step.value: Step,
+    DataType.agent_message.value: AgentMessage,
+    DataType.m_plan_message.value: AgentMessageData,
+}
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# Fields of stored documents that are not exported
+SKIPPED_FIELDS = SYSTEM_FIELDS + (OWNER_FIELD, SCOPE_FIELD, SCHEMA_VERSION_FIELD)
+
+
+def transfer_path(directory: str, data_type: str) -> str:
+    """Return the file holding the documents of a data type."""
+    return os.path.join(directory, f"{data_type}.ndjson.gz")
+
+
+@dataclass
+class TransferProgress:
+    """Documents and bytes moved for one data type."""
+
+    documents: int = 0
+    bytes: int = 0
+    complete: bool = False
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Documents per second over the time spent in this run."""
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.documents / self.elapsed_seconds
+
+
+@dataclass
+class TransferCheckpoint:
+    """Progress of the export and import of one directory."""
+
+    exported: Dict[str, TransferProgress] = field(default_factory=dict)
+    imported: Dict[str, TransferProgress] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, directory: str) -> "TransferCheckpoint":
+        path = os.path.join(directory, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(
+            **{
+                direction: {
+                    data_type: TransferProgress(**progress)
+                    for data_type, progress in data.get(direction, {}).items()
+                }
+                for direction in ("exported", "imported")
+            }
+        )
+
+    def save(self, directory: str) -> None:
+        path = os.path.join(directory, CHECKPOINT_FILE)
+        # Write then rename, so an interrupted save never corrupts the checkpoint
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(asdict(self), file)
+        os.replace(temporary, path)
+
+
+def _data_types(data_types: Optional[Sequence[str]]) -> List[str]:
+    selected = list(data_types or TRANSFER_MODELS)
+    unknown = [data_type for data_type in selected if data_type not in TRANSFER_MODELS]
+    if unknown:
+        raise ValueError(f"Unsupported data types: {', '.join(unknown)}")
+    return selected
+
+
+class _Reporter:
+    """Logs the progress of a transfer every interval seconds."""
+
+    def __init__(
+        self, action: str, progress: Dict[str, TransferProgress], interval: float
+    ):
+        self.action = action
+        self.progress = progress
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.log()
+
+    def log(self) -> None:
+        for data_type, progress in self.progress.items():
+            logger.info(
+                "%s %s: %d documents, %d bytes (%.0f documents/s)%s",
+                self.action,
+                data_type,
+                progress.documents,
+                progress.bytes,
+                progress.rate,
+                " done" if progress.complete else "",
+            )
+
+    def __enter__(self) -> "_Reporter":
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self.log()
+
+
+async def export_documents(
+    database: DatabaseBase,
+    directory: str,
+    data_types: Optional[Sequence[str]] = None,
+    page_size: int = 500,
+    report_interval: float = 10.0,
+) -> Dict[str, TransferProgress]:
+    """Export the documents of data_types (all transferable types by default).
+
+    Returns the progress of every selected type; types finished by an earlier
+    run are not exported again.
+    """
+    selected = _data_types(data_types)
+    os.makedirs(directory, exist_ok=True)
+    checkpoint = TransferCheckpoint.load(directory)
+    for data_type in selected:
+        if not checkpoint.exported.get(data_type, TransferProgress()).complete:
+            checkpoint.exported[data_type] = TransferProgress()
+
+    async def export_type(data_type: str) -> None:
+        progress = checkpoint.exported[data_type]
+        if progress.complete:
+            return
+        started = time.perf_counter()
+        query = "SELECT * FROM c WHERE c.data_type=@data_type"
+        parameters = [{"name": "@data_type", "value": data_type}]
+        path = transfer_path(directory, data_type)
+        handle = await asyncio.to_thread(gzip.open, f"{path}.partial", "wb")
+        try:
+            lines: List[bytes] = []
+
+            async def flush() -> None:
+                chunk = b"".join(lines)
+                await asyncio.to_thread(handle.write, chunk)
+                progress.documents += len(lines)
+                progress.bytes += len(chunk)
+                progress.elapsed_seconds = time.perf_counter() - started
+                lines.clear()
+
+            async for document in database.iter_items(
+                query, parameters, page_size=page_size
+            ):
+                body = {k: v for k, v in document.items() if k not in SKIPPED_FIELDS}
+                lines.append(encode(body) + b"\n")
+                if len(lines) >= page_size:
+                    await flush()
+            await flush()
+        finally:
+            await asyncio.to_thread(handle.close)
+        os.replace(f"{path}.partial", path)
+        progress.complete = True
+        checkpoint.save(directory)
+
+    with _Reporter("Exported", checkpoint.exported, report_interval):
+        await asyncio.gather(*(export_type(data_type) for data_type in selected))
+    return {data_type: checkpoint.exported[data_type] for data_type in selected}
+
+
+async def import_documents(
+    database: DatabaseBase,
+    directory: str,
+    data_types: Optional[Sequence[str]] = None,
+    batch_size: int = 100,
+    concurrency: int = 16,
+    max_concurrency: int = 64,
+    report_interval: float = 10.0,
+) -> Dict[str, TransferProgress]:
+    """Import the files of an export (every type present by default).
+
+    Writes go through an adaptive limiter starting at concurrency writes in
+    flight; the checkpoint advances once a whole batch is written. Returns the
+    progress of every imported type.
+    """
+    selected = [
+        data_type
+        for data_type in _data_types(data_types)
+        if data_types or os.path.exists(transfer_path(directory, data_type))
+    ]
+    checkpoint = TransferCheckpoint.load(directory)
+    limiter = AdaptiveConcurrencyLimiter(
+        name="bulk_import", initial_limit=concurrency, max_limit=max_concurrency
+    )
+    plan_owners: Set[str] = set()
+
+    async def write(data_type: str, line: bytes) -> None:
+        document = decode_message(json.loads(line))
+        model = TRANSFER_MODELS[data_type].model_validate(document)
+        await limiter.run(model.user_id, lambda: database.update_item(model))
+        if data_type != DataType.plan:
+            return
+        await limiter.run(model.user_id, lambda: database.write_plan_locator(model))
+        if model.user_id:
+            plan_owners.add(model.user_id)
+
+    async def import_type(data_type: str) -> None:
+        progress = checkpoint.imported.setdefault(data_type, TransferProgress())
+        if progress.complete:
+            return
+        started = time.perf_counter()
+        done = progress.documents
+        handle = await asyncio.to_thread(
+            gzip.open, transfer_path(directory, data_type), "rb"
+        )
+        try:
+            # Lines written before an interruption are skipped, not rewritten
+            await asyncio.to_thread(
+                lambda: next(itertools.islice(handle, done, done), None)
+            )
+            while True:
+                batch = await asyncio.to_thread(
+                    lambda: list(itertools.islice(handle, batch_size))
+                )
+                if not batch:
+                    break
+                await asyncio.gather(*(write(data_type, line) for line in batch))
+                progress.documents += len(batch)
+                progress.bytes += sum(len(line) for line in batch)
+                progress.elapsed_seconds = time.perf_counter() - started
+                checkpoint.save(directory)
+        finally:
+            await asyncio.to_thread(handle.close)
+        progress.complete = True
+        checkpoint.save(directory)
+
+    with _Reporter("Imported", checkpoint.imported, report_interval):
+        await asyncio.gather(*(import_type(data_type) for data_type in selected))
+    if plan_owners:
+        await reconcile_plan_stats(database, sorted(plan_owners))
+    return {data_type: checkpoint.imported[data_type] for data_type in selected}
+
+
+async def _run(args: argparse.Namespace) -> None:
+    from .database_factory import DatabaseFactory
+
+    data_types = args.types.split(",") if args.types else None
+    try:
+        database = await DatabaseFactory.get_database()
+        started = time.perf_counter()
+        if args.command == "export":
+            results = await export_documents(
+                database, args.directory, data_types, page_size=args.batch_size
+            )
+        else:
+            results = await import_documents(
+                database,
+                args.directory,
+                data_types,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+            )
+        elapsed = time.perf_counter() - started
+        total = sum(progress.documents for progress in results.values())
+        for data_type, progress in results.items():
+            print(f"{data_type:<20} {progress.documents:>10} {progress.bytes:>14}")
+        print(f"{total} documents in {elapsed:.1f} s ({total / elapsed:.0f}/s)")
+    finally:
+        await DatabaseFactory.close_all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("directory")
+    parser.add_argument(
+        "--types", help=f"Comma separated data types ({', '.join(TRANSFER_MODELS)})"
+    )
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
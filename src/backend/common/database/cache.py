@@ -0,0 +1,126 @@
+"""In-process caches used by the database layer."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from opentelemetry import metrics
+
+meter = metrics.get_meter(__name__)
+
+_cache_hits = meter.create_counter(
+    "macae.cache.hits", description="Lookups served from an in-process cache"
+)
+_cache_misses = meter.create_counter(
+    "macae.cache.misses", description="Lookups that missed an in-process cache"
+)
+
+
+class TTLCache:
+    """A bounded LRU cache whose entries expire after a time-to-live.
+
+    With ``sliding=True`` every hit refreshes the entry's expiry, which turns the
+    TTL into an idle timeout; ``max_age_seconds`` then still expires an entry that
+    long after it was set, however often it is read. A ``ttl_seconds`` of None
+    disables expiry and a ``max_entries`` of 0 disables the cache entirely.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 256,
+        ttl_seconds: Optional[float] = 300.0,
+        sliding: bool = False,
+        max_age_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sliding = sliding
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        # key -> (value, expires_at, set_at)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, float]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._attributes = {"cache": name}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _expiry(self, set_at: float) -> float:
+        expires_at = float("inf")
+        if self.ttl_seconds is not None:
+            expires_at = self._clock() + self.ttl_seconds
+        if self.max_age_seconds is not None:
+            expires_at = min(expires_at, set_at + self.max_age_seconds)
+        return expires_at
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at, set_at = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                if self.sliding:
+                    self._entries[key] = (value, self._expiry(set_at), set_at)
+                self.hits += 1
+                _cache_hits.add(1, self._attributes)
+                return value
+            del self._entries[key]
+        self.misses += 1
+        _cache_misses.add(1, self._attributes)
+        return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries when full."""
+        if not self.enabled:
+            return
+        set_at = self._clock()
+        self._entries[key] = (value, self._expiry(set_at), set_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a single entry."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Return the live (key, value) pairs without touching recency or counters."""
+        now = self._clock()
+        return [
+            (key, value)
+            for key, (value, expires_at, _) in self._entries.items()
+            if expires_at > now
+        ]
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > self._clock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
@@ -0,0 +1,366 @@
+"""Change feed consumer that keeps in-process caches coherent across replicas.
+
+Every backend replica runs one ``ChangeFeedConsumer``. It polls the container's
+change feed from its own checkpoint and hands each changed team configuration,
+current-team selection and plan to the subscribed handlers, which drop the
+matching entries from their local caches. Each replica owns a lease holding its
+checkpoint, so a restarted replica resumes where it stopped and two processes
+configured with the same replica name do not consume the same lease.
+
+The change feed reports the latest version of created and updated documents;
+deletes are not reported, so caches must still expire entries on their own.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError,
+)
+
+from ..models.messages_kernel import DataType
+
+logger = logging.getLogger(__name__)
+
+# Document types whose changes invalidate in-process caches
+COHERENT_DATA_TYPES = (
+    DataType.team_config,
+    DataType.user_current_team,
+    DataType.plan,
+)
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """A created or updated document read from the change feed."""
+
+    data_type: str
+    document: Dict[str, Any]
+
+    @property
+    def id(self) -> Optional[str]:
+        return self.document.get("id")
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.document.get("user_id")
+
+    @property
+    def team_id(self) -> Optional[str]:
+        return self.document.get("team_id")
+
+
+ChangeHandler = Callable[[ChangeEvent], Any]
+
+
+@dataclass(frozen=True)
+class Lease:
+    """Ownership of one change feed consumer's checkpoint."""
+
+    lease_id: str
+    owner: str
+    continuation: Optional[str] = None
+    expires_at: float = 0.0
+    etag: Optional[str] = None
+
+
+class LeaseLostError(Exception):
+    """Raised when a lease was taken over by another owner."""
+
+
+class LeaseStore(ABC):
+    """Persists change feed leases and their checkpoints."""
+
+    @abstractmethod
+    async def acquire(
+        self, lease_id: str, owner: str, duration: float
+    ) -> Optional[Lease]:
+        """Take the lease, or return None while another owner holds it."""
+        pass
+
+    @abstractmethod
+    async def checkpoint(
+        self, lease: Lease, continuation: Optional[str], duration: float
+    ) -> Lease:
+        """Store a new checkpoint and extend the lease; raises LeaseLostError."""
+        pass
+
+    @abstractmethod
+    async def release(self, lease: Lease) -> None:
+        """Give up the lease, keeping its checkpoint."""
+        pass
+
+
+class InMemoryLeaseStore(LeaseStore):
+    """Lease store for a single process, used by tests and the in-memory backend."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._leases: Dict[str, Lease] = {}
+        self._version = 0
+
+    def _store(self, lease: Lease) -> Lease:
+        self._version += 1
+        lease = replace(lease, etag=str(self._version))
+        self._leases[lease.lease_id] = lease
+        return lease
+
+    async def acquire(
+        self, lease_id: str, owner: str, duration: float
+    ) -> Optional[Lease]:
+        current = self._leases.get(lease_id)
+        now = self._clock()
+        if current and current.owner != owner and current.expires_at > now:
+            return None
+        continuation = current.continuation if current else None
+        return self._store(Lease(lease_id, owner, continuation, now + duration))
+
+    async def checkpoint(
+        self, lease: Lease, continuation: Optional[str], duration: float
+    ) -> Lease:
+        current = self._leases.get(lease.lease_id)
+        if current is None or current.etag != lease.etag:
+            raise LeaseLostError(lease.lease_id)
+        return self._store(
+            replace(
+                lease,
+                continuation=continuation,
+                expires_at=self._clock() + duration,
+            )
+        )
+
+    async def release(self, lease: Lease) -> None:
+        current = self._leases.get(lease.lease_id)
+        if current is not None and current.etag == lease.etag:
+            self._store(replace(lease, expires_at=0.0))
+
+
+class ContainerLeaseStore(LeaseStore):
+    """Stores leases as documents in a Cosmos DB container partitioned by /id.
+
+    Updates use the document ETag, so a replica that lost its lease to another
+    owner fails its next checkpoint instead of overwriting the new owner's.
+    """
+
+    def __init__(self, container: Any, clock: Callable[[], float] = time.time):
+        self.container = container
+        self._clock = clock
+
+    @staticmethod
+    def _to_lease(document: Dict[str, Any]) -> Lease:
+        return Lease(
+            lease_id=document["id"],
+            owner=document.get("owner", ""),
+            continuation=document.get("continuation"),
+            expires_at=document.get("expires_at", 0.0),
+            etag=document.get("_etag"),
+        )
+
+    @staticmethod
+    def _to_document(lease: Lease) -> Dict[str, Any]:
+        return {
+            "id": lease.lease_id,
+            "owner": lease.owner,
+            "continuation": lease.continuation,
+            "expires_at": lease.expires_at,
+        }
+
+    async def _replace(self, lease: Lease) -> Lease:
+        try:
+            document = await self.container.replace_item(
+                item=lease.lease_id,
+                body=self._to_document(lease),
+                etag=lease.etag,
+                match_condition=MatchConditions.IfNotModified,
+            )
+        except (CosmosAccessConditionFailedError, CosmosResourceNotFoundError):
+            raise LeaseLostError(lease.lease_id)
+        return self._to_lease(document)
+
+    async def acquire(
+        self, lease_id: str, owner: str, duration: float
+    ) -> Optional[Lease]:
+        now = self._clock()
+        try:
+            current = self._to_lease(
+                await self.container.read_item(item=lease_id, partition_key=lease_id)
+            )
+        except CosmosResourceNotFoundError:
+            try:
+                document = await self.container.create_item(
+                    body=self._to_document(Lease(lease_id, owner, None, now + duration))
+                )
+            except CosmosResourceExistsError:
+                # Another process created it first
+                return None
+            return self._to_lease(document)
+
+        if current.owner != owner and current.expires_at > now:
+            return None
+        try:
+            return await self._replace(
+                replace(current, owner=owner, expires_at=now + duration)
+            )
+        except LeaseLostError:
+            return None
+
+    async def checkpoint(
+        self, lease: Lease, continuation: Optional[str], duration: float
+    ) -> Lease:
+        return await self._replace(
+            replace(
+                lease,
+                continuation=continuation,
+                expires_at=self._clock() + duration,
+            )
+        )
+
+    async def release(self, lease: Lease) -> None:
+        try:
+            await self._replace(replace(lease, expires_at=0.0))
+        except LeaseLostError:
+            pass
+
+
+class ChangeFeedConsumer:
+    """Polls a container's change feed and dispatches changes to handlers.
+
+    Starts from "now" the first time a lease is created and from the lease's
+    checkpoint afterwards. The checkpoint only advances after every handler has
+    seen the changes read, so changes are delivered at least once.
+    """
+
+    def __init__(
+        self,
+        container: Any,
+        lease_store: LeaseStore,
+        owner: str,
+        processor_name: str = "cache-coherence",
+        poll_interval: float = 1.0,
+        lease_duration: float = 30.0,
+        max_item_count: int = 100,
+    ):
+        self.container = container
+        self.lease_store = lease_store
+        self.owner = owner
+        self.lease_id = f"{processor_name}.{owner}"
+        self.poll_interval = poll_interval
+        self.lease_duration = lease_duration
+        self.max_item_count = max_item_count
+
+        self._handlers: Dict[str, List[ChangeHandler]] = {}
+        self._lease: Optional[Lease] = None
+        self._task: Optional[asyncio.Task] = None
+        self.changes_dispatched = 0
+
+    def subscribe(self, data_types: Iterable[str], handler: ChangeHandler) -> None:
+        """Call handler (sync or async) for every change of the given data types."""
+        for data_type in data_types:
+            self._handlers.setdefault(data_type, []).append(handler)
+
+    async def _ensure_lease(self) -> Optional[Lease]:
+        now = time.time()
+        if self._lease is not None and self._lease.expires_at - now > (
+            self.lease_duration / 2
+        ):
+            return self._lease
+        if self._lease is not None:
+            try:
+                self._lease = await self.lease_store.checkpoint(
+                    self._lease, self._lease.continuation, self.lease_duration
+                )
+                return self._lease
+            except LeaseLostError:
+                logger.warning("Change feed lease %s was lost", self.lease_id)
+                self._lease = None
+        self._lease = await self.lease_store.acquire(
+            self.lease_id, self.owner, self.lease_duration
+        )
+        return self._lease
+
+    async def _dispatch(self, document: Dict[str, Any]) -> None:
+        data_type = document.get("data_type")
+        handlers = self._handlers.get(data_type)
+        if not handlers:
+            return
+        event = ChangeEvent(data_type=data_type, document=document)
+        for handler in handlers:
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(
+                    "Change feed handler failed for %s %s: %s", data_type, event.id, e
+                )
+        self.changes_dispatched += 1
+
+    async def poll_once(self) -> int:
+        """Read and dispatch every change available now; returns the number read."""
+        lease = await self._ensure_lease()
+        if lease is None:
+            return 0
+        if lease.continuation:
+            feed = self.container.query_items_change_feed(
+                continuation=lease.continuation, max_item_count=self.max_item_count
+            )
+        else:
+            feed = self.container.query_items_change_feed(
+                start_time="Now", max_item_count=self.max_item_count
+            )
+
+        pager = feed.by_page()
+        count = 0
+        async for page in pager:
+            async for document in page:
+                await self._dispatch(document)
+                count += 1
+        continuation = pager.continuation_token or lease.continuation
+        if continuation != lease.continuation:
+            try:
+                self._lease = await self.lease_store.checkpoint(
+                    lease, continuation, self.lease_duration
+                )
+            except LeaseLostError:
+                logger.warning("Change feed lease %s was lost", self.lease_id)
+                self._lease = None
+        return count
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Change feed poll failed: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        """Start polling in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling and release the lease."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lease is not None:
+            try:
+                await self.lease_store.release(self._lease)
+            except Exception as e:
+                logger.warning("Failed to release change feed lease: %s", e)
+            self._lease = None
@@ -0,0 +1,99 @@
+"""Cosmos DB partial document update (patch) operations.
+
+``CosmosDBClient`` sends patch operations to the service as-is; backends that do
+not run on Cosmos DB apply them with ``apply_patch``. Operations use the service's
+JSON shape, e.g. ``{"op": "set", "path": "/overall_status", "value": "completed"}``,
+and support ``add``, ``set``, ``replace``, ``remove`` and ``incr`` on object
+fields and array indexes (``-`` appends).
+"""
+
+import copy
+from typing import Any, Dict, List, Sequence, Tuple
+
+# The service rejects patch requests with more operations than this
+MAX_PATCH_OPERATIONS = 10
+
+
+def set_operation(path: str, value: Any) -> Dict[str, Any]:
+    """Build a patch operation that sets path to value."""
+    return {"op": "set", "path": path, "value": value}
+
+
+def _split(path: str) -> List[str]:
+    if not path.startswith("/") or path == "/":
+        raise ValueError(f"Invalid patch path '{path}'")
+    return [part.replace("~1", "/").replace("~0", "~") for part in path[1:].split("/")]
+
+
+def _parent(document: Dict[str, Any], path: str) -> Tuple[Any, str]:
+    parts = _split(path)
+    target: Any = document
+    for part in parts[:-1]:
+        if isinstance(target, list):
+            target = target[int(part)]
+        elif isinstance(target, dict) and part in target:
+            target = target[part]
+        else:
+            raise ValueError(f"Patch path '{path}' does not exist")
+    return target, parts[-1]
+
+
+def _apply(document: Dict[str, Any], operation: Dict[str, Any]) -> None:
+    op = operation.get("op", "").lower()
+    path = operation.get("path", "")
+    target, key = _parent(document, path)
+
+    if isinstance(target, list):
+        if op == "add" and key == "-":
+            target.append(operation["value"])
+            return
+        index = int(key)
+        if op == "add":
+            target.insert(index, operation["value"])
+        elif op in ("set", "replace"):
+            target[index] = operation["value"]
+        elif op == "remove":
+            del target[index]
+        elif op == "incr":
+            target[index] += operation["value"]
+        else:
+            raise ValueError(f"Unsupported patch operation '{op}'")
+        return
+
+    if not isinstance(target, dict):
+        raise ValueError(f"Patch path '{path}' does not exist")
+    if op in ("add", "set"):
+        target[key] = operation["value"]
+    elif op in ("replace", "remove"):
+        if key not in target:
+            raise ValueError(f"Patch path '{path}' does not exist")
+        if op == "replace":
+            target[key] = operation["value"]
+        else:
+            del target[key]
+    elif op == "incr":
+        target[key] = target.get(key, 0) + operation["value"]
+    else:
+        raise ValueError(f"Unsupported patch operation '{op}'")
+
+
+def apply_patch(
+    document: Dict[str, Any], operations: Sequence[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Return a copy of document with every operation applied, or raise ValueError.
+
+    Like the service, either all operations are applied or none are.
+    """
+    if not operations or len(operations) > MAX_PATCH_OPERATIONS:
+        raise ValueError(
+            f"A patch takes between 1 and {MAX_PATCH_OPERATIONS} operations"
+        )
+    patched = copy.deepcopy(document)
+    for operation in operations:
+        if _split(operation.get("path", ""))[0] in ("id", "_etag", "_ts"):
+            raise ValueError(f"Patch path '{operation.get('path')}' is read-only")
+        try:
+            _apply(patched, operation)
+        except (IndexError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid patch operation {operation}: {e}") from e
+    return patched
@@ -0,0 +1,292 @@
+"""Parser for the subset of Cosmos DB SQL used by the database layer.
+
+Backends that do not run on Cosmos DB use this to accept the same parameterized
+queries as ``CosmosDBClient.query_items``:
+
+    SELECT * | <projection>, ... FROM c
+    [WHERE <condition> [AND ...]]
+    [ORDER BY c.<path> [ASC|DESC], ...]
+
+where a projection is ``c.<path> [AS alias]`` or ``ARRAY_LENGTH(c.<path>) [AS alias]``
+and a condition is ``c.<path> <op> @param | 'literal' | number`` with ``<op>`` one
+of ``= != < <= > >=``, or ``[NOT] IS_DEFINED(c.<path>)`` or
+``[NOT] IS_STRING(c.<path>)``.
+"""
+
+import json
+import operator
+import re
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_QUERY_PATTERN = re.compile(
+    r"^\s*SELECT\s+(?P<select>.+?)\s+FROM\s+(?P<alias>\w+)"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+(?P<order>.+?))?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_AND_PATTERN = re.compile(r"\s+AND\s+", re.IGNORECASE)
+_CONDITION_PATTERN = re.compile(
+    r"^(?P<path>[\w.]+)\s*(?P<operator>!=|<>|<=|>=|=|<|>)\s*(?P<value>.+?)$",
+    re.DOTALL,
+)
+_TYPE_CHECK_PATTERN = re.compile(
+    r"^(?P<negate>NOT\s+)?(?P<function>IS_DEFINED|IS_STRING)"
+    r"\(\s*(?P<path>[\w.]+)\s*\)$",
+    re.IGNORECASE,
+)
+_PROJECTION_PATTERN = re.compile(
+    r"^(?:(?P<function>ARRAY_LENGTH)\(\s*(?P<arg>[\w.]+)\s*\)|(?P<path>[\w.]+))"
+    r"(?:\s+AS\s+(?P<alias>\w+))?$",
+    re.IGNORECASE,
+)
+_ORDER_PATTERN = re.compile(
+    r"^(?P<path>[\w.]+)(?:\s+(?P<direction>ASC|DESC))?$", re.IGNORECASE
+)
+
+_MISSING = object()
+
+_ORDERING = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class QuerySyntaxError(ValueError):
+    """Raised for queries outside the supported Cosmos DB SQL subset."""
+
+
+@dataclass(frozen=True)
+class Condition:
+    """Filter on a document path against a parameter or a literal.
+
+    ``operator`` is ``=`` (the default), ``!=``, ``<``, ``<=``, ``>``, ``>=``, or
+    one of the type checks ``is_defined`` and ``is_string``, which take no value
+    and may be ``negated``.
+    """
+
+    path: Tuple[str, ...]
+    parameter: Optional[str] = None
+    literal: Any = None
+    operator: str = "="
+    negated: bool = False
+
+    def value(self, parameters: Dict[str, Any]) -> Any:
+        if self.parameter is None:
+            return self.literal
+        if self.parameter not in parameters:
+            raise QuerySyntaxError(f"Missing query parameter {self.parameter}")
+        return normalize_value(parameters[self.parameter])
+
+    def test(self, actual: Any, parameters: Dict[str, Any]) -> bool:
+        """Return True when the value at the condition's path satisfies it."""
+        if self.operator == "is_defined":
+            return (actual is not _MISSING) != self.negated
+        if self.operator == "is_string":
+            return isinstance(actual, str) != self.negated
+        if actual is _MISSING:
+            return False
+        expected = self.value(parameters)
+        if self.operator == "=":
+            return actual == expected
+        if self.operator == "!=":
+            return actual != expected
+        # Like Cosmos DB, only booleans, numbers and strings of the same type compare
+        rank = _sort_key(actual)[0]
+        if rank not in (2, 3, 4) or rank != _sort_key(expected)[0]:
+            return False
+        return _ORDERING[self.operator](actual, expected)
+
+
+@dataclass(frozen=True)
+class Projection:
+    """A selected document path, optionally wrapped in ARRAY_LENGTH."""
+
+    path: Tuple[str, ...]
+    alias: str
+    function: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class OrderBy:
+    path: Tuple[str, ...]
+    descending: bool = False
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """A parsed query; ``projections`` is None for ``SELECT *``."""
+
+    projections: Optional[Tuple[Projection, ...]]
+    conditions: Tuple[Condition, ...]
+    order_by: Tuple[OrderBy, ...]
+
+    def matches(self, document: Dict[str, Any], parameters: Dict[str, Any]) -> bool:
+        """Return True when the document satisfies every WHERE condition."""
+        return all(
+            condition.test(get_path(document, condition.path), parameters)
+            for condition in self.conditions
+        )
+
+    def project(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the SELECT list; undefined values are left out like in Cosmos DB."""
+        if self.projections is None:
+            return document
+        result = {}
+        for projection in self.projections:
+            value = get_path(document, projection.path)
+            if projection.function == "ARRAY_LENGTH":
+                value = len(value) if isinstance(value, list) else _MISSING
+            if value is not _MISSING:
+                result[projection.alias] = value
+        return result
+
+    def sort(self, documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Sort documents by the ORDER BY clause; the sort is stable."""
+        ordered = list(documents)
+        for order in reversed(self.order_by):
+            ordered.sort(
+                key=lambda document: _sort_key(get_path(document, order.path)),
+                reverse=order.descending,
+            )
+        return ordered
+
+
+def normalize_value(value: Any) -> Any:
+    """Convert parameter values to their JSON representation (enums to values)."""
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def get_path(document: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    """Resolve a dotted document path, returning a sentinel when it is undefined."""
+    value: Any = document
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def is_missing(value: Any) -> bool:
+    return value is _MISSING
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # Cosmos DB orders undefined < null < booleans < numbers < strings
+    if value is _MISSING:
+        return (0, 0)
+    if value is None:
+        return (1, 0)
+    if isinstance(value, bool):
+        return (2, value)
+    if isinstance(value, (int, float)):
+        return (3, value)
+    if isinstance(value, str):
+        return (4, value)
+    return (5, json.dumps(value, sort_keys=True, default=str))
+
+
+def _split_path(expression: str, alias: str) -> Tuple[str, ...]:
+    parts = expression.split(".")
+    if len(parts) < 2 or parts[0] != alias:
+        raise QuerySyntaxError(f"Expected a path on '{alias}', got '{expression}'")
+    return tuple(parts[1:])
+
+
+def _parse_literal(text: str) -> Any:
+    if text.startswith("'") and text.endswith("'") and len(text) >= 2:
+        return text[1:-1]
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered == "null":
+        return None
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise QuerySyntaxError(f"Unsupported value '{text}'") from e
+
+
+@lru_cache(maxsize=256)
+def parse_query(query: str) -> ParsedQuery:
+    """Parse a query of the supported subset.
+
+    Raises:
+        QuerySyntaxError: If the query uses unsupported syntax
+    """
+    match = _QUERY_PATTERN.match(query)
+    if match is None:
+        raise QuerySyntaxError(f"Unsupported query: {query}")
+    alias = match.group("alias")
+
+    select = match.group("select").strip()
+    projections: Optional[Tuple[Projection, ...]] = None
+    if select != "*":
+        parsed = []
+        for item in select.split(","):
+            item_match = _PROJECTION_PATTERN.match(item.strip())
+            if item_match is None:
+                raise QuerySyntaxError(f"Unsupported projection '{item.strip()}'")
+            if item_match.group("function"):
+                path = _split_path(item_match.group("arg"), alias)
+                function = item_match.group("function").upper()
+                if not item_match.group("alias"):
+                    raise QuerySyntaxError(f"{function} projections need an alias")
+            else:
+                path = _split_path(item_match.group("path"), alias)
+                function = None
+            parsed.append(
+                Projection(path, item_match.group("alias") or path[-1], function)
+            )
+        projections = tuple(parsed)
+
+    conditions = []
+    if match.group("where"):
+        for clause in _AND_PATTERN.split(match.group("where").strip()):
+            check_match = _TYPE_CHECK_PATTERN.match(clause.strip())
+            if check_match is not None:
+                conditions.append(
+                    Condition(
+                        _split_path(check_match.group("path"), alias),
+                        operator=check_match.group("function").lower(),
+                        negated=bool(check_match.group("negate")),
+                    )
+                )
+                continue
+            clause_match = _CONDITION_PATTERN.match(clause.strip())
+            if clause_match is None:
+                raise QuerySyntaxError(f"Unsupported condition '{clause.strip()}'")
+            path = _split_path(clause_match.group("path"), alias)
+            op = clause_match.group("operator").replace("<>", "!=")
+            value = clause_match.group("value").strip()
+            if value.startswith("@"):
+                if not re.fullmatch(r"@\w+", value):
+                    raise QuerySyntaxError(f"Unsupported value '{value}'")
+                conditions.append(Condition(path, parameter=value, operator=op))
+            else:
+                conditions.append(
+                    Condition(path, literal=_parse_literal(value), operator=op)
+                )
+
+    order_by = []
+    if match.group("order"):
+        for item in match.group("order").split(","):
+            order_match = _ORDER_PATTERN.match(item.strip())
+            if order_match is None:
+                raise QuerySyntaxError(f"Unsupported ORDER BY '{item.strip()}'")
+            direction = (order_match.group("direction") or "ASC").upper()
+            path = _split_path(order_match.group("path"), alias)
+            order_by.append(OrderBy(path, direction == "DESC"))
+
+    return ParsedQuery(projections, tuple(conditions), tuple(order_by))
+
+
+def parameter_map(parameters: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Turn the SDK's ``[{"name": ..., "value": ...}]`` list into a dict."""
+    return {parameter["name"]: parameter["value"] for parameter in parameters or []}
@@ -1,12 +1,25 @@
 """CosmosDB implementation of the database interface."""
 
-import datetime
+import asyncio
+import json
 import logging
-from typing import Any, Dict, List, Optional, Type
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Type
 
+import aiohttp
 import v3.models.messages as messages
+from azure.core import MatchConditions
+from azure.core.pipeline.transport import AioHttpTransport
 from azure.cosmos.aio import CosmosClient
 from azure.cosmos.aio._database import DatabaseProxy
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosBatchOperationError,
+    CosmosHttpResponseError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError,
+)
 
 from ..models.messages_kernel import (
     AgentMessage,
@@ -14,13 +27,37 @@ from ..models.messages_kernel import (
     BaseDataModel,
     DataType,
     Plan,
+    PlanLocator,
+    PlanStats,
+    PlanSummary,
     Step,
     TeamConfiguration,
+    TeamSummary,
     UserCurrentTeam,
 )
-from .database_base import DatabaseBase
+from .cache import TTLCache
+from .change_feed import ChangeEvent
+from .database_base import (
+    DatabaseBase,
+    DeleteResult,
+    MessageCursor,
+    PreconditionFailedError,
+)
+from .instrumentation import CosmosInstrumentation, track_operations
+from .message_codec import MessageCodec
+from .partition_layout import SESSION_LAYOUT, PartitionLayout, get_partition_layout
+from .plan_stats import (
+    PLAN_STATS_MAX_ATTEMPTS,
+    plan_status_changes,
+    plan_status_key,
+    touches_plan_stats,
+)
+from .single_flight import SingleFlight
+from .throttle import AdaptiveConcurrencyLimiter, is_throttled
+from .write_behind import MAX_TRANSACTIONAL_BATCH_SIZE, WriteBehindBuffer
 
 
+@track_operations
 class CosmosDBClient(DatabaseBase):
     """CosmosDB implementation of the database interface."""
 
@@ -30,8 +67,24 @@ class CosmosDBClient(DatabaseBase):
         DataType.agent_message: AgentMessage,
         DataType.team_config: TeamConfiguration,
         DataType.user_current_team: UserCurrentTeam,
+        DataType.plan_locator: PlanLocator,
+        DataType.plan_stats: PlanStats,
     }
 
+    # Projections used by list views, leaving out m_plan, streaming_message,
+    # agent system messages and starting tasks
+    PLAN_SUMMARY_FIELDS = (
+        "c.id, c.plan_id, c.session_id, c.user_id, c.initial_goal, "
+        "c.overall_status, c.team_id, c.timestamp"
+    )
+    TEAM_SUMMARY_FIELDS = (
+        "c.id, c.team_id, c.session_id, c.name, c.status, c.created, c.created_by, "
+        "c.description, c.logo, c.user_id, ARRAY_LENGTH(c.agents) AS agent_count"
+    )
+
+    # Upper bound on the number of plan_id -> partition key entries kept in-process
+    PLAN_LOCATOR_CACHE_SIZE = 10000
+
     def __init__(
         self,
         endpoint: str,
@@ -40,6 +93,25 @@ class CosmosDBClient(DatabaseBase):
         container_name: str,
         session_id: str = "",
         user_id: str = "",
+        write_behind_enabled: bool = False,
+        write_behind_batch_size: int = 50,
+        write_behind_flush_interval: float = 0.25,
+        write_behind_max_queue: int = 1000,
+        team_cache_ttl: Optional[float] = 300.0,
+        team_cache_max_entries: int = 256,
+        connection_limit: Optional[int] = None,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 15.0,
+        delete_concurrency: int = 4,
+        slow_operation_ms: Optional[float] = 500.0,
+        write_concurrency: int = 16,
+        write_concurrency_max: int = 64,
+        throttle_max_wait: float = 30.0,
+        partition_layout: str = SESSION_LAYOUT,
+        single_flight_enabled: bool = True,
+        plan_stats_enabled: bool = False,
+        message_codec: Optional[MessageCodec] = None,
+        trusted_reads: bool = False,
     ):
         self.endpoint = endpoint
         self.credential = credential
@@ -53,25 +125,118 @@ class CosmosDBClient(DatabaseBase):
         self.database = None
         self.container = None
         self._initialized = False
+        self._plan_partitions: "OrderedDict[str, Any]" = OrderedDict()
+        # How documents map to partition keys ("session" or "hierarchical")
+        self.layout: PartitionLayout = get_partition_layout(partition_layout)
+        # Views created by for_user() share the client of the instance they came from
+        self._owns_client = True
+
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        # Upper bound on transactional delete batches in flight at once
+        self.delete_concurrency = max(1, delete_concurrency)
+
+        self.write_behind_enabled = write_behind_enabled
+        self.write_behind_batch_size = write_behind_batch_size
+        self.write_behind_flush_interval = write_behind_flush_interval
+        self.write_behind_max_queue = write_behind_max_queue
+        self.write_buffer: Optional[WriteBehindBuffer] = None
+
+        # Request charge / latency per logical operation, shared with for_user() views
+        self.instrumentation = CosmosInstrumentation(slow_operation_ms)
+
+        # Adaptive limit on concurrent writes, shared with for_user() views
+        self.write_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+        if write_concurrency_max > 0:
+            self.write_limiter = AdaptiveConcurrencyLimiter(
+                initial_limit=write_concurrency,
+                max_limit=write_concurrency_max,
+                max_retry_wait=throttle_max_wait,
+            )
+
+        # Team configurations rarely change; writes through this client invalidate it
+        self.team_cache = TTLCache(
+            name="team_config",
+            max_entries=team_cache_max_entries,
+            ttl_seconds=team_cache_ttl,
+        )
+
+        # Identical queries in flight at the same time share one request
+        self.single_flight = SingleFlight("cosmos_query", single_flight_enabled)
+
+        # Maintain the per-user PlanStats document on every plan status change
+        self.plan_stats_enabled = plan_stats_enabled
+        self.message_codec = message_codec
+        self.trusted_reads = trusted_reads
 
     async def initialize(self) -> None:
         """Initialize the CosmosDB client and create container if needed."""
         try:
             if not self._initialized:
-                self.client = CosmosClient(
-                    url=self.endpoint, credential=self.credential
-                )
-                self.database = self.client.get_database_client(self.database_name)
-
-                self.container = await self._get_container(
-                    self.database, self.container_name
-                )
+                container = self.instrumentation.wrap(await self._open_container())
+                if self.write_limiter is not None:
+                    container = self.write_limiter.wrap(container)
+                self.container = self.single_flight.wrap(container)
+                if self.write_behind_enabled:
+                    self.write_buffer = WriteBehindBuffer(
+                        self.container,
+                        max_batch_size=self.write_behind_batch_size,
+                        flush_interval=self.write_behind_flush_interval,
+                        max_queue_size=self.write_behind_max_queue,
+                    )
                 self._initialized = True
 
         except Exception as e:
             self.logger.error("Failed to initialize CosmosDB: %s", str(e))
             raise
 
+    async def _open_container(self) -> Any:
+        """Create the CosmosClient and return the container proxy."""
+        transport = self._build_transport()
+        if transport is not None:
+            self.client = CosmosClient(
+                url=self.endpoint,
+                credential=self.credential,
+                transport=transport,
+            )
+        else:
+            self.client = CosmosClient(url=self.endpoint, credential=self.credential)
+        self.database = self.client.get_database_client(self.database_name)
+        return await self._get_container(self.database, self.container_name)
+
+    def _build_transport(self) -> Optional[AioHttpTransport]:
+        """Build an aiohttp transport with the configured connection pool limits.
+
+        Returns None to let the SDK use its default transport.
+        """
+        if self.connection_limit is None:
+            return None
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            limit_per_host=self.connection_limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        # Same session options the SDK transport uses when it owns the session
+        session = aiohttp.ClientSession(
+            connector=connector,
+            trust_env=True,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            auto_decompress=False,
+        )
+        return AioHttpTransport(session=session, session_owner=True)
+
+    def for_user(self, user_id: str) -> "CosmosDBClient":
+        """Return a lightweight view scoped to user_id.
+
+        The view shares the CosmosClient and its connection pool, the container
+        proxy, the caches and the write-behind buffer with this instance. Closing
+        a view does not close the shared client.
+        """
+        view = super().for_user(user_id)
+        view._owns_client = False
+        return view
+
     # Helper Methods
     async def _ensure_initialized(self) -> None:
         """Ensure the database is initialized."""
@@ -86,8 +251,109 @@ class CosmosDBClient(DatabaseBase):
             self.logger.error("Failed to Get cosmosdb container", error=str(e))
             raise
 
+    def _document(self, item: BaseDataModel) -> Dict[str, Any]:
+        """Convert a model to a document carrying its partition key fields."""
+        return self.layout.stamp(self._to_document(item))
+
+    def _partition_key_of(self, item: BaseDataModel) -> Any:
+        """Return the partition key the layout assigns to a model."""
+        return self.layout.partition_key(self._to_document(item))
+
+    def _remember_plan_partition(self, plan_id: str, partition_key: Any) -> None:
+        """Cache the partition key of a plan, evicting the oldest entry when full."""
+        self._plan_partitions[plan_id] = partition_key
+        self._plan_partitions.move_to_end(plan_id)
+        while len(self._plan_partitions) > self.PLAN_LOCATOR_CACHE_SIZE:
+            self._plan_partitions.popitem(last=False)
+
+    def _forget_plan_partition(self, plan_id: str) -> None:
+        """Drop a cached plan partition key."""
+        self._plan_partitions.pop(plan_id, None)
+
+    async def _resolve_plan_partition(self, plan_id: str) -> Any:
+        """Resolve the partition key of a plan from the cache or its locator.
+
+        With the hierarchical layout the key is derived from the user the view
+        is scoped to. Returns None when the partition is not known, e.g. for
+        plans written before locators existed.
+        """
+        if not plan_id:
+            return None
+        partition_key = self._plan_partitions.get(plan_id)
+        if partition_key is not None:
+            self._plan_partitions.move_to_end(plan_id)
+            return partition_key
+        if not self.layout.uses_plan_locators:
+            return self.layout.query_partition(DataType.plan, self.user_id, plan_id)
+
+        await self._ensure_initialized()
+        try:
+            document = await self.container.read_item(
+                item=plan_id, partition_key=plan_id
+            )
+        except CosmosResourceNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning("Failed to read plan locator %s: %s", plan_id, e)
+            return None
+
+        if document.get("data_type") == DataType.plan_locator:
+            partition_key = document.get("plan_session_id")
+        elif document.get("data_type") == DataType.plan:
+            # The plan lives in its own partition, no separate locator needed
+            partition_key = plan_id
+        else:
+            return None
+
+        if partition_key:
+            self._remember_plan_partition(plan_id, partition_key)
+        return partition_key
+
+    async def flush_pending_writes(self, plan_id: Optional[str] = None) -> None:
+        """Flush buffered writes for a plan, or all buffered writes when plan_id is None."""
+        if self.write_buffer is None:
+            return
+        if not plan_id:
+            await self.write_buffer.flush()
+            return
+        partition_key = await self._resolve_plan_partition(plan_id)
+        if partition_key is not None:
+            await self.write_buffer.flush(partition_key)
+            return
+        # Messages of plans without a locator are buffered under their own session
+        for partition_key in self.write_buffer.partitions_holding("plan_id", plan_id):
+            await self.write_buffer.flush(partition_key)
+
+    async def _add_plan_child(self, item: BaseDataModel) -> None:
+        """Write a document that belongs to a plan into the plan's partition.
+
+        When the plan's partition is known the document is co-located with it, and
+        with write-behind enabled the write is buffered into a transactional batch.
+        The hierarchical layout co-locates them by construction.
+        """
+        if self.layout.uses_plan_locators:
+            partition_key = await self._resolve_plan_partition(item.plan_id)
+            if partition_key is not None and item.session_id != partition_key:
+                # Copy so the caller's model keeps its own session_id
+                item = item.model_copy(update={"session_id": partition_key})
+
+        if self.write_buffer is None:
+            await self.add_item(item)
+            return
+
+        await self._ensure_initialized()
+        document = self._document(item)
+        await self.write_buffer.enqueue(self.layout.partition_key(document), document)
+
     async def close(self) -> None:
         """Close the CosmosDB connection."""
+        if not self._owns_client:
+            return
+        if self.write_buffer:
+            try:
+                await self.write_buffer.close()
+            except Exception as e:
+                self.logger.error("Failed to flush write-behind buffer: %s", e)
         if self.client:
             await self.client.close()
             self.logger.info("Closed CosmosDB connection")
@@ -98,13 +364,7 @@ class CosmosDBClient(DatabaseBase):
         await self._ensure_initialized()
 
         try:
-            # Convert to dictionary and handle datetime serialization
-            document = item.model_dump()
-
-            for key, value in list(document.items()):
-                if isinstance(value, datetime.datetime):
-                    document[key] = value.isoformat()
-
+            document = self._document(item)
             await self.container.create_item(body=document)
         except Exception as e:
             self.logger.error("Failed to add item to CosmosDB: %s", str(e))
@@ -115,11 +375,7 @@ class CosmosDBClient(DatabaseBase):
         await self._ensure_initialized()
 
         try:
-            # Convert to dictionary and handle datetime serialization
-            document = item.model_dump()
-            for key, value in list(document.items()):
-                if isinstance(value, datetime.datetime):
-                    document[key] = value.isoformat()
+            document = self._document(item)
             await self.container.upsert_item(body=document)
         except Exception as e:
             self.logger.error("Failed to update item in CosmosDB: %s", str(e))
@@ -137,6 +393,9 @@ class CosmosDBClient(DatabaseBase):
             )
             return model_class.model_validate(item)
         except Exception as e:
+            if is_throttled(e):
+                # Still throttled after the SDK's retries: not the same as missing
+                raise
             self.logger.error("Failed to retrieve item from CosmosDB: %s", str(e))
             return None
 
@@ -145,28 +404,113 @@ class CosmosDBClient(DatabaseBase):
         query: str,
         parameters: List[Dict[str, Any]],
         model_class: Type[BaseDataModel],
+        partition_key: Any = None,
     ) -> List[BaseDataModel]:
-        """Query items from CosmosDB and return a list of model instances."""
-        await self._ensure_initialized()
+        """Query items from CosmosDB and return a list of model instances.
+
+        partition_key, or a prefix of a hierarchical one, limits the query to
+        the partitions holding it; None queries across partitions. Callers
+        issuing the same query concurrently share one request, and each gets
+        its own model instances.
+
+        Raises:
+            CosmosHttpResponseError: If the query is still throttled (429) once
+                the SDK has given up retrying; other failures return []
+        """
+        key = (query, json.dumps(parameters, default=str), partition_key)
+
+        async def read_documents():
+            return [
+                document
+                async for document in self.iter_items(
+                    query, parameters, partition_key=partition_key
+                )
+            ]
 
         try:
-            items = self.container.query_items(query=query, parameters=parameters)
-            result_list = []
-            async for item in items:
-                # item["ts"] = item["_ts"]
-                try:
-                    result_list.append(model_class.model_validate(item))
-                except Exception as validation_error:
-                    self.logger.warning(
-                        "Failed to validate item: %s", str(validation_error)
-                    )
-                    continue
-            return result_list
+            documents = await self.single_flight.do(key, read_documents)
+            return self._validate(documents, model_class)
         except Exception as e:
+            if is_throttled(e):
+                # Still throttled after the SDK's retries: not the same as no results
+                raise
             self.logger.error("Failed to query items from CosmosDB: %s", str(e))
             return []
 
-    async def delete_item(self, item_id: str, partition_key: str) -> None:
+    async def iter_items(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        model_class: Optional[Type[BaseDataModel]] = None,
+        page_size: Optional[int] = None,
+        partition_key: Any = None,
+    ) -> AsyncIterator[Any]:
+        """Stream query results one SDK page at a time.
+
+        page_size is passed to the SDK as max_item_count (None keeps the
+        service default). Only the current page is held in memory.
+        """
+        await self._ensure_initialized()
+
+        items = self.container.query_items(
+            query=query,
+            parameters=parameters,
+            max_item_count=page_size,
+            **self._scope(partition_key),
+        )
+        async for page in items.by_page():
+            documents = [item async for item in page]
+            if model_class is not None:
+                documents = self._validate(documents, model_class)
+            for item in documents:
+                yield item
+
+    async def query_page(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        model_class: Type[BaseDataModel],
+        page_size: int,
+        continuation_token: Optional[str] = None,
+        partition_key: Any = None,
+    ) -> Tuple[List[BaseDataModel], Optional[str]]:
+        """Query a single page of items using the SDK's continuation tokens.
+
+        Returns the page of model instances and the continuation token for the
+        next page, or None when there are no more results.
+
+        Raises:
+            ValueError: If the continuation token is not valid for the query
+        """
+        await self._ensure_initialized()
+
+        items = self.container.query_items(
+            query=query,
+            parameters=parameters,
+            max_item_count=page_size,
+            **self._scope(partition_key),
+        )
+        pager = items.by_page(continuation_token)
+        result_list: List[BaseDataModel] = []
+        try:
+            # Cross-partition queries can return empty pages, skip those
+            async for page in pager:
+                documents = [item async for item in page]
+                result_list.extend(self._validate(documents, model_class))
+                if result_list or not pager.continuation_token:
+                    break
+        except CosmosHttpResponseError as e:
+            if continuation_token and e.status_code == 400:
+                raise ValueError("Invalid continuation token") from e
+            raise
+        return result_list, pager.continuation_token
+
+    @staticmethod
+    def _scope(partition_key: Any) -> Dict[str, Any]:
+        # Leave partition_key out entirely for cross-partition queries
+        return {} if partition_key is None else {"partition_key": partition_key}
+
+    async def delete_item(self, item_id: str, partition_key: Any) -> None:
         """Delete an item from CosmosDB."""
         await self._ensure_initialized()
 
@@ -178,23 +522,155 @@ class CosmosDBClient(DatabaseBase):
 
     # Plan Operations
     async def add_plan(self, plan: Plan) -> None:
-        """Add a plan to CosmosDB."""
+        """Add a plan to CosmosDB together with its plan locator."""
         await self.add_item(plan)
+        try:
+            await self.write_plan_locator(plan)
+        except Exception as e:
+            # Reads still work without the locator, they just fall back to a query
+            self.logger.warning("Failed to write plan locator for %s: %s", plan.id, e)
+        self._remember_plan_partition(plan.id, self._partition_key_of(plan))
+        await self._apply_plan_stats(None, plan)
+
+    async def write_plan_locator(self, plan: Plan) -> None:
+        """Write the locator that maps a plan's id to the partition holding it.
+
+        Only the session layout needs locators, and only for plans stored outside
+        the partition named by their id.
+        """
+        if not self.layout.uses_plan_locators or plan.session_id == plan.id:
+            return
+        locator = PlanLocator(
+            id=plan.id,
+            session_id=plan.id,
+            plan_id=plan.plan_id,
+            plan_session_id=plan.session_id,
+        )
+        await self.update_item(locator)
 
     async def update_plan(self, plan: Plan) -> None:
         """Update a plan in CosmosDB."""
+        before = None
+        if self.plan_stats_enabled:
+            before = await self.get_plan_by_plan_id(plan.id)
         await self.update_item(plan)
+        self._remember_plan_partition(plan.id, self._partition_key_of(plan))
+        await self._apply_plan_stats(before, plan)
+
+    async def patch_plan(
+        self,
+        plan_id: str,
+        operations: List[Dict[str, Any]],
+        etag: Optional[str] = None,
+    ) -> Optional[Plan]:
+        """Patch a plan in place with a single request and no preceding read.
+
+        The partition key comes from the plan locator cache (or the layout); only
+        plans whose partition is not known need a lookup first. Patches of the
+        status or team read the plan first to update the plan statistics, and
+        apply the patch only if the plan is still the one read.
+        """
+        if not (self.plan_stats_enabled and touches_plan_stats(operations)):
+            return await self._patch_plan(plan_id, operations, etag)
+        for _ in range(PLAN_STATS_MAX_ATTEMPTS):
+            before = await self.get_plan_by_plan_id(plan_id)
+            if before is None:
+                return None
+            try:
+                after = await self._patch_plan(
+                    plan_id, operations, etag or before.etag
+                )
+            except PreconditionFailedError:
+                if etag is not None:
+                    raise
+                continue
+            if after is not None:
+                await self._apply_plan_stats(before, after)
+            return after
+        self.logger.error(
+            "Plan %s kept changing, patching it without updating plan statistics",
+            plan_id,
+        )
+        after = await self._patch_plan(plan_id, operations)
+        for plan in (before, after):
+            if plan is not None and plan.user_id:
+                await self._invalidate_plan_stats(plan.user_id)
+        return after
+
+    async def _patch_plan(
+        self,
+        plan_id: str,
+        operations: List[Dict[str, Any]],
+        etag: Optional[str] = None,
+    ) -> Optional[Plan]:
+        await self._ensure_initialized()
+        partition_key = await self._resolve_plan_partition(plan_id)
+        looked_up = partition_key is None
+        if looked_up:
+            plan = await self.get_plan_by_plan_id(plan_id)
+            if plan is None:
+                return None
+            partition_key = self._partition_key_of(plan)
+
+        conditions = {}
+        if etag is not None:
+            conditions = dict(etag=etag, match_condition=MatchConditions.IfNotModified)
+        try:
+            document = await self.container.patch_item(
+                item=plan_id,
+                partition_key=partition_key,
+                patch_operations=operations,
+                **conditions,
+            )
+        except CosmosAccessConditionFailedError as e:
+            raise PreconditionFailedError(f"Plan {plan_id} was modified") from e
+        except CosmosResourceNotFoundError:
+            self._forget_plan_partition(plan_id)
+            if looked_up or self.layout.uses_plan_locators:
+                return None
+            # The partition was derived from this view's user; look the plan up
+            plan = await self.get_plan_by_plan_id(plan_id)
+            if plan is None or self._partition_key_of(plan) == partition_key:
+                return None
+            self._remember_plan_partition(plan_id, self._partition_key_of(plan))
+            return await self._patch_plan(plan_id, operations, etag)
+        except CosmosHttpResponseError as e:
+            if e.status_code == 400:
+                raise ValueError(f"Invalid patch for plan {plan_id}: {e}") from e
+            raise
+        return Plan.model_validate(document)
 
     async def get_plan_by_plan_id(self, plan_id: str) -> Optional[Plan]:
-        """Retrieve a plan by plan_id."""
+        """Retrieve a plan by plan_id.
+
+        Uses a single-partition point read when the plan's partition key is known
+        from the in-process cache or the plan locator, and only falls back to a
+        cross-partition query when it is not.
+        """
+        partition_key = await self._resolve_plan_partition(plan_id)
+        if partition_key is not None:
+            try:
+                document = await self.container.read_item(
+                    item=plan_id, partition_key=partition_key
+                )
+                if document.get("data_type") == DataType.plan:
+                    return Plan.model_validate(document)
+            except CosmosResourceNotFoundError:
+                pass
+            except Exception as e:
+                self.logger.warning("Failed point read for plan %s: %s", plan_id, e)
+            self._forget_plan_partition(plan_id)
+
         query = "SELECT * FROM c WHERE c.id=@plan_id AND c.data_type=@data_type"
         parameters = [
             {"name": "@plan_id", "value": plan_id},
             {"name": "@data_type", "value": DataType.plan},
-            {"name": "@user_id", "value": self.user_id},
         ]
         results = await self.query_items(query, parameters, Plan)
-        return results[0] if results else None
+        if not results:
+            return None
+        self._remember_plan_partition(plan_id, self._partition_key_of(results[0]))
+        return results[0]
 
     async def get_plan(self, plan_id: str) -> Optional[Plan]:
         """Retrieve a plan by plan_id."""
@@ -207,7 +683,8 @@ class CosmosDBClient(DatabaseBase):
             {"name": "@user_id", "value": self.user_id},
             {"name": "@data_type", "value": DataType.plan},
         ]
-        return await self.query_items(query, parameters, Plan)
+        partition_key = self.layout.query_partition(DataType.plan, self.user_id)
+        return await self.query_items(query, parameters, Plan, partition_key)
 
     async def get_all_plans_by_team_id(self, team_id: str) -> List[Plan]:
         """Retrieve all plans for a specific team."""
@@ -217,7 +694,8 @@ class CosmosDBClient(DatabaseBase):
             {"name": "@team_id", "value": team_id},
             {"name": "@data_type", "value": DataType.plan},
         ]
-        return await self.query_items(query, parameters, Plan)
+        partition_key = self.layout.query_partition(DataType.plan, self.user_id)
+        return await self.query_items(query, parameters, Plan, partition_key)
 
     async def get_all_plans_by_team_id_status(
         self, user_id: str, team_id: str, status: str
@@ -230,12 +708,191 @@ class CosmosDBClient(DatabaseBase):
             {"name": "@data_type", "value": DataType.plan},
             {"name": "@status", "value": status},
         ]
-        return await self.query_items(query, parameters, Plan)
+        partition_key = self.layout.query_partition(DataType.plan, user_id)
+        return await self.query_items(query, parameters, Plan, partition_key)
+
+    async def get_plans_page_by_team_id_status(
+        self,
+        user_id: str,
+        team_id: str,
+        status: str,
+        page_size: int,
+        continuation_token: Optional[str] = None,
+    ) -> Tuple[List[Plan], Optional[str]]:
+        """Retrieve one page of plans for a team, newest first."""
+        query = "SELECT * FROM c WHERE c.team_id=@team_id AND c.data_type=@data_type and c.user_id=@user_id and c.overall_status=@status ORDER BY c._ts DESC"
+        parameters = [
+            {"name": "@user_id", "value": user_id},
+            {"name": "@team_id", "value": team_id},
+            {"name": "@data_type", "value": DataType.plan},
+            {"name": "@status", "value": status},
+        ]
+        return await self.query_page(
+            query,
+            parameters,
+            Plan,
+            page_size,
+            continuation_token,
+            self.layout.query_partition(DataType.plan, user_id),
+        )
+
+    async def get_plan_summaries_by_team_id_status(
+        self,
+        user_id: str,
+        team_id: str,
+        status: str,
+        page_size: Optional[int] = None,
+        continuation_token: Optional[str] = None,
+    ) -> Tuple[List[PlanSummary], Optional[str]]:
+        """Retrieve projected plan summaries for a team, newest first."""
+        query = (
+            f"SELECT {self.PLAN_SUMMARY_FIELDS} FROM c WHERE c.team_id=@team_id "
+            "AND c.data_type=@data_type and c.user_id=@user_id "
+            "and c.overall_status=@status ORDER BY c._ts DESC"
+        )
+        parameters = [
+            {"name": "@user_id", "value": user_id},
+            {"name": "@team_id", "value": team_id},
+            {"name": "@data_type", "value": DataType.plan},
+            {"name": "@status", "value": status},
+        ]
+        partition_key = self.layout.query_partition(DataType.plan, user_id)
+        if page_size is None and continuation_token is None:
+            summaries = await self.query_items(
+                query, parameters, PlanSummary, partition_key
+            )
+            return summaries, None
+        return await self.query_page(
+            query,
+            parameters,
+            PlanSummary,
+            page_size or 20,
+            continuation_token,
+            partition_key,
+        )
+
+    # Plan statistics
+    async def _apply_plan_stats(
+        self, before: Optional[Plan], after: Optional[Plan]
+    ) -> None:
+        """Apply the count changes of a plan write to its owners' statistics."""
+        if not self.plan_stats_enabled:
+            return
+        for user_id, changes in plan_status_changes(before, after).items():
+            await self._update_plan_stats(user_id, changes)
+
+    async def _read_plan_stats(self, user_id: str) -> Optional[PlanStats]:
+        empty = PlanStats.for_user(user_id)
+        try:
+            document = await self.container.read_item(
+                item=empty.id, partition_key=self._partition_key_of(empty)
+            )
+        except CosmosResourceNotFoundError:
+            return None
+        return PlanStats.model_validate(document)
+
+    async def _invalidate_plan_stats(self, user_id: str) -> None:
+        """Delete the statistics of a user whose counts may have drifted.
+
+        The next get_plan_stats rebuilds them from the plans.
+        """
+        empty = PlanStats.for_user(user_id)
+        try:
+            await self.container.delete_item(
+                item=empty.id, partition_key=self._partition_key_of(empty)
+            )
+        except CosmosResourceNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.error(
+                "Failed to invalidate plan statistics of %s, run "
+                "python -m common.database.plan_stats to repair them: %s",
+                user_id,
+                e,
+            )
+
+    async def _update_plan_stats(
+        self, user_id: str, changes: Dict[Tuple[str, str], int]
+    ) -> None:
+        """Read-modify-write the statistics of a user, retrying on ETag conflicts.
+
+        Failures are logged rather than raised, since the plan write has already
+        succeeded; the statistics are deleted so the next read rebuilds them.
+        """
+        await self._ensure_initialized()
+        try:
+            for _ in range(PLAN_STATS_MAX_ATTEMPTS):
+                stats = await self._read_plan_stats(user_id)
+                try:
+                    if stats is None:
+                        stats = PlanStats.for_user(user_id)
+                        stats.apply(changes)
+                        await self.container.create_item(body=self._document(stats))
+                    else:
+                        stats.apply(changes)
+                        await self.container.replace_item(
+                            item=stats.id,
+                            body=self._document(stats),
+                            etag=stats.etag,
+                            match_condition=MatchConditions.IfNotModified,
+                        )
+                    return
+                except (CosmosAccessConditionFailedError, CosmosResourceExistsError):
+                    continue
+            self.logger.error(
+                "Gave up updating plan statistics of %s after %d conflicts",
+                user_id,
+                PLAN_STATS_MAX_ATTEMPTS,
+            )
+        except Exception as e:
+            self.logger.error(
+                "Failed to update plan statistics of %s: %s", user_id, e
+            )
+        await self._invalidate_plan_stats(user_id)
+
+    async def get_plan_stats(self, user_id: Optional[str] = None) -> PlanStats:
+        """Return the plan statistics of a user with a single point read.
+
+        Without statistics maintenance the plans are recounted instead.
+        """
+        user_id = user_id or self.user_id
+        await self._ensure_initialized()
+        if not self.plan_stats_enabled:
+            return await self.rebuild_plan_stats(user_id)
+        stats = await self._read_plan_stats(user_id)
+        if stats is None:
+            return await self.rebuild_plan_stats(user_id)
+        return stats
+
+    async def rebuild_plan_stats(self, user_id: str) -> PlanStats:
+        """Recount the plans of a user and overwrite the user's plan statistics."""
+        await self._ensure_initialized()
+        query = (
+            "SELECT c.data_type, c.user_id, c.team_id, c.overall_status FROM c "
+            "WHERE c.data_type=@data_type AND c.user_id=@user_id"
+        )
+        parameters = [
+            {"name": "@data_type", "value": DataType.plan},
+            {"name": "@user_id", "value": user_id},
+        ]
+        stats = PlanStats.for_user(user_id)
+        changes: Dict[Tuple[str, str], int] = {}
+        async for document in self.iter_items(
+            query,
+            parameters,
+            partition_key=self.layout.query_partition(DataType.plan, user_id),
+        ):
+            key = plan_status_key(document)
+            if key is not None:
+                changes[key[1:]] = changes.get(key[1:], 0) + 1
+        stats.apply(changes)
+        await self.update_item(stats)
+        return stats
 
     # Step Operations
     async def add_step(self, step: Step) -> None:
         """Add a step to CosmosDB."""
-        await self.add_item(step)
+        await self._add_plan_child(step)
 
     async def update_step(self, step: Step) -> None:
         """Update a step in CosmosDB."""
@@ -243,12 +900,15 @@ class CosmosDBClient(DatabaseBase):
 
     async def get_steps_by_plan(self, plan_id: str) -> List[Step]:
         """Retrieve all steps for a plan."""
+        await self.flush_pending_writes(plan_id)
         query = "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.data_type=@data_type ORDER BY c.timestamp"
         parameters = [
             {"name": "@plan_id", "value": plan_id},
             {"name": "@data_type", "value": DataType.step},
         ]
-        return await self.query_items(query, parameters, Step)
+        # Steps share the plan's partition; plans without a locator fan out
+        partition_key = await self._resolve_plan_partition(plan_id)
+        return await self.query_items(query, parameters, Step, partition_key)
 
     async def get_step(self, step_id: str, session_id: str) -> Optional[Step]:
         """Retrieve a step by step_id and session_id."""
@@ -272,13 +932,7 @@ class CosmosDBClient(DatabaseBase):
         Returns:
             TeamConfiguration object or None if not found
         """
-        query = "SELECT * FROM c WHERE c.team_id=@team_id AND c.data_type=@data_type"
-        parameters = [
-            {"name": "@team_id", "value": team_id},
-            {"name": "@data_type", "value": DataType.team_config},
-        ]
-        teams = await self.query_items(query, parameters, TeamConfiguration)
-        return teams[0] if teams else None
+        return await self._get_team_cached(team_id)
 
     async def get_team_by_id(self, team_id: str) -> Optional[TeamConfiguration]:
         """Retrieve a specific team configuration by its document id.
@@ -289,13 +943,46 @@ class CosmosDBClient(DatabaseBase):
         Returns:
             TeamConfiguration object or None if not found
         """
+        return await self._get_team_cached(team_id)
+
+    async def _get_team_cached(self, team_id: str) -> Optional[TeamConfiguration]:
+        """Read a team configuration through the team cache."""
+        cache_key = ("team", team_id)
+        team = self.team_cache.get(cache_key)
+        if team is not None:
+            return team
+
         query = "SELECT * FROM c WHERE c.team_id=@team_id AND c.data_type=@data_type"
         parameters = [
             {"name": "@team_id", "value": team_id},
             {"name": "@data_type", "value": DataType.team_config},
         ]
-        teams = await self.query_items(query, parameters, TeamConfiguration)
-        return teams[0] if teams else None
+        teams = await self.query_items(
+            query,
+            parameters,
+            TeamConfiguration,
+            self.layout.query_partition(DataType.team_config),
+        )
+        team = teams[0] if teams else None
+        if team is not None:
+            self.team_cache.set(cache_key, team)
+        return team
+
+    def invalidate_team_cache(self) -> None:
+        """Drop all cached team configurations."""
+        self.team_cache.clear()
+
+    def handle_change(self, event: ChangeEvent) -> None:
+        """Drop cached state made stale by a change written by another replica."""
+        if event.data_type == DataType.team_config:
+            self.invalidate_team_cache()
+        elif event.data_type == DataType.plan and event.id:
+            self._forget_plan_partition(event.id)
+
+    async def open_lease_container(self, container_name: str) -> Any:
+        """Return the container holding change feed leases (partitioned by /id)."""
+        await self._ensure_initialized()
+        return await self._get_container(self.database, container_name)
 
     async def get_all_teams(self) -> List[TeamConfiguration]:
         """Retrieve all team configurations for a specific user.
@@ -306,13 +993,57 @@ class CosmosDBClient(DatabaseBase):
         Returns:
             List of TeamConfiguration objects
         """
+        cache_key = ("all_teams",)
+        teams = self.team_cache.get(cache_key)
+        if teams is not None:
+            return list(teams)
+
         query = "SELECT * FROM c WHERE c.data_type=@data_type ORDER BY c.created DESC"
         parameters = [
             {"name": "@data_type", "value": DataType.team_config},
         ]
-        teams = await self.query_items(query, parameters, TeamConfiguration)
+        teams = await self.query_items(
+            query,
+            parameters,
+            TeamConfiguration,
+            self.layout.query_partition(DataType.team_config),
+        )
+        self.team_cache.set(cache_key, list(teams))
+        for team in teams:
+            self.team_cache.set(("team", team.team_id), team)
         return teams
 
+    async def get_team_summaries(self) -> List[TeamSummary]:
+        """Retrieve projected summaries of all team configurations.
+
+        Built from the cached full team list when it is warm, otherwise read with
+        a projecting query.
+        """
+        teams = self.team_cache.get(("all_teams",))
+        if teams is not None:
+            return [TeamSummary.from_team(team) for team in teams]
+
+        cache_key = ("team_summaries",)
+        summaries = self.team_cache.get(cache_key)
+        if summaries is not None:
+            return list(summaries)
+
+        query = (
+            f"SELECT {self.TEAM_SUMMARY_FIELDS} FROM c "
+            "WHERE c.data_type=@data_type ORDER BY c.created DESC"
+        )
+        parameters = [
+            {"name": "@data_type", "value": DataType.team_config},
+        ]
+        summaries = await self.query_items(
+            query,
+            parameters,
+            TeamSummary,
+            self.layout.query_partition(DataType.team_config),
+        )
+        self.team_cache.set(cache_key, list(summaries))
+        return summaries
+
     async def delete_team(self, team_id: str) -> bool:
         """Delete a team configuration by team_id.
 
@@ -329,7 +1060,10 @@ class CosmosDBClient(DatabaseBase):
             team = await self.get_team(team_id)
             print(team)
             if team:
-                await self.delete_item(item_id=team.id, partition_key=team.session_id)
+                await self.delete_item(
+                    item_id=team.id, partition_key=self._partition_key_of(team)
+                )
+            self.invalidate_team_cache()
             return True
         except Exception as e:
             logging.exception(f"Failed to delete team from Cosmos DB: {e}")
@@ -346,7 +1080,8 @@ class CosmosDBClient(DatabaseBase):
 
         # Get the appropriate model class
         model_class = self.MODEL_CLASS_MAPPING.get(data_type, BaseDataModel)
-        return await self.query_items(query, parameters, model_class)
+        partition_key = self.layout.query_partition(data_type, self.user_id)
+        return await self.query_items(query, parameters, model_class, partition_key)
 
     async def get_all_items(self) -> List[Dict[str, Any]]:
         """Retrieve all items as dictionaries."""
@@ -355,12 +1090,7 @@ class CosmosDBClient(DatabaseBase):
             {"name": "@user_id", "value": self.user_id},
         ]
 
-        await self._ensure_initialized()
-        items = self.container.query_items(query=query, parameters=parameters)
-        results = []
-        async for item in items:
-            results.append(item)
-        return results
+        return [item async for item in self.iter_items(query, parameters)]
 
     # Collection Management (for compatibility)
 
@@ -375,7 +1105,10 @@ class CosmosDBClient(DatabaseBase):
         Args:
             team: The TeamConfiguration to add
         """
-        await self.add_item(team)
+        try:
+            await self.add_item(team)
+        finally:
+            self.invalidate_team_cache()
 
     async def update_team(self, team: TeamConfiguration) -> None:
         """Update an existing team configuration in Cosmos DB.
@@ -383,7 +1116,10 @@ class CosmosDBClient(DatabaseBase):
         Args:
             team: The TeamConfiguration to update
         """
-        await self.update_item(team)
+        try:
+            await self.update_item(team)
+        finally:
+            self.invalidate_team_cache()
 
     async def get_current_team(self, user_id: str) -> Optional[UserCurrentTeam]:
         """Retrieve the current team for a user."""
@@ -397,31 +1133,35 @@ class CosmosDBClient(DatabaseBase):
             {"name": "@user_id", "value": user_id},
         ]
 
-        # Get the appropriate model class
-        teams = await self.query_items(query, parameters, UserCurrentTeam)
+        teams = await self.query_items(
+            query,
+            parameters,
+            UserCurrentTeam,
+            self.layout.query_partition(DataType.user_current_team, user_id),
+        )
         return teams[0] if teams else None
 
     async def delete_current_team(self, user_id: str) -> bool:
         """Delete the current team for a user."""
-        query = "SELECT c.id, c.session_id FROM c WHERE c.user_id=@user_id AND c.data_type=@data_type"
-
+        await self._ensure_initialized()
+        query = (
+            f"SELECT {self.layout.key_fields} FROM c "
+            "WHERE c.user_id=@user_id AND c.data_type=@data_type"
+        )
         params = [
             {"name": "@user_id", "value": user_id},
             {"name": "@data_type", "value": DataType.user_current_team},
         ]
-        items = self.container.query_items(query=query, parameters=params)
-        print("Items to delete:", items)
-        if items:
-            async for doc in items:
-                try:
-                    await self.container.delete_item(
-                        doc["id"], partition_key=doc["session_id"]
-                    )
-                except Exception as e:
-                    self.logger.warning(
-                        "Failed deleting current team doc %s: %s", doc.get("id"), e
-                    )
-
+        scope = self._scope(
+            self.layout.query_partition(DataType.user_current_team, user_id)
+        )
+        documents = [
+            doc
+            async for doc in self.container.query_items(
+                query=query, parameters=params, **scope
+            )
+        ]
+        await self._delete_documents(documents, DeleteResult())
         return True
 
     async def set_current_team(self, current_team: UserCurrentTeam) -> None:
@@ -435,26 +1175,128 @@ class CosmosDBClient(DatabaseBase):
         await self.update_item(current_team)
 
     async def delete_plan_by_plan_id(self, plan_id: str) -> bool:
-        """Delete a plan by its ID."""
-        query = "SELECT c.id, c.session_id FROM c WHERE c.id=@plan_id "
+        """Delete a plan and every document that belongs to it.
 
-        params = [
-            {"name": "@plan_id", "value": plan_id},
-        ]
-        items = self.container.query_items(query=query, parameters=params)
-        print("Items to delete planid:", items)
-        if items:
-            async for doc in items:
-                try:
-                    await self.container.delete_item(
-                        doc["id"], partition_key=doc["session_id"]
-                    )
-                except Exception as e:
-                    self.logger.warning(
-                        "Failed deleting current team doc %s: %s", doc.get("id"), e
-                    )
+        Returns False when some of the plan's documents could not be deleted.
+        """
+        result = await self.delete_plan_cascade(plan_id)
+        return result.failed == 0
+
+    async def delete_plan_cascade(
+        self, plan_id: str, keep_plan: bool = False
+    ) -> DeleteResult:
+        """Delete a plan together with every document that references its plan_id.
+
+        Covers the plan, its locator, steps, agent messages and the MPlan. The
+        documents are grouped by partition key and removed with transactional
+        batches, at most ``delete_concurrency`` of them in flight at once. With
+        keep_plan, the plan and its locator are left in place.
+        """
+        started = time.perf_counter()
+        await self._ensure_initialized()
+        # Buffered messages of the plan would otherwise be written after the delete
+        await self.flush_pending_writes(plan_id)
+        plan = None
+        if not keep_plan:
+            if self.plan_stats_enabled:
+                plan = await self.get_plan_by_plan_id(plan_id)
+            self._forget_plan_partition(plan_id)
+
+        parameters = [{"name": "@plan_id", "value": plan_id}]
+        documents: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+        archive_key = None
+        # The plan locator only shares the plan's id; everything else has plan_id
+        for condition in ("c.id=@plan_id", "c.plan_id=@plan_id"):
+            query = (
+                f"SELECT {self.layout.key_fields}, c.archive_key FROM c "
+                f"WHERE {condition}"
+            )
+            async for doc in self.container.query_items(
+                query=query, parameters=parameters
+            ):
+                if keep_plan and doc["id"] == plan_id:
+                    continue
+                if doc["id"] == plan_id and doc.get("data_type") == DataType.plan:
+                    archive_key = doc.get("archive_key")
+                documents[(self.layout.partition_key(doc), doc["id"])] = doc
+
+        result = DeleteResult()
+        await self._delete_documents(documents.values(), result)
+        if result.deleted.get(DataType.plan.value):
+            await self._apply_plan_stats(plan, None)
+            result.archive_key = archive_key
+            await self._forget_archive(result)
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        self.logger.info(
+            "Deleted plan %s: %d documents in %d batches (%d failed) in %.1f ms",
+            plan_id,
+            result.total_deleted,
+            result.batches,
+            result.failed,
+            result.elapsed_ms,
+        )
+        return result
+
+    async def _delete_documents(
+        self, documents: Iterable[Dict[str, Any]], result: DeleteResult
+    ) -> None:
+        """Delete documents with one transactional batch per partition chunk."""
+        by_partition: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        for doc in documents:
+            by_partition[self.layout.partition_key(doc)].append(doc)
+        semaphore = asyncio.Semaphore(self.delete_concurrency)
+        size = MAX_TRANSACTIONAL_BATCH_SIZE
+
+        async def delete_chunk(partition_key: Any, chunk: List[Dict[str, Any]]):
+            async with semaphore:
+                await self._delete_chunk(partition_key, chunk, result)
+
+        await asyncio.gather(
+            *(
+                delete_chunk(partition_key, docs[start : start + size])
+                for partition_key, docs in by_partition.items()
+                for start in range(0, len(docs), size)
+            )
+        )
 
-        return True
+    async def _delete_chunk(
+        self, partition_key: Any, chunk: List[Dict[str, Any]], result: DeleteResult
+    ) -> None:
+        operations = [("delete", (doc["id"],)) for doc in chunk]
+        try:
+            await self.container.execute_item_batch(
+                batch_operations=operations, partition_key=partition_key
+            )
+            result.batches += 1
+            for doc in chunk:
+                result.record(doc.get("data_type"))
+            return
+        except CosmosBatchOperationError as e:
+            self.logger.warning(
+                "Delete batch failed at index %s for partition %s, "
+                "deleting documents individually: %s",
+                e.error_index,
+                partition_key,
+                e.message,
+            )
+        except Exception as e:
+            self.logger.warning(
+                "Delete batch failed for partition %s, "
+                "deleting documents individually: %s",
+                partition_key,
+                e,
+            )
+
+        for doc in chunk:
+            try:
+                await self.container.delete_item(doc["id"], partition_key=partition_key)
+                result.record(doc.get("data_type"))
+            except CosmosResourceNotFoundError:
+                # Already removed, e.g. by a concurrent delete of the same plan
+                continue
+            except Exception as e:
+                result.failed += 1
+                self.logger.warning("Failed deleting document %s: %s", doc["id"], e)
 
     async def add_mplan(self, mplan: messages.MPlan) -> None:
         """Add a team configuration to the database."""
@@ -476,7 +1318,7 @@ class CosmosDBClient(DatabaseBase):
 
     async def add_agent_message(self, message: AgentMessageData) -> None:
         """Add an agent message to the database."""
-        await self.add_item(message)
+        await self._add_plan_child(message)
 
     async def update_agent_message(self, message: AgentMessageData) -> None:
         """Update an agent message in the database."""
@@ -484,10 +1326,40 @@ class CosmosDBClient(DatabaseBase):
 
     async def get_agent_messages(self, plan_id: str) -> List[AgentMessageData]:
         """Retrieve an agent message by message_id."""
+        await self.flush_pending_writes(plan_id)
         query = "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.data_type=@data_type ORDER BY c._ts ASC"
         parameters = [
             {"name": "@plan_id", "value": plan_id},
             {"name": "@data_type", "value": DataType.m_plan_message},
         ]
-
-        return await self.query_items(query, parameters, AgentMessageData)
+        # Messages share the plan's partition; plans without a locator fan out
+        partition_key = await self._resolve_plan_partition(plan_id)
+        return await self.query_items(
+            query, parameters, AgentMessageData, partition_key
+        )
+
+    async def get_agent_messages_since(
+        self, plan_id: str, cursor: Optional[str] = None
+    ) -> Tuple[List[AgentMessageData], str]:
+        """Retrieve the agent messages of a plan written after a cursor."""
+        position = MessageCursor.decode(cursor)
+        await self.flush_pending_writes(plan_id)
+        query = (
+            "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.data_type=@data_type"
+            " AND c._ts >= @since ORDER BY c._ts ASC"
+        )
+        parameters = [
+            {"name": "@plan_id", "value": plan_id},
+            {"name": "@data_type", "value": DataType.m_plan_message},
+            {"name": "@since", "value": position.since_ts},
+        ]
+        # Messages share the plan's partition; plans without a locator fan out
+        partition_key = await self._resolve_plan_partition(plan_id)
+        documents = [
+            document
+            async for document in self.iter_items(
+                query, parameters, partition_key=partition_key
+            )
+        ]
+        documents, position = position.advance(documents)
+        return self._validate(documents, AgentMessageData), position.encode()
@@ -3,8 +3,23 @@
 
 # pylint: disable=unnecessary-pass
 
+import asyncio
+import base64
+import copy
+import json
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Type
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
 
 import v3.models.messages as messages
 
@@ -12,15 +27,126 @@ from ..models.messages_kernel import (
     AgentMessageData,
     BaseDataModel,
     Plan,
+    PlanStats,
+    PlanSummary,
     Step,
     TeamConfiguration,
+    TeamSummary,
     UserCurrentTeam,
 )
+from .message_codec import MessageCodec, decode_message
+from .serialization import to_document
+from .trusted_read import is_current, stamp, validate_all
+
+
+@dataclass
+class DeleteResult:
+    """Outcome of a multi-document delete such as a plan cascade."""
+
+    deleted: Dict[str, int] = field(default_factory=dict)
+    failed: int = 0
+    batches: int = 0
+    elapsed_ms: float = 0.0
+    # Archive blob of the deleted plan, when it had been archived
+    archive_key: Optional[str] = None
+
+    @property
+    def total_deleted(self) -> int:
+        """Number of documents deleted across all data types."""
+        return sum(self.deleted.values())
+
+    def record(self, data_type: Optional[str]) -> None:
+        """Count one deleted document of the given data type."""
+        key = data_type or "unknown"
+        self.deleted[key] = self.deleted.get(key, 0) + 1
+
+
+@dataclass
+class PlanBundle:
+    """A plan with the team and agent messages needed to open it."""
+
+    plan: Plan
+    team: Optional[TeamConfiguration] = None
+    messages: List[AgentMessageData] = field(default_factory=list)
+    # Token to pass as since to fetch only the messages written after these
+    messages_cursor: Optional[str] = None
+
+
+# Messages whose _ts is this many seconds before the newest one read are read
+# again (and skipped by id), so writes that committed late are not missed
+MESSAGE_CURSOR_OVERLAP_SECONDS = 5
+
+
+@dataclass
+class MessageCursor:
+    """Position in the agent messages of a plan, handed to clients as a token.
+
+    ``_ts`` has a resolution of one second and writes are not committed in
+    ``_ts`` order, so the cursor holds the newest ``_ts`` read and the ids of
+    the messages read from the overlap window before it.
+    """
+
+    ts: int = 0
+    seen: List[str] = field(default_factory=list)
+
+    @property
+    def since_ts(self) -> int:
+        """Smallest _ts a message not read yet can have."""
+        return max(0, self.ts - MESSAGE_CURSOR_OVERLAP_SECONDS) if self.ts else 0
+
+    @classmethod
+    def decode(cls, token: Optional[str]) -> "MessageCursor":
+        """Parse a token returned by encode; None or "" is the start of the plan.
+
+        Raises:
+            ValueError: If the token is not a message cursor
+        """
+        if not token:
+            return cls()
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+            cursor = cls(ts=data["ts"], seen=data["seen"])
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError("Invalid message cursor") from e
+        if not isinstance(cursor.ts, int) or not isinstance(cursor.seen, list):
+            raise ValueError("Invalid message cursor")
+        return cursor
+
+    def encode(self) -> str:
+        payload = json.dumps({"ts": self.ts, "seen": self.seen}).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii")
+
+    def advance(
+        self, documents: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], "MessageCursor"]:
+        """Split message documents with _ts >= since_ts, ordered by _ts.
+
+        Returns the documents not read before and the cursor after them.
+        """
+        seen = set(self.seen)
+        new = [doc for doc in documents if doc.get("id") not in seen]
+        ts = max([self.ts] + [doc.get("_ts", 0) for doc in documents])
+        window = ts - MESSAGE_CURSOR_OVERLAP_SECONDS
+        # The next read starts at the window, which these documents cover
+        seen = [doc["id"] for doc in documents if doc.get("_ts", 0) >= window]
+        return new, MessageCursor(ts=ts, seen=seen)
+
+
+class PreconditionFailedError(Exception):
+    """Raised when a conditional write finds the document changed since it was read."""
 
 
 class DatabaseBase(ABC):
     """Abstract base class for database operations."""
 
+    # Compact encoding of agent messages on write; None stores them as they are
+    message_codec: Optional[MessageCodec] = None
+    # Stamp documents with their schema version and validate pages of current
+    # documents in one call (see trusted_read)
+    trusted_reads: bool = False
+    # Deletes the archive blob of a deleted plan (see archive); None keeps it
+    archive_forgetter: Optional[Callable[[str], Awaitable[None]]] = None
+
     @abstractmethod
     async def initialize(self) -> None:
         """Initialize the database client and create containers if needed."""
@@ -59,6 +185,22 @@ class DatabaseBase(ABC):
         """Query items from the database and return a list of model instances."""
         pass
 
+    @abstractmethod
+    def iter_items(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        model_class: Optional[Type[BaseDataModel]] = None,
+        page_size: Optional[int] = None,
+    ) -> AsyncIterator[Any]:
+        """Stream the results of a query one page at a time.
+
+        Yields model instances, or the raw documents when model_class is None.
+        Each page is validated as it arrives and the next page is only fetched
+        once the caller has consumed the current one.
+        """
+        pass
+
     @abstractmethod
     async def delete_item(self, item_id: str, partition_key: str) -> None:
         """Delete an item from the database."""
@@ -75,6 +217,25 @@ class DatabaseBase(ABC):
         """Update a plan in the database."""
         pass
 
+    @abstractmethod
+    async def patch_plan(
+        self,
+        plan_id: str,
+        operations: List[Dict[str, Any]],
+        etag: Optional[str] = None,
+    ) -> Optional[Plan]:
+        """Apply Cosmos DB patch operations to a plan without reading it first.
+
+        Returns the updated plan, or None when the plan does not exist. With an
+        etag (e.g. ``plan.etag`` from an earlier read) the patch only applies if
+        the plan has not changed since.
+
+        Raises:
+            PreconditionFailedError: If etag no longer matches the stored plan
+            ValueError: If the operations are invalid
+        """
+        pass
+
     @abstractmethod
     async def get_plan_by_plan_id(self, plan_id: str) -> Optional[Plan]:
         """Retrieve a plan by plan_id."""
@@ -102,6 +263,30 @@ class DatabaseBase(ABC):
         """Retrieve all plans for a specific team."""
         pass
 
+    @abstractmethod
+    async def get_plans_page_by_team_id_status(
+        self,
+        user_id: str,
+        team_id: str,
+        status: str,
+        page_size: int,
+        continuation_token: Optional[str] = None,
+    ) -> Tuple[List[Plan], Optional[str]]:
+        """Retrieve one page of plans for a team and the token for the next page."""
+        pass
+
+    @abstractmethod
+    async def get_plan_summaries_by_team_id_status(
+        self,
+        user_id: str,
+        team_id: str,
+        status: str,
+        page_size: Optional[int] = None,
+        continuation_token: Optional[str] = None,
+    ) -> Tuple[List[PlanSummary], Optional[str]]:
+        """Retrieve plan summaries for a team, optionally one page at a time."""
+        pass
+
     # Step Operations
     @abstractmethod
     async def add_step(self, step: Step) -> None:
@@ -149,6 +334,11 @@ class DatabaseBase(ABC):
         """Retrieve all team configurations for the given user."""
         pass
 
+    @abstractmethod
+    async def get_team_summaries(self) -> List[TeamSummary]:
+        """Retrieve summaries of all team configurations."""
+        pass
+
     @abstractmethod
     async def delete_team(self, team_id: str) -> bool:
         """Delete a team configuration by team_id and return True if deleted."""
@@ -165,6 +355,100 @@ class DatabaseBase(ABC):
         """Retrieve all items as dictionaries."""
         pass
 
+    def _to_document(self, item: BaseDataModel) -> Dict[str, Any]:
+        """Convert a model to a stored document, serializing datetimes."""
+        document = to_document(item)
+        if self.trusted_reads:
+            stamp(document, type(item))
+        if self.message_codec is not None and isinstance(item, AgentMessageData):
+            document = self.message_codec.encode(document)
+        return document
+
+    def _validate(
+        self, documents: List[Dict[str, Any]], model_class: Type[BaseDataModel]
+    ) -> List[BaseDataModel]:
+        """Validate documents into models, skipping and logging invalid ones.
+
+        Agent messages stored in the compact encoding are decoded first. With
+        trusted reads, documents all written by the current model are validated
+        in a single call.
+        """
+        if self.trusted_reads and all(
+            is_current(document, model_class) for document in documents
+        ):
+            try:
+                return validate_all(documents, model_class)
+            except Exception:
+                pass  # Validate one by one to skip only the invalid documents
+        result_list = []
+        for document in documents:
+            try:
+                document = decode_message(document)
+                result_list.append(model_class.model_validate(document))
+            except Exception as validation_error:
+                self.logger.warning(
+                    "Failed to validate item: %s", str(validation_error)
+                )
+        return result_list
+
+    def for_user(self, user_id: str) -> "DatabaseBase":
+        """Return a view of this database scoped to user_id.
+
+        The view shares connections and caches with this instance; implementations
+        that hold no shared resources can return a plain copy.
+        """
+        view = copy.copy(self)
+        view.user_id = user_id
+        return view
+
+    async def _forget_archive(self, result: DeleteResult) -> None:
+        """Delete the archive blob of a deleted plan through archive_forgetter."""
+        if not result.archive_key or self.archive_forgetter is None:
+            return
+        try:
+            await self.archive_forgetter(result.archive_key)
+        except Exception as e:
+            self.logger.warning(
+                "Failed to delete archive blob %s: %s", result.archive_key, e
+            )
+
+    async def flush_pending_writes(self, plan_id: Optional[str] = None) -> None:
+        """Flush buffered writes; a no-op for implementations that write immediately."""
+        pass
+
+    async def write_plan_locator(self, plan: Plan) -> None:
+        """Write the lookup document of a stored plan; a no-op where none is needed."""
+        pass
+
+    async def get_plan_bundle(
+        self, plan_id: str, since: Optional[str] = None
+    ) -> Optional[PlanBundle]:
+        """Load a plan with its team and agent messages, or None without the plan.
+
+        The messages query runs concurrently with the plan read, and the team is
+        read (through the team cache where there is one) as soon as the plan's
+        team_id is known, so opening a plan waits for two round trips at most.
+        With a since cursor only the messages written after it are loaded.
+
+        Raises:
+            ValueError: If since is not a message cursor
+        """
+
+        async def plan_and_team():
+            plan = await self.get_plan_by_plan_id(plan_id)
+            if plan is None or not plan.team_id:
+                return plan, None
+            return plan, await self.get_team_by_id(plan.team_id)
+
+        (plan, team), (messages, cursor) = await asyncio.gather(
+            plan_and_team(), self.get_agent_messages_since(plan_id, since)
+        )
+        if plan is None:
+            return None
+        return PlanBundle(
+            plan=plan, team=team, messages=messages, messages_cursor=cursor
+        )
+
     # Context Manager Support
     async def __aenter__(self):
         """Async context manager entry."""
@@ -204,6 +488,29 @@ class DatabaseBase(ABC):
         """Retrieve the current team for a user."""
         pass
 
+    @abstractmethod
+    async def delete_plan_cascade(
+        self, plan_id: str, keep_plan: bool = False
+    ) -> DeleteResult:
+        """Delete a plan together with every document that references its plan_id.
+
+        With keep_plan, only the plan's documents are deleted and the plan stays.
+        """
+        pass
+
+    @abstractmethod
+    async def get_plan_stats(self, user_id: Optional[str] = None) -> PlanStats:
+        """Return the plan statistics of a user (the view's user by default).
+
+        Statistics that were never written are built from the user's plans.
+        """
+        pass
+
+    @abstractmethod
+    async def rebuild_plan_stats(self, user_id: str) -> PlanStats:
+        """Recount the plans of a user and overwrite the user's plan statistics."""
+        pass
+
     @abstractmethod
     async def add_mplan(self, mplan: messages.MPlan) -> None:
         """Add a team configuration to the database."""
@@ -232,3 +539,17 @@ class DatabaseBase(ABC):
     async def get_agent_messages(self, plan_id: str) -> Optional[AgentMessageData]:
         """Retrieve an agent message by message_id."""
         pass
+
+    @abstractmethod
+    async def get_agent_messages_since(
+        self, plan_id: str, cursor: Optional[str] = None
+    ) -> Tuple[List[AgentMessageData], str]:
+        """Retrieve the agent messages of a plan written after a cursor.
+
+        Returns the messages in the order they were written and the cursor to
+        pass next time; without a cursor every message is returned.
+
+        Raises:
+            ValueError: If cursor is not a message cursor
+        """
+        pass
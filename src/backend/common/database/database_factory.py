@@ -1,64 +1,238 @@
 """Database factory for creating database instances."""
 
+import asyncio
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from common.config.app_config import config
 
+from .archive import BlobArchiveStore, LocalArchiveStore, PlanArchiver
+from .change_feed import (
+    COHERENT_DATA_TYPES,
+    ChangeFeedConsumer,
+    ChangeHandler,
+    ContainerLeaseStore,
+)
 from .cosmosdb import CosmosDBClient
 from .database_base import DatabaseBase
+from .in_memory_cosmos import InMemoryDBClient
+from .message_codec import MessageCodec
+from .sqlite_db import SQLiteDBClient
 
 
 class DatabaseFactory:
-    """Factory class for creating database instances."""
+    """Factory class for creating database instances.
+
+    The backend is selected with DATABASE_BACKEND. The factory owns one
+    initialized client per process; callers receive cheap user-scoped views of
+    it that share its connection pool, container proxy and caches.
+    """
 
     _instance: Optional[DatabaseBase] = None
+    _lock: Optional[asyncio.Lock] = None
+    _change_feed: Optional[ChangeFeedConsumer] = None
+    _archive: Optional[PlanArchiver] = None
     _logger = logging.getLogger(__name__)
 
+    @staticmethod
+    def _create_client() -> DatabaseBase:
+        client = DatabaseFactory._create_backend()
+        # Deleting an archived plan also deletes its blob from the archive store
+        client.archive_forgetter = DatabaseFactory._forget_archive
+        return client
+
+    @staticmethod
+    def _create_backend() -> DatabaseBase:
+        backend = config.DATABASE_BACKEND.lower()
+        if backend == "sqlite":
+            return SQLiteDBClient(
+                database_path=config.SQLITE_DATABASE_PATH,
+                reader_pool_size=config.SQLITE_READER_POOL_SIZE,
+                plan_stats_enabled=config.PLAN_STATS_ENABLED,
+                message_codec=DatabaseFactory._message_codec(),
+                trusted_reads=config.TRUSTED_READS_ENABLED,
+            )
+        if backend == "memory":
+            return InMemoryDBClient(**DatabaseFactory._cosmos_options())
+        if backend != "cosmosdb":
+            raise ValueError(
+                f"Unsupported DATABASE_BACKEND '{config.DATABASE_BACKEND}'"
+            )
+        return CosmosDBClient(
+            endpoint=config.COSMOSDB_ENDPOINT,
+            credential=config.get_azure_credentials(),
+            database_name=config.COSMOSDB_DATABASE,
+            container_name=config.COSMOSDB_CONTAINER,
+            connection_limit=config.COSMOSDB_CONNECTION_LIMIT,
+            connection_limit_per_host=config.COSMOSDB_CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=config.COSMOSDB_KEEPALIVE_SECONDS,
+            **DatabaseFactory._cosmos_options(),
+        )
+
+    @staticmethod
+    def _cosmos_options() -> Dict[str, Any]:
+        """Client options shared by the Cosmos DB and in-memory backends."""
+        return dict(
+            session_id="",
+            user_id="",
+            write_behind_enabled=config.COSMOSDB_WRITE_BEHIND_ENABLED,
+            write_behind_batch_size=config.COSMOSDB_WRITE_BEHIND_BATCH_SIZE,
+            write_behind_flush_interval=(
+                config.COSMOSDB_WRITE_BEHIND_FLUSH_INTERVAL_MS / 1000
+            ),
+            write_behind_max_queue=config.COSMOSDB_WRITE_BEHIND_MAX_QUEUE,
+            team_cache_ttl=config.TEAM_CACHE_TTL_SECONDS,
+            team_cache_max_entries=config.TEAM_CACHE_MAX_ENTRIES,
+            delete_concurrency=config.COSMOSDB_DELETE_CONCURRENCY,
+            slow_operation_ms=config.COSMOSDB_SLOW_OPERATION_MS or None,
+            write_concurrency=config.COSMOSDB_WRITE_CONCURRENCY,
+            write_concurrency_max=config.COSMOSDB_WRITE_CONCURRENCY_MAX,
+            throttle_max_wait=config.COSMOSDB_THROTTLE_MAX_WAIT_SECONDS,
+            partition_layout=config.COSMOSDB_PARTITION_LAYOUT,
+            single_flight_enabled=config.COSMOSDB_SINGLE_FLIGHT_ENABLED,
+            plan_stats_enabled=config.PLAN_STATS_ENABLED,
+            message_codec=DatabaseFactory._message_codec(),
+            trusted_reads=config.TRUSTED_READS_ENABLED,
+        )
+
+    @staticmethod
+    def _message_codec() -> Optional[MessageCodec]:
+        """Compact agent message encoding, or None when it is disabled."""
+        if not config.MESSAGE_COMPACT_ENABLED:
+            return None
+        return MessageCodec(
+            compression=config.MESSAGE_COMPRESSION,
+            threshold=config.MESSAGE_COMPRESSION_THRESHOLD_BYTES,
+        )
+
+    @staticmethod
+    async def _get_shared_instance() -> DatabaseBase:
+        """Create and initialize the process-wide client once."""
+        if DatabaseFactory._instance is not None:
+            return DatabaseFactory._instance
+        if DatabaseFactory._lock is None:
+            DatabaseFactory._lock = asyncio.Lock()
+        async with DatabaseFactory._lock:
+            if DatabaseFactory._instance is None:
+                client = DatabaseFactory._create_client()
+                await client.initialize()
+                DatabaseFactory._instance = client
+                DatabaseFactory._logger.info("Initialized shared database client")
+        return DatabaseFactory._instance
+
     @staticmethod
     async def get_database(
         user_id: str = "",
         force_new: bool = False,
     ) -> DatabaseBase:
         """
-        Get a database instance.
+        Get a database instance scoped to a user.
 
         Args:
-            endpoint: CosmosDB endpoint URL
-            credential: Azure credential for authentication
-            database_name: Name of the CosmosDB database
-            container_name: Name of the CosmosDB container
-            session_id: Session ID for partitioning
             user_id: User ID for data isolation
-            force_new: Force creation of new instance
+            force_new: Create a standalone client with its own connection pool
+                instead of a view of the shared one; the caller must close it
 
         Returns:
             DatabaseBase: Database instance
         """
+        if force_new:
+            client = DatabaseFactory._create_client()
+            client.user_id = user_id
+            await client.initialize()
+            return client
 
-        # Create new instance if forced or if singleton doesn't exist
-        if force_new or DatabaseFactory._instance is None:
-            cosmos_db_client = CosmosDBClient(
-                endpoint=config.COSMOSDB_ENDPOINT,
-                credential=config.get_azure_credentials(),
-                database_name=config.COSMOSDB_DATABASE,
-                container_name=config.COSMOSDB_CONTAINER,
-                session_id="",
-                user_id=user_id,
-            )
+        shared = await DatabaseFactory._get_shared_instance()
+        return shared.for_user(user_id)
 
-            await cosmos_db_client.initialize()
+    @staticmethod
+    async def start_cache_coherence(
+        *handlers: ChangeHandler,
+    ) -> Optional[ChangeFeedConsumer]:
+        """Invalidate in-process caches from the change feed of the shared client.
 
-            if not force_new:
-                DatabaseFactory._instance = cosmos_db_client
+        The shared client's own caches are always subscribed; ``handlers`` receive
+        the same team configuration, current-team and plan changes. Returns None
+        for backends without a change feed (SQLite runs on a single node).
+        """
+        if DatabaseFactory._change_feed is not None:
+            return DatabaseFactory._change_feed
+        shared = await DatabaseFactory._get_shared_instance()
+        if not isinstance(shared, CosmosDBClient):
+            return None
 
-            return cosmos_db_client
+        lease_container = await shared.open_lease_container(
+            config.COSMOSDB_LEASE_CONTAINER
+        )
+        consumer = ChangeFeedConsumer(
+            shared.container,
+            ContainerLeaseStore(lease_container),
+            owner=config.REPLICA_NAME,
+            poll_interval=config.CACHE_COHERENCE_POLL_SECONDS,
+        )
+        for handler in (shared.handle_change, *handlers):
+            consumer.subscribe(COHERENT_DATA_TYPES, handler)
+        consumer.start()
+        DatabaseFactory._change_feed = consumer
+        DatabaseFactory._logger.info(
+            "Started change feed cache coherence as %s", config.REPLICA_NAME
+        )
+        return consumer
 
-        return DatabaseFactory._instance
+    @staticmethod
+    async def get_plan_archive() -> PlanArchiver:
+        """Return the process-wide archive of completed plans.
+
+        Reading archived plans works whether or not ARCHIVE_ENABLED starts the
+        background archiving.
+        """
+        if DatabaseFactory._archive is None:
+            shared = await DatabaseFactory._get_shared_instance()
+            if config.ARCHIVE_BLOB_ACCOUNT_URL:
+                store = BlobArchiveStore(
+                    config.ARCHIVE_BLOB_ACCOUNT_URL,
+                    config.ARCHIVE_BLOB_CONTAINER,
+                    config.get_azure_credentials(),
+                )
+            else:
+                store = LocalArchiveStore(config.ARCHIVE_STORAGE_PATH)
+            DatabaseFactory._archive = PlanArchiver(
+                shared,
+                store,
+                archive_after_days=config.ARCHIVE_AFTER_DAYS,
+                batch_size=config.ARCHIVE_BATCH_SIZE,
+                interval=config.ARCHIVE_INTERVAL_SECONDS,
+                cache_max_entries=config.ARCHIVE_CACHE_MAX_ENTRIES,
+            )
+        return DatabaseFactory._archive
+
+    @staticmethod
+    async def _forget_archive(key: str) -> None:
+        """Delete an archive blob; the archive is only built for archived plans."""
+        archive = await DatabaseFactory.get_plan_archive()
+        await archive.forget(key)
+
+    @staticmethod
+    async def start_archiver() -> PlanArchiver:
+        """Start moving completed plans to cold storage in the background."""
+        archive = await DatabaseFactory.get_plan_archive()
+        archive.start()
+        DatabaseFactory._logger.info(
+            "Started archiving plans completed over %s days ago",
+            config.ARCHIVE_AFTER_DAYS,
+        )
+        return archive
 
     @staticmethod
     async def close_all():
         """Close all database connections."""
+        if DatabaseFactory._archive:
+            await DatabaseFactory._archive.stop()
+            DatabaseFactory._archive = None
+        if DatabaseFactory._change_feed:
+            await DatabaseFactory._change_feed.stop()
+            DatabaseFactory._change_feed = None
         if DatabaseFactory._instance:
             await DatabaseFactory._instance.close()
             DatabaseFactory._instance = None
+        DatabaseFactory._lock = None
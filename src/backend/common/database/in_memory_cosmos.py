@@ -0,0 +1,931 @@
+"""In-memory stand-in for a Cosmos DB container with a request-unit cost model.
+
+``InMemoryContainer`` implements the part of the ``azure.cosmos.aio`` container
+API that ``CosmosDBClient`` uses, so the client's real query patterns can be run
+and costed offline. Documents live in logical partitions with a hash index per
+partition on every top-level scalar field; logical partitions are hashed onto a
+fixed number of physical partitions to model cross-partition fan-out. Containers
+with several partition key paths model hierarchical (MultiHash) partition keys:
+keys are tuples, queries may pass a prefix, and all keys sharing a first level
+are placed on the same physical partition.
+
+Request charges and latencies are approximations for comparing query patterns,
+not a reproduction of the service's billing. With ``provisioned_throughput`` set,
+requests beyond the provisioned RU/s are rejected with 429 and a retry-after
+delay, like a throttled container.
+"""
+
+import asyncio
+import base64
+import copy
+import hashlib
+import itertools
+import json
+import math
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosBatchOperationError,
+    CosmosHttpResponseError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError,
+)
+
+from .cosmos_patch import apply_patch
+from .cosmos_query import get_path, is_missing, parameter_map, parse_query
+from .cosmosdb import CosmosDBClient
+
+REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+REQUEST_DURATION_HEADER = "x-ms-request-duration-ms"
+ITEM_COUNT_HEADER = "x-ms-item-count"
+ETAG_HEADER = "etag"
+RETRY_AFTER_HEADER = "x-ms-retry-after-ms"
+
+DEFAULT_PAGE_SIZE = 100
+
+
+@dataclass
+class RequestChargeModel:
+    """Approximate request-unit charges of Cosmos DB operations.
+
+    Follows the published rules of thumb: a 1 KB point read costs 1 RU, a 1 KB
+    write about 5.5 RU with default indexing, and a query pays a base charge, a
+    penalty for every extra physical partition it fans out to, and the work of
+    loading, scanning and returning documents.
+    """
+
+    point_read_per_kb: float = 1.0
+    write_per_kb: float = 5.5
+    delete_per_kb: float = 5.0
+    query_base: float = 2.3
+    cross_partition_penalty: float = 1.0
+    query_per_document_loaded: float = 0.03
+    query_per_document_scanned: float = 0.1
+    query_per_kb_returned: float = 0.25
+
+    @staticmethod
+    def _kb(size_bytes: int) -> int:
+        return max(1, math.ceil(size_bytes / 1024))
+
+    def point_read(self, size_bytes: int) -> float:
+        return round(self._kb(size_bytes) * self.point_read_per_kb, 2)
+
+    def write(self, size_bytes: int) -> float:
+        return round(self._kb(size_bytes) * self.write_per_kb, 2)
+
+    def delete(self, size_bytes: int) -> float:
+        return round(self._kb(size_bytes) * self.delete_per_kb, 2)
+
+    def query(
+        self,
+        physical_partitions: int,
+        documents_loaded: int,
+        documents_scanned: int,
+        bytes_returned: int,
+    ) -> float:
+        charge = (
+            self.query_base
+            + max(0, physical_partitions - 1) * self.cross_partition_penalty
+            + documents_loaded * self.query_per_document_loaded
+            + documents_scanned * self.query_per_document_scanned
+            + bytes_returned / 1024 * self.query_per_kb_returned
+        )
+        return round(charge, 2)
+
+
+@dataclass
+class LatencyModel:
+    """Approximate server-side latency of Cosmos DB operations.
+
+    With ``simulate=True`` every operation also sleeps for its modeled latency.
+    """
+
+    point_read_ms: float = 1.0
+    write_ms: float = 4.0
+    query_ms: float = 2.5
+    per_partition_ms: float = 1.5
+    per_kb_ms: float = 0.02
+    simulate: bool = False
+
+    def latency(
+        self, base_ms: float, size_bytes: int = 0, partitions: int = 1
+    ) -> float:
+        latency = (
+            base_ms
+            + max(0, partitions - 1) * self.per_partition_ms
+            + size_bytes / 1024 * self.per_kb_ms
+        )
+        return round(latency, 3)
+
+
+@dataclass
+class OperationTotals:
+    """Accumulated cost of one kind of operation."""
+
+    count: int = 0
+    request_charge: float = 0.0
+    duration_ms: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "request_charge": round(self.request_charge, 2),
+            "duration_ms": round(self.duration_ms, 3),
+        }
+
+
+@dataclass
+class _StoredDocument:
+    body: Dict[str, Any]
+    size: int
+    sequence: int
+
+
+class _ClientConnection:
+    """Exposes the headers of the last response like the SDK's client connection."""
+
+    def __init__(self):
+        self.last_response_headers: Dict[str, str] = {}
+
+
+@dataclass
+class _QueryPlan:
+    """Result of evaluating a query once; pages are sliced from it."""
+
+    documents: List[Dict[str, Any]]
+    physical_partitions: int
+    documents_loaded: int
+    documents_scanned: int
+    fingerprint: str
+    pages_served: int = field(default=0)
+
+
+class _Page:
+    def __init__(self, items: List[Dict[str, Any]]):
+        self._items = iter(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._items)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _QueryPager:
+    """Page iterator with ``continuation_token`` like the SDK's ``by_page``."""
+
+    def __init__(self, query: "_QueryResult", token: Optional[str]):
+        self._query = query
+        self._offset: Optional[int] = None
+        self._done = False
+        self.continuation_token = token
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._done:
+            raise StopAsyncIteration
+        if self._offset is None:
+            # Like the SDK, an invalid token only fails once the first page is fetched
+            self._offset = self._query.decode_token(self.continuation_token)
+        items, self._offset = await self._query.fetch_page(self._offset)
+        if self._offset is None:
+            self._done = True
+            self.continuation_token = None
+        else:
+            self.continuation_token = self._query.encode_token(self._offset)
+        return _Page(items)
+
+
+class _QueryResult:
+    """Lazily evaluated query result mimicking the SDK's ``AsyncItemPaged``."""
+
+    def __init__(
+        self,
+        container: "InMemoryContainer",
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]],
+        partition_key: Any,
+        page_size: int,
+        response_hook: Optional[Callable],
+    ):
+        self._container = container
+        self._query = query
+        self._parameters = parameters
+        self._partition_key = partition_key
+        self._page_size = page_size
+        self._response_hook = response_hook
+        self._plan: Optional[_QueryPlan] = None
+
+    def _evaluate(self) -> _QueryPlan:
+        if self._plan is None:
+            self._plan = self._container._evaluate_query(
+                self._query, self._parameters, self._partition_key
+            )
+        return self._plan
+
+    def encode_token(self, offset: int) -> str:
+        payload = {"offset": offset, "query": self._evaluate().fingerprint}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode("ascii")
+
+    def decode_token(self, token: Optional[str]) -> int:
+        if not token:
+            return 0
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+            offset = payload["offset"]
+            valid = payload["query"] == self._evaluate().fingerprint
+        except (ValueError, TypeError, KeyError):
+            valid = False
+        if not valid or not isinstance(offset, int) or offset < 0:
+            raise CosmosHttpResponseError(
+                status_code=400, message="Invalid continuation token"
+            )
+        return offset
+
+    async def fetch_page(
+        self, offset: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        self._container._admit()
+        plan = self._evaluate()
+        items = plan.documents[offset : offset + self._page_size]
+        next_offset = offset + len(items)
+        returned_bytes = sum(len(json.dumps(item)) for item in items)
+        first_page = plan.pages_served == 0
+        plan.pages_served += 1
+
+        model = self._container.charge_model
+        charge = model.query(
+            plan.physical_partitions,
+            plan.documents_loaded if first_page else 0,
+            plan.documents_scanned if first_page else 0,
+            returned_bytes,
+        )
+        latency = self._container.latency_model.latency(
+            self._container.latency_model.query_ms,
+            returned_bytes,
+            plan.physical_partitions,
+        )
+        await self._container._complete(
+            "query", charge, latency, self._response_hook, items, len(items)
+        )
+        if next_offset >= len(plan.documents):
+            return [copy.deepcopy(item) for item in items], None
+        return [copy.deepcopy(item) for item in items], next_offset
+
+    def by_page(self, continuation_token: Optional[str] = None) -> _QueryPager:
+        return _QueryPager(self, continuation_token)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        async for page in self.by_page():
+            async for item in page:
+                yield item
+
+
+def _change_feed_position(token: str) -> int:
+    try:
+        return int(str(token).strip('"'))
+    except ValueError:
+        raise CosmosHttpResponseError(
+            status_code=400, message="Invalid continuation token"
+        )
+
+
+class _ChangeFeedPager:
+    """Page iterator over the change feed; stops once no further changes exist."""
+
+    def __init__(self, feed: "_ChangeFeedResult", position: int):
+        self._feed = feed
+        self._position = position
+        self.continuation_token = str(position)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        container = self._feed.container
+        changed = container._changes_after(
+            self._position, self._feed.partition_key, self._feed.page_size
+        )
+        if changed:
+            self._position = changed[-1].sequence
+        self.continuation_token = str(self._position)
+        size = sum(stored.size for stored in changed)
+        await container._complete(
+            "change_feed",
+            container.charge_model.point_read(size),
+            container.latency_model.latency(container.latency_model.query_ms, size),
+            self._feed.response_hook,
+            [stored.body for stored in changed],
+            len(changed),
+            etag=self.continuation_token,
+        )
+        if not changed:
+            raise StopAsyncIteration
+        return _Page([copy.deepcopy(stored.body) for stored in changed])
+
+
+class _ChangeFeedResult:
+    """Change feed iterable mimicking the SDK's ``AsyncItemPaged``."""
+
+    def __init__(
+        self,
+        container: "InMemoryContainer",
+        position: int,
+        partition_key: Any,
+        page_size: int,
+        response_hook: Optional[Callable],
+    ):
+        self.container = container
+        self.position = position
+        self.partition_key = partition_key
+        self.page_size = page_size
+        self.response_hook = response_hook
+
+    def by_page(self, continuation_token: Optional[str] = None) -> _ChangeFeedPager:
+        position = self.position
+        if continuation_token is not None:
+            position = _change_feed_position(continuation_token)
+        return _ChangeFeedPager(self, position)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        async for page in self.by_page():
+            async for item in page:
+                yield item
+
+
+class InMemoryContainer:
+    """An in-memory Cosmos DB container that reports modeled request charges."""
+
+    def __init__(
+        self,
+        container_id: str = "memory",
+        partition_key_path: Union[str, Sequence[str]] = "/session_id",
+        physical_partitions: int = 4,
+        charge_model: Optional[RequestChargeModel] = None,
+        latency_model: Optional[LatencyModel] = None,
+        provisioned_throughput: Optional[float] = None,
+    ):
+        self.id = container_id
+        self.partition_key_path = partition_key_path
+        self.physical_partitions = max(1, physical_partitions)
+        self.charge_model = charge_model or RequestChargeModel()
+        self.latency_model = latency_model or LatencyModel()
+        self.client_connection = _ClientConnection()
+
+        paths = (
+            [partition_key_path]
+            if isinstance(partition_key_path, str)
+            else list(partition_key_path)
+        )
+        self._partition_paths = [tuple(path.strip("/").split("/")) for path in paths]
+        self.hierarchical = len(self._partition_paths) > 1
+        self._partitions: Dict[Any, Dict[str, _StoredDocument]] = {}
+        self._indexes: Dict[Any, Dict[str, Dict[Any, Set[str]]]] = {}
+        self._sequence = itertools.count(1)
+        # Sequence number of the latest write, the change feed's logical clock
+        self._latest_sequence = 0
+        self._totals: Dict[str, OperationTotals] = {}
+
+        # Request units per second before requests are throttled (None: unlimited)
+        self.provisioned_throughput = provisioned_throughput
+        self._ru_budget = provisioned_throughput or 0.0
+        self._budget_updated = time.monotonic()
+        self.throttled_requests = 0
+
+    # Cost accounting
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return accumulated count, request charge and latency per operation."""
+        return {name: totals.as_dict() for name, totals in self._totals.items()}
+
+    @property
+    def total_request_charge(self) -> float:
+        return round(sum(t.request_charge for t in self._totals.values()), 2)
+
+    def reset_stats(self) -> None:
+        self._totals.clear()
+        self.throttled_requests = 0
+
+    def _admit(self) -> None:
+        """Reject the request with 429 while the RU budget of this second is spent."""
+        rate = self.provisioned_throughput
+        if not rate:
+            return
+        now = time.monotonic()
+        self._ru_budget = min(
+            rate, self._ru_budget + (now - self._budget_updated) * rate
+        )
+        self._budget_updated = now
+        if self._ru_budget > 0:
+            return
+        self.throttled_requests += 1
+        error = CosmosHttpResponseError(
+            status_code=429,
+            message="Request rate is large. More Request Units may be needed.",
+        )
+        error.headers = {
+            RETRY_AFTER_HEADER: str(math.ceil(-self._ru_budget / rate * 1000) + 1),
+            REQUEST_CHARGE_HEADER: "0",
+        }
+        raise error
+
+    async def _complete(
+        self,
+        operation: str,
+        charge: float,
+        latency_ms: float,
+        response_hook: Optional[Callable],
+        result: Any,
+        item_count: Optional[int] = None,
+        etag: Optional[str] = None,
+    ) -> None:
+        totals = self._totals.setdefault(operation, OperationTotals())
+        totals.count += 1
+        totals.request_charge += charge
+        totals.duration_ms += latency_ms
+        if self.provisioned_throughput:
+            self._ru_budget -= charge
+
+        headers = {
+            REQUEST_CHARGE_HEADER: str(charge),
+            REQUEST_DURATION_HEADER: str(latency_ms),
+        }
+        if item_count is not None:
+            headers[ITEM_COUNT_HEADER] = str(item_count)
+        if etag is not None:
+            headers[ETAG_HEADER] = etag
+        self.client_connection.last_response_headers = headers
+        if response_hook is not None:
+            response_hook(headers, result)
+        if self.latency_model.simulate:
+            await asyncio.sleep(latency_ms / 1000)
+
+    # Storage helpers
+    def _physical_partition(self, partition_key: Any) -> int:
+        if self.hierarchical:
+            # A user's (first level's) partitions stay together until they outgrow
+            # one physical partition, which this model never does
+            partition_key = partition_key[0]
+        encoded = json.dumps(partition_key, default=str).encode("utf-8")
+        return zlib.crc32(encoded) % self.physical_partitions
+
+    def _partition_key_of(self, body: Dict[str, Any]) -> Any:
+        values = []
+        for path in self._partition_paths:
+            value = get_path(body, path)
+            values.append(None if is_missing(value) else value)
+        return tuple(values) if self.hierarchical else values[0]
+
+    def _key(self, partition_key: Any) -> Any:
+        """Normalize a partition key passed to the API (lists become tuples)."""
+        if self.hierarchical and isinstance(partition_key, (list, tuple)):
+            return tuple(partition_key)
+        return partition_key
+
+    @staticmethod
+    def _index_key(value: Any) -> Optional[Tuple[str, Any]]:
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return (type(value).__name__, value)
+        return None
+
+    def _index(
+        self, partition_key: Any, document_id: str, body: Dict[str, Any]
+    ) -> None:
+        indexes = self._indexes.setdefault(partition_key, {})
+        for name, value in body.items():
+            key = self._index_key(value)
+            if key is not None:
+                indexes.setdefault(name, {}).setdefault(key, set()).add(document_id)
+
+    def _unindex(
+        self, partition_key: Any, document_id: str, body: Dict[str, Any]
+    ) -> None:
+        indexes = self._indexes.get(partition_key, {})
+        for name, value in body.items():
+            key = self._index_key(value)
+            if key is not None and name in indexes:
+                indexes[name].get(key, set()).discard(document_id)
+
+    def _serialize(self, body: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        # Round-trip through JSON like the SDK does, rejecting unserializable bodies
+        encoded = json.dumps(body)
+        return json.loads(encoded), len(encoded.encode("utf-8"))
+
+    def _put(self, body: Dict[str, Any]) -> _StoredDocument:
+        document, _ = self._serialize(body)
+        if not document.get("id"):
+            raise CosmosHttpResponseError(status_code=400, message="Missing id")
+        document["_ts"] = int(time.time())
+        document["_etag"] = f'"{uuid.uuid4()}"'
+        size = len(json.dumps(document).encode("utf-8"))
+
+        partition_key = self._partition_key_of(document)
+        partition = self._partitions.setdefault(partition_key, {})
+        previous = partition.pop(document["id"], None)
+        if previous is not None:
+            self._unindex(partition_key, document["id"], previous.body)
+        stored = _StoredDocument(document, size, next(self._sequence))
+        self._latest_sequence = stored.sequence
+        partition[document["id"]] = stored
+        self._index(partition_key, document["id"], document)
+        return stored
+
+    def _get(self, item: str, partition_key: Any) -> _StoredDocument:
+        stored = self._partitions.get(partition_key, {}).get(item)
+        if stored is None:
+            raise CosmosResourceNotFoundError(
+                status_code=404,
+                message=f"Entity with the specified id {item} does not exist",
+            )
+        return stored
+
+    def _remove(self, item: str, partition_key: Any) -> _StoredDocument:
+        stored = self._get(item, partition_key)
+        del self._partitions[partition_key][item]
+        self._unindex(partition_key, item, stored.body)
+        return stored
+
+    # Container API
+    async def read_item(
+        self, item: str, partition_key: Any, **kwargs
+    ) -> Dict[str, Any]:
+        self._admit()
+        stored = self._get(item, self._key(partition_key))
+        result = copy.deepcopy(stored.body)
+        await self._complete(
+            "read_item",
+            self.charge_model.point_read(stored.size),
+            self.latency_model.latency(self.latency_model.point_read_ms, stored.size),
+            kwargs.get("response_hook"),
+            result,
+        )
+        return result
+
+    async def create_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self._admit()
+        partition_key = self._partition_key_of(body)
+        if body.get("id") in self._partitions.get(partition_key, {}):
+            raise CosmosResourceExistsError(
+                status_code=409,
+                message="Entity with the specified id already exists in the system.",
+            )
+        return await self._write("create_item", body, kwargs.get("response_hook"))
+
+    async def upsert_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self._admit()
+        stored = self._partitions.get(self._partition_key_of(body), {}).get(
+            body.get("id")
+        )
+        if stored is not None:
+            self._check_precondition(stored, kwargs)
+        return await self._write("upsert_item", body, kwargs.get("response_hook"))
+
+    async def replace_item(
+        self, item: str, body: Dict[str, Any], **kwargs
+    ) -> Dict[str, Any]:
+        self._admit()
+        stored = self._get(item, self._partition_key_of(body))
+        self._check_precondition(stored, kwargs)
+        return await self._write("replace_item", body, kwargs.get("response_hook"))
+
+    async def patch_item(
+        self,
+        item: str,
+        partition_key: Any,
+        patch_operations: List[Dict[str, Any]],
+        **kwargs,
+    ) -> Dict[str, Any]:
+        self._admit()
+        partition_key = self._key(partition_key)
+        stored = self._get(item, partition_key)
+        self._check_precondition(stored, kwargs)
+        try:
+            body = apply_patch(stored.body, patch_operations)
+        except ValueError as e:
+            raise CosmosHttpResponseError(status_code=400, message=str(e))
+        if self._partition_key_of(body) != partition_key:
+            raise CosmosHttpResponseError(
+                status_code=400, message="The partition key cannot be patched"
+            )
+        return await self._write("patch_item", body, kwargs.get("response_hook"))
+
+    @staticmethod
+    def _check_precondition(stored: _StoredDocument, kwargs: Dict[str, Any]) -> None:
+        # Optimistic concurrency: etag + MatchConditions.IfNotModified
+        if kwargs.get("match_condition") != MatchConditions.IfNotModified:
+            return
+        if kwargs.get("etag") != stored.body.get("_etag"):
+            raise CosmosAccessConditionFailedError(
+                status_code=412,
+                message="Operation cannot be performed because one of the "
+                "specified precondition is not met.",
+            )
+
+    async def _write(
+        self, operation: str, body: Dict[str, Any], response_hook
+    ) -> Dict[str, Any]:
+        stored = self._put(body)
+        result = copy.deepcopy(stored.body)
+        await self._complete(
+            operation,
+            self.charge_model.write(stored.size),
+            self.latency_model.latency(self.latency_model.write_ms, stored.size),
+            response_hook,
+            result,
+        )
+        return result
+
+    async def delete_item(self, item: Any, partition_key: Any, **kwargs) -> None:
+        self._admit()
+        partition_key = self._key(partition_key)
+        item_id = item["id"] if isinstance(item, dict) else item
+        self._check_precondition(self._get(item_id, partition_key), kwargs)
+        stored = self._remove(item_id, partition_key)
+        await self._complete(
+            "delete_item",
+            self.charge_model.delete(stored.size),
+            self.latency_model.latency(self.latency_model.write_ms, stored.size),
+            kwargs.get("response_hook"),
+            None,
+        )
+
+    def query_items(
+        self,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]] = None,
+        partition_key: Any = None,
+        max_item_count: Optional[int] = None,
+        response_hook: Optional[Callable] = None,
+        **kwargs,
+    ) -> _QueryResult:
+        page_size = max_item_count if max_item_count and max_item_count > 0 else None
+        return _QueryResult(
+            self,
+            query,
+            parameters,
+            partition_key,
+            page_size or DEFAULT_PAGE_SIZE,
+            response_hook,
+        )
+
+    def query_items_change_feed(
+        self,
+        start_time: Any = "Now",
+        continuation: Optional[str] = None,
+        partition_key: Any = None,
+        max_item_count: Optional[int] = None,
+        response_hook: Optional[Callable] = None,
+        **kwargs,
+    ) -> "_ChangeFeedResult":
+        """Read the latest version of every document changed after a position.
+
+        Like the service's latest-version mode, each changed document is returned
+        once in modification order and deletes are not reported. The continuation
+        token is the sequence number of the last change read.
+        """
+        if continuation is not None:
+            position = _change_feed_position(continuation)
+        elif start_time == "Beginning":
+            position = 0
+        else:
+            position = self._latest_sequence
+        page_size = max_item_count if max_item_count and max_item_count > 0 else None
+        return _ChangeFeedResult(
+            self,
+            position,
+            partition_key,
+            page_size or DEFAULT_PAGE_SIZE,
+            response_hook,
+        )
+
+    def _changes_after(
+        self, position: int, partition_key: Any, limit: int
+    ) -> List[_StoredDocument]:
+        if partition_key is not None:
+            partitions = [self._partitions.get(self._key(partition_key), {})]
+        else:
+            partitions = list(self._partitions.values())
+        changed = [
+            stored
+            for partition in partitions
+            for stored in partition.values()
+            if stored.sequence > position
+        ]
+        changed.sort(key=lambda stored: stored.sequence)
+        return changed[:limit]
+
+    async def execute_item_batch(
+        self, batch_operations: List[Tuple], partition_key: Any, **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Apply a transactional batch: either every operation succeeds or none does."""
+        self._admit()
+        partition_key = self._key(partition_key)
+        snapshot = (
+            copy.deepcopy(self._partitions.get(partition_key, {})),
+            copy.deepcopy(self._indexes.get(partition_key, {})),
+        )
+        results = []
+        charge = 0.0
+        size = 0
+        for index, (operation, args, *_rest) in enumerate(batch_operations):
+            try:
+                result, operation_charge, operation_size = self._apply_batch_operation(
+                    operation, args, partition_key
+                )
+            except CosmosHttpResponseError as e:
+                self._partitions[partition_key], self._indexes[partition_key] = snapshot
+                raise CosmosBatchOperationError(
+                    error_index=index,
+                    headers={},
+                    status_code=e.status_code,
+                    message=f"Batch operation {index} ({operation}) failed: {e}",
+                    operation_responses=[],
+                )
+            results.append(result)
+            charge += operation_charge
+            size += operation_size
+
+        await self._complete(
+            "execute_item_batch",
+            round(charge, 2),
+            self.latency_model.latency(self.latency_model.write_ms, size),
+            kwargs.get("response_hook"),
+            results,
+        )
+        return results
+
+    def _apply_batch_operation(
+        self, operation: str, args: Tuple, partition_key: Any
+    ) -> Tuple[Dict[str, Any], float, int]:
+        operation = operation.lower()
+        if operation in ("create", "upsert", "replace"):
+            body = args[-1]
+            if self._partition_key_of(body) != partition_key:
+                raise CosmosHttpResponseError(
+                    status_code=400, message="Partition key mismatch in batch"
+                )
+            exists = body.get("id") in self._partitions.get(partition_key, {})
+            if operation == "create" and exists:
+                raise CosmosResourceExistsError(status_code=409, message="Conflict")
+            if operation == "replace" and not exists:
+                raise CosmosResourceNotFoundError(status_code=404, message="Not found")
+            stored = self._put(body)
+            charge = self.charge_model.write(stored.size)
+            return {"statusCode": 201, "resourceBody": stored.body}, charge, stored.size
+        if operation == "delete":
+            stored = self._remove(args[0], partition_key)
+            charge = self.charge_model.delete(stored.size)
+            return {"statusCode": 204}, charge, stored.size
+        if operation == "read":
+            stored = self._get(args[0], partition_key)
+            charge = self.charge_model.point_read(stored.size)
+            return {"statusCode": 200, "resourceBody": stored.body}, charge, stored.size
+        raise CosmosHttpResponseError(
+            status_code=400, message=f"Unsupported batch operation {operation}"
+        )
+
+    # Query evaluation
+    def _evaluate_query(
+        self,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]],
+        partition_key: Any,
+    ) -> _QueryPlan:
+        parsed = parse_query(query)
+        values = parameter_map(parameters)
+
+        if partition_key is None:
+            # Like the service, route on equality filters of the partition key paths
+            prefix = []
+            for path in self._partition_paths:
+                condition = next(
+                    (
+                        c
+                        for c in parsed.conditions
+                        if c.path == path and c.operator == "="
+                    ),
+                    None,
+                )
+                if condition is None:
+                    break
+                prefix.append(condition.value(values))
+            if prefix:
+                partition_key = tuple(prefix) if self.hierarchical else prefix[0]
+        partition_key = self._key(partition_key)
+
+        if self.hierarchical and partition_key is not None:
+            # A full key or a prefix of one
+            partition_keys = [
+                key
+                for key in self._partitions
+                if key[: len(partition_key)] == partition_key
+            ]
+            physical_partitions = max(
+                1, len({self._physical_partition(key) for key in partition_keys})
+            )
+        elif partition_key is not None:
+            partition_keys = [partition_key]
+            physical_partitions = 1
+        else:
+            # Cross-partition query: fans out to every physical partition
+            partition_keys = list(self._partitions)
+            physical_partitions = self.physical_partitions
+
+        loaded = 0
+        scanned = 0
+        matches: List[_StoredDocument] = []
+        for key in partition_keys:
+            partition = self._partitions.get(key, {})
+            candidates = self._index_candidates(key, parsed.conditions, values)
+            if candidates is None:
+                scanned += len(partition)
+                candidate_documents = partition.values()
+            else:
+                candidate_documents = [
+                    partition[doc_id] for doc_id in candidates if doc_id in partition
+                ]
+                loaded += len(candidate_documents)
+            matches.extend(
+                stored
+                for stored in candidate_documents
+                if parsed.matches(stored.body, values)
+            )
+
+        matches.sort(key=lambda stored: stored.sequence)
+        documents = parsed.sort(stored.body for stored in matches)
+        documents = [parsed.project(document) for document in documents]
+        fingerprint = hashlib.sha1(
+            json.dumps([query, values, partition_key], default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        return _QueryPlan(documents, physical_partitions, loaded, scanned, fingerprint)
+
+    def _index_candidates(
+        self, partition_key: Any, conditions, values: Dict[str, Any]
+    ) -> Optional[Set[str]]:
+        """Intersect the hash index entries of top-level equality conditions.
+
+        Returns None when no condition can use the index and the partition must
+        be scanned.
+        """
+        indexes = self._indexes.get(partition_key, {})
+        candidates: Optional[Set[str]] = None
+        for condition in conditions:
+            if len(condition.path) != 1 or condition.operator != "=":
+                continue
+            key = self._index_key(condition.value(values))
+            if key is None:
+                continue
+            ids = indexes.get(condition.path[0], {}).get(key, set())
+            candidates = set(ids) if candidates is None else candidates & ids
+        return candidates
+
+
+class InMemoryDBClient(CosmosDBClient):
+    """CosmosDBClient running on an InMemoryContainer instead of a Cosmos account.
+
+    Executes exactly the queries and point operations of ``CosmosDBClient``, so
+    tests and benchmarks can exercise and cost them offline.
+    """
+
+    def __init__(
+        self,
+        container: Optional[InMemoryContainer] = None,
+        lease_container: Optional[InMemoryContainer] = None,
+        **kwargs,
+    ):
+        kwargs.setdefault("endpoint", "memory://")
+        kwargs.setdefault("credential", None)
+        kwargs.setdefault("database_name", "memory")
+        kwargs.setdefault("container_name", "memory")
+        super().__init__(**kwargs)
+        self.memory_container = container or InMemoryContainer(
+            container_id=self.container_name,
+            partition_key_path=list(self.layout.paths),
+        )
+        self.lease_container = lease_container
+
+    async def _open_container(self) -> InMemoryContainer:
+        return self.memory_container
+
+    async def open_lease_container(self, container_name: str) -> InMemoryContainer:
+        if self.lease_container is None:
+            self.lease_container = InMemoryContainer(
+                container_id=container_name, partition_key_path="/id"
+            )
+        return self.lease_container
@@ -0,0 +1,349 @@
+"""Request-charge and latency instrumentation of Cosmos DB operations."""
+
+import functools
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from azure.cosmos.exceptions import CosmosHttpResponseError
+from azure.cosmos.http_constants import HttpHeaders
+from opentelemetry import metrics
+
+logger = logging.getLogger(__name__)
+meter = metrics.get_meter(__name__)
+
+_request_charge = meter.create_histogram(
+    "macae.cosmos.request_charge",
+    unit="RU",
+    description="Request units charged per Cosmos DB request",
+)
+_server_duration = meter.create_histogram(
+    "macae.cosmos.server_duration",
+    unit="ms",
+    description="Server-side duration reported per Cosmos DB request",
+)
+_operation_charge = meter.create_histogram(
+    "macae.cosmos.operation.request_charge",
+    unit="RU",
+    description="Request units charged per logical data layer operation",
+)
+_operation_duration = meter.create_histogram(
+    "macae.cosmos.operation.duration",
+    unit="ms",
+    description="Wall-clock time of a logical data layer operation",
+)
+_operation_items = meter.create_histogram(
+    "macae.cosmos.operation.item_count",
+    description="Documents returned or written per logical data layer operation",
+)
+_operation_pages = meter.create_histogram(
+    "macae.cosmos.operation.page_count",
+    description="Query pages fetched per logical data layer operation",
+)
+
+# Label for requests issued outside any tracked operation, e.g. write-behind flushes
+UNTRACKED_OPERATION = "untracked"
+
+# Container methods that issue exactly one request each
+POINT_OPERATIONS = (
+    "read_item",
+    "create_item",
+    "upsert_item",
+    "replace_item",
+    "patch_item",
+    "delete_item",
+    "execute_item_batch",
+)
+
+
+def _header_float(headers: Optional[Mapping[str, Any]], name: str) -> float:
+    try:
+        return float((headers or {}).get(name, 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _item_count(headers: Optional[Mapping[str, Any]], result: Any) -> int:
+    count = (headers or {}).get(HttpHeaders.ItemCount)
+    if count is not None:
+        try:
+            return int(count)
+        except (TypeError, ValueError):
+            pass
+    if isinstance(result, list):
+        return len(result)
+    return 1 if result is not None else 0
+
+
+@dataclass
+class OperationRecord:
+    """Requests made while one logical operation (e.g. get_agent_messages) ran."""
+
+    name: str
+    request_charge: float = 0.0
+    server_duration_ms: float = 0.0
+    request_count: int = 0
+    item_count: int = 0
+    page_count: int = 0
+    failed_requests: int = 0
+    queries: List[Tuple[str, Tuple[str, ...]]] = field(default_factory=list)
+
+
+@dataclass
+class OperationTotals:
+    """Running totals for one logical operation name."""
+
+    count: int = 0
+    request_charge: float = 0.0
+    duration_ms: float = 0.0
+    max_duration_ms: float = 0.0
+    request_count: int = 0
+    slow_count: int = 0
+
+
+_current_operation: ContextVar[Optional[OperationRecord]] = ContextVar(
+    "cosmos_operation", default=None
+)
+
+
+class CosmosInstrumentation:
+    """Collects request charge, server duration, item and page counts per operation.
+
+    Every request made through a container wrapped with ``wrap`` is attributed to
+    the logical operation in progress (see ``operation``); operations started
+    inside another one fold into it. Totals feed OpenTelemetry histograms tagged
+    with the operation name, and operations slower than ``slow_operation_ms`` are
+    logged with their parameterized SQL.
+    """
+
+    def __init__(self, slow_operation_ms: Optional[float] = 500.0):
+        self.slow_operation_ms = slow_operation_ms
+        self._totals: Dict[str, OperationTotals] = {}
+
+    def wrap(self, container: Any) -> "InstrumentedContainer":
+        """Return a proxy of container that reports every request."""
+        return InstrumentedContainer(container, self)
+
+    @contextmanager
+    def operation(self, name: str):
+        """Attribute the requests made inside the block to operation ``name``."""
+        if _current_operation.get() is not None:
+            yield
+            return
+        record = OperationRecord(name=name)
+        token = _current_operation.set(record)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            _current_operation.reset(token)
+            self._finish(record, (time.perf_counter() - started) * 1000)
+
+    async def stream(self, name: str, iterator: AsyncIterator) -> AsyncIterator:
+        """Attribute the requests made while iterator is advanced to ``name``.
+
+        The operation is only active while the next item is being fetched, so
+        work the caller does between items is not charged to it. Its duration
+        runs from the first to the last fetch.
+        """
+        if _current_operation.get() is not None:
+            try:
+                async for item in iterator:
+                    yield item
+            finally:
+                await iterator.aclose()
+            return
+        record = OperationRecord(name=name)
+        started = time.perf_counter()
+        try:
+            while True:
+                token = _current_operation.set(record)
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _current_operation.reset(token)
+                yield item
+        finally:
+            await iterator.aclose()
+            self._finish(record, (time.perf_counter() - started) * 1000)
+
+    def record_request(
+        self,
+        request: str,
+        headers: Optional[Mapping[str, Any]],
+        result: Any = None,
+        failed: bool = False,
+        page: bool = False,
+    ) -> None:
+        """Record the response metadata of one Cosmos DB request."""
+        record = _current_operation.get()
+        operation = record.name if record else UNTRACKED_OPERATION
+        charge = _header_float(headers, HttpHeaders.RequestCharge)
+        server_ms = _header_float(headers, HttpHeaders.RequestDurationMs)
+        attributes = {"operation": operation, "request": request}
+        _request_charge.record(charge, attributes)
+        _server_duration.record(server_ms, attributes)
+        if record is None:
+            return
+        record.request_count += 1
+        record.request_charge += charge
+        record.server_duration_ms += server_ms
+        if failed:
+            record.failed_requests += 1
+        else:
+            record.item_count += _item_count(headers, result)
+        if page:
+            record.page_count += 1
+
+    def record_query(self, query: str, parameters: Optional[List[Dict]]) -> None:
+        """Remember the parameterized SQL issued by the current operation."""
+        record = _current_operation.get()
+        if record is not None:
+            names = tuple(item.get("name", "") for item in parameters or ())
+            record.queries.append((query, names))
+
+    def _finish(self, record: OperationRecord, duration_ms: float) -> None:
+        if record.request_count == 0:
+            return
+        attributes = {"operation": record.name}
+        _operation_charge.record(record.request_charge, attributes)
+        _operation_duration.record(duration_ms, attributes)
+        _operation_items.record(record.item_count, attributes)
+        _operation_pages.record(record.page_count, attributes)
+
+        totals = self._totals.setdefault(record.name, OperationTotals())
+        totals.count += 1
+        totals.request_charge += record.request_charge
+        totals.duration_ms += duration_ms
+        totals.max_duration_ms = max(totals.max_duration_ms, duration_ms)
+        totals.request_count += record.request_count
+
+        if self.slow_operation_ms is not None and duration_ms >= self.slow_operation_ms:
+            totals.slow_count += 1
+            logger.warning(
+                "Slow Cosmos DB operation %s: %.1f ms, %.2f RU, %d requests, "
+                "%d pages, %d items; queries: %s",
+                record.name,
+                duration_ms,
+                record.request_charge,
+                record.request_count,
+                record.page_count,
+                record.item_count,
+                "; ".join(
+                    f"{query} [{', '.join(names)}]" for query, names in record.queries
+                )
+                or "none",
+            )
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return a snapshot of per-operation totals since startup."""
+        return {
+            name: {
+                "count": totals.count,
+                "request_charge": round(totals.request_charge, 2),
+                "mean_request_charge": round(totals.request_charge / totals.count, 2),
+                "mean_duration_ms": round(totals.duration_ms / totals.count, 2),
+                "max_duration_ms": round(totals.max_duration_ms, 2),
+                "requests": totals.request_count,
+                "slow": totals.slow_count,
+            }
+            for name, totals in self._totals.items()
+        }
+
+
+class InstrumentedContainer:
+    """Container proxy that reports the response metadata of every request."""
+
+    def __init__(self, container: Any, instrumentation: CosmosInstrumentation):
+        self._container = container
+        self._instrumentation = instrumentation
+        for name in POINT_OPERATIONS:
+            if hasattr(container, name):
+                setattr(self, name, self._point_operation(name))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._container, name)
+
+    def _hook(
+        self, request: str, user_hook: Optional[Callable], page: bool = False
+    ) -> Callable:
+        def hook(headers, result):
+            self._instrumentation.record_request(request, headers, result, page=page)
+            if user_hook is not None:
+                user_hook(headers, result)
+
+        return hook
+
+    def _point_operation(self, name: str) -> Callable:
+        method = getattr(self._container, name)
+
+        async def call(*args, **kwargs):
+            kwargs["response_hook"] = self._hook(name, kwargs.get("response_hook"))
+            try:
+                return await method(*args, **kwargs)
+            except CosmosHttpResponseError as e:
+                self._instrumentation.record_request(
+                    name, getattr(e, "headers", None), failed=True
+                )
+                raise
+
+        return call
+
+    def query_items(self, query: str, *args, **kwargs) -> Any:
+        """Run a query, recording the SQL and the metadata of every page."""
+        parameters = kwargs.get("parameters", args[0] if args else None)
+        self._instrumentation.record_query(query, parameters)
+        kwargs["response_hook"] = self._hook(
+            "query_items", kwargs.get("response_hook"), page=True
+        )
+        return self._container.query_items(query, *args, **kwargs)
+
+
+def track_operations(cls):
+    """Class decorator attributing the requests of each public coroutine method.
+
+    Wraps the public coroutine and async generator methods defined on ``cls`` so
+    that the Cosmos DB requests they make are reported under the method's name.
+    Instances must expose a ``instrumentation`` attribute holding a
+    ``CosmosInstrumentation``.
+    """
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or name in ("initialize", "close"):
+            continue
+        if inspect.iscoroutinefunction(member):
+            setattr(cls, name, _tracked(name, member))
+        elif inspect.isasyncgenfunction(member):
+            setattr(cls, name, _tracked_stream(name, member))
+    return cls
+
+
+def _tracked(name: str, method: Callable) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        with self.instrumentation.operation(name):
+            return await method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _tracked_stream(name: str, method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self.instrumentation.stream(name, method(self, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,196 @@
+"""Compact storage encoding of agent message documents.
+
+``AgentMessageData.raw_data`` is usually the JSON of the whole agent response,
+so it repeats ``content`` (often twice, as ``content`` and
+``streaming_message``). ``MessageCodec.encode`` stores such documents in a
+compact form before they are written:
+
+- top-level raw_data fields equal to ``content`` are stored as null and listed
+  in the encoding, when raw_data is JSON as ``json.dumps`` writes it (so the
+  original string is restored exactly)
+- content and raw_data longer than ``threshold`` bytes are compressed with gzip
+  (or zstd, when the ``zstandard`` package is installed) and base64 encoded,
+  when that makes them smaller
+
+How a document was encoded is recorded in its ``payload_encoding`` field.
+``decode_message`` restores the original fields and leaves documents without
+that field alone, so messages written before the codec existed (or with it
+disabled) read back unchanged and only compact documents pay for decoding.
+"""
+
+import base64
+import gzip
+import json
+from typing import Any, Dict, Optional
+
+from opentelemetry import metrics
+
+try:
+    import zstandard
+except ImportError:  # Optional; only needed to write or read zstd payloads
+    zstandard = None
+
+meter = metrics.get_meter(__name__)
+
+_original_bytes = meter.create_counter(
+    "macae.message_codec.original_bytes",
+    unit="By",
+    description="Size of agent message content and raw_data before encoding",
+)
+_stored_bytes = meter.create_counter(
+    "macae.message_codec.stored_bytes",
+    unit="By",
+    description="Size of agent message content and raw_data as stored",
+)
+
+ENCODING_FIELD = "payload_encoding"
+# raw_data fields stored as null because they equal content
+REFERENCES_KEY = "raw_references"
+COMPRESSIONS = ("none", "gzip", "zstd")
+ENCODED_FIELDS = ("content", "raw_data")
+
+
+def _compress(algorithm: str, text: str) -> str:
+    data = text.encode("utf-8")
+    if algorithm == "zstd":
+        data = zstandard.ZstdCompressor().compress(data)
+    else:
+        data = gzip.compress(data, mtime=0)
+    return base64.b64encode(data).decode("ascii")
+
+
+def _decompress(algorithm: str, text: str) -> str:
+    data = base64.b64decode(text)
+    if algorithm == "zstd":
+        if zstandard is None:
+            raise ValueError("Reading zstd message payloads needs zstandard")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif algorithm == "gzip":
+        data = gzip.decompress(data)
+    else:
+        raise ValueError(f"Unsupported message payload encoding '{algorithm}'")
+    return data.decode("utf-8")
+
+
+def _size(document: Dict[str, Any]) -> int:
+    return sum(
+        len(value.encode("utf-8"))
+        for value in (document.get(name) for name in ENCODED_FIELDS)
+        if isinstance(value, str)
+    )
+
+
+def _deduplicate(content: str, raw_data: str) -> Optional[Dict[str, Any]]:
+    """Return raw_data with fields equal to content nulled, or None."""
+    # Cheap check first: the content as it appears inside a JSON string
+    if not content or json.dumps(content)[1:-1] not in raw_data:
+        return None
+    try:
+        raw = json.loads(raw_data)
+    except ValueError:
+        return None
+    # Only JSON that json.dumps reproduces byte for byte can be restored exactly
+    if not isinstance(raw, dict) or json.dumps(raw) != raw_data:
+        return None
+    references = [key for key, value in raw.items() if value == content]
+    if not references:
+        return None
+    for key in references:
+        raw[key] = None
+    return {"raw": raw, "references": references}
+
+
+def decode_message(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Return an agent message document with its original content and raw_data.
+
+    Documents that were not stored compactly are returned as they are.
+    """
+    encoding = document.get(ENCODING_FIELD)
+    if not encoding:
+        return document
+    document = dict(document)
+    del document[ENCODING_FIELD]
+    for name in ENCODED_FIELDS:
+        algorithm = encoding.get(name)
+        if algorithm:
+            document[name] = _decompress(algorithm, document[name])
+    references = encoding.get(REFERENCES_KEY)
+    if references:
+        raw = json.loads(document["raw_data"])
+        for key in references:
+            raw[key] = document["content"]
+        document["raw_data"] = json.dumps(raw)
+    return document
+
+
+class MessageCodec:
+    """Encodes agent message documents compactly before they are stored.
+
+    Keeps running totals of the payload bytes it was given and the bytes it
+    stored, exported as ``macae.message_codec.*`` counters.
+    """
+
+    def __init__(self, compression: str = "gzip", threshold: int = 2048):
+        compression = (compression or "none").lower()
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported message compression '{compression}'")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd message compression needs the zstandard package")
+        self.compression = compression
+        self.threshold = threshold
+        self.messages = 0
+        self.original_bytes = 0
+        self.stored_bytes = 0
+
+    def encode(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the compact form of an agent message document."""
+        if document.get(ENCODING_FIELD):
+            return document
+        original = _size(document)
+        encoding: Dict[str, Any] = {}
+        content = document.get("content")
+        raw_data = document.get("raw_data")
+        if isinstance(content, str) and isinstance(raw_data, str):
+            deduplicated = _deduplicate(content, raw_data)
+            if deduplicated is not None:
+                document["raw_data"] = json.dumps(
+                    deduplicated["raw"], separators=(",", ":")
+                )
+                encoding[REFERENCES_KEY] = deduplicated["references"]
+        if self.compression != "none":
+            for name in ENCODED_FIELDS:
+                value = document.get(name)
+                if not isinstance(value, str):
+                    continue
+                size = len(value.encode("utf-8"))
+                if size < self.threshold:
+                    continue
+                compressed = _compress(self.compression, value)
+                if len(compressed) < size:
+                    document[name] = compressed
+                    encoding[name] = self.compression
+        if encoding:
+            document[ENCODING_FIELD] = encoding
+        self._record(original, _size(document))
+        return document
+
+    def _record(self, original: int, stored: int) -> None:
+        self.messages += 1
+        self.original_bytes += original
+        self.stored_bytes += stored
+        _original_bytes.add(original)
+        _stored_bytes.add(stored)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the payload bytes encoded and stored so far."""
+        return {
+            "compression": self.compression,
+            "messages": self.messages,
+            "original_bytes": self.original_bytes,
+            "stored_bytes": self.stored_bytes,
+            "saved_ratio": (
+                round(1 - self.stored_bytes / self.original_bytes, 4)
+                if self.original_bytes
+                else 0.0
+            ),
+        }
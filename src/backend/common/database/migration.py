@@ -0,0 +1,288 @@
+"""Online, resumable copy of the Cosmos DB container into another partition layout.
+
+The copy reads the source container's change feed from the beginning and upserts
+every document into the target container, stamped with the partition key fields
+of the target layout, through an adaptive write limiter that backs off on 429s.
+The change feed position is checkpointed to a file after every page, so an
+interrupted copy resumes where it stopped and a later run only copies documents
+written since. The application keeps serving from the source container until
+the cut-over (point COSMOSDB_CONTAINER and COSMOSDB_PARTITION_LAYOUT at the
+target). The change feed does not report deletes, so stop the backend before the
+final copy and verification.
+
+Usage (from src/backend):
+    python -m common.database.migration --target memory_v2
+    python -m common.database.migration --target memory_v2 --verify-only
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Mapping, Optional
+
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+from azure.cosmos.http_constants import HttpHeaders
+
+from ..models.messages_kernel import DataType
+from .partition_layout import (
+    HIERARCHICAL_LAYOUT,
+    PartitionLayout,
+    get_partition_layout,
+)
+from .throttle import AdaptiveConcurrencyLimiter
+
+logger = logging.getLogger(__name__)
+
+# Properties the service adds to every stored document
+SYSTEM_FIELDS = ("_rid", "_self", "_etag", "_attachments", "_ts", "_lsn")
+
+# Plan locators only serve the session layout and are not copied
+SKIPPED_DATA_TYPES = (DataType.plan_locator,)
+
+
+def _request_charge(headers: Optional[Mapping[str, Any]]) -> float:
+    try:
+        return float((headers or {}).get(HttpHeaders.RequestCharge, 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class MigrationCheckpoint:
+    """Progress of a copy, saved after every change feed page."""
+
+    continuation: Optional[str] = None
+    copied: int = 0
+    skipped: int = 0
+    request_charge: float = 0.0
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "MigrationCheckpoint":
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as file:
+            return cls(**json.load(file))
+
+    def save(self, path: Optional[str]) -> None:
+        if not path:
+            return
+        # Write then rename, so an interrupted save never corrupts the checkpoint
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(asdict(self), file)
+        os.replace(temporary, path)
+
+
+@dataclass
+class VerificationReport:
+    """Result of comparing every source document with its copy."""
+
+    checked: int = 0
+    target_documents: int = 0
+    missing: List[str] = field(default_factory=list)
+    mismatched: List[str] = field(default_factory=list)
+    request_charge: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return (
+            not self.missing
+            and not self.mismatched
+            and self.target_documents == self.checked
+        )
+
+
+class ContainerMigration:
+    """Copies and verifies the documents of one container in another layout."""
+
+    def __init__(
+        self,
+        source: Any,
+        target: Any,
+        layout: PartitionLayout,
+        checkpoint_path: Optional[str] = None,
+        page_size: int = 100,
+        write_concurrency: int = 16,
+        write_concurrency_max: int = 64,
+        max_retry_wait: float = 30.0,
+    ):
+        self.source = source
+        self.layout = layout
+        self.checkpoint_path = checkpoint_path
+        self.page_size = page_size
+        self.limiter = AdaptiveConcurrencyLimiter(
+            name="migration",
+            initial_limit=write_concurrency,
+            max_limit=write_concurrency_max,
+            max_retry_wait=max_retry_wait,
+        )
+        self.target = self.limiter.wrap(target)
+        self.checkpoint = MigrationCheckpoint.load(checkpoint_path)
+
+    def prepare(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the body to store in the target for a source document."""
+        body = {k: v for k, v in document.items() if k not in SYSTEM_FIELDS}
+        return self.layout.stamp(body)
+
+    def _record_charge(self, headers, result) -> None:
+        self.checkpoint.request_charge += _request_charge(headers)
+
+    async def _copy_document(self, document: Dict[str, Any]) -> None:
+        if document.get("data_type") in SKIPPED_DATA_TYPES:
+            self.checkpoint.skipped += 1
+            return
+        await self.target.upsert_item(
+            body=self.prepare(document), response_hook=self._record_charge
+        )
+        self.checkpoint.copied += 1
+
+    async def copy(self, max_pages: Optional[int] = None) -> MigrationCheckpoint:
+        """Copy every document changed since the checkpoint.
+
+        Upserts are idempotent: a page that failed part-way is copied again in
+        full on the next run. max_pages stops early, e.g. to spread the copy out.
+        """
+        options = dict(max_item_count=self.page_size, response_hook=self._record_charge)
+        if self.checkpoint.continuation:
+            feed = self.source.query_items_change_feed(
+                continuation=self.checkpoint.continuation, **options
+            )
+        else:
+            feed = self.source.query_items_change_feed(
+                start_time="Beginning", **options
+            )
+
+        pager = feed.by_page()
+        pages = 0
+        async for page in pager:
+            documents = [document async for document in page]
+            await asyncio.gather(
+                *(self._copy_document(document) for document in documents)
+            )
+            if pager.continuation_token:
+                self.checkpoint.continuation = pager.continuation_token
+            self.checkpoint.save(self.checkpoint_path)
+            pages += 1
+            logger.info(
+                "Migration copied %d documents (%.0f RU, write limit %d)",
+                self.checkpoint.copied,
+                self.checkpoint.request_charge,
+                self.limiter.current_limit,
+            )
+            if max_pages is not None and pages >= max_pages:
+                break
+        return self.checkpoint
+
+    async def _verify_document(
+        self, document: Dict[str, Any], report: VerificationReport
+    ) -> None:
+        expected = self.prepare(document)
+
+        def record(headers, result):
+            report.request_charge += _request_charge(headers)
+
+        try:
+            copy = await self.target.read_item(
+                item=document["id"],
+                partition_key=self.layout.partition_key(expected),
+                response_hook=record,
+            )
+        except CosmosResourceNotFoundError:
+            report.missing.append(document["id"])
+            return
+        actual = {k: v for k, v in copy.items() if k not in SYSTEM_FIELDS}
+        if actual != expected:
+            report.mismatched.append(document["id"])
+
+    async def verify(self) -> VerificationReport:
+        """Point-read the copy of every source document and compare contents."""
+        report = VerificationReport()
+
+        def record(headers, result):
+            report.request_charge += _request_charge(headers)
+
+        source_pages = self.source.query_items(
+            query="SELECT * FROM c",
+            max_item_count=self.page_size,
+            response_hook=record,
+        ).by_page()
+        async for page in source_pages:
+            documents = [
+                document
+                async for document in page
+                if document.get("data_type") not in SKIPPED_DATA_TYPES
+            ]
+            report.checked += len(documents)
+            await asyncio.gather(
+                *(self._verify_document(document, report) for document in documents)
+            )
+
+        target_ids = self.target.query_items(
+            query="SELECT c.id FROM c",
+            max_item_count=self.page_size,
+            response_hook=record,
+        )
+        async for _ in target_ids:
+            report.target_documents += 1
+        return report
+
+
+async def _run(args: argparse.Namespace) -> bool:
+    from azure.cosmos.aio import CosmosClient
+
+    from common.config.app_config import config
+
+    layout = get_partition_layout(args.layout)
+    async with CosmosClient(
+        url=config.COSMOSDB_ENDPOINT, credential=config.get_azure_credentials()
+    ) as client:
+        database = client.get_database_client(config.COSMOSDB_DATABASE)
+        source = database.get_container_client(args.source)
+        if args.create_target:
+            # Needs key (control plane) access; deployments provision it in infra
+            target = await database.create_container_if_not_exists(
+                id=args.target, **layout.container_options()
+            )
+        else:
+            target = database.get_container_client(args.target)
+
+        migration = ContainerMigration(
+            source, target, layout, args.checkpoint, args.page_size
+        )
+        if not args.verify_only:
+            checkpoint = await migration.copy()
+            print(
+                f"Copied {checkpoint.copied} documents, skipped {checkpoint.skipped} "
+                f"({checkpoint.request_charge:.0f} RU in total)"
+            )
+        report = await migration.verify()
+        print(
+            f"Verified {report.checked} documents ({report.request_charge:.0f} RU): "
+            f"{len(report.missing)} missing, {len(report.mismatched)} different, "
+            f"{report.target_documents} in the target"
+        )
+        for document_id in (report.missing + report.mismatched)[:20]:
+            print(f"  {document_id}")
+        return report.ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=os.environ.get("COSMOSDB_CONTAINER"))
+    parser.add_argument("--target", required=True)
+    parser.add_argument("--layout", default=HIERARCHICAL_LAYOUT)
+    parser.add_argument("--checkpoint", default="migration-checkpoint.json")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--create-target", action="store_true")
+    parser.add_argument("--verify-only", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(0 if asyncio.run(_run(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Partition key layouts of the Cosmos DB container.
+
+``session`` is the original layout: every document is partitioned by its own
+``session_id``, so plans are spread over random partitions and every query by
+user or team fans out to the whole container.
+
+``hierarchical`` partitions by two levels (MultiHash): an owner, then a scope.
+The client stamps both onto every document it writes:
+
+- plans, steps and messages: ``[user_id, plan_id]``, so one plan's documents
+  share a logical partition and one user's plans share a partition key prefix
+- the current team and plan statistics of a user: ``[user_id, "_user"]``
+- team configurations: ``["_teams", team_id]``, so the team catalog is one
+  partition key prefix instead of the whole container
+
+Queries by user, plan or team then pass the matching (prefix) partition key and
+are routed to the physical partitions holding it.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.messages_kernel import DataType
+
+SESSION_LAYOUT = "session"
+HIERARCHICAL_LAYOUT = "hierarchical"
+
+# Document fields holding the two levels of the hierarchical partition key
+OWNER_FIELD = "partition_owner"
+SCOPE_FIELD = "partition_scope"
+
+# Owner of the team catalog and of documents without a user
+TEAMS_OWNER = "_teams"
+SHARED_OWNER = "_shared"
+# Scope of per-user documents that do not belong to a plan
+USER_SCOPE = "_user"
+# Per-user documents stored under USER_SCOPE
+USER_DATA_TYPES = (DataType.user_current_team, DataType.plan_stats)
+
+# Composite indexes serving the filtered, ordered queries of CosmosDBClient
+COMPOSITE_INDEXES: List[List[Dict[str, str]]] = [
+    # Plans of a user by team and status, newest first
+    [
+        {"path": "/user_id", "order": "ascending"},
+        {"path": "/team_id", "order": "ascending"},
+        {"path": "/overall_status", "order": "ascending"},
+        {"path": "/_ts", "order": "descending"},
+    ],
+    # Steps of a plan in order
+    [
+        {"path": "/plan_id", "order": "ascending"},
+        {"path": "/data_type", "order": "ascending"},
+        {"path": "/timestamp", "order": "ascending"},
+    ],
+    # Agent messages of a plan in order
+    [
+        {"path": "/plan_id", "order": "ascending"},
+        {"path": "/data_type", "order": "ascending"},
+        {"path": "/_ts", "order": "ascending"},
+    ],
+    # Team catalog, newest first
+    [
+        {"path": "/data_type", "order": "ascending"},
+        {"path": "/created", "order": "descending"},
+    ],
+]
+
+INDEXING_POLICY: Dict[str, Any] = {
+    "indexingMode": "consistent",
+    "automatic": True,
+    "includedPaths": [{"path": "/*"}],
+    "excludedPaths": [{"path": '/"_etag"/?'}],
+    "compositeIndexes": COMPOSITE_INDEXES,
+}
+
+
+class PartitionLayout:
+    """The original layout: one partition per ``session_id``."""
+
+    name = SESSION_LAYOUT
+    paths: Tuple[str, ...] = ("/session_id",)
+    kind = "Hash"
+    # Plans of this layout are found through plan locator documents
+    uses_plan_locators = True
+    # Fields a query must project to address a document for a delete
+    key_fields = "c.id, c.session_id, c.data_type"
+
+    def partition_key(self, document: Dict[str, Any]) -> Any:
+        """Return the partition key of a stored (or to be stored) document."""
+        return document.get("session_id")
+
+    def stamp(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the fields the partition key is read from to a document."""
+        return document
+
+    def query_partition(
+        self,
+        data_type: str,
+        user_id: Optional[str] = None,
+        plan_id: Optional[str] = None,
+    ) -> Any:
+        """Return the (prefix) partition key that holds every match, or None.
+
+        None means the query has to fan out across partitions.
+        """
+        return None
+
+    def container_options(self) -> Dict[str, Any]:
+        """Keyword arguments to create a container with this layout."""
+        from azure.cosmos import PartitionKey
+
+        return dict(
+            partition_key=PartitionKey(path=list(self.paths), kind=self.kind),
+            indexing_policy=INDEXING_POLICY,
+        )
+
+
+class HierarchicalPartitionLayout(PartitionLayout):
+    """Two-level layout keyed by owner (user or team catalog), then plan."""
+
+    name = HIERARCHICAL_LAYOUT
+    paths = (f"/{OWNER_FIELD}", f"/{SCOPE_FIELD}")
+    kind = "MultiHash"
+    uses_plan_locators = False
+    key_fields = f"c.id, c.data_type, c.{OWNER_FIELD}, c.{SCOPE_FIELD}"
+
+    def partition_key(self, document: Dict[str, Any]) -> Tuple[str, str]:
+        if OWNER_FIELD in document and SCOPE_FIELD in document:
+            return (document[OWNER_FIELD], document[SCOPE_FIELD])
+        data_type = document.get("data_type")
+        if data_type == DataType.team_config:
+            return (TEAMS_OWNER, document.get("team_id") or document["id"])
+        owner = document.get("user_id") or SHARED_OWNER
+        if data_type in USER_DATA_TYPES:
+            return (owner, USER_SCOPE)
+        if data_type == DataType.plan:
+            return (owner, document.get("plan_id") or document["id"])
+        scope = document.get("plan_id") or document.get("session_id") or USER_SCOPE
+        return (owner, scope)
+
+    def stamp(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        document[OWNER_FIELD], document[SCOPE_FIELD] = self.partition_key(document)
+        return document
+
+    def query_partition(
+        self,
+        data_type: str,
+        user_id: Optional[str] = None,
+        plan_id: Optional[str] = None,
+    ) -> Optional[Tuple[str, ...]]:
+        if data_type == DataType.team_config:
+            return (TEAMS_OWNER,)
+        if not user_id:
+            return None
+        if data_type in USER_DATA_TYPES:
+            return (user_id, USER_SCOPE)
+        if plan_id:
+            return (user_id, plan_id)
+        return (user_id,)
+
+
+_LAYOUTS = {
+    SESSION_LAYOUT: PartitionLayout,
+    HIERARCHICAL_LAYOUT: HierarchicalPartitionLayout,
+}
+
+
+def get_partition_layout(name: str) -> PartitionLayout:
+    """Return the layout called name ("session" or "hierarchical")."""
+    try:
+        return _LAYOUTS[(name or SESSION_LAYOUT).lower()]()
+    except KeyError:
+        raise ValueError(f"Unsupported partition layout '{name}'") from None
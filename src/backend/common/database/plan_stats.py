@@ -0,0 +1,139 @@
+"""Per-user plan statistics maintained incrementally as plans change.
+
+Every plan write that adds a plan, changes its status or team, or deletes it
+also applies the change to the owner's ``PlanStats`` document, so the number of
+plans per team and status is served with a single point read instead of a
+count query over all of the user's plans. The Cosmos DB backend updates the
+document with an ETag-conditioned read-modify-write that retries on conflicts;
+the SQLite backend updates it in the transaction of the plan write.
+
+On Cosmos DB this costs a read of the plan before every status or team change,
+so maintenance is opt-in (PLAN_STATS_ENABLED); without it the statistics are
+recounted on every read. A statistics update that fails or keeps conflicting
+deletes the document, so the next read rebuilds it. Counts still drift when the
+process dies between the plan write and the statistics write, or for plans
+written before statistics existed; ``reconcile_plan_stats`` rebuilds the
+documents from the plans.
+
+Usage (from src/backend):
+    python -m common.database.plan_stats
+    python -m common.database.plan_stats --user <user_id>
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from ..models.messages_kernel import DataType, Plan
+from .cosmos_query import normalize_value
+from .database_base import DatabaseBase
+
+logger = logging.getLogger(__name__)
+
+# Attempts of the ETag-conditioned read-modify-write before giving up
+PLAN_STATS_MAX_ATTEMPTS = 10
+
+# Patch paths whose change moves a plan to another count
+PLAN_STATS_PATHS = ("/overall_status", "/team_id", "/user_id")
+
+# (team_id, status) -> change in the number of plans, per user_id
+PlanStatsChanges = Dict[str, Dict[Tuple[str, str], int]]
+
+
+def plan_status_key(
+    plan: Union[Plan, Mapping[str, Any], None],
+) -> Optional[Tuple[str, str, str]]:
+    """Return the (user_id, team_id, status) a plan is counted under, or None."""
+    if plan is None:
+        return None
+    if isinstance(plan, Plan):
+        user_id, team_id, status = plan.user_id, plan.team_id, plan.overall_status
+    else:
+        if plan.get("data_type") != DataType.plan:
+            return None
+        user_id = plan.get("user_id")
+        team_id, status = plan.get("team_id"), plan.get("overall_status")
+    if not user_id or status is None:
+        return None
+    return user_id, team_id or "", str(normalize_value(status))
+
+
+def plan_status_changes(
+    before: Union[Plan, Mapping[str, Any], None],
+    after: Union[Plan, Mapping[str, Any], None],
+) -> PlanStatsChanges:
+    """Return the count changes of a plan going from before to after.
+
+    None stands for a plan that does not exist (yet or any more).
+    """
+    changes: PlanStatsChanges = {}
+    old, new = plan_status_key(before), plan_status_key(after)
+    if old == new:
+        return changes
+    for key, change in ((old, -1), (new, 1)):
+        if key is not None:
+            user_id, team_id, status = key
+            changes.setdefault(user_id, {})[(team_id, status)] = change
+    return changes
+
+
+def touches_plan_stats(operations: Iterable[Mapping[str, Any]]) -> bool:
+    """Return whether patch operations can change what a plan is counted under."""
+    return any(operation.get("path") in PLAN_STATS_PATHS for operation in operations)
+
+
+async def _plan_owners(database: DatabaseBase) -> List[str]:
+    query = "SELECT c.user_id FROM c WHERE c.data_type=@data_type"
+    parameters = [{"name": "@data_type", "value": DataType.plan}]
+    owners = set()
+    async for document in database.iter_items(query, parameters):
+        if document.get("user_id"):
+            owners.add(document["user_id"])
+    return sorted(owners)
+
+
+async def reconcile_plan_stats(
+    database: DatabaseBase, user_ids: Optional[Iterable[str]] = None
+) -> int:
+    """Rebuild the statistics of user_ids, or of every user owning a plan.
+
+    Returns the number of users whose statistics were rebuilt.
+    """
+    if user_ids is None:
+        user_ids = await _plan_owners(database)
+    rebuilt = 0
+    for user_id in user_ids:
+        stats = await database.rebuild_plan_stats(user_id)
+        logger.info(
+            "Rebuilt plan statistics of %s: %d plans",
+            user_id,
+            sum(stats.totals.values()),
+        )
+        rebuilt += 1
+    return rebuilt
+
+
+async def _run(args: argparse.Namespace) -> None:
+    from .database_factory import DatabaseFactory
+
+    try:
+        database = await DatabaseFactory.get_database()
+        rebuilt = await reconcile_plan_stats(database, args.user or None)
+        print(f"Rebuilt plan statistics of {rebuilt} users")
+    finally:
+        await DatabaseFactory.close_all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--user", action="append", help="Only rebuild this user (repeatable)"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
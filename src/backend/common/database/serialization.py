@@ -0,0 +1,117 @@
+"""Conversion of data models into stored documents and their JSON encoding."""
+
+import datetime
+import json
+import types
+import typing
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Set, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator; the stdlib encoder is used without it
+    orjson = None
+
+_UNION_TYPES = (typing.Union, types.UnionType)
+
+
+@dataclass(frozen=True)
+class _SerializationPlan:
+    """Per-model recipe for turning an instance into a stored document."""
+
+    adapter: TypeAdapter
+    # Fields annotated as datetime / Optional[datetime], converted in place
+    datetime_fields: Tuple[str, ...]
+    # Fields whose annotation nests dates or datetimes, walked recursively
+    nested_fields: Tuple[str, ...]
+
+
+def _is_datetime(annotation: Any) -> bool:
+    if annotation is datetime.datetime:
+        return True
+    if typing.get_origin(annotation) in _UNION_TYPES:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return args == [datetime.datetime]
+    return False
+
+
+def _contains_date(annotation: Any, seen: Set[type]) -> bool:
+    if annotation in (datetime.datetime, datetime.date):
+        return True
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if annotation in seen:
+            return False
+        seen.add(annotation)
+        return any(
+            _contains_date(field.annotation, seen)
+            for field in annotation.model_fields.values()
+        )
+    return any(_contains_date(arg, seen) for arg in typing.get_args(annotation))
+
+
+@lru_cache(maxsize=None)
+def _plan_for(model_class: Type[BaseModel]) -> _SerializationPlan:
+    datetime_fields, nested_fields = [], []
+    for name, field in model_class.model_fields.items():
+        if _is_datetime(field.annotation):
+            datetime_fields.append(name)
+        elif _contains_date(field.annotation, {model_class}):
+            nested_fields.append(name)
+    return _SerializationPlan(
+        adapter=TypeAdapter(model_class),
+        datetime_fields=tuple(datetime_fields),
+        nested_fields=tuple(nested_fields),
+    )
+
+
+def _isoformat_nested(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: _isoformat_nested(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_isoformat_nested(item) for item in value]
+    return value
+
+
+def to_document(item: BaseModel) -> Dict[str, Any]:
+    """Dump a model to a document ready for storage.
+
+    Matches ``model_dump()`` with datetimes written as ``isoformat()`` strings, at
+    any depth the field annotations declare. Which fields need converting is worked
+    out once per model class; values of ``Any``-typed fields are stored as given.
+    """
+    plan = _plan_for(type(item))
+    document = plan.adapter.dump_python(item)
+    for name in plan.datetime_fields:
+        value = document.get(name)
+        if value is not None:
+            document[name] = value.isoformat()
+    for name in plan.nested_fields:
+        if name in document:
+            document[name] = _isoformat_nested(document[name])
+    if item.__pydantic_extra__:
+        for name in item.__pydantic_extra__:
+            document[name] = _isoformat_nested(document.get(name))
+    return document
+
+
+def json_default(value: Any) -> Any:
+    """Fallback for values the JSON encoders do not handle natively."""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode(document: Any) -> bytes:
+    """Encode a document as compact UTF-8 JSON, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(
+            document, default=json_default, option=orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(
+        document, separators=(",", ":"), ensure_ascii=False, default=json_default
+    ).encode("utf-8")
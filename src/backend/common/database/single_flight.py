@@ -0,0 +1,118 @@
+"""Coalescing of identical concurrent reads into one request.
+
+A UI reload fires several endpoints at once, and many of them read the same
+current team or team list. ``SingleFlight`` runs the first call for a key and
+lets every caller that asks for the same key while it is in flight await that
+call's result instead of issuing its own request.
+
+Callers never join a flight that started before a write made through this
+client completed: every completed write moves the flight generation on, and the
+generation is part of the key. Results are shared, so flights should return
+data that callers do not mutate (e.g. raw documents each caller validates).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from opentelemetry import metrics
+
+from .throttle import WRITE_OPERATIONS
+
+meter = metrics.get_meter(__name__)
+
+_flight_calls = meter.create_counter(
+    "macae.single_flight.calls", description="Reads issued through a single flight"
+)
+_flight_coalesced = meter.create_counter(
+    "macae.single_flight.coalesced",
+    description="Reads served by joining an identical read already in flight",
+)
+
+
+class SingleFlight:
+    """Shares one in-flight call among concurrent callers asking for the same key.
+
+    The shared call runs as its own task, so a caller that is cancelled (e.g. a
+    client disconnect) does not cancel it for the others.
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.generation = 0
+        self._flights: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self._attributes = {"flight": name}
+
+    def invalidate(self) -> None:
+        """Make later calls start new flights instead of joining current ones."""
+        self.generation += 1
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of call(), shared with concurrent calls for key."""
+        if not self.enabled:
+            return await call()
+        self.calls += 1
+        _flight_calls.add(1, self._attributes)
+        flight_key = (self.generation, key)
+        flight = self._flights.get(flight_key)
+        if flight is None:
+            flight = asyncio.ensure_future(call())
+            self._flights[flight_key] = flight
+            flight.add_done_callback(lambda done: self._land(flight_key, done))
+        else:
+            self.coalesced += 1
+            _flight_coalesced.add(1, self._attributes)
+        return await asyncio.shield(flight)
+
+    def _land(self, flight_key: Tuple[int, Hashable], flight: asyncio.Future) -> None:
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+        # Mark the error retrieved when every caller was cancelled before it
+        if not flight.cancelled():
+            flight.exception()
+
+    def wrap(self, container: Any) -> "FlightInvalidatingContainer":
+        """Return a proxy of container whose completed writes invalidate flights."""
+        return FlightInvalidatingContainer(container, self)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call and coalescing counters."""
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": (
+                round(self.coalesced / self.calls, 4) if self.calls else 0.0
+            ),
+            "in_flight": len(self._flights),
+        }
+
+
+class FlightInvalidatingContainer:
+    """Container proxy that moves the flight generation on after every write.
+
+    Writes that fail still invalidate, since they may have been applied.
+    """
+
+    def __init__(self, container: Any, flights: SingleFlight):
+        self._container = container
+        self._flights = flights
+        for name in WRITE_OPERATIONS:
+            if hasattr(container, name):
+                setattr(self, name, self._write_operation(name))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._container, name)
+
+    def _write_operation(self, name: str) -> Callable:
+        method = getattr(self._container, name)
+
+        async def call(*args, **kwargs):
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self._flights.invalidate()
+
+        return call
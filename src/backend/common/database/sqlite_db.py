@@ -0,0 +1,1023 @@
+"""SQLite implementation of the database interface for single-node deployments."""
+
+import asyncio
+import base64
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+import v3.models.messages as messages
+
+from ..models.messages_kernel import (
+    AgentMessage,
+    AgentMessageData,
+    BaseDataModel,
+    DataType,
+    Plan,
+    PlanStats,
+    PlanSummary,
+    Step,
+    TeamConfiguration,
+    TeamSummary,
+    UserCurrentTeam,
+)
+from .cosmos_patch import apply_patch
+from .cosmos_query import normalize_value, parameter_map, parse_query
+from .database_base import (
+    DatabaseBase,
+    DeleteResult,
+    MessageCursor,
+    PreconditionFailedError,
+)
+from .message_codec import MessageCodec
+from .plan_stats import PlanStatsChanges, plan_status_changes, plan_status_key
+from .serialization import encode, to_document
+
+# Document fields stored in their own columns; everything else is read from the
+# JSON body with json_extract
+INDEXED_FIELDS = (
+    "id",
+    "session_id",
+    "data_type",
+    "user_id",
+    "team_id",
+    "plan_id",
+    "overall_status",
+    "_ts",
+)
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS documents (
+        id TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        data_type TEXT,
+        user_id TEXT,
+        team_id TEXT,
+        plan_id TEXT,
+        overall_status TEXT,
+        _ts INTEGER NOT NULL,
+        body TEXT NOT NULL CHECK (json_valid(body)),
+        PRIMARY KEY (session_id, id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_documents_user_type "
+    "ON documents (user_id, data_type)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_team_status_ts "
+    "ON documents (team_id, overall_status, _ts)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_plan_type "
+    "ON documents (plan_id, data_type)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_id ON documents (id)",
+)
+
+_COLUMNS = ", ".join(INDEXED_FIELDS + ("body",))
+_PLACEHOLDERS = ", ".join("?" for _ in INDEXED_FIELDS + ("body",))
+_UPDATES = ", ".join(
+    f"{field}=excluded.{field}"
+    for field in INDEXED_FIELDS + ("body",)
+    if field not in ("id", "session_id")
+)
+INSERT_SQL = f"INSERT INTO documents ({_COLUMNS}) VALUES ({_PLACEHOLDERS})"
+UPSERT_SQL = f"{INSERT_SQL} ON CONFLICT (session_id, id) DO UPDATE SET {_UPDATES}"
+
+# Rows read per round trip when streaming query results
+ITER_PAGE_SIZE = 100
+
+
+def _column(path: str) -> str:
+    """Map a dotted document path to an indexed column or a json_extract expression."""
+    if path in INDEXED_FIELDS:
+        return path
+    return f"json_extract(body, '$.{path}')"
+
+
+def _clause(condition: Tuple[Any, ...]) -> Tuple[str, List[Any]]:
+    """Render a (path, value) or (path, operator, value[, negated]) condition as SQL.
+
+    The type checks ``is_defined`` and ``is_string`` take no value; like
+    json_extract, is_defined treats a null value as undefined.
+    """
+    if len(condition) == 2:
+        (path, value), operator, negated = condition, "=", False
+    else:
+        path, operator, value, *rest = condition
+        negated = bool(rest and rest[0])
+    if operator in ("is_defined", "is_string"):
+        if operator == "is_defined":
+            check = f"{_column(path)} IS NOT NULL"
+        elif path in INDEXED_FIELDS:
+            check = f"typeof({path}) = 'text'"
+        else:
+            check = f"json_type(body, '$.{path}') IS 'text'"
+        return (f"NOT ({check})" if negated else check), []
+    if operator == "!=":
+        operator = "<>"
+    return f"{_column(path)} {operator} ?", [normalize_value(value)]
+
+
+class SQLiteDBClient(DatabaseBase):
+    """SQLite implementation of the database interface.
+
+    Runs in WAL mode so readers never block the writer. All writes go through a
+    single dedicated writer thread; reads run on a pool of reader threads, each
+    holding its own read-only connection.
+    """
+
+    MODEL_CLASS_MAPPING = {
+        DataType.plan: Plan,
+        DataType.step: Step,
+        DataType.agent_message: AgentMessage,
+        DataType.team_config: TeamConfiguration,
+        DataType.user_current_team: UserCurrentTeam,
+        DataType.plan_stats: PlanStats,
+    }
+
+    def __init__(
+        self,
+        database_path: str,
+        session_id: str = "",
+        user_id: str = "",
+        reader_pool_size: int = 4,
+        busy_timeout_ms: int = 5000,
+        plan_stats_enabled: bool = False,
+        message_codec: Optional[MessageCodec] = None,
+        trusted_reads: bool = False,
+    ):
+        self.database_path = database_path
+        self.session_id = session_id
+        self.user_id = user_id
+        self.reader_pool_size = max(1, reader_pool_size)
+        self.busy_timeout_ms = busy_timeout_ms
+        # Maintain the per-user PlanStats document in every plan write transaction
+        self.plan_stats_enabled = plan_stats_enabled
+        self.message_codec = message_codec
+        self.trusted_reads = trusted_reads
+
+        self.logger = logging.getLogger(__name__)
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._initialized = False
+        # Views created by for_user() share the connections of their parent
+        self._owns_connections = True
+
+    async def initialize(self) -> None:
+        """Open the writer and reader pools and create the schema if needed."""
+        try:
+            if not self._initialized:
+                self._writer = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix="sqlite-writer",
+                    initializer=self._open_connection,
+                    initargs=(False,),
+                )
+                await self._write(self._create_schema)
+                self._readers = ThreadPoolExecutor(
+                    max_workers=self.reader_pool_size,
+                    thread_name_prefix="sqlite-reader",
+                    initializer=self._open_connection,
+                    initargs=(True,),
+                )
+                self._initialized = True
+
+        except Exception as e:
+            self.logger.error("Failed to initialize SQLite: %s", str(e))
+            raise
+
+    def for_user(self, user_id: str) -> "SQLiteDBClient":
+        """Return a view scoped to user_id that shares this instance's connections."""
+        view = super().for_user(user_id)
+        view._owns_connections = False
+        return view
+
+    async def close(self) -> None:
+        """Shut down the thread pools and close all connections."""
+        if not self._owns_connections or not self._initialized:
+            return
+        self._initialized = False
+        for executor in (self._writer, self._readers):
+            if executor is not None:
+                await asyncio.to_thread(executor.shutdown, True)
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self.logger.info("Closed SQLite database %s", self.database_path)
+
+    # Connection handling
+    def _open_connection(self, read_only: bool) -> None:
+        """Open the calling thread's connection (runs as the executor initializer)."""
+        connection = self._connect(read_only)
+        self._local.connection = connection
+        with self._connections_lock:
+            self._connections.append(connection)
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.database_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        if read_only:
+            connection.execute("PRAGMA query_only=ON")
+        else:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _run_with_connection(self, operation: Callable[..., Any], *args) -> Any:
+        return operation(self._local.connection, *args)
+
+    async def _write(self, operation: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._writer, self._run_with_connection, operation, *args
+        )
+
+    async def _read(self, operation: Callable[..., Any], *args) -> Any:
+        await self._ensure_initialized()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._readers, self._run_with_connection, operation, *args
+        )
+
+    async def _ensure_initialized(self) -> None:
+        """Ensure the database is initialized."""
+        if not self._initialized:
+            await self.initialize()
+
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection) -> None:
+        for statement in SCHEMA:
+            connection.execute(statement)
+
+    # Statement helpers (run on the pool threads)
+    @staticmethod
+    def _row(document: Dict[str, Any]) -> Tuple[Any, ...]:
+        values = [normalize_value(document.get(field)) for field in INDEXED_FIELDS]
+        values.append(encode(document).decode("utf-8"))
+        return tuple(values)
+
+    @staticmethod
+    def _stamp(document: Dict[str, Any]) -> Dict[str, Any]:
+        document["_ts"] = int(time.time())
+        document["_etag"] = f'"{uuid.uuid4()}"'
+        return document
+
+    @staticmethod
+    def _execute_plan_stats(
+        connection: sqlite3.Connection, changes: PlanStatsChanges
+    ) -> None:
+        # Runs inside the caller's write transaction
+        for user_id, user_changes in changes.items():
+            document_id = PlanStats.document_id(user_id)
+            row = connection.execute(
+                "SELECT body FROM documents WHERE session_id = ? AND id = ?",
+                (document_id, document_id),
+            ).fetchone()
+            if row is None:
+                stats = PlanStats.for_user(user_id)
+            else:
+                stats = PlanStats.model_validate_json(row[0])
+            stats.apply(user_changes)
+            document = SQLiteDBClient._stamp(to_document(stats))
+            connection.execute(UPSERT_SQL, SQLiteDBClient._row(document))
+
+    @staticmethod
+    def _execute_plan_write(
+        connection: sqlite3.Connection,
+        document: Dict[str, Any],
+        upsert: bool,
+        plan_stats: bool,
+    ) -> None:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            before = None
+            if plan_stats:
+                row = connection.execute(
+                    "SELECT body FROM documents WHERE id = ? AND data_type = ?",
+                    (document["id"], normalize_value(DataType.plan)),
+                ).fetchone()
+                before = json.loads(row[0]) if row is not None else None
+            connection.execute(
+                UPSERT_SQL if upsert else INSERT_SQL, SQLiteDBClient._row(document)
+            )
+            if plan_stats:
+                SQLiteDBClient._execute_plan_stats(
+                    connection, plan_status_changes(before, document)
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _execute_write(
+        connection: sqlite3.Connection, sql: str, rows: Sequence[Tuple[Any, ...]]
+    ) -> int:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = connection.executemany(sql, rows)
+            connection.execute("COMMIT")
+            return cursor.rowcount
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _execute_cascade(
+        connection: sqlite3.Connection,
+        plan_id: str,
+        keep_plan: bool = False,
+        plan_stats: bool = False,
+    ) -> Tuple[Dict[str, int], Optional[str]]:
+        # Returns the deleted documents by data type and the plan's archive_key
+        archive_key = None
+        if keep_plan:
+            where = "WHERE plan_id = ? AND id != ?"
+        else:
+            where = "WHERE id = ? OR plan_id = ?"
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            counts = connection.execute(
+                f"SELECT data_type, COUNT(*) FROM documents {where} GROUP BY data_type",
+                (plan_id, plan_id),
+            ).fetchall()
+            if not keep_plan:
+                for (body,) in connection.execute(
+                    "SELECT body FROM documents WHERE id = ? AND data_type = ?",
+                    (plan_id, normalize_value(DataType.plan)),
+                ).fetchall():
+                    plan = json.loads(body)
+                    archive_key = plan.get("archive_key")
+                    if plan_stats:
+                        SQLiteDBClient._execute_plan_stats(
+                            connection, plan_status_changes(plan, None)
+                        )
+            connection.execute(f"DELETE FROM documents {where}", (plan_id, plan_id))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        deleted = {data_type or "unknown": count for data_type, count in counts}
+        return deleted, archive_key
+
+    @staticmethod
+    def _execute_patch(
+        connection: sqlite3.Connection,
+        plan_id: str,
+        operations: List[Dict[str, Any]],
+        etag: Optional[str],
+        plan_stats: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT body FROM documents WHERE id = ? AND data_type = ?",
+                (plan_id, normalize_value(DataType.plan)),
+            ).fetchone()
+            patched = None
+            if row is not None:
+                document = json.loads(row[0])
+                if etag is not None and document.get("_etag") != etag:
+                    raise PreconditionFailedError(f"Plan {plan_id} was modified")
+                patched = apply_patch(document, operations)
+                if patched.get("session_id") != document.get("session_id"):
+                    raise ValueError("The partition key cannot be patched")
+                SQLiteDBClient._stamp(patched)
+                connection.execute(UPSERT_SQL, SQLiteDBClient._row(patched))
+                if plan_stats:
+                    SQLiteDBClient._execute_plan_stats(
+                        connection, plan_status_changes(document, patched)
+                    )
+            connection.execute("COMMIT")
+            return patched
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _execute_select(
+        connection: sqlite3.Connection, sql: str, values: Sequence[Any]
+    ) -> List[Dict[str, Any]]:
+        return [json.loads(row[0]) for row in connection.execute(sql, values)]
+
+    @staticmethod
+    def _fetch_page(cursor: sqlite3.Cursor, size: int) -> List[Dict[str, Any]]:
+        return [json.loads(row[0]) for row in cursor.fetchmany(size)]
+
+    @staticmethod
+    def _build_select(
+        conditions: Sequence[Tuple[Any, ...]],
+        order_by: Sequence[Tuple[str, bool]] = (),
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[str, List[Any]]:
+        sql = "SELECT body FROM documents"
+        values: List[Any] = []
+        if conditions:
+            clauses = []
+            for condition in conditions:
+                clause, clause_values = _clause(condition)
+                clauses.append(clause)
+                values.extend(clause_values)
+            sql += " WHERE " + " AND ".join(clauses)
+        ordering = [
+            f"{_column(path)} {'DESC' if descending else 'ASC'}"
+            for path, descending in order_by
+        ]
+        # Keep insertion order between documents with equal sort keys
+        descending = bool(order_by) and order_by[0][1]
+        ordering.append(f"rowid {'DESC' if descending else 'ASC'}")
+        sql += " ORDER BY " + ", ".join(ordering)
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            values.extend([limit, offset])
+        return sql, values
+
+    async def _select(
+        self,
+        conditions: Sequence[Tuple[Any, ...]],
+        order_by: Sequence[Tuple[str, bool]] = (),
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        sql, values = self._build_select(conditions, order_by, limit, offset)
+        return await self._read(self._execute_select, sql, values)
+
+    async def _find(
+        self,
+        model_class: Type[BaseDataModel],
+        order_by: Sequence[Tuple[str, bool]] = (),
+        **filters: Any,
+    ) -> List[BaseDataModel]:
+        documents = await self._select(list(filters.items()), order_by)
+        return self._validate(documents, model_class)
+
+    async def _find_one(
+        self, model_class: Type[BaseDataModel], **filters: Any
+    ) -> Optional[BaseDataModel]:
+        results = await self._find(model_class, **filters)
+        return results[0] if results else None
+
+    async def _find_page(
+        self,
+        model_class: Type[BaseDataModel],
+        conditions: Sequence[Tuple[str, Any]],
+        order_by: Sequence[Tuple[str, bool]],
+        page_size: int,
+        continuation_token: Optional[str],
+    ) -> Tuple[List[BaseDataModel], Optional[str]]:
+        offset = self._decode_token(continuation_token)
+        # Read one extra row to know whether another page follows
+        documents = await self._select(conditions, order_by, page_size + 1, offset)
+        return self._page(documents, model_class, page_size, offset)
+
+    def _page(
+        self,
+        documents: List[Dict[str, Any]],
+        model_class: Type[BaseDataModel],
+        page_size: int,
+        offset: int,
+    ) -> Tuple[List[BaseDataModel], Optional[str]]:
+        next_token = None
+        if len(documents) > page_size:
+            documents = documents[:page_size]
+            next_token = self._encode_token(offset + page_size)
+        return self._validate(documents, model_class), next_token
+
+    @staticmethod
+    def _encode_token(offset: int) -> str:
+        payload = json.dumps({"offset": offset}).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii")
+
+    @staticmethod
+    def _decode_token(token: Optional[str]) -> int:
+        if not token:
+            return 0
+        try:
+            offset = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))[
+                "offset"
+            ]
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError("Invalid continuation token") from e
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("Invalid continuation token")
+        return offset
+
+    async def _store(self, documents: List[Dict[str, Any]], upsert: bool) -> None:
+        await self._ensure_initialized()
+        rows = [self._row(self._stamp(document)) for document in documents]
+        await self._write(
+            self._execute_write, UPSERT_SQL if upsert else INSERT_SQL, rows
+        )
+
+    async def _delete_where(self, conditions: Sequence[Tuple[str, Any]]) -> int:
+        await self._ensure_initialized()
+        sql = "DELETE FROM documents WHERE " + " AND ".join(
+            f"{_column(path)} = ?" for path, _ in conditions
+        )
+        values = tuple(normalize_value(value) for _, value in conditions)
+        return await self._write(self._execute_write, sql, [values])
+
+    # Core CRUD Operations
+    async def add_item(self, item: BaseDataModel) -> None:
+        """Add an item to SQLite."""
+        try:
+            await self._store([self._to_document(item)], upsert=False)
+        except Exception as e:
+            self.logger.error("Failed to add item to SQLite: %s", str(e))
+            raise
+
+    async def update_item(self, item: BaseDataModel) -> None:
+        """Update an item in SQLite."""
+        try:
+            await self._store([self._to_document(item)], upsert=True)
+        except Exception as e:
+            self.logger.error("Failed to update item in SQLite: %s", str(e))
+            raise
+
+    async def get_item_by_id(
+        self, item_id: str, partition_key: str, model_class: Type[BaseDataModel]
+    ) -> Optional[BaseDataModel]:
+        """Retrieve an item by its ID and partition key."""
+        try:
+            return await self._find_one(
+                model_class, id=item_id, session_id=partition_key
+            )
+        except Exception as e:
+            self.logger.error("Failed to retrieve item from SQLite: %s", str(e))
+            return None
+
+    async def query_items(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        model_class: Type[BaseDataModel],
+    ) -> List[BaseDataModel]:
+        """Run a query written in the Cosmos DB SQL subset used by the data layer."""
+        try:
+            documents = await self._query_documents(query, parameters)
+            return self._validate(documents, model_class)
+        except Exception as e:
+            self.logger.error("Failed to query items from SQLite: %s", str(e))
+            return []
+
+    async def iter_items(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        model_class: Optional[Type[BaseDataModel]] = None,
+        page_size: Optional[int] = None,
+    ) -> AsyncIterator[Any]:
+        """Stream query results, reading page_size rows per round trip.
+
+        The rows come from one cursor on a connection of its own, so a full scan
+        reads every row once from a single snapshot, and a caller reading more
+        inside the loop does not wait for a pooled reader held by the scan.
+        """
+        page_size = page_size or ITER_PAGE_SIZE
+        await self._ensure_initialized()
+        parsed, sql, values = self._compile_query(query, parameters)
+        connection = await asyncio.to_thread(self._connect, True)
+        try:
+            cursor = await asyncio.to_thread(connection.execute, sql, values)
+            while True:
+                documents = await asyncio.to_thread(
+                    self._fetch_page, cursor, page_size
+                )
+                documents = [parsed.project(document) for document in documents]
+                page = (
+                    documents
+                    if model_class is None
+                    else self._validate(documents, model_class)
+                )
+                for item in page:
+                    yield item
+                if len(documents) < page_size:
+                    return
+        finally:
+            await asyncio.to_thread(connection.close)
+
+    async def query_page(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        model_class: Type[BaseDataModel],
+        page_size: int,
+        continuation_token: Optional[str] = None,
+    ) -> Tuple[List[BaseDataModel], Optional[str]]:
+        """Query a single page of items.
+
+        Raises:
+            ValueError: If the continuation token is not valid for the query
+        """
+        offset = self._decode_token(continuation_token)
+        documents = await self._query_documents(
+            query, parameters, limit=page_size + 1, offset=offset
+        )
+        return self._page(documents, model_class, page_size, offset)
+
+    async def _query_documents(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        parsed, sql, values = self._compile_query(query, parameters, limit, offset)
+        documents = await self._read(self._execute_select, sql, values)
+        return [parsed.project(document) for document in documents]
+
+    def _compile_query(
+        self,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[Any, str, List[Any]]:
+        """Translate a query into its parsed form, SQL and SQL parameter values."""
+        parsed = parse_query(query)
+        values = parameter_map(parameters)
+        conditions = [
+            (
+                ".".join(condition.path),
+                condition.operator,
+                None
+                if condition.operator in ("is_defined", "is_string")
+                else condition.value(values),
+                condition.negated,
+            )
+            for condition in parsed.conditions
+        ]
+        order_by = [
+            (".".join(order.path), order.descending) for order in parsed.order_by
+        ]
+        sql, sql_values = self._build_select(conditions, order_by, limit, offset)
+        return parsed, sql, sql_values
+
+    async def delete_item(self, item_id: str, partition_key: str) -> None:
+        """Delete an item from SQLite."""
+        try:
+            await self._delete_where([("id", item_id), ("session_id", partition_key)])
+        except Exception as e:
+            self.logger.error("Failed to delete item from SQLite: %s", str(e))
+            raise
+
+    # Plan Operations
+    async def add_plan(self, plan: Plan) -> None:
+        """Add a plan to SQLite, counting it in the owner's plan statistics."""
+        await self._store_plan(plan, upsert=False)
+
+    async def update_plan(self, plan: Plan) -> None:
+        """Update a plan in SQLite together with the owner's plan statistics."""
+        await self._store_plan(plan, upsert=True)
+
+    async def _store_plan(self, plan: Plan, upsert: bool) -> None:
+        await self._ensure_initialized()
+        document = self._stamp(self._to_document(plan))
+        try:
+            await self._write(
+                self._execute_plan_write, document, upsert, self.plan_stats_enabled
+            )
+        except Exception as e:
+            self.logger.error("Failed to write plan to SQLite: %s", str(e))
+            raise
+
+    async def patch_plan(
+        self,
+        plan_id: str,
+        operations: List[Dict[str, Any]],
+        etag: Optional[str] = None,
+    ) -> Optional[Plan]:
+        """Patch a plan in place within one write transaction."""
+        await self._ensure_initialized()
+        document = await self._write(
+            self._execute_patch, plan_id, operations, etag, self.plan_stats_enabled
+        )
+        return Plan.model_validate(document) if document is not None else None
+
+    async def get_plan_by_plan_id(self, plan_id: str) -> Optional[Plan]:
+        """Retrieve a plan by plan_id."""
+        return await self._find_one(Plan, id=plan_id, data_type=DataType.plan)
+
+    async def get_plan(self, plan_id: str) -> Optional[Plan]:
+        """Retrieve a plan by plan_id."""
+        return await self.get_plan_by_plan_id(plan_id)
+
+    async def get_all_plans(self) -> List[Plan]:
+        """Retrieve all plans for the user."""
+        return await self._find(Plan, user_id=self.user_id, data_type=DataType.plan)
+
+    async def get_all_plans_by_team_id(self, team_id: str) -> List[Plan]:
+        """Retrieve all plans for a specific team."""
+        return await self._find(
+            Plan, team_id=team_id, data_type=DataType.plan, user_id=self.user_id
+        )
+
+    def _team_plan_conditions(
+        self, user_id: str, team_id: str, status: str
+    ) -> List[Tuple[str, Any]]:
+        return [
+            ("team_id", team_id),
+            ("overall_status", status),
+            ("data_type", DataType.plan),
+            ("user_id", user_id),
+        ]
+
+    async def get_all_plans_by_team_id_status(
+        self, user_id: str, team_id: str, status: str
+    ) -> List[Plan]:
+        """Retrieve all plans for a specific team, newest first."""
+        documents = await self._select(
+            self._team_plan_conditions(user_id, team_id, status), [("_ts", True)]
+        )
+        return self._validate(documents, Plan)
+
+    async def get_plans_page_by_team_id_status(
+        self,
+        user_id: str,
+        team_id: str,
+        status: str,
+        page_size: int,
+        continuation_token: Optional[str] = None,
+    ) -> Tuple[List[Plan], Optional[str]]:
+        """Retrieve one page of plans for a team, newest first."""
+        return await self._find_page(
+            Plan,
+            self._team_plan_conditions(user_id, team_id, status),
+            [("_ts", True)],
+            page_size,
+            continuation_token,
+        )
+
+    async def get_plan_summaries_by_team_id_status(
+        self,
+        user_id: str,
+        team_id: str,
+        status: str,
+        page_size: Optional[int] = None,
+        continuation_token: Optional[str] = None,
+    ) -> Tuple[List[PlanSummary], Optional[str]]:
+        """Retrieve plan summaries for a team, newest first."""
+        conditions = self._team_plan_conditions(user_id, team_id, status)
+        if page_size is None and continuation_token is None:
+            documents = await self._select(conditions, [("_ts", True)])
+            return self._validate(documents, PlanSummary), None
+        return await self._find_page(
+            PlanSummary,
+            conditions,
+            [("_ts", True)],
+            page_size or 20,
+            continuation_token,
+        )
+
+    # Plan statistics
+    @staticmethod
+    def _execute_rebuild_plan_stats(
+        connection: sqlite3.Connection, user_id: str
+    ) -> Dict[str, Any]:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                "SELECT team_id, overall_status, COUNT(*) FROM documents "
+                "WHERE user_id = ? AND data_type = ? "
+                "GROUP BY team_id, overall_status",
+                (user_id, normalize_value(DataType.plan)),
+            ).fetchall()
+            stats = PlanStats.for_user(user_id)
+            changes: Dict[Tuple[str, str], int] = {}
+            for team_id, status, count in rows:
+                key = plan_status_key(
+                    {
+                        "data_type": DataType.plan,
+                        "user_id": user_id,
+                        "team_id": team_id,
+                        "overall_status": status,
+                    }
+                )
+                if key is not None:
+                    changes[key[1:]] = changes.get(key[1:], 0) + count
+            stats.apply(changes)
+            document = SQLiteDBClient._stamp(to_document(stats))
+            connection.execute(UPSERT_SQL, SQLiteDBClient._row(document))
+            connection.execute("COMMIT")
+            return document
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def get_plan_stats(self, user_id: Optional[str] = None) -> PlanStats:
+        """Return the plan statistics of a user (recounted when not maintained)."""
+        user_id = user_id or self.user_id
+        if not self.plan_stats_enabled:
+            return await self.rebuild_plan_stats(user_id)
+        document_id = PlanStats.document_id(user_id)
+        stats = await self._find_one(PlanStats, id=document_id, session_id=document_id)
+        if stats is None:
+            return await self.rebuild_plan_stats(user_id)
+        return stats
+
+    async def rebuild_plan_stats(self, user_id: str) -> PlanStats:
+        """Recount the plans of a user within one write transaction."""
+        await self._ensure_initialized()
+        document = await self._write(self._execute_rebuild_plan_stats, user_id)
+        return PlanStats.model_validate(document)
+
+    # Step Operations
+    async def add_step(self, step: Step) -> None:
+        """Add a step to SQLite."""
+        await self.add_item(step)
+
+    async def update_step(self, step: Step) -> None:
+        """Update a step in SQLite."""
+        await self.update_item(step)
+
+    async def get_steps_by_plan(self, plan_id: str) -> List[Step]:
+        """Retrieve all steps for a plan."""
+        return await self._find(
+            Step,
+            order_by=[("timestamp", False)],
+            plan_id=plan_id,
+            data_type=DataType.step,
+        )
+
+    async def get_step(self, step_id: str, session_id: str) -> Optional[Step]:
+        """Retrieve a step by step_id and session_id."""
+        return await self._find_one(
+            Step, id=step_id, session_id=session_id, data_type=DataType.step
+        )
+
+    async def get_steps_for_plan(self, plan_id: str) -> List[Step]:
+        """Alias for get_steps_by_plan for compatibility."""
+        return await self.get_steps_by_plan(plan_id)
+
+    # Team Operations
+    async def add_team(self, team: TeamConfiguration) -> None:
+        """Add a team configuration to SQLite."""
+        await self.add_item(team)
+
+    async def update_team(self, team: TeamConfiguration) -> None:
+        """Update an existing team configuration in SQLite."""
+        await self.update_item(team)
+
+    async def get_team(self, team_id: str) -> Optional[TeamConfiguration]:
+        """Retrieve a specific team configuration by team_id."""
+        return await self._find_one(
+            TeamConfiguration, team_id=team_id, data_type=DataType.team_config
+        )
+
+    async def get_team_by_id(self, team_id: str) -> Optional[TeamConfiguration]:
+        """Retrieve a specific team configuration by team_id."""
+        return await self.get_team(team_id)
+
+    async def get_all_teams(self) -> List[TeamConfiguration]:
+        """Retrieve all team configurations, newest first."""
+        return await self._find(
+            TeamConfiguration,
+            order_by=[("created", True)],
+            data_type=DataType.team_config,
+        )
+
+    async def get_team_summaries(self) -> List[TeamSummary]:
+        """Retrieve summaries of all team configurations."""
+        return [TeamSummary.from_team(team) for team in await self.get_all_teams()]
+
+    async def delete_team(self, team_id: str) -> bool:
+        """Delete a team configuration by team_id."""
+        try:
+            team = await self.get_team(team_id)
+            if team:
+                await self.delete_item(item_id=team.id, partition_key=team.session_id)
+            return True
+        except Exception as e:
+            self.logger.exception("Failed to delete team from SQLite: %s", e)
+            return False
+
+    # Data Management Operations
+    async def get_data_by_type(self, data_type: str) -> List[BaseDataModel]:
+        """Retrieve all data of a specific type."""
+        model_class = self.MODEL_CLASS_MAPPING.get(data_type, BaseDataModel)
+        return await self._find(model_class, data_type=data_type, user_id=self.user_id)
+
+    async def get_all_items(self) -> List[Dict[str, Any]]:
+        """Retrieve all items as dictionaries."""
+        query = "SELECT * FROM c WHERE c.user_id=@user_id"
+        parameters = [{"name": "@user_id", "value": self.user_id}]
+        return [item async for item in self.iter_items(query, parameters)]
+
+    # Current team Operations
+    async def get_current_team(self, user_id: str) -> Optional[UserCurrentTeam]:
+        """Retrieve the current team for a user."""
+        return await self._find_one(
+            UserCurrentTeam, data_type=DataType.user_current_team, user_id=user_id
+        )
+
+    async def delete_current_team(self, user_id: str) -> bool:
+        """Delete the current team for a user."""
+        await self._delete_where(
+            [("user_id", user_id), ("data_type", DataType.user_current_team)]
+        )
+        return True
+
+    async def set_current_team(self, current_team: UserCurrentTeam) -> None:
+        """Set the current team for a user."""
+        await self.add_item(current_team)
+
+    async def update_current_team(self, current_team: UserCurrentTeam) -> None:
+        """Update the current team for a user."""
+        await self.update_item(current_team)
+
+    async def delete_plan_by_plan_id(self, plan_id: str) -> bool:
+        """Delete a plan and every document that belongs to it."""
+        await self.delete_plan_cascade(plan_id)
+        return True
+
+    async def delete_plan_cascade(
+        self, plan_id: str, keep_plan: bool = False
+    ) -> DeleteResult:
+        """Delete a plan together with every document that references its plan_id.
+
+        Runs as a single write transaction. With keep_plan, the plan stays.
+        """
+        started = time.perf_counter()
+        await self._ensure_initialized()
+        deleted, archive_key = await self._write(
+            self._execute_cascade, plan_id, keep_plan, self.plan_stats_enabled
+        )
+        result = DeleteResult(
+            deleted=deleted,
+            batches=1,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            archive_key=archive_key,
+        )
+        await self._forget_archive(result)
+        return result
+
+    # MPlan Operations
+    async def add_mplan(self, mplan: messages.MPlan) -> None:
+        """Add an mplan to the database."""
+        await self.add_item(mplan)
+
+    async def update_mplan(self, mplan: messages.MPlan) -> None:
+        """Update an mplan in the database."""
+        await self.update_item(mplan)
+
+    async def get_mplan(self, plan_id: str) -> Optional[messages.MPlan]:
+        """Retrieve an mplan by plan_id."""
+        return await self._find_one(
+            messages.MPlan, plan_id=plan_id, data_type=DataType.m_plan
+        )
+
+    # Agent message Operations
+    async def add_agent_message(self, message: AgentMessageData) -> None:
+        """Add an agent message to the database."""
+        await self.add_item(message)
+
+    async def update_agent_message(self, message: AgentMessageData) -> None:
+        """Update an agent message in the database."""
+        await self.update_item(message)
+
+    async def get_agent_messages(self, plan_id: str) -> List[AgentMessageData]:
+        """Retrieve the agent messages of a plan in the order they were written."""
+        return await self._find(
+            AgentMessageData,
+            order_by=[("_ts", False)],
+            plan_id=plan_id,
+            data_type=DataType.m_plan_message,
+        )
+
+    async def get_agent_messages_since(
+        self, plan_id: str, cursor: Optional[str] = None
+    ) -> Tuple[List[AgentMessageData], str]:
+        """Retrieve the agent messages of a plan written after a cursor."""
+        position = MessageCursor.decode(cursor)
+        documents = await self._select(
+            [
+                ("plan_id", plan_id),
+                ("data_type", DataType.m_plan_message),
+                ("_ts", ">=", position.since_ts),
+            ],
+            [("_ts", False)],
+        )
+        documents, position = position.advance(documents)
+        return self._validate(documents, AgentMessageData), position.encode()
@@ -0,0 +1,345 @@
+"""Adaptive, throttle-aware concurrency limiting of Cosmos DB writes."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Mapping, Optional
+
+from azure.cosmos.exceptions import CosmosHttpResponseError
+from azure.cosmos.http_constants import HttpHeaders, StatusCodes
+from opentelemetry import metrics
+
+logger = logging.getLogger(__name__)
+meter = metrics.get_meter(__name__)
+
+# Container methods that consume write request units
+WRITE_OPERATIONS = (
+    "create_item",
+    "upsert_item",
+    "replace_item",
+    "patch_item",
+    "delete_item",
+    "execute_item_batch",
+)
+
+# Fairness key of writes that do not name a user or partition
+SHARED_KEY = "shared"
+
+
+def is_throttled(error: BaseException) -> bool:
+    """Return whether error is a 429 response (request rate too large)."""
+    return (
+        isinstance(error, CosmosHttpResponseError)
+        and error.status_code == StatusCodes.TOO_MANY_REQUESTS
+    )
+
+
+def _retry_after_ms(headers: Optional[Mapping[str, Any]]) -> float:
+    try:
+        return float((headers or {}).get(HttpHeaders.RetryAfterInMilliseconds, 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _throttle_retries(headers: Optional[Mapping[str, Any]]) -> int:
+    # Throttled attempts the SDK already retried before the request succeeded
+    try:
+        return int((headers or {}).get(HttpHeaders.ThrottleRetryCount, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit that backs off when Cosmos DB throttles.
+
+    Every successful request raises the limit by ``increase`` divided by the
+    current limit (about ``increase`` per round of requests); a throttled
+    request multiplies it by ``decrease_factor``, at most once per
+    ``decrease_cooldown`` seconds so that one burst of 429s only halves it once.
+    A 429 also holds back new requests for the ``x-ms-retry-after-ms`` the
+    service asked for. Waiting requests are admitted round-robin across keys
+    (user ids), so one user's burst cannot starve the others. A throttled
+    request is retried until ``max_retry_wait`` seconds have passed since its
+    first 429, like the SDK's own throttling retry policy.
+    """
+
+    def __init__(
+        self,
+        name: str = "cosmos_writes",
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 0.1,
+        max_retry_wait: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.max_retry_wait = max_retry_wait
+        self._clock = clock
+
+        self._in_flight = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queue_depth = 0
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._wake_handle: Optional[asyncio.TimerHandle] = None
+
+        self._throttled = 0
+        self._retries = 0
+        self._rejected = 0
+
+        attributes = {"limiter": name}
+        self._attributes = attributes
+        self._limit_counter = meter.create_up_down_counter(
+            "macae.cosmos.limiter.limit",
+            description="Current adaptive concurrency limit of Cosmos DB writes",
+        )
+        self._queue_counter = meter.create_up_down_counter(
+            "macae.cosmos.limiter.queue_depth",
+            description="Cosmos DB writes waiting for a concurrency slot",
+        )
+        self._throttle_counter = meter.create_counter(
+            "macae.cosmos.limiter.throttled",
+            description="Cosmos DB writes answered with 429 (request rate too large)",
+        )
+        self._limit_counter.add(self.current_limit, attributes)
+
+    @property
+    def current_limit(self) -> int:
+        """Number of requests allowed in flight at once."""
+        return int(self.limit)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot."""
+        return self._queue_depth
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of limiter metrics."""
+        return {
+            "limit": self.current_limit,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queue_depth,
+            "waiting_keys": len(self._waiters),
+            "throttled": self._throttled,
+            "retries": self._retries,
+            "rejected": self._rejected,
+        }
+
+    def wrap(self, container: Any) -> "ThrottledContainer":
+        """Return a proxy of container whose writes go through this limiter."""
+        return ThrottledContainer(container, self)
+
+    # Slot handling
+    def _paused(self) -> bool:
+        return self._clock() < self._paused_until
+
+    def _set_limit(self, limit: float) -> None:
+        previous = self.current_limit
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        if self.current_limit != previous:
+            self._limit_counter.add(self.current_limit - previous, self._attributes)
+
+    def _schedule_wake(self) -> None:
+        if self._wake_handle is not None:
+            return
+        delay = max(0.0, self._paused_until - self._clock())
+        loop = asyncio.get_running_loop()
+        self._wake_handle = loop.call_later(delay, self._on_wake)
+
+    def _on_wake(self) -> None:
+        self._wake_handle = None
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.current_limit:
+            if self._paused():
+                self._schedule_wake()
+                return
+            key, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                # Round-robin: the key goes to the back of the line
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            self._queue_depth -= 1
+            self._queue_counter.add(-1, self._attributes)
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    async def _acquire(self, key: str) -> None:
+        if (
+            not self._waiters
+            and self._in_flight < self.current_limit
+            and not self._paused()
+        ):
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(waiter)
+        self._queue_depth += 1
+        self._queue_counter.add(1, self._attributes)
+        if self._paused():
+            self._schedule_wake()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Cancelled after being admitted: hand the slot on
+                self._release()
+            else:
+                self._discard(key, waiter)
+            raise
+
+    def _discard(self, key: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiters.get(key)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del self._waiters[key]
+        self._queue_depth -= 1
+        self._queue_counter.add(-1, self._attributes)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, key: Optional[str] = None):
+        """Hold one concurrency slot for the duration of the block."""
+        await self._acquire(key or SHARED_KEY)
+        try:
+            yield
+        finally:
+            self._release()
+
+    # Feedback
+    def on_success(self, throttle_retries: int = 0) -> None:
+        """Record a completed request; throttle_retries counts SDK-retried 429s."""
+        if throttle_retries:
+            self._throttled += throttle_retries
+            self._throttle_counter.add(throttle_retries, self._attributes)
+            self._decrease()
+            return
+        self._set_limit(self.limit + self.increase / max(self.limit, 1.0))
+        self._wake()
+
+    def on_throttled(self, retry_after_ms: float) -> float:
+        """Record a 429; returns the seconds to wait before retrying."""
+        self._throttled += 1
+        self._throttle_counter.add(1, self._attributes)
+        self._decrease()
+        delay = max(retry_after_ms, 0.0) / 1000
+        self._paused_until = max(self._paused_until, self._clock() + delay)
+        return delay
+
+    def _decrease(self) -> None:
+        now = self._clock()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self._set_limit(self.limit * self.decrease_factor)
+        logger.info(
+            "Cosmos DB throttled %s; concurrency limit lowered to %d",
+            self.name,
+            self.current_limit,
+        )
+
+    async def run(
+        self,
+        key: Optional[str],
+        call: Callable[[], Any],
+        response_headers: Optional[Callable[[], Optional[Mapping[str, Any]]]] = None,
+    ) -> Any:
+        """Run call() in a slot, retrying after the service's delay on 429s.
+
+        call must start a new request each time it is invoked. response_headers,
+        when given, returns the headers of the successful response so that
+        throttles the SDK retried internally also lower the limit.
+        """
+        deadline: Optional[float] = None
+        while True:
+            async with self.slot(key):
+                try:
+                    result = await call()
+                except CosmosHttpResponseError as e:
+                    if not is_throttled(e):
+                        raise
+                    delay = self.on_throttled(_retry_after_ms(e.headers))
+                    now = self._clock()
+                    if deadline is None:
+                        deadline = now + self.max_retry_wait
+                    if now + delay > deadline:
+                        self._rejected += 1
+                        raise
+                else:
+                    headers = response_headers() if response_headers else None
+                    self.on_success(_throttle_retries(headers))
+                    return result
+            self._retries += 1
+            await asyncio.sleep(delay)
+
+
+class ThrottledContainer:
+    """Container proxy that runs every write through an adaptive limiter.
+
+    Reads and queries pass straight through. The fairness key of a write is the
+    ``user_id`` of its body, falling back to its partition key.
+    """
+
+    def __init__(self, container: Any, limiter: AdaptiveConcurrencyLimiter):
+        self._container = container
+        self._limiter = limiter
+        for name in WRITE_OPERATIONS:
+            if hasattr(container, name):
+                setattr(self, name, self._write_operation(name))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._container, name)
+
+    @staticmethod
+    def _fairness_key(kwargs: Dict[str, Any]) -> str:
+        body = kwargs.get("body")
+        if body is None and kwargs.get("batch_operations"):
+            operation_args = kwargs["batch_operations"][0][1]
+            body = operation_args[-1] if operation_args else None
+        if isinstance(body, dict) and body.get("user_id"):
+            return str(body["user_id"])
+        partition_key = kwargs.get("partition_key")
+        return str(partition_key) if partition_key is not None else SHARED_KEY
+
+    def _write_operation(self, name: str) -> Callable:
+        method = getattr(self._container, name)
+        limiter = self._limiter
+
+        async def call(*args, **kwargs):
+            user_hook = kwargs.get("response_hook")
+            captured: Dict[str, Any] = {}
+
+            def hook(headers, result):
+                captured["headers"] = headers
+                if user_hook is not None:
+                    user_hook(headers, result)
+
+            async def attempt():
+                return await method(*args, **{**kwargs, "response_hook": hook})
+
+            return await limiter.run(
+                self._fairness_key(kwargs), attempt, lambda: captured.get("headers")
+            )
+
+        return call
@@ -0,0 +1,317 @@
+"""Write-behind buffering of document writes into Cosmos DB transactional batches."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from azure.cosmos.exceptions import CosmosBatchOperationError
+from opentelemetry import metrics
+
+logger = logging.getLogger(__name__)
+meter = metrics.get_meter(__name__)
+
+# Cosmos DB rejects transactional batches with more than 100 operations
+MAX_TRANSACTIONAL_BATCH_SIZE = 100
+
+
+class WriteBehindError(Exception):
+    """Raised by a flush that gave up on buffered documents."""
+
+    def __init__(self, partition_key: str, document_ids: List[Any]):
+        super().__init__(
+            f"Failed to write {len(document_ids)} buffered documents to partition "
+            f"{partition_key}: {document_ids}"
+        )
+        self.partition_key = partition_key
+        self.document_ids = document_ids
+
+
+class WriteBehindBuffer:
+    """Groups document upserts per partition key and writes them as transactional batches.
+
+    Documents are flushed when a partition reaches ``max_batch_size``, when the
+    oldest pending document is older than ``flush_interval`` seconds, or when
+    ``flush`` is called explicitly (end of plan, reads that need the data, shutdown).
+    The buffer holds at most ``max_queue_size`` documents; producers wait for a
+    flush once it is full.
+
+    A document that cannot be written is queued again and retried by later
+    flushes; after ``max_write_attempts`` failed writes it is dropped and the
+    flush raises ``WriteBehindError`` naming it.
+    """
+
+    def __init__(
+        self,
+        container: Any,
+        max_batch_size: int = 50,
+        flush_interval: float = 0.25,
+        max_queue_size: int = 1000,
+        max_write_attempts: int = 3,
+    ):
+        self.container = container
+        self.max_batch_size = max(1, min(max_batch_size, MAX_TRANSACTIONAL_BATCH_SIZE))
+        self.flush_interval = flush_interval
+        self.max_queue_size = max(max_queue_size, self.max_batch_size)
+        self.max_write_attempts = max(1, max_write_attempts)
+
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._first_enqueued: Dict[str, float] = {}
+        self._partition_locks: Dict[str, asyncio.Lock] = {}
+        self._queue_depth = 0
+        self._space_available: Optional[asyncio.Condition] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # At most one flush started by producers waiting for space
+        self._backpressure_task: Optional[asyncio.Task] = None
+        # Failed writes per (partition key, document id) still being retried
+        self._attempts: Dict[Tuple[str, Any], int] = {}
+        self._closed = False
+
+        self._flush_count = 0
+        self._flushed_documents = 0
+        self._failed_documents = 0
+        self._retried_documents = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+
+        self._flush_duration = meter.create_histogram(
+            "macae.cosmos.write_behind.flush_duration",
+            unit="ms",
+            description="Time taken to flush one partition batch to Cosmos DB",
+        )
+        self._batch_size_histogram = meter.create_histogram(
+            "macae.cosmos.write_behind.batch_size",
+            description="Number of documents written per flushed batch",
+        )
+        self._queue_depth_counter = meter.create_up_down_counter(
+            "macae.cosmos.write_behind.queue_depth",
+            description="Documents waiting in the write-behind buffer",
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of documents waiting to be written."""
+        return self._queue_depth
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of buffer metrics."""
+        return {
+            "queue_depth": self._queue_depth,
+            "pending_partitions": len(self._pending),
+            "flush_count": self._flush_count,
+            "flushed_documents": self._flushed_documents,
+            "failed_documents": self._failed_documents,
+            "retried_documents": self._retried_documents,
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "max_flush_ms": round(self._max_flush_ms, 2),
+        }
+
+    async def enqueue(self, partition_key: str, document: Dict[str, Any]) -> None:
+        """Queue a document for upsert into the given partition."""
+        if self._closed:
+            raise RuntimeError("Write-behind buffer is closed")
+        if self._space_available is None:
+            self._space_available = asyncio.Condition()
+        self._ensure_flush_task()
+
+        async with self._space_available:
+            while self._queue_depth >= self.max_queue_size:
+                # Make room by flushing the largest partition, then wait for space
+                self._ensure_backpressure_flush()
+                await self._space_available.wait()
+
+            self._pending.setdefault(partition_key, []).append(document)
+            self._first_enqueued.setdefault(partition_key, time.monotonic())
+            self._queue_depth += 1
+            self._queue_depth_counter.add(1)
+
+        if len(self._pending.get(partition_key, ())) >= self.max_batch_size:
+            await self.flush(partition_key)
+
+    def partitions_holding(self, field: str, value: Any) -> List[str]:
+        """Return the partition keys with a pending document whose field is value."""
+        return [
+            partition_key
+            for partition_key, documents in self._pending.items()
+            if any(document.get(field) == value for document in documents)
+        ]
+
+    async def flush(self, partition_key: Optional[str] = None) -> None:
+        """Write pending documents of one partition, or of all partitions when None."""
+        if partition_key is None:
+            partitions = list(self._pending)
+        else:
+            partitions = [partition_key]
+        errors = []
+        for key in partitions:
+            try:
+                await self._flush_partition(key)
+            except WriteBehindError as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+    async def close(self) -> None:
+        """Stop the background flushers and write everything still buffered.
+
+        Documents still failing are retried until they run out of attempts.
+        """
+        self._closed = True
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self._backpressure_task is not None:
+            await self._backpressure_task
+            self._backpressure_task = None
+        errors = []
+        while self._pending:
+            try:
+                await self.flush()
+            except WriteBehindError as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+    def _ensure_flush_task(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    def _ensure_backpressure_flush(self) -> None:
+        if self._backpressure_task is not None and not self._backpressure_task.done():
+            return
+        if self._pending:
+            largest = max(self._pending, key=lambda key: len(self._pending[key]))
+            self._backpressure_task = asyncio.create_task(
+                self._flush_logged(largest)
+            )
+
+    async def _flush_logged(self, partition_key: str) -> None:
+        try:
+            await self._flush_partition(partition_key)
+        except Exception as e:
+            logger.error("Write-behind flush failed for %s: %s", partition_key, e)
+
+    async def _flush_periodically(self) -> None:
+        """Flush partitions whose oldest document has waited longer than the window."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            now = time.monotonic()
+            expired = [
+                key
+                for key, enqueued_at in list(self._first_enqueued.items())
+                if now - enqueued_at >= self.flush_interval
+            ]
+            for key in expired:
+                await self._flush_logged(key)
+
+    async def _flush_partition(self, partition_key: str) -> None:
+        lock = self._partition_locks.setdefault(partition_key, asyncio.Lock())
+        async with lock:
+            documents = self._pending.pop(partition_key, [])
+            self._first_enqueued.pop(partition_key, None)
+            if not documents:
+                return
+
+            start = time.perf_counter()
+            failed: List[Dict[str, Any]] = []
+            offset = 0
+            try:
+                for offset in range(0, len(documents), self.max_batch_size):
+                    chunk = documents[offset : offset + self.max_batch_size]
+                    failed += await self._write_chunk(partition_key, chunk)
+            except asyncio.CancelledError:
+                # Keep what was not confirmed written for the next flush
+                kept = failed + documents[offset:]
+                self._pending[partition_key] = kept + self._pending.get(
+                    partition_key, []
+                )
+                self._first_enqueued[partition_key] = time.monotonic()
+                await asyncio.shield(self._release(len(documents) - len(kept)))
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self._flush_count += 1
+                self._last_flush_ms = elapsed_ms
+                self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+                self._flush_duration.record(elapsed_ms)
+                self._batch_size_histogram.record(len(documents))
+            failed_ids = {id(document) for document in failed}
+            for document in documents:
+                if id(document) not in failed_ids:
+                    self._attempts.pop((partition_key, document.get("id")), None)
+            dropped = self._requeue(partition_key, failed)
+            await self._release(len(documents) - len(failed) + len(dropped))
+        if dropped:
+            raise WriteBehindError(
+                partition_key, [document.get("id") for document in dropped]
+            )
+
+    def _requeue(
+        self, partition_key: str, failed: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Queue failed documents ahead of newer ones; return those given up on."""
+        retry, dropped = [], []
+        for document in failed:
+            key = (partition_key, document.get("id"))
+            self._attempts[key] = self._attempts.get(key, 0) + 1
+            if self._attempts[key] < self.max_write_attempts:
+                retry.append(document)
+            else:
+                del self._attempts[key]
+                dropped.append(document)
+        if retry:
+            self._retried_documents += len(retry)
+            self._pending[partition_key] = retry + self._pending.get(partition_key, [])
+            self._first_enqueued[partition_key] = time.monotonic()
+        self._failed_documents += len(dropped)
+        return dropped
+
+    async def _write_chunk(
+        self, partition_key: str, chunk: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Write a chunk, returning the documents that could not be written."""
+        operations = [("upsert", (document,)) for document in chunk]
+        try:
+            await self.container.execute_item_batch(
+                batch_operations=operations, partition_key=partition_key
+            )
+            self._flushed_documents += len(chunk)
+            return []
+        except CosmosBatchOperationError as e:
+            logger.warning(
+                "Transactional batch failed at index %s for partition %s, "
+                "retrying documents individually: %s",
+                e.error_index,
+                partition_key,
+                e.message,
+            )
+        except Exception as e:
+            logger.warning(
+                "Transactional batch failed for partition %s, "
+                "retrying documents individually: %s",
+                partition_key,
+                e,
+            )
+
+        failed = []
+        for document in chunk:
+            try:
+                await self.container.upsert_item(body=document)
+                self._flushed_documents += 1
+            except Exception as e:
+                failed.append(document)
+                logger.error(
+                    "Failed to write buffered document %s: %s", document.get("id"), e
+                )
+        return failed
+
+    async def _release(self, count: int) -> None:
+        self._queue_depth -= count
+        self._queue_depth_counter.add(-count)
+        if self._space_available is not None:
+            async with self._space_available:
+                self._space_available.notify_all()
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from semantic_kernel.kernel_pydantic import Field, KernelBaseModel
 
@@ -17,6 +17,8 @@ class DataType(str, Enum):
     user_current_team = "user_current_team"
     m_plan = "m_plan"
     m_plan_message = "m_plan_message"
+    plan_locator = "plan_locator"
+    plan_stats = "plan_stats"
 
 
 class AgentType(str, Enum):
@@ -132,6 +134,86 @@ class Plan(BaseDataModel):
     streaming_message: Optional[str] = None
     human_clarification_request: Optional[str] = None
     human_clarification_response: Optional[str] = None
+    # Blob holding the plan and its messages once moved to cold storage
+    archive_key: Optional[str] = None
+    # ETag of the stored document when read from the database, never written back
+    etag: Optional[str] = Field(default=None, alias="_etag", exclude=True)
+
+
+class PlanLocator(BaseDataModel):
+    """Maps a plan_id to the partition key (session_id) of its plan document.
+
+    The locator is stored with ``id`` and ``session_id`` both set to the plan_id,
+    so it can always be fetched with a single point read.
+    """
+
+    data_type: Literal[DataType.plan_locator] = Field(
+        DataType.plan_locator, Literal=True
+    )
+    plan_id: str
+    plan_session_id: str
+
+
+class PlanStats(BaseDataModel):
+    """Number of plans of one user per team and status.
+
+    Kept up to date as plans are added, change status or are deleted. There is
+    one document per user; ``id`` and ``session_id`` are both
+    ``plan_stats.<user_id>`` so it is always fetched with a single point read.
+    """
+
+    data_type: Literal[DataType.plan_stats] = Field(
+        DataType.plan_stats, Literal=True
+    )
+    user_id: str
+    # team_id ("" for plans without a team) -> overall_status -> number of plans
+    teams: Dict[str, Dict[str, int]] = Field(default_factory=dict)
+    # ETag of the stored document when read from the database, never written back
+    etag: Optional[str] = Field(default=None, alias="_etag", exclude=True)
+
+    @staticmethod
+    def document_id(user_id: str) -> str:
+        return f"plan_stats.{user_id}"
+
+    @classmethod
+    def for_user(cls, user_id: str) -> "PlanStats":
+        """Return empty statistics for a user."""
+        document_id = cls.document_id(user_id)
+        return cls(id=document_id, session_id=document_id, user_id=user_id)
+
+    @property
+    def totals(self) -> Dict[str, int]:
+        """Number of plans per status across all teams."""
+        totals: Dict[str, int] = {}
+        for statuses in self.teams.values():
+            for status, count in statuses.items():
+                totals[status] = totals.get(status, 0) + count
+        return totals
+
+    def apply(self, changes: Dict[Tuple[str, str], int]) -> None:
+        """Add (team_id, status) count changes, dropping counts that reach zero."""
+        for (team_id, status), change in changes.items():
+            statuses = self.teams.setdefault(team_id, {})
+            count = max(0, statuses.get(status, 0) + change)
+            if count:
+                statuses[status] = count
+            else:
+                statuses.pop(status, None)
+            if not statuses:
+                del self.teams[team_id]
+
+
+class PlanSummary(KernelBaseModel):
+    """Lightweight projection of a Plan for list views."""
+
+    id: str
+    plan_id: str
+    session_id: str
+    user_id: str
+    initial_goal: str
+    overall_status: PlanStatus = PlanStatus.in_progress
+    team_id: Optional[str] = None
+    timestamp: Optional[datetime] = None
 
 
 class Step(BaseDataModel):
@@ -202,6 +284,39 @@ class TeamConfiguration(BaseDataModel):
     user_id: str  # Who uploaded this configuration
 
 
+class TeamSummary(KernelBaseModel):
+    """Lightweight projection of a TeamConfiguration for list views."""
+
+    id: str
+    team_id: str
+    session_id: str
+    name: str
+    status: str
+    created: str
+    created_by: str
+    description: str = ""
+    logo: str = ""
+    user_id: str
+    agent_count: int = 0
+
+    @classmethod
+    def from_team(cls, team: "TeamConfiguration") -> "TeamSummary":
+        """Build a summary from a full team configuration."""
+        return cls(
+            id=team.id,
+            team_id=team.team_id,
+            session_id=team.session_id,
+            name=team.name,
+            status=team.status,
+            created=team.created,
+            created_by=team.created_by,
+            description=team.description,
+            logo=team.logo,
+            user_id=team.user_id,
+            agent_count=len(team.agents),
+        )
+
+
 class PlanWithSteps(Plan):
     """Plan model that includes the associated steps."""
 
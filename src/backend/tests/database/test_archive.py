@@ -0,0 +1,154 @@
+"""Tests for moving completed plans to cold storage."""
+
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.archive import LocalArchiveStore, PlanArchiver  # noqa: E402
+from common.database.in_memory_cosmos import InMemoryDBClient  # noqa: E402
+from common.database.sqlite_db import SQLiteDBClient  # noqa: E402
+from common.models.messages_kernel import Plan, PlanStatus  # noqa: E402
+
+
+def _backend(name, tmp_path):
+    if name == "sqlite":
+        return SQLiteDBClient(database_path=str(tmp_path / "macae.db"))
+    return InMemoryDBClient()
+
+
+async def _add_plan(database, user_id, status):
+    plan_id = str(uuid.uuid4())
+    await database.for_user(user_id).add_plan(
+        Plan(
+            id=plan_id,
+            plan_id=plan_id,
+            user_id=user_id,
+            initial_goal="goal",
+            overall_status=status,
+        )
+    )
+    return plan_id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+async def test_archive_once_moves_only_old_completed_plans(backend, tmp_path):
+    database = _backend(backend, tmp_path)
+    await database.initialize()
+    store = LocalArchiveStore(str(tmp_path / "archive"))
+    archiver = PlanArchiver(database, store, archive_after_days=30, batch_size=2)
+    completed = [
+        await _add_plan(database, f"user-{index}", PlanStatus.completed)
+        for index in range(3)
+    ]
+    running = await _add_plan(database, "user-0", PlanStatus.in_progress)
+    try:
+        # Nothing is old enough yet
+        assert await archiver.archive_once() == 0
+
+        later = time.time() + 31 * 86400
+        assert await archiver.archive_once(now=later) == 2
+        assert await archiver.archive_once(now=later) == 1
+        # Stubs are not picked up again
+        assert await archiver.archive_once(now=later) == 0
+
+        for plan_id, index in zip(completed, range(3)):
+            view = database.for_user(f"user-{index}")
+            stub = await view.get_plan_by_plan_id(plan_id)
+            assert (await archiver.load(stub.archive_key)).plan.id == plan_id
+        plan = await database.for_user("user-0").get_plan_by_plan_id(running)
+        assert plan.archive_key is None
+    finally:
+        await database.close()
+
+
+@pytest.mark.asyncio
+async def test_plan_changed_while_archiving_is_left_alone(tmp_path):
+    database = InMemoryDBClient()
+    view = database.for_user("user-0")
+    plan_id = await _add_plan(database, "user-0", PlanStatus.completed)
+    stale_etag = (await view.get_plan_by_plan_id(plan_id)).etag
+    await view.patch_plan(
+        plan_id, [{"op": "set", "path": "/summary", "value": "updated"}]
+    )
+    root = tmp_path / "archive"
+    archiver = PlanArchiver(database, LocalArchiveStore(str(root)))
+
+    assert not await archiver.archive_plan(plan_id, "user-0", stale_etag)
+
+    plan = await view.get_plan_by_plan_id(plan_id)
+    assert plan.archive_key is None and plan.summary == "updated"
+    # The blob written for the attempt was removed again
+    assert not [files for _, _, files in os.walk(root) if files]
+    with pytest.raises(ValueError):
+        await LocalArchiveStore(str(root)).get("../outside")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+async def test_deleting_an_archived_plan_removes_its_blob(backend, tmp_path):
+    database = _backend(backend, tmp_path)
+    await database.initialize()
+    store = LocalArchiveStore(str(tmp_path / "archive"))
+    archiver = PlanArchiver(database, store, archive_after_days=30)
+    forgotten = []
+
+    async def forget(key):
+        forgotten.append(key)
+        await archiver.forget(key)
+
+    database.archive_forgetter = forget
+    try:
+        archived, running = [
+            await _add_plan(database, "user-0", status)
+            for status in (PlanStatus.completed, PlanStatus.in_progress)
+        ]
+        await archiver.archive_once(now=time.time() + 31 * 86400)
+        view = database.for_user("user-0")
+        key = (await view.get_plan_by_plan_id(archived)).archive_key
+        await archiver.load(key)
+
+        # Plans that were never archived have no blob to delete
+        assert await view.delete_plan_by_plan_id(running)
+        assert forgotten == []
+
+        assert await view.delete_plan_by_plan_id(archived)
+        assert forgotten == [key]
+        assert await view.get_plan_by_plan_id(archived) is None
+        with pytest.raises(KeyError):
+            await archiver.load(key)
+    finally:
+        await database.close()
+
+
+@pytest.mark.asyncio
+async def test_opening_an_archived_plan_twice_returns_it_whole(tmp_path):
+    database = InMemoryDBClient()
+    archiver = PlanArchiver(database, LocalArchiveStore(str(tmp_path / "archive")))
+    view = database.for_user("user-0")
+    plan_id = await _add_plan(database, "user-0", PlanStatus.completed)
+    await view.patch_plan(
+        plan_id,
+        [
+            {"op": "set", "path": "/m_plan", "value": {"steps": []}},
+            {"op": "set", "path": "/streaming_message", "value": "done"},
+        ],
+    )
+    await archiver.archive_once(now=time.time() + 31 * 86400)
+    key = (await view.get_plan_by_plan_id(plan_id)).archive_key
+
+    for _ in range(2):
+        plan = (await archiver.load(key)).plan
+        assert plan.m_plan == {"steps": []}
+        assert plan.streaming_message == "done"
+        # What GET /plan does before returning the plan
+        plan.streaming_message = ""
+        plan.m_plan = None
@@ -0,0 +1,614 @@
+"""Behavioral tests shared by every DatabaseBase implementation.
+
+SQLite and the in-memory Cosmos DB stand-in, with both partition layouts, always
+run. The Cosmos DB backend runs when COSMOSDB_TEST_ENDPOINT (and optionally
+COSMOSDB_TEST_KEY, COSMOSDB_TEST_DATABASE, COSMOSDB_TEST_CONTAINER) point at a
+disposable account.
+"""
+
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from semantic_kernel.kernel_pydantic import KernelBaseModel
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.archive import LocalArchiveStore, PlanArchiver  # noqa: E402
+from common.database.cosmos_patch import set_operation  # noqa: E402
+from common.database.cosmosdb import CosmosDBClient  # noqa: E402
+from common.database.database_base import PreconditionFailedError  # noqa: E402
+from common.database.in_memory_cosmos import InMemoryDBClient  # noqa: E402
+from common.database.sqlite_db import SQLiteDBClient  # noqa: E402
+from common.models.messages_kernel import (  # noqa: E402
+    AgentMessageData,
+    DataType,
+    Plan,
+    PlanStatus,
+    Step,
+    TeamAgent,
+    TeamConfiguration,
+    UserCurrentTeam,
+)
+
+BACKENDS = ["sqlite", "memory", "memory_hierarchical", "cosmosdb"]
+
+
+class _AgentCount(KernelBaseModel):
+    team_id: str
+    agent_count: int
+
+
+async def _create_backend(name, tmp_path):
+    if name == "sqlite":
+        return SQLiteDBClient(
+            database_path=str(tmp_path / "macae.db"), plan_stats_enabled=True
+        )
+    if name == "memory":
+        return InMemoryDBClient(plan_stats_enabled=True)
+    if name == "memory_hierarchical":
+        return InMemoryDBClient(
+            partition_layout="hierarchical", plan_stats_enabled=True
+        )
+
+    endpoint = os.environ.get("COSMOSDB_TEST_ENDPOINT")
+    if not endpoint:
+        pytest.skip("COSMOSDB_TEST_ENDPOINT is not set")
+    credential = os.environ.get("COSMOSDB_TEST_KEY")
+    if not credential:
+        from azure.identity.aio import DefaultAzureCredential
+
+        credential = DefaultAzureCredential()
+    return CosmosDBClient(
+        endpoint=endpoint,
+        credential=credential,
+        database_name=os.environ.get("COSMOSDB_TEST_DATABASE", "macae"),
+        container_name=os.environ.get("COSMOSDB_TEST_CONTAINER", "memory"),
+        team_cache_max_entries=0,
+        plan_stats_enabled=True,
+    )
+
+
+@pytest_asyncio.fixture(params=BACKENDS)
+async def database(request, tmp_path):
+    backend = await _create_backend(request.param, tmp_path)
+    await backend.initialize()
+    view = backend.for_user(f"user-{uuid.uuid4()}")
+    created = []
+    view.created_plans = created
+    try:
+        yield view
+    finally:
+        for plan_id in created:
+            await view.delete_plan_by_plan_id(plan_id)
+        await backend.close()
+
+
+def _uid() -> str:
+    return str(uuid.uuid4())
+
+
+async def _add_plan(database, team_id, status=PlanStatus.completed, **fields):
+    plan_id = _uid()
+    plan = Plan(
+        id=plan_id,
+        plan_id=plan_id,
+        session_id=_uid(),
+        user_id=database.user_id,
+        team_id=team_id,
+        initial_goal=f"goal {plan_id}",
+        overall_status=status,
+        **fields,
+    )
+    await database.add_plan(plan)
+    database.created_plans.append(plan_id)
+    return plan
+
+
+def _team(user_id, created="2025-01-01T00:00:00", agents=0):
+    team_id = _uid()
+    return TeamConfiguration(
+        id=team_id,
+        team_id=team_id,
+        session_id=_uid(),
+        name=f"Team {team_id}",
+        status="visible",
+        created=created,
+        created_by=user_id,
+        user_id=user_id,
+        agents=[
+            TeamAgent(
+                input_key=f"agent_{index}",
+                type="ai",
+                name=f"Agent{index}",
+                deployment_name="gpt-4o",
+                icon="",
+            )
+            for index in range(agents)
+        ],
+    )
+
+
+@pytest.mark.asyncio
+async def test_plan_round_trip(database):
+    plan = await _add_plan(database, _uid(), m_plan={"steps": [1, 2]})
+
+    loaded = await database.get_plan_by_plan_id(plan.id)
+    assert loaded.initial_goal == plan.initial_goal
+    assert loaded.m_plan == {"steps": [1, 2]}
+    assert (await database.get_plan(plan.id)).id == plan.id
+
+    loaded.overall_status = PlanStatus.failed
+    await database.update_plan(loaded)
+    assert (await database.get_plan_by_plan_id(plan.id)).overall_status == "failed"
+
+    assert await database.get_plan_by_plan_id(_uid()) is None
+
+
+@pytest.mark.asyncio
+async def test_plans_by_team_and_status(database):
+    team_id = _uid()
+    completed = [await _add_plan(database, team_id) for _ in range(3)]
+    await _add_plan(database, team_id, status=PlanStatus.in_progress)
+    await _add_plan(database, _uid())
+
+    plans = await database.get_all_plans_by_team_id_status(
+        database.user_id, team_id, PlanStatus.completed
+    )
+    assert {plan.id for plan in plans} == {plan.id for plan in completed}
+
+    other_user = await database.for_user(_uid()).get_all_plans_by_team_id_status(
+        _uid(), team_id, PlanStatus.completed
+    )
+    assert other_user == []
+    assert len(await database.get_all_plans_by_team_id(team_id)) == 4
+    assert len(await database.get_all_plans()) == 5
+
+
+@pytest.mark.asyncio
+async def test_plan_pages_cover_all_plans_once(database):
+    team_id = _uid()
+    expected = {(await _add_plan(database, team_id)).id for _ in range(5)}
+
+    seen = []
+    token = None
+    while True:
+        plans, token = await database.get_plans_page_by_team_id_status(
+            database.user_id, team_id, PlanStatus.completed, 2, token
+        )
+        assert len(plans) <= 2
+        seen.extend(plan.id for plan in plans)
+        if token is None:
+            break
+    assert sorted(seen) == sorted(expected)
+
+
+@pytest.mark.asyncio
+async def test_plan_summaries_leave_out_heavy_fields(database):
+    team_id = _uid()
+    plan = await _add_plan(database, team_id, streaming_message="x" * 1000)
+
+    summaries, token = await database.get_plan_summaries_by_team_id_status(
+        database.user_id, team_id, PlanStatus.completed
+    )
+    assert token is None
+    assert [summary.id for summary in summaries] == [plan.id]
+    assert "streaming_message" not in summaries[0].model_dump()
+
+    page, _ = await database.get_plan_summaries_by_team_id_status(
+        database.user_id, team_id, PlanStatus.completed, page_size=1
+    )
+    assert [summary.id for summary in page] == [plan.id]
+
+
+@pytest.mark.asyncio
+async def test_steps_are_ordered_by_timestamp(database):
+    plan = await _add_plan(database, _uid())
+    steps = [
+        Step(
+            id=_uid(),
+            plan_id=plan.id,
+            session_id=plan.session_id,
+            user_id=database.user_id,
+            action=f"step {index}",
+            agent="Generic_Agent",
+        )
+        for index in range(3)
+    ]
+    for step in reversed(steps):
+        await database.add_step(step)
+
+    loaded = await database.get_steps_by_plan(plan.id)
+    assert [step.id for step in loaded] == [step.id for step in steps]
+    assert (await database.get_step(steps[0].id, plan.session_id)).action == "step 0"
+
+
+@pytest.mark.asyncio
+async def test_agent_messages_round_trip(database):
+    plan = await _add_plan(database, _uid())
+    written = []
+    for index in range(3):
+        message = AgentMessageData(
+            plan_id=plan.id,
+            session_id=plan.session_id,
+            user_id=database.user_id,
+            agent="Agent",
+            content=f"message {index}",
+            raw_data="{}",
+        )
+        await database.add_agent_message(message)
+        written.append(message.id)
+
+    await database.flush_pending_writes(plan.id)
+    messages = await database.get_agent_messages(plan.id)
+    assert sorted(message.id for message in messages) == sorted(written)
+
+
+@pytest.mark.asyncio
+async def test_plan_bundle_loads_plan_team_and_messages(database):
+    team = _team(database.user_id)
+    await database.add_team(team)
+    try:
+        plan = await _add_plan(database, team.team_id)
+        await database.add_agent_message(
+            AgentMessageData(
+                plan_id=plan.id,
+                session_id=plan.session_id,
+                user_id=database.user_id,
+                agent="Agent",
+                content="hello",
+                raw_data="{}",
+            )
+        )
+
+        bundle = await database.get_plan_bundle(plan.id)
+        assert bundle.plan.id == plan.id
+        assert bundle.team.name == team.name
+        assert [message.content for message in bundle.messages] == ["hello"]
+        assert await database.get_plan_bundle(_uid()) is None
+    finally:
+        await database.delete_team(team.team_id)
+
+
+@pytest.mark.asyncio
+async def test_agent_messages_since_returns_only_the_tail(database):
+    plan = await _add_plan(database, _uid())
+
+    async def add(content):
+        await database.add_agent_message(
+            AgentMessageData(
+                plan_id=plan.id,
+                session_id=plan.session_id,
+                user_id=database.user_id,
+                agent="Agent",
+                content=content,
+                raw_data="{}",
+            )
+        )
+
+    await add("first")
+    await add("second")
+    messages, cursor = await database.get_agent_messages_since(plan.id)
+    assert [message.content for message in messages] == ["first", "second"]
+
+    # Messages written within the same second as the cursor are not missed
+    await add("third")
+    messages, cursor = await database.get_agent_messages_since(plan.id, cursor)
+    assert [message.content for message in messages] == ["third"]
+    assert (await database.get_agent_messages_since(plan.id, cursor))[0] == []
+
+    bundle = await database.get_plan_bundle(plan.id, since=cursor)
+    assert bundle.messages == [] and bundle.messages_cursor
+    with pytest.raises(ValueError):
+        await database.get_agent_messages_since(plan.id, "not a cursor")
+
+
+@pytest.mark.asyncio
+async def test_patch_plan_updates_fields_in_place(database):
+    plan = await _add_plan(database, _uid(), status=PlanStatus.in_progress)
+    loaded = await database.get_plan_by_plan_id(plan.id)
+    assert loaded.etag
+
+    patched = await database.patch_plan(
+        plan.id,
+        [
+            set_operation("/overall_status", PlanStatus.completed),
+            set_operation("/streaming_message", "done"),
+        ],
+    )
+    assert patched.overall_status == PlanStatus.completed
+    assert patched.etag != loaded.etag
+    reloaded = await database.get_plan_by_plan_id(plan.id)
+    assert reloaded.streaming_message == "done"
+    assert reloaded.initial_goal == plan.initial_goal
+
+    # The read above is stale now, so a conditional patch must not apply
+    with pytest.raises(PreconditionFailedError):
+        await database.patch_plan(
+            plan.id,
+            [set_operation("/overall_status", PlanStatus.failed)],
+            etag=loaded.etag,
+        )
+    await database.patch_plan(
+        plan.id,
+        [set_operation("/m_plan", {"steps": []})],
+        etag=reloaded.etag,
+    )
+    final = await database.get_plan_by_plan_id(plan.id)
+    assert final.overall_status == PlanStatus.completed
+    assert final.m_plan == {"steps": []}
+    assert await database.patch_plan(_uid(), [set_operation("/summary", "x")]) is None
+
+
+@pytest.mark.asyncio
+async def test_plan_stats_follow_plan_writes_and_rebuild(database):
+    team_id = _uid()
+    user_id = database.user_id
+    assert (await database.get_plan_stats()).teams == {}
+
+    first = await _add_plan(database, team_id, status=PlanStatus.in_progress)
+    await _add_plan(database, team_id, status=PlanStatus.in_progress)
+    other = await _add_plan(database, None, status=PlanStatus.completed)
+    stats = await database.get_plan_stats()
+    assert stats.teams == {team_id: {"in_progress": 2}, "": {"completed": 1}}
+
+    await database.patch_plan(
+        first.id, [set_operation("/overall_status", PlanStatus.completed)]
+    )
+    # Patches that leave status and team alone do not change the counts
+    await database.patch_plan(first.id, [set_operation("/summary", "done")])
+    updated = await database.get_plan_by_plan_id(other.id)
+    updated.overall_status = PlanStatus.failed
+    await database.update_plan(updated)
+    stats = await database.get_plan_stats(user_id)
+    assert stats.teams == {
+        team_id: {"in_progress": 1, "completed": 1},
+        "": {"failed": 1},
+    }
+
+    await database.delete_plan_by_plan_id(other.id)
+    # Deleting it again does not count it twice
+    await database.delete_plan_by_plan_id(other.id)
+    stats = await database.get_plan_stats()
+    assert stats.teams == {team_id: {"in_progress": 1, "completed": 1}}
+    assert stats.totals == {"in_progress": 1, "completed": 1}
+
+    # Counts lost along the way are repaired by a rebuild from the plans
+    stats.teams = {}
+    await database.update_item(stats)
+    assert (await database.get_plan_stats()).teams == {}
+    rebuilt = await database.rebuild_plan_stats(user_id)
+    assert rebuilt.teams == {team_id: {"in_progress": 1, "completed": 1}}
+    assert (await database.get_plan_stats()).teams == rebuilt.teams
+
+
+@pytest.mark.asyncio
+async def test_iter_items_streams_every_page(database):
+    plan = await _add_plan(database, _uid())
+    for index in range(5):
+        await database.add_agent_message(
+            AgentMessageData(
+                plan_id=plan.id,
+                session_id=plan.session_id,
+                user_id=database.user_id,
+                agent="Agent",
+                content=f"message {index}",
+                raw_data="{}",
+            )
+        )
+    await database.flush_pending_writes(plan.id)
+
+    query = "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.data_type=@data_type"
+    parameters = [
+        {"name": "@plan_id", "value": plan.id},
+        {"name": "@data_type", "value": DataType.m_plan_message},
+    ]
+    streamed = [
+        message
+        async for message in database.iter_items(
+            query, parameters, AgentMessageData, page_size=2
+        )
+    ]
+    listed = await database.query_items(query, parameters, AgentMessageData)
+    assert len(streamed) == 5
+    assert sorted(message.id for message in streamed) == sorted(
+        message.id for message in listed
+    )
+
+    documents = [
+        document async for document in database.iter_items(query, parameters)
+    ]
+    assert {document["content"] for document in documents} == {
+        f"message {index}" for index in range(5)
+    }
+
+
+@pytest.mark.asyncio
+async def test_sqlite_scan_reads_one_snapshot(tmp_path):
+    database = SQLiteDBClient(database_path=str(tmp_path / "macae.db"))
+    await database.initialize()
+    try:
+        for index in range(5):
+            await database.add_agent_message(
+                AgentMessageData(
+                    plan_id="plan-1",
+                    session_id="session-1",
+                    user_id="user-1",
+                    agent="Agent",
+                    content=f"message {index}",
+                    raw_data="{}",
+                )
+            )
+        query = "SELECT * FROM c WHERE c.data_type=@data_type"
+        parameters = [{"name": "@data_type", "value": DataType.m_plan_message}]
+
+        contents = []
+        async for document in database.iter_items(query, parameters, page_size=2):
+            contents.append(document["content"])
+            if len(contents) == 2:
+                # Rows read on the first page disappear before the next one
+                for read in await database.query_items(
+                    query, parameters, AgentMessageData
+                ):
+                    if read.content in contents:
+                        await database.delete_item(read.id, read.session_id)
+
+        assert contents == [f"message {index}" for index in range(5)]
+    finally:
+        await database.close()
+
+
+@pytest.mark.asyncio
+async def test_team_lifecycle(database):
+    older = _team(database.user_id, created="2025-01-01T00:00:00", agents=2)
+    newer = _team(database.user_id, created="2025-02-01T00:00:00")
+    await database.add_team(older)
+    await database.add_team(newer)
+    try:
+        assert (await database.get_team(older.team_id)).name == older.name
+        assert (await database.get_team_by_id(newer.team_id)).name == newer.name
+
+        team_ids = [team.team_id for team in await database.get_all_teams()]
+        assert team_ids.index(newer.team_id) < team_ids.index(older.team_id)
+
+        summaries = {
+            summary.team_id: summary for summary in await database.get_team_summaries()
+        }
+        assert summaries[older.team_id].agent_count == 2
+
+        older.name = "Renamed"
+        await database.update_team(older)
+        assert (await database.get_team(older.team_id)).name == "Renamed"
+    finally:
+        assert await database.delete_team(older.team_id)
+        assert await database.delete_team(newer.team_id)
+    assert await database.get_team(older.team_id) is None
+
+
+@pytest.mark.asyncio
+async def test_current_team_set_get_delete(database):
+    current = UserCurrentTeam(user_id=database.user_id, team_id=_uid())
+    await database.set_current_team(current)
+    assert (await database.get_current_team(database.user_id)).team_id == (
+        current.team_id
+    )
+
+    await database.delete_current_team(database.user_id)
+    assert await database.get_current_team(database.user_id) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_plan_by_plan_id(database):
+    plan = await _add_plan(database, _uid())
+    assert await database.delete_plan_by_plan_id(plan.id)
+    assert await database.get_plan_by_plan_id(plan.id) is None
+
+
+@pytest.mark.asyncio
+async def test_query_items_supports_projections(database):
+    team = _team(database.user_id, agents=3)
+    await database.add_team(team)
+    try:
+        query = (
+            "SELECT c.team_id, ARRAY_LENGTH(c.agents) AS agent_count FROM c "
+            "WHERE c.team_id=@team_id AND c.data_type=@data_type"
+        )
+        parameters = [
+            {"name": "@team_id", "value": team.team_id},
+            {"name": "@data_type", "value": DataType.team_config},
+        ]
+        results = await database.query_items(query, parameters, _AgentCount)
+        assert [(result.team_id, result.agent_count) for result in results] == [
+            (team.team_id, 3)
+        ]
+    finally:
+        await database.delete_team(team.team_id)
+
+
+@pytest.mark.asyncio
+async def test_delete_plan_cascade_removes_plan_documents(database):
+    team_id = _uid()
+    plan = await _add_plan(database, team_id)
+    other = await _add_plan(database, team_id)
+    for target in (plan, other):
+        await database.add_step(
+            Step(
+                id=_uid(),
+                plan_id=target.id,
+                session_id=target.session_id,
+                user_id=database.user_id,
+                action="step",
+                agent="Generic_Agent",
+            )
+        )
+        for index in range(3):
+            await database.add_agent_message(
+                AgentMessageData(
+                    plan_id=target.id,
+                    session_id=target.session_id,
+                    user_id=database.user_id,
+                    agent="Agent",
+                    content=f"message {index}",
+                    raw_data="{}",
+                )
+            )
+
+    result = await database.delete_plan_cascade(plan.id)
+    assert result.failed == 0
+    assert result.deleted[DataType.plan] == 1
+    assert result.deleted[DataType.step] == 1
+    assert result.deleted[DataType.m_plan_message] == 3
+    assert result.elapsed_ms >= 0
+
+    assert await database.get_plan_by_plan_id(plan.id) is None
+    assert await database.get_steps_by_plan(plan.id) == []
+    assert await database.get_agent_messages(plan.id) == []
+    assert len(await database.get_agent_messages(other.id)) == 3
+    assert (await database.delete_plan_cascade(plan.id)).total_deleted == 0
+
+
+@pytest.mark.asyncio
+async def test_archived_plan_leaves_a_stub_and_rehydrates(database, tmp_path):
+    plan = await _add_plan(database, _uid(), m_plan={"steps": ["a"]})
+    await database.add_step(
+        Step(
+            plan_id=plan.id,
+            session_id=plan.session_id,
+            user_id=database.user_id,
+            action="step",
+            agent="Generic_Agent",
+        )
+    )
+    for index in range(3):
+        await database.add_agent_message(
+            AgentMessageData(
+                plan_id=plan.id,
+                session_id=plan.session_id,
+                user_id=database.user_id,
+                agent="Agent",
+                content=f"message {index}",
+                raw_data="{}",
+            )
+        )
+    stored = await database.get_plan_by_plan_id(plan.id)
+    archiver = PlanArchiver(database, LocalArchiveStore(str(tmp_path / "archive")))
+
+    assert await archiver.archive_plan(plan.id, database.user_id, stored.etag)
+
+    stub = await database.get_plan_by_plan_id(plan.id)
+    assert stub.archive_key and stub.m_plan is None
+    assert stub.initial_goal == plan.initial_goal
+    assert await database.get_steps_by_plan(plan.id) == []
+    assert await database.get_agent_messages(plan.id) == []
+
+    archived = await archiver.load(stub.archive_key)
+    assert archived.plan.m_plan == {"steps": ["a"]}
+    assert len(archived.steps) == 1
+    assert [m.content for m in archived.messages] == [
+        f"message {index}" for index in range(3)
+    ]
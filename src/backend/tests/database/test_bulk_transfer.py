@@ -0,0 +1,149 @@
+"""Tests for bulk export and import of documents as NDJSON."""
+
+import gzip
+import json
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.bulk_transfer import (  # noqa: E402
+    TransferCheckpoint,
+    TransferProgress,
+    export_documents,
+    import_documents,
+    transfer_path,
+)
+from common.database.in_memory_cosmos import InMemoryDBClient  # noqa: E402
+from common.database.sqlite_db import SQLiteDBClient  # noqa: E402
+from common.models.messages_kernel import (  # noqa: E402
+    AgentMessageData,
+    Plan,
+    PlanStatus,
+    TeamConfiguration,
+)
+
+
+async def _seed(database, users=2, plans=3, messages=4):
+    await database.add_team(
+        TeamConfiguration(
+            team_id="team-1",
+            session_id=str(uuid.uuid4()),
+            name="Team",
+            status="visible",
+            created="2024-01-01",
+            created_by="admin",
+            user_id="admin",
+        )
+    )
+    for user in range(users):
+        view = database.for_user(f"user-{user}")
+        for _ in range(plans):
+            plan_id = str(uuid.uuid4())
+            await view.add_plan(
+                Plan(
+                    id=plan_id,
+                    plan_id=plan_id,
+                    user_id=f"user-{user}",
+                    team_id="team-1",
+                    initial_goal="goal",
+                    overall_status=PlanStatus.completed,
+                )
+            )
+            for index in range(messages):
+                await view.add_agent_message(
+                    AgentMessageData(
+                        plan_id=plan_id,
+                        user_id=f"user-{user}",
+                        agent="Agent",
+                        content=f"message {index}",
+                        raw_data="{}",
+                    )
+                )
+
+
+@pytest.mark.asyncio
+async def test_export_from_cosmos_layout_and_import_into_sqlite(tmp_path):
+    source = InMemoryDBClient(partition_layout="hierarchical")
+    await _seed(source)
+    directory = str(tmp_path / "export")
+
+    exported = await export_documents(source, directory, report_interval=0)
+    assert exported["plan"].documents == 6
+    assert exported["m_plan_message"].documents == 24
+    with gzip.open(transfer_path(directory, "plan"), "rb") as file:
+        document = json.loads(file.readline())
+    # Service and partition key fields stay behind
+    assert "_etag" not in document and "partition_owner" not in document
+
+    target = SQLiteDBClient(database_path=str(tmp_path / "macae.db"))
+    try:
+        imported = await import_documents(target, directory, report_interval=0)
+        assert {key: value.documents for key, value in imported.items()} == {
+            key: value.documents for key, value in exported.items()
+        }
+        view = target.for_user("user-1")
+        plans = await view.get_all_plans()
+        assert len(plans) == 3
+        assert len(await view.get_agent_messages(plans[0].id)) == 4
+        assert (await target.get_team("team-1")).name == "Team"
+        # Statistics of imported plans are rebuilt
+        stats = await target.get_plan_stats("user-0")
+        assert stats.teams == {"team-1": {"completed": 3}}
+    finally:
+        await target.close()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_transfers_resume_from_the_checkpoint(tmp_path):
+    source = InMemoryDBClient()
+    await _seed(source, users=1, plans=2, messages=5)
+    directory = str(tmp_path / "export")
+    await export_documents(source, directory, ["plan"], report_interval=0)
+    # A finished type is not exported again
+    again = await export_documents(
+        source, directory, ["plan", "m_plan_message"], report_interval=0
+    )
+    assert again["plan"].complete and again["m_plan_message"].documents == 10
+
+    # Pretend an earlier import stopped after writing the first 4 messages
+    checkpoint = TransferCheckpoint.load(directory)
+    checkpoint.imported["m_plan_message"] = TransferProgress(documents=4)
+    checkpoint.save(directory)
+    target = InMemoryDBClient()
+    imported = await import_documents(
+        target, directory, ["m_plan_message"], batch_size=3, report_interval=0
+    )
+
+    assert imported["m_plan_message"].documents == 10
+    query = "SELECT * FROM c WHERE c.data_type=@data_type"
+    parameters = [{"name": "@data_type", "value": "m_plan_message"}]
+    assert len([doc async for doc in target.iter_items(query, parameters)]) == 6
+    assert TransferCheckpoint.load(directory).imported["m_plan_message"].complete
+
+
+@pytest.mark.asyncio
+async def test_imported_plans_get_their_plan_locators(tmp_path):
+    source = InMemoryDBClient(partition_layout="hierarchical")
+    await _seed(source, users=1, plans=2, messages=1)
+    directory = str(tmp_path / "export")
+    await export_documents(source, directory, ["plan"], report_interval=0)
+
+    target = InMemoryDBClient()
+    await import_documents(target, directory, ["plan"], report_interval=0)
+
+    query = "SELECT * FROM c WHERE c.data_type=@data_type"
+    parameters = [{"name": "@data_type", "value": "plan_locator"}]
+    locators = [doc async for doc in target.iter_items(query, parameters)]
+    plans = await target.for_user("user-0").get_all_plans()
+    assert sorted(doc["plan_session_id"] for doc in locators) == sorted(
+        plan.session_id for plan in plans
+    )
+    # A client with a cold cache finds the plans through their locators
+    target._forget_plan_partition(plans[0].id)
+    assert await target._resolve_plan_partition(plans[0].id) == plans[0].session_id
@@ -0,0 +1,146 @@
+"""Tests for the TTL/LRU cache and the team configuration cache."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.cache import TTLCache  # noqa: E402
+from common.database.cosmosdb import CosmosDBClient  # noqa: E402
+from common.models.messages_kernel import TeamConfiguration  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache("test", ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_sliding_expiry_refreshes_on_hit():
+    clock = FakeClock()
+    cache = TTLCache("test", ttl_seconds=10, sliding=True, clock=clock)
+    cache.set("a", 1)
+    clock.now = 8
+    assert cache.get("a") == 1
+    clock.now = 16
+    assert cache.get("a") == 1
+
+
+def test_sliding_entries_still_expire_at_their_max_age():
+    clock = FakeClock()
+    cache = TTLCache(
+        "test", ttl_seconds=10, sliding=True, max_age_seconds=25, clock=clock
+    )
+    cache.set("a", 1)
+    for now in (8, 16, 24):
+        clock.now = now
+        assert cache.get("a") == 1
+    clock.now = 26
+    assert cache.get("a") is None
+    # Setting the entry again starts a new max age
+    cache.set("a", 2)
+    clock.now = 34
+    assert cache.get("a") == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache("test", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_max_entries_disables_cache():
+    cache = TTLCache("test", max_entries=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def _team(team_id="team-1", name="Team"):
+    return TeamConfiguration(
+        id=team_id,
+        team_id=team_id,
+        session_id="session",
+        name=name,
+        status="visible",
+        created="2025-01-01T00:00:00",
+        created_by="user",
+        user_id="user",
+    )
+
+
+def _client_with_teams(teams):
+    client = CosmosDBClient(
+        endpoint="https://example.documents.azure.com",
+        credential=None,
+        database_name="db",
+        container_name="container",
+    )
+    client.container = MagicMock()
+    client._initialized = True
+
+    calls = []
+
+    async def query_items(query, parameters, model_class, partition_key=None):
+        calls.append(query)
+        team_filter = [p["value"] for p in parameters if p["name"] == "@team_id"]
+        return [
+            team for team in teams if not team_filter or team.team_id == team_filter[0]
+        ]
+
+    client.query_items = query_items
+    client.add_item = MagicMock(side_effect=_async_noop)
+    client.update_item = MagicMock(side_effect=_async_noop)
+    return client, calls
+
+
+async def _async_noop(*args, **kwargs):
+    return None
+
+
+@pytest.mark.asyncio
+async def test_team_lookups_are_served_from_cache():
+    client, calls = _client_with_teams([_team()])
+
+    assert (await client.get_team("team-1")).name == "Team"
+    assert (await client.get_team_by_id("team-1")).name == "Team"
+    await client.get_all_teams()
+    await client.get_all_teams()
+
+    assert len(calls) == 2
+    assert client.team_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_team_writes_invalidate_cache():
+    teams = [_team()]
+    client, calls = _client_with_teams(teams)
+    await client.get_team("team-1")
+
+    teams[0] = _team(name="Renamed")
+    await client.update_team(teams[0])
+
+    assert (await client.get_team("team-1")).name == "Renamed"
+    assert len(calls) == 2
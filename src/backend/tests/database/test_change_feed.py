@@ -0,0 +1,124 @@
+"""Tests for change feed driven cache coherence between backend replicas."""
+
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.change_feed import (  # noqa: E402
+    COHERENT_DATA_TYPES,
+    ChangeFeedConsumer,
+    ContainerLeaseStore,
+    InMemoryLeaseStore,
+    LeaseLostError,
+)
+from common.database.in_memory_cosmos import (  # noqa: E402
+    InMemoryContainer,
+    InMemoryDBClient,
+)
+from common.models.messages_kernel import DataType, TeamConfiguration  # noqa: E402
+
+
+def _team(name="Team"):
+    team_id = str(uuid.uuid4())
+    return TeamConfiguration(
+        id=team_id,
+        team_id=team_id,
+        session_id=str(uuid.uuid4()),
+        name=name,
+        status="visible",
+        created="2025-01-01T00:00:00",
+        created_by="user",
+        user_id="user",
+    )
+
+
+async def _replicas(count=2):
+    container = InMemoryContainer()
+    replicas = []
+    for _ in range(count):
+        replica = InMemoryDBClient(container=container)
+        await replica.initialize()
+        replicas.append(replica)
+    return replicas
+
+
+@pytest.mark.asyncio
+async def test_writes_on_one_replica_invalidate_caches_on_another():
+    writer, reader = await _replicas()
+    consumer = ChangeFeedConsumer(reader.container, InMemoryLeaseStore(), "reader")
+    consumer.subscribe(COHERENT_DATA_TYPES, reader.handle_change)
+    await consumer.poll_once()
+
+    team = _team("Before")
+    await writer.add_team(team)
+    assert (await reader.get_team(team.team_id)).name == "Before"
+
+    team.name = "After"
+    await writer.update_team(team)
+    # The reader still serves its cached copy until it sees the change
+    assert (await reader.get_team(team.team_id)).name == "Before"
+
+    assert await consumer.poll_once() >= 1
+    assert (await reader.get_team(team.team_id)).name == "After"
+
+
+@pytest.mark.asyncio
+async def test_consumer_resumes_from_its_checkpoint():
+    (database,) = await _replicas(1)
+    store = InMemoryLeaseStore()
+    seen = []
+
+    first = ChangeFeedConsumer(database.container, store, "replica-1")
+    first.subscribe([DataType.team_config], lambda event: seen.append(event.id))
+    await first.poll_once()
+    one = _team()
+    await database.add_team(one)
+    await first.poll_once()
+    await first.stop()
+
+    two = _team()
+    await database.add_team(two)
+    second = ChangeFeedConsumer(database.container, store, "replica-1")
+    second.subscribe([DataType.team_config], lambda event: seen.append(event.id))
+    await second.poll_once()
+
+    assert seen == [one.id, two.id]
+
+
+@pytest.mark.asyncio
+async def test_a_held_lease_is_not_consumed_twice():
+    (database,) = await _replicas(1)
+    store = InMemoryLeaseStore()
+    owner = ChangeFeedConsumer(database.container, store, "replica-1")
+    await owner.poll_once()
+
+    impostor = ChangeFeedConsumer(database.container, store, "replica-1")
+    impostor.owner = "other-process"
+    await database.add_team(_team())
+    assert await impostor.poll_once() == 0
+    assert await owner.poll_once() == 1
+
+
+@pytest.mark.asyncio
+async def test_container_lease_store_detects_lost_leases():
+    clock = [1000.0]
+    store = ContainerLeaseStore(
+        InMemoryContainer(partition_key_path="/id"), clock=lambda: clock[0]
+    )
+
+    lease = await store.acquire("lease", "a", duration=10)
+    assert await store.acquire("lease", "b", duration=10) is None
+    lease = await store.checkpoint(lease, "42", duration=10)
+
+    clock[0] += 11
+    taken = await store.acquire("lease", "b", duration=10)
+    assert taken.owner == "b"
+    assert taken.continuation == "42"
+    with pytest.raises(LeaseLostError):
+        await store.checkpoint(lease, "43", duration=10)
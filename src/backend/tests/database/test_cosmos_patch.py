@@ -0,0 +1,52 @@
+"""Tests for applying Cosmos DB patch operations outside Cosmos DB."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.cosmos_patch import apply_patch  # noqa: E402
+
+
+def test_operations_follow_the_service_semantics():
+    document = {"id": "1", "status": "new", "count": 1, "m_plan": {"steps": ["a"]}}
+
+    patched = apply_patch(
+        document,
+        [
+            {"op": "set", "path": "/status", "value": "approved"},
+            {"op": "incr", "path": "/count", "value": 2},
+            {"op": "add", "path": "/m_plan/steps/-", "value": "c"},
+            {"op": "add", "path": "/m_plan/steps/1", "value": "b"},
+            {"op": "add", "path": "/m_plan/facts", "value": ""},
+            {"op": "replace", "path": "/m_plan/facts", "value": "known"},
+            {"op": "remove", "path": "/count"},
+        ],
+    )
+
+    assert patched == {
+        "id": "1",
+        "status": "approved",
+        "m_plan": {"steps": ["a", "b", "c"], "facts": "known"},
+    }
+    # The input document is left untouched
+    assert document["status"] == "new"
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        {"op": "replace", "path": "/missing", "value": 1},
+        {"op": "remove", "path": "/missing"},
+        {"op": "set", "path": "/missing/child", "value": 1},
+        {"op": "set", "path": "/id", "value": "2"},
+        {"op": "move", "path": "/status", "value": 1},
+    ],
+)
+def test_invalid_operations_are_rejected(operation):
+    with pytest.raises(ValueError):
+        apply_patch({"id": "1", "status": "new"}, [operation])
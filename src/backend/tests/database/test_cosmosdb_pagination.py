@@ -0,0 +1,102 @@
+"""Tests for continuation-token pagination in CosmosDBClient."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.cosmosdb import CosmosDBClient  # noqa: E402
+from common.models.messages_kernel import Plan  # noqa: E402
+
+
+class _Page:
+    def __init__(self, items):
+        self._items = list(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._items:
+            raise StopAsyncIteration
+        return self._items.pop(0)
+
+
+class _Pager:
+    """Stands in for the SDK page iterator: pages keyed by continuation token."""
+
+    def __init__(self, pages, token):
+        self._pages = pages
+        self.continuation_token = token
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.continuation_token not in self._pages:
+            raise StopAsyncIteration
+        items, next_token = self._pages[self.continuation_token]
+        self.continuation_token = next_token
+        return _Page(items)
+
+
+def _plan_doc(index):
+    return Plan(
+        id=f"plan-{index}", plan_id=f"plan-{index}", user_id="u", initial_goal="g"
+    ).model_dump(mode="json")
+
+
+def _client(pages):
+    client = CosmosDBClient(
+        endpoint="https://example.documents.azure.com",
+        credential=None,
+        database_name="db",
+        container_name="container",
+    )
+    query_result = MagicMock()
+    query_result.by_page = lambda token=None: _Pager(pages, token)
+    client.container = MagicMock()
+    client.container.query_items = MagicMock(return_value=query_result)
+    client._initialized = True
+    return client
+
+
+@pytest.mark.asyncio
+async def test_returns_page_and_next_token():
+    pages = {
+        None: ([_plan_doc(1), _plan_doc(2)], "token-2"),
+        "token-2": ([_plan_doc(3)], None),
+    }
+    client = _client(pages)
+
+    plans, token = await client.get_plans_page_by_team_id_status(
+        "u", "team", "completed", page_size=2
+    )
+    assert [plan.id for plan in plans] == ["plan-1", "plan-2"]
+    assert token == "token-2"
+    _, kwargs = client.container.query_items.call_args
+    assert kwargs["max_item_count"] == 2
+
+    plans, token = await client.get_plans_page_by_team_id_status(
+        "u", "team", "completed", page_size=2, continuation_token=token
+    )
+    assert [plan.id for plan in plans] == ["plan-3"]
+    assert token is None
+
+
+@pytest.mark.asyncio
+async def test_skips_empty_pages():
+    pages = {
+        None: ([], "token-2"),
+        "token-2": ([_plan_doc(1)], None),
+    }
+    plans, token = await _client(pages).get_plans_page_by_team_id_status(
+        "u", "team", "completed", page_size=5
+    )
+    assert [plan.id for plan in plans] == ["plan-1"]
+    assert token is None
@@ -0,0 +1,165 @@
+"""Tests for plan locator based point reads in CosmosDBClient."""
+
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from azure.cosmos.exceptions import CosmosResourceNotFoundError  # noqa: E402
+from common.database.cosmosdb import CosmosDBClient  # noqa: E402
+from common.models.messages_kernel import DataType, Plan  # noqa: E402
+
+
+class _AsyncItems:
+    """Minimal async iterator standing in for a Cosmos query pager."""
+
+    def __init__(self, items):
+        self._items = list(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._items:
+            raise StopAsyncIteration
+        return self._items.pop(0)
+
+    def by_page(self, continuation_token=None):
+        # All results fit on a single page
+        return _AsyncItems([self])
+
+
+def _make_client(documents):
+    """Create a CosmosDBClient backed by a dict of (id, partition_key) -> document."""
+    client = CosmosDBClient(
+        endpoint="https://example.documents.azure.com",
+        credential=None,
+        database_name="db",
+        container_name="container",
+        user_id="user-1",
+    )
+
+    async def read_item(item, partition_key):
+        key = (item, partition_key)
+        if key not in documents:
+            raise CosmosResourceNotFoundError(message="not found")
+        return documents[key]
+
+    async def upsert_item(body):
+        documents[(body["id"], body["session_id"])] = body
+
+    async def create_item(body):
+        documents[(body["id"], body["session_id"])] = body
+
+    def query_items(query, parameters, **kwargs):
+        plan_id = parameters[0]["value"]
+        return _AsyncItems(
+            doc
+            for (doc_id, _), doc in documents.items()
+            if doc_id == plan_id and doc["data_type"] == DataType.plan
+        )
+
+    container = MagicMock()
+    container.read_item = AsyncMock(side_effect=read_item)
+    container.upsert_item = AsyncMock(side_effect=upsert_item)
+    container.create_item = AsyncMock(side_effect=create_item)
+    container.query_items = MagicMock(side_effect=query_items)
+    client.container = container
+    client._initialized = True
+    return client
+
+
+def _make_plan(plan_id="plan-1", session_id="session-1"):
+    return Plan(
+        id=plan_id,
+        plan_id=plan_id,
+        session_id=session_id,
+        user_id="user-1",
+        initial_goal="goal",
+    )
+
+
+@pytest.mark.asyncio
+async def test_add_plan_writes_locator_and_reads_with_point_read():
+    documents = {}
+    client = _make_client(documents)
+    await client.add_plan(_make_plan())
+
+    locator = documents[("plan-1", "plan-1")]
+    assert locator["data_type"] == DataType.plan_locator
+    assert locator["plan_session_id"] == "session-1"
+
+    plan = await client.get_plan_by_plan_id("plan-1")
+    assert plan.session_id == "session-1"
+    client.container.query_items.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cold_cache_resolves_partition_through_locator():
+    documents = {}
+    client = _make_client(documents)
+    await client.add_plan(_make_plan())
+    client._forget_plan_partition("plan-1")
+
+    plan = await client.get_plan_by_plan_id("plan-1")
+    assert plan.plan_id == "plan-1"
+    client.container.query_items.assert_not_called()
+    assert client._plan_partitions["plan-1"] == "session-1"
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_query_for_plans_without_locator():
+    plan = _make_plan()
+    documents = {("plan-1", "session-1"): plan.model_dump(mode="json")}
+    client = _make_client(documents)
+
+    result = await client.get_plan_by_plan_id("plan-1")
+    assert result.plan_id == "plan-1"
+    client.container.query_items.assert_called_once()
+
+    # The partition key is now cached, so the next read is a point read
+    await client.get_plan_by_plan_id("plan-1")
+    client.container.query_items.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_stale_cache_entry_falls_back_to_query():
+    plan = _make_plan()
+    documents = {("plan-1", "session-1"): plan.model_dump(mode="json")}
+    client = _make_client(documents)
+    client._remember_plan_partition("plan-1", "wrong-partition")
+
+    result = await client.get_plan_by_plan_id("plan-1")
+    assert result.session_id == "session-1"
+    assert client._plan_partitions["plan-1"] == "session-1"
+
+
+def test_locator_cache_is_bounded():
+    client = _make_client({})
+    client.PLAN_LOCATOR_CACHE_SIZE = 2
+    client._remember_plan_partition("a", "1")
+    client._remember_plan_partition("b", "2")
+    client._remember_plan_partition("c", "3")
+    assert list(client._plan_partitions) == ["b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_message_queries_are_scoped_to_the_plan_partition():
+    documents = {}
+    client = _make_client(documents)
+    await client.add_plan(_make_plan())
+    client._forget_plan_partition("plan-1")
+
+    await client.get_agent_messages_since("plan-1")
+    assert client.container.query_items.call_args.kwargs["partition_key"] == (
+        "session-1"
+    )
+
+    # Plans written before locators existed are still found by a fan-out query
+    await client.get_agent_messages("plan-2")
+    assert "partition_key" not in client.container.query_items.call_args.kwargs
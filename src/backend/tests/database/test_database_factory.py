@@ -0,0 +1,93 @@
+"""Tests for the shared-client database factory and user-scoped views."""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+MOCK_ENV_VARS = {
+    "APPLICATIONINSIGHTS_CONNECTION_STRING": "",
+    "AZURE_OPENAI_ENDPOINT": "https://mock-openai-endpoint.azure.com/",
+    "AZURE_AI_SUBSCRIPTION_ID": "00000000-0000-0000-0000-000000000000",
+    "AZURE_AI_RESOURCE_GROUP": "rg-test",
+    "AZURE_AI_PROJECT_NAME": "proj-test",
+    "AZURE_AI_AGENT_ENDPOINT": "https://agents.example.com/",
+}
+
+with patch.dict(os.environ, MOCK_ENV_VARS, clear=False):
+    from common.database.cosmosdb import CosmosDBClient
+    from common.database.database_factory import DatabaseFactory
+
+
+def _client():
+    client = CosmosDBClient(
+        endpoint="https://example.documents.azure.com",
+        credential=None,
+        database_name="db",
+        container_name="container",
+    )
+    client.client = MagicMock()
+    client.client.close = AsyncMock()
+    client.container = MagicMock()
+    client._initialized = True
+    return client
+
+
+@pytest.mark.asyncio
+async def test_views_share_client_and_caches():
+    root = _client()
+    alice = root.for_user("alice")
+    bob = root.for_user("bob")
+
+    assert (alice.user_id, bob.user_id, root.user_id) == ("alice", "bob", "")
+    assert alice.container is root.container
+    assert alice.team_cache is root.team_cache
+
+    alice._remember_plan_partition("plan-1", "session-1")
+    assert await bob._resolve_plan_partition("plan-1") == "session-1"
+
+
+@pytest.mark.asyncio
+async def test_closing_a_view_keeps_the_shared_client_open():
+    root = _client()
+    await root.for_user("alice").close()
+    root.client.close.assert_not_called()
+
+    await root.close()
+    root.client.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_factory_initializes_one_client_for_concurrent_users():
+    created = []
+
+    def create_client():
+        client = _client()
+        client._initialized = False
+
+        async def initialize():
+            await asyncio.sleep(0.01)
+            client._initialized = True
+
+        client.initialize = initialize
+        created.append(client)
+        return client
+
+    await DatabaseFactory.close_all()
+    with patch.object(DatabaseFactory, "_create_client", side_effect=create_client):
+        views = await asyncio.gather(
+            *(DatabaseFactory.get_database(user_id=f"user-{i}") for i in range(20))
+        )
+    try:
+        assert len(created) == 1
+        assert {view.user_id for view in views} == {f"user-{i}" for i in range(20)}
+        assert all(view.container is created[0].container for view in views)
+    finally:
+        await DatabaseFactory.close_all()
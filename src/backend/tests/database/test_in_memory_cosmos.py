@@ -0,0 +1,149 @@
+"""Tests for the in-memory Cosmos DB container and its request-unit model."""
+
+import sys
+from pathlib import Path
+
+import pytest
+from azure.cosmos.exceptions import (
+    CosmosBatchOperationError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError,
+)
+
+# Add the backend path to sys.path so we can import common modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.cosmos_query import QuerySyntaxError, parse_query  # noqa: E402
+from common.database.in_memory_cosmos import InMemoryContainer  # noqa: E402
+
+
+def _document(index, session_id="s1", **fields):
+    return {
+        "id": f"doc-{index}",
+        "session_id": session_id,
+        "data_type": "plan",
+        "user_id": "u",
+        **fields,
+    }
+
+
+async def _drain(result):
+    return [item async for item in result]
+
+
+def test_parser_supports_projections_and_ordering():
+    parsed = parse_query(
+        "SELECT c.id, ARRAY_LENGTH(c.agents) AS agent_count FROM c "
+        "WHERE c.data_type=@data_type and c.user_id='u' ORDER BY c._ts DESC"
+    )
+    assert [p.alias for p in parsed.projections] == ["id", "agent_count"]
+    assert [c.path for c in parsed.conditions] == [("data_type",), ("user_id",)]
+    assert parsed.conditions[1].literal == "u"
+    assert parsed.order_by[0].descending
+
+    with pytest.raises(QuerySyntaxError):
+        parse_query("SELECT * FROM c WHERE c.a = @a OR c.b = @b")
+
+
+def test_parser_supports_comparisons_and_is_defined():
+    parsed = parse_query(
+        "SELECT * FROM c WHERE c._ts < @cutoff AND c.status != 'done' "
+        "AND NOT IS_DEFINED(c.archive_key)"
+    )
+    assert [c.operator for c in parsed.conditions] == ["<", "!=", "is_defined"]
+    assert parsed.conditions[2].negated
+    parameters = {"@cutoff": 100}
+    assert parsed.matches({"_ts": 50, "status": "new"}, parameters)
+    assert not parsed.matches({"_ts": 150, "status": "new"}, parameters)
+    assert not parsed.matches({"_ts": 50, "status": "done"}, parameters)
+    assert not parsed.matches({"_ts": 50, "archive_key": "k"}, parameters)
+    # Values of different types never compare
+    assert not parsed.matches({"_ts": "50"}, parameters)
+
+
+@pytest.mark.asyncio
+async def test_point_operations_and_errors():
+    container = InMemoryContainer()
+    await container.create_item(body=_document(1))
+    with pytest.raises(CosmosResourceExistsError):
+        await container.create_item(body=_document(1))
+
+    document = await container.read_item(item="doc-1", partition_key="s1")
+    assert document["user_id"] == "u" and "_ts" in document and "_etag" in document
+    assert container.client_connection.last_response_headers[
+        "x-ms-request-charge"
+    ] == "1.0"
+
+    await container.delete_item("doc-1", partition_key="s1")
+    with pytest.raises(CosmosResourceNotFoundError):
+        await container.read_item(item="doc-1", partition_key="s1")
+
+
+@pytest.mark.asyncio
+async def test_cross_partition_queries_cost_more_than_single_partition():
+    container = InMemoryContainer(physical_partitions=8)
+    for index in range(20):
+        await container.upsert_item(body=_document(index, session_id=f"s{index % 5}"))
+
+    charges = []
+
+    def hook(headers, _result):
+        charges.append(float(headers["x-ms-request-charge"]))
+
+    single = await _drain(
+        container.query_items(
+            "SELECT * FROM c WHERE c.session_id=@pk AND c.data_type=@type",
+            parameters=[{"name": "@pk", "value": "s1"}, {"name": "@type", "value": "plan"}],
+            response_hook=hook,
+        )
+    )
+    cross = await _drain(
+        container.query_items(
+            "SELECT * FROM c WHERE c.user_id=@user_id AND c.data_type=@type",
+            parameters=[{"name": "@user_id", "value": "u"}, {"name": "@type", "value": "plan"}],
+            response_hook=hook,
+        )
+    )
+
+    assert len(single) == 4 and len(cross) == 20
+    assert charges[1] > charges[0]
+    assert container.stats()["query"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_paging_and_projection():
+    container = InMemoryContainer()
+    for index in range(5):
+        await container.upsert_item(body=_document(index, agents=[1] * index))
+
+    query = container.query_items(
+        "SELECT c.id, ARRAY_LENGTH(c.agents) AS agent_count FROM c "
+        "WHERE c.user_id=@user_id ORDER BY c.id DESC",
+        parameters=[{"name": "@user_id", "value": "u"}],
+        max_item_count=2,
+    )
+    pages = []
+    async for page in query.by_page():
+        pages.append([item async for item in page])
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert pages[0][0] == {"id": "doc-4", "agent_count": 4}
+
+
+@pytest.mark.asyncio
+async def test_transactional_batch_is_atomic():
+    container = InMemoryContainer()
+    await container.upsert_item(body=_document(1))
+
+    with pytest.raises(CosmosBatchOperationError) as error:
+        await container.execute_item_batch(
+            batch_operations=[
+                ("upsert", (_document(2),)),
+                ("create", (_document(1),)),
+            ],
+            partition_key="s1",
+        )
+    assert error.value.error_index == 1
+    with pytest.raises(CosmosResourceNotFoundError):
+        await container.read_item(item="doc-2", partition_key="s1")
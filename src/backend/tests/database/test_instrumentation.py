@@ -0,0 +1,113 @@
+"""Tests for per-operation Cosmos DB request instrumentation."""
+
+import logging
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.in_memory_cosmos import InMemoryDBClient  # noqa: E402
+from common.models.messages_kernel import (  # noqa: E402
+    AgentMessageData,
+    Plan,
+    PlanStatus,
+)
+
+
+async def _database(**kwargs):
+    database = InMemoryDBClient(**kwargs)
+    await database.initialize()
+    return database.for_user("user-1")
+
+
+async def _add_plan(database):
+    plan_id = str(uuid.uuid4())
+    plan = Plan(
+        id=plan_id,
+        plan_id=plan_id,
+        session_id=str(uuid.uuid4()),
+        user_id=database.user_id,
+        team_id="team-1",
+        initial_goal="goal",
+        overall_status=PlanStatus.completed,
+    )
+    await database.add_plan(plan)
+    return plan
+
+
+@pytest.mark.asyncio
+async def test_requests_are_attributed_to_the_calling_operation():
+    database = await _database(slow_operation_ms=None)
+    plan = await _add_plan(database)
+    for index in range(3):
+        await database.add_agent_message(
+            AgentMessageData(
+                plan_id=plan.id,
+                session_id=plan.session_id,
+                user_id=database.user_id,
+                agent="Agent",
+                content=f"message {index}",
+                raw_data="{}",
+            )
+        )
+    await database.get_agent_messages(plan.id)
+    await database.get_plan_by_plan_id(str(uuid.uuid4()))
+
+    stats = database.instrumentation.stats()
+    assert stats["add_plan"]["count"] == 1
+    assert stats["add_agent_message"]["count"] == 3
+    messages = stats["get_agent_messages"]
+    assert messages["count"] == 1
+    assert messages["requests"] == 1
+    assert messages["request_charge"] > 0
+    # The failed locator read is still charged to the operation
+    assert stats["get_plan_by_plan_id"]["requests"] >= 1
+    assert "query_items" not in stats
+
+
+@pytest.mark.asyncio
+async def test_slow_operations_are_logged_with_their_sql(caplog):
+    database = await _database(slow_operation_ms=0)
+    plan = await _add_plan(database)
+
+    with caplog.at_level(logging.WARNING, logger="common.database.instrumentation"):
+        await database.get_all_plans_by_team_id_status(
+            database.user_id, plan.team_id, PlanStatus.completed
+        )
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(
+        "get_all_plans_by_team_id_status" in message
+        and "c.team_id=@team_id" in message
+        and "@user_id" in message
+        for message in messages
+    )
+    assert database.instrumentation.stats()["get_all_plans_by_team_id_status"][
+        "slow"
+    ] == 1
+
+
+@pytest.mark.asyncio
+async def test_streamed_queries_fetch_pages_on_demand():
+    database = await _database(slow_operation_ms=None)
+    for _ in range(6):
+        await _add_plan(database)
+    query = "SELECT * FROM c WHERE c.user_id=@user_id AND c.data_type=@data_type"
+    parameters = [
+        {"name": "@user_id", "value": database.user_id},
+        {"name": "@data_type", "value": "plan"},
+    ]
+
+    stream = database.iter_items(query, parameters, Plan, page_size=2)
+    first = await stream.__anext__()
+    await stream.aclose()
+
+    assert isinstance(first, Plan)
+    stats = database.instrumentation.stats()["iter_items"]
+    assert stats["count"] == 1
+    assert stats["requests"] == 1
@@ -0,0 +1,104 @@
+"""Tests for the compact storage encoding of agent messages."""
+
+import json
+import sys
+import uuid
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.in_memory_cosmos import InMemoryDBClient  # noqa: E402
+from common.database.message_codec import (  # noqa: E402
+    ENCODING_FIELD,
+    MessageCodec,
+    decode_message,
+)
+from common.database.sqlite_db import SQLiteDBClient  # noqa: E402
+from common.models.messages_kernel import AgentMessageData  # noqa: E402
+from v3.models.messages import AgentMessageResponse, AgentMessageType  # noqa: E402
+
+CONTENT = '- The "quarterly" report is ready.\n' * 100
+
+
+def _message(plan_id, content=CONTENT):
+    response = AgentMessageResponse(
+        plan_id=plan_id,
+        agent="Analyst",
+        content=content,
+        agent_type=AgentMessageType.AI_AGENT,
+        streaming_message=content,
+    )
+    return AgentMessageData(
+        plan_id=plan_id,
+        user_id="user-1",
+        agent="Analyst",
+        content=content,
+        raw_data=json.dumps(asdict(response)),
+    )
+
+
+def test_encode_deduplicates_and_compresses_reversibly():
+    codec = MessageCodec(compression="gzip", threshold=1024)
+    original = _message("plan-1").model_dump(mode="json")
+
+    stored = codec.encode(dict(original))
+    assert stored[ENCODING_FIELD]["raw_references"] == [
+        "content",
+        "streaming_message",
+    ]
+    assert stored[ENCODING_FIELD]["content"] == "gzip"
+    assert decode_message(stored) == original
+    assert codec.stats()["saved_ratio"] > 0.9
+
+    # Short messages are only deduplicated; raw_data that json.dumps would
+    # write differently is left as it is
+    short = _message("plan-1", "hi").model_dump(mode="json")
+    spaced = dict(short, raw_data='{"content": "hi" }')
+    assert ENCODING_FIELD not in codec.encode(spaced)
+    assert decode_message(codec.encode(dict(short))) == short
+    # Documents written without the codec read back unchanged
+    assert decode_message(original) is original
+    with pytest.raises(ValueError):
+        MessageCodec(compression="brotli")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+async def test_messages_read_back_whether_stored_compact_or_not(backend, tmp_path):
+    def create(codec):
+        if backend == "sqlite":
+            return SQLiteDBClient(
+                database_path=str(tmp_path / "macae.db"), message_codec=codec
+            )
+        return InMemoryDBClient(message_codec=codec, container=container)
+
+    container = None
+    plain = create(None)
+    if backend == "memory":
+        container = plain.memory_container
+    compact = create(MessageCodec(threshold=512))
+    plan_id = str(uuid.uuid4())
+    legacy, new = _message(plan_id, "written before"), _message(plan_id)
+    try:
+        await plain.add_agent_message(legacy)
+        await compact.add_agent_message(new)
+
+        messages = await compact.get_agent_messages(plan_id)
+        assert [m.raw_data for m in messages] == [legacy.raw_data, new.raw_data]
+        assert messages[1].content == CONTENT
+        stored = [
+            document
+            async for document in compact.iter_items(
+                "SELECT * FROM c WHERE c.plan_id=@plan_id",
+                [{"name": "@plan_id", "value": plan_id}],
+            )
+        ]
+        assert [ENCODING_FIELD in document for document in stored] == [False, True]
+    finally:
+        await compact.close()
+        await plain.close()
@@ -0,0 +1,40 @@
+"""Tests for the cursor of incremental agent message reads."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.database_base import (  # noqa: E402
+    MESSAGE_CURSOR_OVERLAP_SECONDS,
+    MessageCursor,
+)
+
+
+def test_cursor_rereads_the_overlap_window_and_skips_what_it_read():
+    documents = [{"id": "a", "_ts": 100}, {"id": "b", "_ts": 110}]
+    new, cursor = MessageCursor().advance(documents)
+    assert [doc["id"] for doc in new] == ["a", "b"]
+    assert cursor.since_ts == 110 - MESSAGE_CURSOR_OVERLAP_SECONDS
+    assert cursor.seen == ["b"]
+
+    # "c" committed after the first read with an older _ts than "b"
+    cursor = MessageCursor.decode(cursor.encode())
+    tail = [{"id": "c", "_ts": 108}, {"id": "b", "_ts": 110}, {"id": "d", "_ts": 111}]
+    new, cursor = cursor.advance(tail)
+    assert [doc["id"] for doc in new] == ["c", "d"]
+    assert cursor.ts == 111 and cursor.seen == ["c", "b", "d"]
+
+    # Nothing new keeps the position
+    new, same = cursor.advance(tail)
+    assert new == [] and same == cursor
+
+
+@pytest.mark.parametrize("token", ["%%%", "bm90IGpzb24=", "eyJ0cyI6ICJ4In0="])
+def test_invalid_tokens_are_rejected(token):
+    with pytest.raises(ValueError, match="Invalid message cursor"):
+        MessageCursor.decode(token)
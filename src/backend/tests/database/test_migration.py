@@ -0,0 +1,138 @@
+"""Tests for the hierarchical partition layout and the container migration."""
+
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.in_memory_cosmos import (  # noqa: E402
+    InMemoryContainer,
+    InMemoryDBClient,
+)
+from common.database.migration import ContainerMigration  # noqa: E402
+from common.database.partition_layout import (  # noqa: E402
+    HierarchicalPartitionLayout,
+)
+from common.models.messages_kernel import (  # noqa: E402
+    AgentType,
+    Plan,
+    PlanStatus,
+    Step,
+    TeamConfiguration,
+    UserCurrentTeam,
+)
+
+
+async def _seed(database, users=2, plans=3):
+    await database.add_team(
+        TeamConfiguration(
+            team_id="team-1",
+            session_id=str(uuid.uuid4()),
+            name="Team",
+            status="visible",
+            created="2024-01-01",
+            created_by="admin",
+            user_id="admin",
+        )
+    )
+    for user in range(users):
+        view = database.for_user(f"user-{user}")
+        await view.set_current_team(
+            UserCurrentTeam(user_id=f"user-{user}", team_id="team-1")
+        )
+        for _ in range(plans):
+            plan_id = str(uuid.uuid4())
+            await view.add_plan(
+                Plan(
+                    id=plan_id,
+                    plan_id=plan_id,
+                    user_id=f"user-{user}",
+                    team_id="team-1",
+                    initial_goal="goal",
+                    overall_status=PlanStatus.completed,
+                )
+            )
+            await view.add_step(
+                Step(
+                    plan_id=plan_id,
+                    user_id=f"user-{user}",
+                    action="step",
+                    agent=AgentType.GENERIC,
+                )
+            )
+
+
+def _hierarchical_container():
+    return InMemoryContainer(
+        container_id="memory_v2",
+        partition_key_path=list(HierarchicalPartitionLayout.paths),
+    )
+
+
+@pytest.mark.asyncio
+async def test_migration_resumes_from_checkpoint_and_verifies(tmp_path):
+    source = InMemoryDBClient()
+    await _seed(source)
+    target = _hierarchical_container()
+    checkpoint = str(tmp_path / "checkpoint.json")
+    layout = HierarchicalPartitionLayout()
+
+    first = ContainerMigration(
+        source.memory_container, target, layout, checkpoint, page_size=5
+    )
+    await first.copy(max_pages=1)
+    assert first.checkpoint.copied + first.checkpoint.skipped == 5
+
+    # A new run picks up from the saved change feed position
+    resumed = ContainerMigration(
+        source.memory_container, target, layout, checkpoint, page_size=5
+    )
+    assert resumed.checkpoint.continuation == first.checkpoint.continuation
+    await resumed.copy()
+    report = await resumed.verify()
+    assert report.ok, report
+    # Plan locators of the session layout are not copied
+    assert resumed.checkpoint.skipped == 6
+    assert report.checked == 1 + 2 + 2 * 3 * 2
+
+    # Writes made to the source while migrating are caught up by the next run
+    await source.for_user("user-0").set_current_team(
+        UserCurrentTeam(user_id="user-0", team_id="team-2")
+    )
+    assert not (await resumed.verify()).ok
+    await resumed.copy()
+    assert (await resumed.verify()).ok
+
+    migrated = InMemoryDBClient(container=target, partition_layout="hierarchical")
+    view = migrated.for_user("user-1")
+    plans = await view.get_all_plans()
+    assert len(plans) == 3
+    assert len(await view.get_steps_by_plan(plans[0].plan_id)) == 1
+    assert (await view.get_team("team-1")).name == "Team"
+    current_teams = await migrated.for_user("user-0").get_data_by_type(
+        "user_current_team"
+    )
+    assert len(current_teams) == 2
+
+
+@pytest.mark.asyncio
+async def test_user_and_team_queries_stay_in_one_physical_partition():
+    charges = {}
+    for layout in ("session", "hierarchical"):
+        database = InMemoryDBClient(partition_layout=layout)
+        await _seed(database, users=8)
+        database.invalidate_team_cache()
+        view = database.for_user("user-3")
+        database.memory_container.reset_stats()
+        await view.get_all_teams()
+        await view.get_all_plans_by_team_id_status("user-3", "team-1", "completed")
+        charges[layout] = database.memory_container.stats()["query"]["request_charge"]
+
+    # In the session layout both queries fan out to all 4 physical partitions,
+    # paying 3 RU of cross-partition penalty each
+    assert charges["hierarchical"] < charges["session"] - 5
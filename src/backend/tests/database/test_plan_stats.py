@@ -0,0 +1,98 @@
+"""Tests for the incrementally maintained per-user plan statistics."""
+
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.cosmos_patch import set_operation  # noqa: E402
+from common.database.in_memory_cosmos import (  # noqa: E402
+    InMemoryContainer,
+    InMemoryDBClient,
+    LatencyModel,
+)
+from common.database.plan_stats import reconcile_plan_stats  # noqa: E402
+from common.database.sqlite_db import SQLiteDBClient  # noqa: E402
+from common.models.messages_kernel import Plan, PlanStatus  # noqa: E402
+
+
+def _plan(user_id, team_id, status=PlanStatus.in_progress):
+    plan_id = str(uuid.uuid4())
+    return Plan(
+        id=plan_id,
+        plan_id=plan_id,
+        user_id=user_id,
+        team_id=team_id,
+        initial_goal="goal",
+        overall_status=status,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_plan_writes_retry_on_etag_conflicts():
+    container = InMemoryContainer(latency_model=LatencyModel(simulate=True))
+    database = InMemoryDBClient(container=container, plan_stats_enabled=True)
+    view = database.for_user("user-1")
+    plans = [_plan("user-1", "team-1") for _ in range(8)]
+
+    await asyncio.gather(*(view.add_plan(plan) for plan in plans))
+    await asyncio.gather(
+        *(
+            view.patch_plan(
+                plan.id, [set_operation("/overall_status", PlanStatus.completed)]
+            )
+            for plan in plans[:5]
+        )
+    )
+
+    stats = await view.get_plan_stats()
+    assert stats.teams == {"team-1": {"in_progress": 3, "completed": 5}}
+
+
+@pytest.mark.asyncio
+async def test_lost_statistics_updates_are_rebuilt_on_the_next_read(monkeypatch):
+    database = InMemoryDBClient(plan_stats_enabled=True)
+    view = database.for_user("user-1")
+    plan = _plan("user-1", "team-1")
+    await view.add_plan(plan)
+
+    async def unavailable(*args, **kwargs):
+        raise RuntimeError("unavailable")
+
+    monkeypatch.setattr(view.container, "replace_item", unavailable)
+    await view.patch_plan(
+        plan.id, [set_operation("/overall_status", PlanStatus.completed)]
+    )
+    monkeypatch.undo()
+
+    stats = await view.get_plan_stats()
+    assert stats.teams == {"team-1": {"completed": 1}}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+async def test_reconcile_rebuilds_every_plan_owner(backend, tmp_path):
+    if backend == "sqlite":
+        database = SQLiteDBClient(
+            database_path=str(tmp_path / "macae.db"), plan_stats_enabled=False
+        )
+    else:
+        database = InMemoryDBClient(plan_stats_enabled=False)
+    try:
+        for user_id, count in (("user-1", 2), ("user-2", 1)):
+            for _ in range(count):
+                await database.add_plan(_plan(user_id, "team-1"))
+
+        assert await reconcile_plan_stats(database) == 2
+        assert await reconcile_plan_stats(database, ["user-2"]) == 1
+        stats = await database.get_plan_stats("user-1")
+        assert stats.teams == {"team-1": {"in_progress": 2}}
+        assert (await database.get_plan_stats("user-2")).totals == {"in_progress": 1}
+    finally:
+        await database.close()
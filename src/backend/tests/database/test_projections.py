@@ -0,0 +1,103 @@
+"""Tests for the plan and team summary projections."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.cosmosdb import CosmosDBClient  # noqa: E402
+from common.models.messages_kernel import (  # noqa: E402
+    PlanSummary,
+    TeamAgent,
+    TeamConfiguration,
+    TeamSummary,
+)
+
+
+def _client():
+    client = CosmosDBClient(
+        endpoint="https://example.documents.azure.com",
+        credential=None,
+        database_name="db",
+        container_name="container",
+    )
+    client.container = MagicMock()
+    client._initialized = True
+    return client
+
+
+def _team():
+    return TeamConfiguration(
+        id="team-1",
+        team_id="team-1",
+        session_id="session",
+        name="Team",
+        status="visible",
+        created="2025-01-01T00:00:00",
+        created_by="user",
+        user_id="user",
+        agents=[
+            TeamAgent(
+                input_key="a", type="ai", name="A", deployment_name="d", icon=""
+            ),
+            TeamAgent(
+                input_key="b", type="ai", name="B", deployment_name="d", icon=""
+            ),
+        ],
+    )
+
+
+@pytest.mark.asyncio
+async def test_plan_summaries_use_projecting_query():
+    client = _client()
+    captured = {}
+
+    async def query_items(query, parameters, model_class, partition_key=None):
+        captured.update(query=query, model_class=model_class)
+        return []
+
+    client.query_items = query_items
+    summaries, token = await client.get_plan_summaries_by_team_id_status(
+        "user", "team-1", "completed"
+    )
+
+    assert summaries == [] and token is None
+    assert captured["model_class"] is PlanSummary
+    assert captured["query"].startswith(f"SELECT {client.PLAN_SUMMARY_FIELDS} FROM c")
+    assert "m_plan" not in captured["query"]
+
+
+@pytest.mark.asyncio
+async def test_team_summaries_are_projected_and_cached():
+    client = _client()
+    calls = []
+
+    async def query_items(query, parameters, model_class, partition_key=None):
+        calls.append(query)
+        return [TeamSummary.from_team(_team())]
+
+    client.query_items = query_items
+    summaries = await client.get_team_summaries()
+    await client.get_team_summaries()
+
+    assert len(calls) == 1
+    assert "ARRAY_LENGTH(c.agents) AS agent_count" in calls[0]
+    assert summaries[0].agent_count == 2
+
+
+@pytest.mark.asyncio
+async def test_team_summaries_reuse_cached_team_list():
+    client = _client()
+    client.team_cache.set(("all_teams",), [_team()])
+    client.query_items = MagicMock()
+
+    summaries = await client.get_team_summaries()
+
+    client.query_items.assert_not_called()
+    assert [summary.team_id for summary in summaries] == ["team-1"]
+    assert "agents" not in summaries[0].model_dump()
@@ -0,0 +1,105 @@
+"""Tests for the document serialization helpers."""
+
+import datetime
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from semantic_kernel.kernel_pydantic import KernelBaseModel
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.serialization import encode, to_document  # noqa: E402
+from common.models.messages_kernel import (  # noqa: E402
+    AgentMessageData,
+    Plan,
+    PlanStatus,
+    TeamAgent,
+    TeamConfiguration,
+)
+
+
+class _Event(KernelBaseModel):
+    at: datetime.datetime
+
+
+class _Timeline(KernelBaseModel):
+    started: Optional[datetime.datetime] = None
+    events: List[_Event] = []
+    marks: Dict[str, datetime.date] = {}
+
+
+def _legacy_document(item):
+    document = item.model_dump()
+    for key, value in list(document.items()):
+        if isinstance(value, datetime.datetime):
+            document[key] = value.isoformat()
+    return document
+
+
+def _samples():
+    return [
+        Plan(
+            plan_id="plan-1",
+            user_id="user-1",
+            team_id="team-1",
+            initial_goal="Onboard a new employee",
+            overall_status=PlanStatus.in_progress,
+            m_plan={"steps": [{"agent": "HR", "action": "Create account"}]},
+        ),
+        TeamConfiguration(
+            team_id="team-1",
+            session_id="session-1",
+            name="HR team",
+            status="visible",
+            created="2025-01-01T00:00:00",
+            created_by="user-1",
+            user_id="user-1",
+            agents=[
+                TeamAgent(
+                    input_key="hr",
+                    type="ai",
+                    name="HRAgent",
+                    deployment_name="gpt-4o",
+                    icon="",
+                )
+            ],
+        ),
+        AgentMessageData(
+            plan_id="plan-1",
+            user_id="user-1",
+            agent="HRAgent",
+            content="Account created – ✓",
+            raw_data="{}",
+        ),
+    ]
+
+
+def test_documents_match_the_legacy_serialization():
+    for item in _samples():
+        document = to_document(item)
+        legacy = _legacy_document(item)
+        assert json.dumps(document) == json.dumps(legacy)
+        assert encode(document) == json.dumps(
+            legacy, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+
+
+def test_nested_datetimes_are_serialized():
+    moment = datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    timeline = _Timeline(
+        started=moment,
+        events=[_Event(at=moment)],
+        marks={"due": datetime.date(2025, 2, 1)},
+    )
+
+    document = to_document(timeline)
+    assert document == {
+        "started": "2025-01-02T03:04:05+00:00",
+        "events": [{"at": "2025-01-02T03:04:05+00:00"}],
+        "marks": {"due": "2025-02-01"},
+    }
+    assert json.loads(encode(document)) == document
@@ -0,0 +1,70 @@
+"""Tests for coalescing identical concurrent reads."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.in_memory_cosmos import (  # noqa: E402
+    InMemoryContainer,
+    InMemoryDBClient,
+    LatencyModel,
+)
+from common.database.single_flight import SingleFlight  # noqa: E402
+from common.models.messages_kernel import UserCurrentTeam  # noqa: E402
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_flight_until_invalidated():
+    flights = SingleFlight("test")
+    release = asyncio.Event()
+    calls = []
+
+    async def read():
+        calls.append("read")
+        number = len(calls)
+        await release.wait()
+        return number
+
+    first = [asyncio.create_task(flights.do("key", read)) for _ in range(3)]
+    await asyncio.sleep(0)
+    # A caller that gives up does not cancel the flight for the others
+    first[0].cancel()
+    flights.invalidate()
+    second = asyncio.create_task(flights.do("key", read))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*first[1:]) == [1, 1]
+    assert await second == 2
+    assert flights.stats()["coalesced"] == 2
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_identical_queries_issue_one_request_and_see_later_writes():
+    container = InMemoryContainer(latency_model=LatencyModel(simulate=True))
+    database = InMemoryDBClient(container=container)
+    view = database.for_user("user-1")
+    await view.set_current_team(UserCurrentTeam(user_id="user-1", team_id="team-1"))
+    container.reset_stats()
+
+    teams = await asyncio.gather(*(view.get_current_team("user-1") for _ in range(5)))
+
+    assert container.stats()["query"]["count"] == 1
+    assert database.single_flight.stats()["coalesced"] == 4
+    # Every caller gets its own instance
+    assert len({id(team) for team in teams}) == 5
+
+    # A read issued after a write does not join a flight started before it
+    stale = asyncio.create_task(view.get_current_team("user-1"))
+    await asyncio.sleep(0)
+    current = teams[0].model_copy(update={"team_id": "team-2"})
+    await view.update_current_team(current)
+    assert (await view.get_current_team("user-1")).team_id == "team-2"
+    await stale
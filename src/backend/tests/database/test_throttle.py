@@ -0,0 +1,138 @@
+"""Tests for the adaptive concurrency limiter of Cosmos DB writes."""
+
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.in_memory_cosmos import (  # noqa: E402
+    InMemoryContainer,
+    InMemoryDBClient,
+)
+from common.database.throttle import AdaptiveConcurrencyLimiter  # noqa: E402
+from common.models.messages_kernel import Plan, PlanStatus  # noqa: E402
+
+
+def _throttled(retry_after_ms):
+    error = CosmosHttpResponseError(status_code=429, message="Too many requests")
+    error.headers = {"x-ms-retry-after-ms": str(retry_after_ms)}
+    return error
+
+
+@pytest.mark.asyncio
+async def test_limit_halves_on_429_and_grows_back():
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=8, max_limit=16, decrease_cooldown=10
+    )
+    attempts = []
+
+    async def write():
+        attempts.append(len(attempts))
+        if len(attempts) <= 2:
+            raise _throttled(5)
+        return "ok"
+
+    assert await limiter.run("user-1", write) == "ok"
+    stats = limiter.stats()
+    assert stats["throttled"] == 2
+    assert stats["retries"] == 2
+    # Both 429s fell inside one cooldown window, so the limit halved once
+    assert stats["limit"] == 4
+
+    for _ in range(8):
+        limiter.on_success()
+    assert limiter.current_limit == 5
+
+    async def always_throttled():
+        raise _throttled(1)
+
+    limiter.max_retry_wait = 0.01
+    with pytest.raises(CosmosHttpResponseError):
+        await limiter.run("user-1", always_throttled)
+    assert limiter.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_waiting_writes_are_admitted_round_robin_across_users():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    admitted = []
+    release = asyncio.Event()
+
+    async def blocker():
+        async with limiter.slot("blocker"):
+            await release.wait()
+
+    async def write(user):
+        async with limiter.slot(user):
+            admitted.append(user)
+
+    holder = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(write(user)) for user in ("a", "a", "a", "b")]
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 4
+
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    assert admitted == ["a", "b", "a", "a"]
+    assert limiter.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_burst_of_writes_succeeds_against_a_throttled_container():
+    container = InMemoryContainer(provisioned_throughput=300)
+    database = InMemoryDBClient(container=container, write_concurrency=8)
+    await database.initialize()
+
+    async def add_plans(user_id):
+        view = database.for_user(user_id)
+        for _ in range(10):
+            plan_id = str(uuid.uuid4())
+            await view.add_plan(
+                Plan(
+                    id=plan_id,
+                    plan_id=plan_id,
+                    session_id=str(uuid.uuid4()),
+                    user_id=user_id,
+                    team_id="team-1",
+                    initial_goal="goal",
+                    overall_status=PlanStatus.in_progress,
+                )
+            )
+
+    await asyncio.gather(*(add_plans(f"user-{index}") for index in range(4)))
+
+    assert container.throttled_requests > 0
+    assert database.write_limiter.stats()["throttled"] > 0
+    # Lift the throughput cap so that the read back is not throttled itself
+    container.provisioned_throughput = None
+    assert len(await database.for_user("user-0").get_all_plans()) == 10
+
+
+@pytest.mark.asyncio
+async def test_queries_still_throttled_raise_instead_of_returning_nothing(
+    monkeypatch,
+):
+    database = InMemoryDBClient()
+    await database.initialize()
+    view = database.for_user("user-0")
+    error = _throttled(1000)
+
+    def query_items(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(view.container, "query_items", query_items)
+    with pytest.raises(CosmosHttpResponseError):
+        await view.get_all_plans()
+
+    # Other failures keep returning no results
+    error = CosmosHttpResponseError(status_code=500, message="Internal error")
+    assert await view.get_all_plans() == []
+    await database.close()
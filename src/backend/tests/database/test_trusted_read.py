@@ -0,0 +1,130 @@
+"""Tests for schema-version stamps and trusted reads."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database import database_base  # noqa: E402
+from common.database.in_memory_cosmos import InMemoryDBClient  # noqa: E402
+from common.database.serialization import to_document  # noqa: E402
+from common.database.sqlite_db import SQLiteDBClient  # noqa: E402
+from common.database.trusted_read import (  # noqa: E402
+    SCHEMA_VERSION_FIELD,
+    is_current,
+    schema_version,
+    stamp,
+    validate_all,
+)
+from common.models.messages_kernel import (  # noqa: E402
+    AgentMessageData,
+    AgentMessageType,
+    Plan,
+    PlanStatus,
+    PlanSummary,
+)
+
+
+def _plan():
+    return Plan(
+        plan_id="plan-1",
+        session_id="session-1",
+        user_id="user-1",
+        initial_goal="goal",
+        overall_status=PlanStatus.completed,
+        m_plan={"steps": [{"action": "a"}]},
+        team_id="team-1",
+    )
+
+
+def test_only_documents_of_the_current_model_are_current():
+    document = stamp(to_document(_plan()), Plan)
+
+    assert is_current(document, Plan)
+    assert not is_current(to_document(_plan()), Plan)
+    assert not is_current(dict(document, **{SCHEMA_VERSION_FIELD: "old"}), Plan)
+    assert not is_current(document, PlanSummary)
+    assert schema_version(Plan) != schema_version(PlanSummary)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+async def test_trusted_reads_return_what_validation_returns(backend, tmp_path):
+    if backend == "sqlite":
+        database = SQLiteDBClient(str(tmp_path / "macae.db"), trusted_reads=True)
+    else:
+        database = InMemoryDBClient(trusted_reads=True)
+    await database.initialize()
+    view = database.for_user("user-1")
+    try:
+        plan = _plan()
+        await view.add_plan(plan)
+        for index in range(3):
+            await view.add_agent_message(
+                AgentMessageData(
+                    plan_id=plan.plan_id,
+                    session_id=plan.session_id,
+                    user_id="user-1",
+                    agent="Agent",
+                    agent_type=AgentMessageType.AI_AGENT,
+                    content=f"message {index}",
+                    raw_data="{}",
+                    steps=[{"index": index}],
+                )
+            )
+
+        first, second = await asyncio.gather(
+            view.get_agent_messages(plan.plan_id),
+            view.get_agent_messages(plan.plan_id),
+        )
+        assert [message.content for message in first] == [
+            f"message {index}" for index in range(3)
+        ]
+        # Readers sharing one query never share mutable values
+        first[0].steps.append("changed")
+        assert second[0].steps == [{"index": 0}]
+
+        read = await view.get_plan_by_plan_id(plan.id)
+        assert read.model_dump(exclude={"etag"}) == plan.model_dump(exclude={"etag"})
+
+        # A page failing as a whole still returns its valid documents
+        documents = [stamp(to_document(message), AgentMessageData) for message in first]
+        documents[1]["agent_type"] = "unknown"
+        assert len(view._validate(documents, AgentMessageData)) == 2
+    finally:
+        await database.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+async def test_plan_pages_are_validated_in_one_call(backend, tmp_path, monkeypatch):
+    if backend == "sqlite":
+        database = SQLiteDBClient(str(tmp_path / "macae.db"), trusted_reads=True)
+    else:
+        database = InMemoryDBClient(trusted_reads=True)
+    await database.initialize()
+    view = database.for_user("user-1")
+    calls = []
+
+    def counting_validate_all(documents, model_class):
+        calls.append(len(documents))
+        return validate_all(documents, model_class)
+
+    monkeypatch.setattr(database_base, "validate_all", counting_validate_all)
+    try:
+        for index in range(3):
+            plan = _plan()
+            await view.add_plan(plan.model_copy(update={"plan_id": f"plan-{index}"}))
+
+        plans, _ = await view.get_plans_page_by_team_id_status(
+            "user-1", "team-1", PlanStatus.completed, page_size=2
+        )
+        assert [plan.team_id for plan in plans] == ["team-1", "team-1"]
+        assert calls and calls[-1] >= 2
+    finally:
+        await database.close()
@@ -0,0 +1,216 @@
+"""Tests for the write-behind buffer."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend path to sys.path so we can import common modules
+backend_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_path))
+
+from common.database.in_memory_cosmos import InMemoryDBClient  # noqa: E402
+from common.database.write_behind import (  # noqa: E402
+    WriteBehindBuffer,
+    WriteBehindError,
+)
+from common.models.messages_kernel import (  # noqa: E402
+    AgentMessageData,
+    AgentMessageType,
+    Plan,
+)
+
+
+class FakeContainer:
+    """Records transactional batches and individual upserts."""
+
+    def __init__(self, fail_batches: bool = False, fail_upserts: int = 0):
+        self.batches = []
+        self.upserts = []
+        self.fail_batches = fail_batches
+        self.fail_upserts = fail_upserts
+
+    async def execute_item_batch(self, batch_operations, partition_key):
+        if self.fail_batches:
+            raise RuntimeError("batch rejected")
+        self.batches.append(
+            (partition_key, [operation[1][0] for operation in batch_operations])
+        )
+
+    async def upsert_item(self, body):
+        if self.fail_upserts:
+            self.fail_upserts -= 1
+            raise RuntimeError("upsert rejected")
+        self.upserts.append(body)
+
+
+def _document(index: int, partition_key: str = "plan-a"):
+    return {"id": f"doc-{index}", "session_id": partition_key}
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_batch_size_reached():
+    container = FakeContainer()
+    buffer = WriteBehindBuffer(container, max_batch_size=3, flush_interval=60)
+
+    for index in range(3):
+        await buffer.enqueue("plan-a", _document(index))
+
+    assert len(container.batches) == 1
+    assert [doc["id"] for doc in container.batches[0][1]] == ["doc-0", "doc-1", "doc-2"]
+    assert buffer.queue_depth == 0
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_groups_documents_per_partition_on_explicit_flush():
+    container = FakeContainer()
+    buffer = WriteBehindBuffer(container, max_batch_size=10, flush_interval=60)
+
+    await buffer.enqueue("plan-a", _document(1, "plan-a"))
+    await buffer.enqueue("plan-b", _document(2, "plan-b"))
+    await buffer.enqueue("plan-a", _document(3, "plan-a"))
+    assert buffer.queue_depth == 3
+
+    await buffer.flush("plan-a")
+    assert container.batches == [
+        ("plan-a", [_document(1, "plan-a"), _document(3, "plan-a")])
+    ]
+    assert buffer.queue_depth == 1
+
+    await buffer.close()
+    assert container.batches[-1][0] == "plan-b"
+    assert buffer.stats()["flushed_documents"] == 3
+
+
+@pytest.mark.asyncio
+async def test_flushes_after_time_window():
+    container = FakeContainer()
+    buffer = WriteBehindBuffer(container, max_batch_size=10, flush_interval=0.01)
+
+    await buffer.enqueue("plan-a", _document(1))
+    await asyncio.sleep(0.1)
+
+    assert len(container.batches) == 1
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_individual_upserts_when_batch_fails():
+    container = FakeContainer(fail_batches=True)
+    buffer = WriteBehindBuffer(container, max_batch_size=2, flush_interval=60)
+
+    await buffer.enqueue("plan-a", _document(1))
+    await buffer.enqueue("plan-a", _document(2))
+
+    assert [doc["id"] for doc in container.upserts] == ["doc-1", "doc-2"]
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_documents_are_retried_then_reported():
+    container = FakeContainer(fail_batches=True, fail_upserts=1)
+    buffer = WriteBehindBuffer(container, flush_interval=60, max_write_attempts=2)
+
+    await buffer.enqueue("plan-a", _document(1))
+    await buffer.flush()
+    # The failed document stays queued and is written by the next flush
+    assert buffer.queue_depth == 1
+    await buffer.flush()
+    assert [doc["id"] for doc in container.upserts] == ["doc-1"]
+    assert buffer.queue_depth == 0
+
+    container.fail_upserts = 2
+    await buffer.enqueue("plan-a", _document(2))
+    with pytest.raises(WriteBehindError) as error:
+        await buffer.close()
+    assert error.value.document_ids == ["doc-2"]
+    assert buffer.stats()["failed_documents"] == 1
+    assert buffer.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_producers_waiting_for_space_share_one_flush():
+    container = FakeContainer()
+    buffer = WriteBehindBuffer(
+        container, max_batch_size=10, flush_interval=60, max_queue_size=10
+    )
+    for index in range(9):
+        await buffer.enqueue(f"plan-{index}", _document(index, f"plan-{index}"))
+    await buffer.enqueue("plan-0", _document(9, "plan-0"))
+
+    flushes = {"running": 0, "most": 0}
+    flush_partition = buffer._flush_partition
+
+    async def tracked(partition_key):
+        flushes["running"] += 1
+        flushes["most"] = max(flushes["most"], flushes["running"])
+        await asyncio.sleep(0.01)
+        try:
+            await flush_partition(partition_key)
+        finally:
+            flushes["running"] -= 1
+
+    buffer._flush_partition = tracked
+    await asyncio.gather(
+        *(
+            buffer.enqueue("plan-x", _document(index, "plan-x"))
+            for index in range(10, 15)
+        )
+    )
+    await buffer.close()
+    assert flushes["most"] == 1
+    assert sum(len(documents) for _, documents in container.batches) == 15
+
+
+@pytest.mark.asyncio
+async def test_enqueue_after_close_is_rejected():
+    buffer = WriteBehindBuffer(FakeContainer())
+    await buffer.close()
+    with pytest.raises(RuntimeError):
+        await buffer.enqueue("plan-a", _document(1))
+
+
+@pytest.mark.asyncio
+async def test_reading_a_plan_flushes_only_its_buffered_messages():
+    database = InMemoryDBClient(
+        write_behind_enabled=True, write_behind_flush_interval=60.0
+    )
+    await database.initialize()
+    try:
+        views = [database.for_user(user_id) for user_id in ("user-1", "user-2")]
+        for index, view in enumerate(views):
+            await view.add_plan(
+                Plan(
+                    id=f"plan-{index}",
+                    plan_id=f"plan-{index}",
+                    session_id=f"session-{index}",
+                    user_id=view.user_id,
+                    initial_goal="goal",
+                )
+            )
+            message = AgentMessageData(
+                plan_id=f"plan-{index}",
+                session_id="",
+                user_id=view.user_id,
+                agent="Agent",
+                agent_type=AgentMessageType.AI_AGENT,
+                content="hello",
+                raw_data="{}",
+            )
+            await view.add_agent_message(message)
+            # The message is buffered into the plan's partition, not changed
+            assert message.session_id == ""
+        # A cold locator cache must not widen the flush to every user
+        views[0]._forget_plan_partition("plan-0")
+
+        messages = await views[0].get_agent_messages("plan-0")
+
+        assert [(m.content, m.session_id) for m in messages] == [
+            ("hello", "session-0")
+        ]
+        assert database.write_buffer.partitions_holding("plan_id", "plan-1")
+        assert not database.write_buffer.partitions_holding("plan_id", "plan-0")
+    finally:
+        await database.close()
@@ -0,0 +1,131 @@
+"""Tests for the per-user session context used to resolve the current team."""
+
+import os
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+# Add the backend path to sys.path so we can import common and v3 modules
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+MOCK_ENV_VARS = {
+    "APPLICATIONINSIGHTS_CONNECTION_STRING": "",
+    "AZURE_OPENAI_ENDPOINT": "https://mock-openai-endpoint.azure.com/",
+    "AZURE_AI_SUBSCRIPTION_ID": "00000000-0000-0000-0000-000000000000",
+    "AZURE_AI_RESOURCE_GROUP": "rg-test",
+    "AZURE_AI_PROJECT_NAME": "proj-test",
+    "AZURE_AI_AGENT_ENDPOINT": "https://agents.example.com/",
+}
+
+with patch.dict(os.environ, MOCK_ENV_VARS, clear=False):
+    from common.database.change_feed import ChangeEvent
+    from common.models.messages_kernel import (
+        DataType,
+        TeamConfiguration,
+        UserCurrentTeam,
+    )
+    from v3.common.services.team_service import TeamService
+    from v3.config.settings import team_config
+
+
+def _team(team_id="team-1"):
+    return TeamConfiguration(
+        id=team_id,
+        team_id=team_id,
+        session_id="session",
+        name="Team",
+        status="visible",
+        created="2025-01-01T00:00:00",
+        created_by="user",
+        user_id="user",
+    )
+
+
+def _memory_store(current_team_id="team-1"):
+    store = AsyncMock()
+    store.get_current_team.return_value = (
+        UserCurrentTeam(user_id="user-1", team_id=current_team_id)
+        if current_team_id
+        else None
+    )
+    store.get_team_by_id.return_value = _team(current_team_id or "team-1")
+    store.get_team.side_effect = lambda team_id: _team(team_id)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def _clear_sessions():
+    team_config.sessions.clear()
+    yield
+    team_config.sessions.clear()
+
+
+@pytest.mark.asyncio
+async def test_session_context_is_resolved_once():
+    store = _memory_store()
+    service = TeamService(store)
+
+    first = await service.get_session_context("user-1")
+    second = await service.get_session_context("user-1")
+
+    assert first.team_id == "team-1"
+    assert second is first
+    store.get_current_team.assert_awaited_once()
+    store.get_team_by_id.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_user_without_current_team_has_no_context():
+    service = TeamService(_memory_store(current_team_id=None))
+    assert await service.get_session_context("user-1") is None
+
+
+@pytest.mark.asyncio
+async def test_team_selection_updates_session_context():
+    store = _memory_store()
+    service = TeamService(store)
+    await service.get_session_context("user-1")
+
+    await service.handle_team_selection(user_id="user-1", team_id="team-2")
+
+    context = await service.get_session_context("user-1")
+    assert context.team_id == "team-2"
+    assert context.team.team_id == "team-2"
+    store.get_current_team.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_deleting_team_invalidates_sessions_using_it():
+    store = _memory_store()
+    store.delete_team.return_value = True
+    service = TeamService(store)
+    await service.get_session_context("user-1")
+
+    await service.delete_team_configuration("team-1", "user-1")
+
+    assert team_config.get_session_context("user-1") is None
+
+
+def test_change_events_clear_stale_session_contexts():
+    team_config.set_session_context(
+        "user-1", UserCurrentTeam(user_id="user-1", team_id="team-1"), _team()
+    )
+    team_config.set_session_context(
+        "user-2", UserCurrentTeam(user_id="user-2", team_id="team-2"), _team("team-2")
+    )
+
+    team_config.handle_change(
+        ChangeEvent(DataType.team_config, {"id": "team-1", "team_id": "team-1"})
+    )
+    assert team_config.get_session_context("user-1") is None
+    assert team_config.get_session_context("user-2") is not None
+
+    team_config.handle_change(
+        ChangeEvent(
+            DataType.user_current_team, {"user_id": "user-2", "team_id": "team-3"}
+        )
+    )
+    assert team_config.get_session_context("user-2") is None
@@ -6,6 +6,7 @@ from typing import Optional
 
 import v3.models.messages as messages
 from auth.auth_utils import get_authenticated_user_details
+from common.database.database_base import MessageCursor
 from common.database.database_factory import DatabaseFactory
 from common.models.messages_kernel import (
     InputTask,
@@ -38,6 +39,10 @@ from v3.orchestration.orchestration_manager import OrchestrationManager
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Plan history pagination limits for /plans
+DEFAULT_PLAN_PAGE_SIZE = 20
+MAX_PLAN_PAGE_SIZE = 100
+
 app_v3 = APIRouter(
     prefix="/api/v3",
     responses={404: {"description": "Not found"}},
@@ -117,31 +122,25 @@ async def init_team(
         # Initialize memory store and service
         memory_store = await DatabaseFactory.get_database(user_id=user_id)
         team_service = TeamService(memory_store)
-        user_current_team = await memory_store.get_current_team(user_id=user_id)
-        if not user_current_team:
+        session_context = await team_service.get_session_context(user_id)
+        if not session_context:
             print("User has no current team, setting to default:", init_team_id)
             user_current_team = await team_service.handle_team_selection(
                 user_id=user_id, team_id=init_team_id
             )
             if user_current_team:
                 init_team_id = user_current_team.team_id
+            session_context = team_config.get_session_context(user_id)
         else:
-            init_team_id = user_current_team.team_id
+            init_team_id = session_context.team_id
         # Verify the team exists and user has access to it
-        team_configuration = await team_service.get_team_configuration(
-            init_team_id, user_id
-        )
+        team_configuration = session_context.team if session_context else None
         if team_configuration is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Team configuration '{init_team_id}' not found or access denied",
             )
 
-        # Set as current team in memory
-        team_config.set_current_team(
-            user_id=user_id, team_configuration=team_configuration
-        )
-
         # Initialize agent team for this user session
         await OrchestrationManager.get_current_or_new_orchestration(
             user_id=user_id, team_config=team_configuration, team_switched=team_switched
@@ -253,11 +252,9 @@ async def process_request(
         plan_id = str(uuid.uuid4())
         # Initialize memory store and service
         memory_store = await DatabaseFactory.get_database(user_id=user_id)
-        user_current_team = await memory_store.get_current_team(user_id=user_id)
-        team_id = None
-        if user_current_team:
-            team_id = user_current_team.team_id
-        team = await memory_store.get_team_by_id(team_id=team_id)
+        session_context = await TeamService(memory_store).get_session_context(user_id)
+        team_id = session_context.team_id if session_context else None
+        team = session_context.team if session_context else None
         if not team:
             raise HTTPException(
                 status_code=404,
@@ -823,7 +820,10 @@ async def upload_team_config(
 
 
 @app_v3.get("/team_configs")
-async def get_team_configs(request: Request):
+async def get_team_configs(
+    request: Request,
+    view: str = Query("full", pattern="^(full|summary)$"),
+):
     """
     Retrieve all team configurations for the current user.
 
@@ -836,6 +836,13 @@ async def get_team_configs(request: Request):
         type: string
         required: true
         description: User ID extracted from the authentication header
+      - name: view
+        in: query
+        type: string
+        required: false
+        description: >
+          "summary" returns only list fields plus agent_count, leaving out
+          agents, starting_tasks and plan
     responses:
       200:
         description: List of team configurations for the user
@@ -882,6 +889,10 @@ async def get_team_configs(request: Request):
         memory_store = await DatabaseFactory.get_database(user_id=user_id)
         team_service = TeamService(memory_store)
 
+        if view == "summary":
+            summaries = await team_service.get_team_summaries()
+            return [summary.model_dump() for summary in summaries]
+
         # Retrieve all team configurations
         team_configs = await team_service.get_all_team_configurations()
 
@@ -1086,7 +1097,9 @@ async def select_team(selection: TeamSelectionRequest, request: Request):
                 detail=f"Team configuration '{selection.team_id}' not found or access denied",
             )
         set_team = await team_service.handle_team_selection(
-            user_id=user_id, team_id=selection.team_id
+            user_id=user_id,
+            team_id=selection.team_id,
+            team_configuration=team_configuration,
         )
         if not set_team:
             track_event_if_configured(
@@ -1103,11 +1116,6 @@ async def select_team(selection: TeamSelectionRequest, request: Request):
                 detail=f"Team configuration '{selection.team_id}' failed to set",
             )
 
-        # save to in-memory config for current user
-        team_config.set_current_team(
-            user_id=user_id, team_configuration=team_configuration
-        )
-
         # Track the team selection event
         track_event_if_configured(
             "Team selected",
@@ -1147,7 +1155,12 @@ async def select_team(selection: TeamSelectionRequest, request: Request):
 
 # Get plans is called in the initial side rendering of the frontend
 @app_v3.get("/plans")
-async def get_plans(request: Request):
+async def get_plans(
+    request: Request,
+    page_size: Optional[int] = Query(None, ge=1, le=MAX_PLAN_PAGE_SIZE),
+    page_token: Optional[str] = Query(None),
+    view: str = Query("full", pattern="^(full|summary)$"),
+):
     """
     Retrieve plans for the current user.
 
@@ -1160,9 +1173,28 @@ async def get_plans(request: Request):
         type: string
         required: false
         description: Optional session ID to retrieve plans for a specific session
+      - name: page_size
+        in: query
+        type: integer
+        required: false
+        description: Return one page of at most this many plans instead of the full list
+      - name: page_token
+        in: query
+        type: string
+        required: false
+        description: Continuation token returned as next_page_token by the previous page
+      - name: view
+        in: query
+        type: string
+        required: false
+        description: >
+          "summary" returns only the fields the history list renders, leaving
+          out m_plan and streaming_message
     responses:
       200:
-        description: List of plans with steps for the user
+        description: >
+          List of plans with steps for the user. When page_size or page_token is
+          given, an object with "plans" and "next_page_token" (null on the last page).
         schema:
           type: array
           items:
@@ -1219,22 +1251,95 @@ async def get_plans(request: Request):
     # Initialize memory context
     memory_store = await DatabaseFactory.get_database(user_id=user_id)
 
-    current_team = await memory_store.get_current_team(user_id=user_id)
-    if not current_team:
-        return []
+    session_context = await TeamService(memory_store).get_session_context(user_id)
+    paginate = page_size is not None or page_token is not None
+    if not session_context:
+        return {"plans": [], "next_page_token": None} if paginate else []
+
+    if view == "summary":
+        try:
+            summaries, next_page_token = (
+                await memory_store.get_plan_summaries_by_team_id_status(
+                    user_id=user_id,
+                    team_id=session_context.team_id,
+                    status=PlanStatus.completed,
+                    page_size=(page_size or DEFAULT_PLAN_PAGE_SIZE) if paginate else None,
+                    continuation_token=page_token,
+                )
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if paginate:
+            return {"plans": summaries, "next_page_token": next_page_token}
+        return summaries
+
+    if paginate:
+        try:
+            plans, next_page_token = await memory_store.get_plans_page_by_team_id_status(
+                user_id=user_id,
+                team_id=session_context.team_id,
+                status=PlanStatus.completed,
+                page_size=page_size or DEFAULT_PLAN_PAGE_SIZE,
+                continuation_token=page_token,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"plans": plans, "next_page_token": next_page_token}
 
     all_plans = await memory_store.get_all_plans_by_team_id_status(
-        user_id=user_id, team_id=current_team.team_id, status=PlanStatus.completed
+        user_id=user_id, team_id=session_context.team_id, status=PlanStatus.completed
     )
 
     return all_plans
 
 
+@app_v3.get("/plan_stats")
+async def get_plan_stats(request: Request):
+    """
+    Retrieve the number of plans of the current user per team and status.
+
+    ---
+    tags:
+      - Plans
+    responses:
+      200:
+        description: >
+          Plan counts, served from one document kept up to date as plans change
+        schema:
+          type: object
+          properties:
+            user_id:
+              type: string
+            teams:
+              type: object
+              description: >
+                Number of plans per status, keyed by team ID ("" for plans
+                without a team)
+            totals:
+              type: object
+              description: Number of plans per status across all teams
+      400:
+        description: Missing or invalid user information
+    """
+    authenticated_user = get_authenticated_user_details(request_headers=request.headers)
+    user_id = authenticated_user["user_principal_id"]
+    if not user_id:
+        track_event_if_configured(
+            "UserIdNotFound", {"status_code": 400, "detail": "no user"}
+        )
+        raise HTTPException(status_code=400, detail="no user")
+
+    memory_store = await DatabaseFactory.get_database(user_id=user_id)
+    stats = await memory_store.get_plan_stats(user_id)
+    return {"user_id": user_id, "teams": stats.teams, "totals": stats.totals}
+
+
 # Get plans is called in the initial side rendering of the frontend
 @app_v3.get("/plan")
 async def get_plan_by_id(
     request: Request,
     plan_id: Optional[str] = Query(None),
+    since: Optional[str] = Query(None),
 ):
     """
     Retrieve plans for the current user.
@@ -1248,6 +1353,13 @@ async def get_plan_by_id(
         type: string
         required: false
         description: Optional session ID to retrieve plans for a specific session
+      - name: since
+        in: query
+        type: string
+        required: false
+        description: >
+          messages_cursor of an earlier response; only the agent messages
+          written after it are returned in messages
     responses:
       200:
         description: List of plans with steps for the user
@@ -1304,22 +1416,32 @@ async def get_plan_by_id(
 
     # <To do: Francia> Replace the following with code to get plan run history from the database
 
+    try:
+        MessageCursor.decode(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Initialize memory context
     memory_store = await DatabaseFactory.get_database(user_id=user_id)
     try:
         if plan_id:
-            plan = await memory_store.get_plan_by_plan_id(plan_id=plan_id)
-            if not plan:
+            # Plan, team and messages are read concurrently
+            bundle = await memory_store.get_plan_bundle(plan_id=plan_id, since=since)
+            if not bundle:
                 track_event_if_configured(
                     "GetPlanBySessionNotFound",
                     {"status_code": 400, "detail": "Plan not found"},
                 )
                 raise HTTPException(status_code=404, detail="Plan not found")
 
-            # Use get_steps_by_plan to match the original implementation
-
-            team = await memory_store.get_team_by_id(team_id=plan.team_id)
-            agent_messages = await memory_store.get_agent_messages(plan_id=plan.plan_id)
+            plan, team, agent_messages = bundle.plan, bundle.team, bundle.messages
+            messages_cursor = bundle.messages_cursor
+            if plan.archive_key:
+                # Completed plans moved to cold storage keep only a stub
+                archive = await DatabaseFactory.get_plan_archive()
+                archived = await archive.load(plan.archive_key)
+                plan = archived.plan
+                agent_messages, messages_cursor = archived.messages_since(since)
             mplan = plan.m_plan if plan.m_plan else None
             streaming_message = plan.streaming_message if plan.streaming_message else ""
             plan.streaming_message = ""  # clear streaming message after retrieval
@@ -1328,6 +1450,7 @@ async def get_plan_by_id(
                 "plan": plan,
                 "team": team if team else None,
                 "messages": agent_messages,
+                "messages_cursor": messages_cursor,
                 "m_plan": mplan,
                 "streaming_message": streaming_message,
             }
@@ -3,6 +3,7 @@ import logging
 from dataclasses import asdict
 
 import v3.models.messages as messages
+from common.database.cosmos_patch import set_operation
 from common.database.database_factory import DatabaseFactory
 from common.models.messages_kernel import (
     AgentMessageData,
@@ -12,6 +13,7 @@ from common.models.messages_kernel import (
 )
 from common.utils.event_utils import track_event_if_configured
 from v3.config.settings import orchestration_config
+from v3.config.settings import team_config as session_store
 
 logger = logging.getLogger(__name__)
 
@@ -146,14 +148,29 @@ class PlanService:
                     orchestration_config.plans[human_feedback.m_plan_id],
                 )
                 if human_feedback.approved:
-                    plan = await memory_store.get_plan(human_feedback.plan_id)
                     mplan.plan_id = human_feedback.plan_id
-                    mplan.team_id = plan.team_id  # just to keep consistency
-                    orchestration_config.plans[human_feedback.m_plan_id] = mplan
+                    if not mplan.team_id:
+                        # The plan was created for the user's current team
+                        context = session_store.get_session_context(user_id)
+                        if context is not None:
+                            mplan.team_id = context.team_id
+                    # One patch request instead of reading and rewriting the plan
+                    plan = await memory_store.patch_plan(
+                        human_feedback.plan_id,
+                        [
+                            set_operation("/overall_status", PlanStatus.approved),
+                            set_operation("/m_plan", mplan.model_dump(mode="json")),
+                        ],
+                    )
+                    if plan and plan.team_id and plan.team_id != mplan.team_id:
+                        # Team unknown or changed since: correct the stored m_plan
+                        mplan.team_id = plan.team_id
+                        plan = await memory_store.patch_plan(
+                            human_feedback.plan_id,
+                            [set_operation("/m_plan/team_id", plan.team_id)],
+                        )
                     if plan:
-                        plan.overall_status = PlanStatus.approved
-                        plan.m_plan = mplan.model_dump()
-                        await memory_store.update_plan(plan)
+                        orchestration_config.plans[human_feedback.m_plan_id] = mplan
                         track_event_if_configured(
                             "PlanApproved",
                             {
@@ -208,10 +225,17 @@ class PlanService:
             memory_store = await DatabaseFactory.get_database(user_id=user_id)
             await memory_store.add_agent_message(agent_msg)
             if agent_message.is_final:
-                plan = await memory_store.get_plan(agent_msg.plan_id)
-                plan.streaming_message = agent_message.streaming_message
-                plan.overall_status = PlanStatus.completed
-                await memory_store.update_plan(plan)
+                # End of plan: persist any buffered messages before completing it
+                await memory_store.flush_pending_writes(agent_msg.plan_id)
+                await memory_store.patch_plan(
+                    agent_msg.plan_id,
+                    [
+                        set_operation(
+                            "/streaming_message", agent_message.streaming_message
+                        ),
+                        set_operation("/overall_status", PlanStatus.completed),
+                    ],
+                )
             return True
         except Exception as e:
             logger.exception(
@@ -15,9 +15,12 @@ from common.models.messages_kernel import (
     StartingTask,
     TeamAgent,
     TeamConfiguration,
+    TeamSummary,
     UserCurrentTeam,
 )
 from v3.common.services.foundry_service import FoundryService
+from v3.config.settings import UserSessionContext
+from v3.config.settings import team_config as session_store
 
 
 class TeamService:
@@ -176,6 +179,8 @@ class TeamService:
         try:
             # Use the specific add_team method from cosmos memory context
             await self.memory_context.add_team(team_config)
+            # Sessions holding an older version of this team must re-read it
+            session_store.invalidate_team(team_config.team_id)
 
             self.logger.info(
                 "Successfully saved team configuration with ID: %s", team_config.id
@@ -233,6 +238,7 @@ class TeamService:
         """
         try:
             await self.memory_context.delete_current_team(user_id)
+            session_store.clear_session_context(user_id)
             self.logger.info("Successfully deleted current team for user %s", user_id)
             return True
 
@@ -240,8 +246,43 @@ class TeamService:
             self.logger.error("Error deleting current team: %s", str(e))
             return False
 
+    async def get_session_context(self, user_id: str) -> Optional[UserSessionContext]:
+        """
+        Resolve the user's current team and its configuration.
+
+        Served from the in-process session context when available; otherwise the
+        current team selection and team configuration are read from the database
+        once and cached for subsequent requests.
+
+        Args:
+            user_id: User ID to resolve the current team for
+
+        Returns:
+            UserSessionContext, or None if the user has no current team. The
+            context's team is None when the selected team no longer exists.
+        """
+        context = session_store.get_session_context(user_id)
+        if context is not None:
+            return context
+
+        current_team = await self.memory_context.get_current_team(user_id=user_id)
+        if current_team is None:
+            return None
+        team_configuration = await self.memory_context.get_team_by_id(
+            team_id=current_team.team_id
+        )
+        if team_configuration is None:
+            # Not cached, so a re-uploaded team is picked up on the next request
+            return UserSessionContext(current_team=current_team, team=None)
+        return session_store.set_session_context(
+            user_id, current_team, team_configuration
+        )
+
     async def handle_team_selection(
-        self, user_id: str, team_id: str
+        self,
+        user_id: str,
+        team_id: str,
+        team_configuration: Optional[TeamConfiguration] = None,
     ) -> UserCurrentTeam:
         """
         Set a default team for a user.
@@ -249,6 +290,7 @@ class TeamService:
         Args:
             user_id: User ID to set the default team for
             team_id: Team ID to set as default
+            team_configuration: Already resolved configuration of the team, if any
 
         Returns:
             True if successful, False otherwise
@@ -261,10 +303,20 @@ class TeamService:
                 team_id=team_id,
             )
             await self.memory_context.set_current_team(current_team)
+
+            if team_configuration is None:
+                team_configuration = await self.memory_context.get_team(team_id)
+            if team_configuration is not None:
+                session_store.set_session_context(
+                    user_id, current_team, team_configuration
+                )
+            else:
+                session_store.clear_session_context(user_id)
             return current_team
 
         except Exception as e:
             self.logger.error("Error setting default team: %s", str(e))
+            session_store.clear_session_context(user_id)
             return None
 
     async def get_all_team_configurations(self) -> List[TeamConfiguration]:
@@ -286,6 +338,20 @@ class TeamService:
             self.logger.error("Error retrieving team configurations: %s", str(e))
             return []
 
+    async def get_team_summaries(self) -> List[TeamSummary]:
+        """
+        Retrieve lightweight summaries of all team configurations.
+
+        Returns:
+            List of TeamSummary objects
+        """
+        try:
+            return await self.memory_context.get_team_summaries()
+
+        except (KeyError, TypeError, ValueError) as e:
+            self.logger.error("Error retrieving team summaries: %s", str(e))
+            return []
+
     async def delete_team_configuration(self, team_id: str, user_id: str) -> bool:
         """
         Delete a team configuration by ID.
@@ -301,6 +367,7 @@ class TeamService:
             # First, verify the configuration exists and belongs to the user
             success = await self.memory_context.delete_team(team_id)
             if success:
+                session_store.invalidate_team(team_id)
                 self.logger.info("Successfully deleted team configuration: %s", team_id)
 
             return success
@@ -6,10 +6,13 @@ Handles Azure OpenAI, MCP, and environment setup.
 import asyncio
 import json
 import logging
+from dataclasses import dataclass
 from typing import Dict, Optional
 
 from common.config.app_config import config
-from common.models.messages_kernel import TeamConfiguration
+from common.database.cache import TTLCache
+from common.database.change_feed import ChangeEvent
+from common.models.messages_kernel import DataType, TeamConfiguration, UserCurrentTeam
 from fastapi import WebSocket
 from semantic_kernel.agents.orchestration.magentic import MagenticOrchestration
 from semantic_kernel.connectors.ai.open_ai import (
@@ -398,22 +401,95 @@ class ConnectionConfig:
             logger.warning("No connection found for process ID: %s", process_id)
 
 
+@dataclass
+class UserSessionContext:
+    """A user's current team selection together with its resolved configuration."""
+
+    current_team: UserCurrentTeam
+    team: Optional[TeamConfiguration]
+
+    @property
+    def team_id(self) -> str:
+        return self.current_team.team_id
+
+
 class TeamConfig:
-    """Team configuration for agents."""
+    """Per-user session context holding the current team of agents.
 
-    def __init__(self):
-        self.teams: Dict[str, TeamConfiguration] = {}
+    Contexts are bounded in number and expire after a period of inactivity, so
+    the hot request paths can resolve the current team without querying the
+    database while idle users are eventually re-read from it. Active users are
+    re-read too once their context reaches max_age, so a change the replica
+    missed does not outlive it.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        idle_timeout: float = 1800.0,
+        max_age: Optional[float] = 28800.0,
+    ):
+        self.sessions = TTLCache(
+            name="user_session",
+            max_entries=max_sessions,
+            ttl_seconds=idle_timeout,
+            sliding=True,
+            max_age_seconds=max_age,
+        )
+
+    def set_session_context(
+        self,
+        user_id: str,
+        current_team: UserCurrentTeam,
+        team_configuration: TeamConfiguration,
+    ) -> UserSessionContext:
+        """Store the user's current team selection and its configuration."""
+        context = UserSessionContext(
+            current_team=current_team, team=team_configuration
+        )
+        self.sessions.set(user_id, context)
+        return context
+
+    def get_session_context(self, user_id: str) -> Optional[UserSessionContext]:
+        """Get the user's session context, or None if unknown or expired."""
+        return self.sessions.get(user_id)
+
+    def clear_session_context(self, user_id: str) -> None:
+        """Forget the user's session context."""
+        self.sessions.invalidate(user_id)
+
+    def invalidate_team(self, team_id: str) -> None:
+        """Forget every session context that refers to the given team."""
+        for user_id, context in self.sessions.items():
+            if context.team_id == team_id:
+                self.sessions.invalidate(user_id)
+
+    def handle_change(self, event: ChangeEvent) -> None:
+        """Forget session contexts made stale by a change from another replica."""
+        if event.data_type == DataType.user_current_team and event.user_id:
+            self.clear_session_context(event.user_id)
+        elif event.data_type == DataType.team_config and event.team_id:
+            self.invalidate_team(event.team_id)
 
     def set_current_team(self, user_id: str, team_configuration: TeamConfiguration):
-        """Add a new team configuration."""
+        """Set the current team configuration for a user."""
 
         # To do: close current team of agents if any
 
-        self.teams[user_id] = team_configuration
+        context = self.sessions.get(user_id)
+        if context is not None and context.team_id == team_configuration.team_id:
+            context.team = team_configuration
+            return
+        self.set_session_context(
+            user_id,
+            UserCurrentTeam(user_id=user_id, team_id=team_configuration.team_id),
+            team_configuration,
+        )
 
-    def get_current_team(self, user_id: str) -> TeamConfiguration:
+    def get_current_team(self, user_id: str) -> Optional[TeamConfiguration]:
         """Get the current team configuration."""
-        return self.teams.get(user_id, None)
+        context = self.sessions.get(user_id)
+        return context.team if context else None
 
 
 # Global config instances
@@ -421,4 +497,8 @@ azure_config = AzureConfig()
 mcp_config = MCPConfig()
 orchestration_config = OrchestrationConfig()
 connection_config = ConnectionConfig()
-team_config = TeamConfig()
+team_config = TeamConfig(
+    max_sessions=config.USER_SESSION_MAX_ENTRIES,
+    idle_timeout=config.USER_SESSION_IDLE_SECONDS,
+    max_age=config.USER_SESSION_MAX_AGE_SECONDS or None,
+)